@@ -1,4 +1,3 @@
-import pandas as pd
 import plotly.express as px
 import streamlit as st
 
@@ -7,10 +6,13 @@ import utils
 
 # --- Page Configuration & Data Loading ---
 st.set_page_config(page_title="Real Estate IA - Dashboard", page_icon="🏠", layout="wide")
+# Streamlit runs each page on its own, so every page calls the startup hook (once per process).
+utils.startup()
 
 try:
     clients_df = utils.get_all_clients_df()
-    properties_df = utils.get_all_properties_df()
+    # Listing figures come from the maintained aggregates (see market_stats.py).
+    market = utils.get_market_stats()
 except Exception as e:
     st.error(f"Error loading data: {e}")
     st.stop()
@@ -18,37 +20,30 @@ except Exception as e:
 st.sidebar.header("Quick Jump")
 quick_jump_term = st.sidebar.text_input("Search clients or properties")
 if quick_jump_term:
-    jump_term = quick_jump_term.strip().lower()
-    client_matches = clients_df[
-        clients_df['name'].astype(str).str.contains(jump_term, case=False, na=False) |
-        clients_df['phone'].astype(str).str.contains(jump_term, case=False, na=False) |
-        clients_df['client_id'].astype(str).str.contains(jump_term, case=False, na=False)
-    ].head(5)
-    property_matches = properties_df[
-        properties_df['property_id'].astype(str).str.contains(jump_term, case=False, na=False) |
-        properties_df['arealocality'].astype(str).str.contains(jump_term, case=False, na=False) |
-        properties_df['propertytype'].astype(str).str.contains(jump_term, case=False, na=False)
-    ].head(5)
+    # Ranked prefix search over the FTS5 indexes (see text_search.py); a
+    # matching note leads to its client.
+    client_matches = utils.search_everything(quick_jump_term, limit=10, kinds=('client', 'note')).drop_duplicates('id').head(5)
+    property_matches = utils.search_everything(quick_jump_term, limit=5, kinds=('property',))
 
     if not client_matches.empty:
         st.sidebar.caption("Clients")
         for _, row in client_matches.iterrows():
             if st.sidebar.button(
-                f"Open {row['name']}",
-                key=f"jump_client_{row['client_id']}"
+                f"Open {row['label']}",
+                key=f"jump_client_{row['id']}",
+                help=row['detail'] if row['kind'] == 'note' else None
             ):
-                st.session_state.home_client_jump_id = row['client_id']
+                st.session_state.home_client_jump_id = row['id']
                 st.switch_page("pages/2_📈_Client_Management.py")
 
     if not property_matches.empty:
         st.sidebar.caption("Properties")
         for _, row in property_matches.iterrows():
-            label = f"{row.get('propertytype', 'Property')} · {row.get('arealocality', 'Unknown')}"
             if st.sidebar.button(
-                label,
-                key=f"jump_property_{row['property_id']}"
+                row['label'],
+                key=f"jump_property_{row['id']}"
             ):
-                st.session_state.home_property_jump_id = row['property_id']
+                st.session_state.home_property_jump_id = row['id']
                 st.switch_page("pages/3_🏘️_Property_Explorer.py")
 
 # --- Main Page UI ---
@@ -83,7 +78,7 @@ priority_col2.markdown(
     unsafe_allow_html=True,
 )
 priority_col3.markdown(
-    f"<div class='kpi-card'><div class='kpi-title'>Total Inventory</div><p class='kpi-value'>{len(properties_df)}</p></div>",
+    f"<div class='kpi-card'><div class='kpi-title'>Total Inventory</div><p class='kpi-value'>{market['total_listings']}</p></div>",
     unsafe_allow_html=True,
 )
 st.divider()
@@ -143,10 +138,8 @@ with st.form("search_form"):
     search_term = st.text_input("Search for a client by name or phone number:")
     if st.form_submit_button("Search") and search_term:
         if all(col in clients_df.columns for col in ['name', 'phone', 'status']):
-            search_results = clients_df[
-                clients_df['name'].str.contains(search_term, case=False, na=False) |
-                clients_df['phone'].astype(str).str.contains(search_term, na=False)
-            ]
+            matched_ids = utils.search_everything(search_term, limit=50, kinds=('client',))['id']
+            search_results = clients_df[clients_df['client_id'].isin(matched_ids)]
             if not search_results.empty:
                 st.dataframe(
                     search_results[['name', 'phone', 'status']],
@@ -154,7 +147,7 @@ with st.form("search_form"):
                     hide_index=True
                 )
             else:
-                st.info("No matching clients found. Try part of a phone number, or search by first name.")
+                st.info("No matching clients found. Try the start of a phone number, or search by first name.")
         else:
             st.error("Missing required columns for search.")
 st.divider()
@@ -162,7 +155,7 @@ st.divider()
 # --- At a Glance ---
 st.header("At a Glance")
 total_clients = len(clients_df)
-active_properties = len(properties_df)
+active_properties = market['total_listings']
 if 'lookingfor' in clients_df.columns:
     clients_for_sale = len(clients_df[clients_df['lookingfor'] == 'Sale'])
     clients_for_rent = len(clients_df[clients_df['lookingfor'] == 'Rent'])
@@ -192,26 +185,24 @@ with map_col:
         'Jesal Park': {'lat': 19.315, 'lon': 72.858},
         'Kanakia': {'lat': 19.292, 'lon': 72.879},
     }
-    if 'arealocality' in properties_df.columns:
-        properties_df['lat'] = properties_df['arealocality'].map(
-            lambda x: location_coords.get(x, {}).get('lat')
-        )
-        properties_df['lon'] = properties_df['arealocality'].map(
-            lambda x: location_coords.get(x, {}).get('lon')
-        )
-        map_df = properties_df.dropna(subset=['lat', 'lon'])
-        if not map_df.empty:
-            st.map(map_df, latitude='lat', longitude='lon', size=10)
-        else:
-            st.info("No mappable properties.")
+    map_df = market['listings_by_arealocality'].copy()
+    map_df['lat'] = map_df['arealocality'].map(lambda x: location_coords.get(x, {}).get('lat'))
+    map_df['lon'] = map_df['arealocality'].map(lambda x: location_coords.get(x, {}).get('lon'))
+    map_df = map_df.dropna(subset=['lat', 'lon'])
+    if not map_df.empty:
+        # One point per locality, its area growing with the number of listings.
+        map_df['size'] = 50 * map_df['listings'] ** 0.5
+        st.map(map_df, latitude='lat', longitude='lon', size='size')
     else:
-        st.error("Missing 'arealocality' column for mapping.")
+        st.info("No mappable properties.")
 with chart_col:
     st.subheader("📊 Property Type Distribution")
-    if 'propertytype' in properties_df.columns and not properties_df.empty:
+    property_types = market['listings_by_propertytype']
+    if not property_types.empty:
         fig = px.pie(
-            properties_df,
+            property_types,
             names='propertytype',
+            values='listings',
             title='Breakdown of Property Types',
             hole=.3,
             color_discrete_sequence=px.colors.sequential.RdBu
@@ -219,30 +210,19 @@ with chart_col:
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("No property type data available.")
-if 'listingdate' in properties_df.columns:
-    try:
-        properties_df['listing_month'] = pd.to_datetime(
-            properties_df['listingdate'], errors='coerce'
-        ).dt.to_period('M').astype(str)
-        monthly_counts = (
-            properties_df.groupby('listing_month')
-            .size()
-            .reset_index(name='count')
-            .sort_values('listing_month')
-        )
-        fig_line = px.line(
-            monthly_counts,
-            x='listing_month',
-            y='count',
-            title='Monthly Trend of New Listings',
-            markers=True
-        )
-        fig_line.update_layout(
-            xaxis_title='Month',
-            yaxis_title='Number of New Listings'
-        )
-        st.plotly_chart(fig_line, use_container_width=True)
-    except Exception as e:
-        st.warning(f"Error processing listing dates: {e}")
+monthly_counts = market['listings_by_month']
+if not monthly_counts.empty:
+    fig_line = px.line(
+        monthly_counts,
+        x='month',
+        y='listings',
+        title='Monthly Trend of New Listings',
+        markers=True
+    )
+    fig_line.update_layout(
+        xaxis_title='Month',
+        yaxis_title='Number of New Listings'
+    )
+    st.plotly_chart(fig_line, use_container_width=True)
 else:
-    st.info("No 'listingdate' column for trend analysis.")
\ No newline at end of file
+    st.info("No listing dates for trend analysis.")
\ No newline at end of file
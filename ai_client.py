@@ -0,0 +1,263 @@
+"""
+HTTP client for the chat-completions backend behind the assistant.
+
+``assistant_engine`` used to call bare ``requests.post`` for every turn: a new
+connection (and TLS handshake) each time, and a single 429 or 503 sent the
+user straight to the local reply. ``AIClient`` keeps:
+- one ``requests.Session`` with a bounded connection pool, so turns reuse
+  keep-alive connections;
+- at most ``max_concurrent`` requests in flight; a stream holds its slot
+  until it has been read to the end;
+- retries of connection errors, timeouts and ``RETRY_STATUSES`` responses,
+  with exponential backoff and full jitter (``Retry-After`` is honoured up
+  to ``backoff_max``);
+- a circuit breaker. After ``failure_threshold`` calls in a row fail
+  (retries included), calls raise ``CircuitOpenError`` at once for
+  ``reset_timeout`` seconds. Then one trial call is let through: success
+  closes the circuit, failure opens it again. A client error (400, 401,
+  404, ...) says nothing about the backend's health: it is counted under
+  ``client_errors`` and leaves the failure streak and circuit as they were.
+
+Streams are only retried before their first byte is handed out.
+``stats`` reports counters, the circuit state and latency histograms
+(request: time to the response; stream: time to the end of a stream).
+"""
+
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import AI_MAX_CONCURRENCY, AI_MAX_RETRIES, AI_TIMEOUT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0)
+
+
+class CircuitOpenError(RuntimeError):
+    """The backend failed repeatedly; calls are skipped until the circuit half-opens."""
+
+
+class LatencyHistogram:
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.total += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{bound:g}" for bound in self.bounds] + ["inf"]
+        count = sum(self.counts)
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": count,
+            "sum": round(self.total, 6),
+            "mean": round(self.total / count, 6) if count else 0.0,
+        }
+
+
+def is_backend_failure(exc: BaseException) -> bool:
+    """False for errors that say the request was wrong (400, 401, 404, ...) rather than the backend down."""
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        return status >= 500 or status in RETRY_STATUSES
+    return True
+
+
+def chat_completions_url(base_url: str) -> str:
+    base_url = base_url.rstrip("/")
+    return base_url if base_url.endswith("/chat/completions") else f"{base_url}/chat/completions"
+
+
+class AIClient:
+    """Pooled, retrying, circuit-broken client for one chat-completions endpoint."""
+
+    def __init__(self, base_url: str, api_key: str, timeout: float = AI_TIMEOUT_SECONDS,
+                 max_retries: int = AI_MAX_RETRIES, max_concurrent: int = AI_MAX_CONCURRENCY,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 jitter: Callable[[float, float], float] = random.uniform) -> None:
+        self.base_url = base_url
+        self.api_key = api_key
+        self.url = chat_completions_url(base_url)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._sleep = sleep
+        self._jitter = jitter
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrent)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"})
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._stats = {"requests": 0, "attempts": 0, "retries": 0, "successes": 0, "failures": 0,
+                       "client_errors": 0, "short_circuited": 0}
+        self._latency = {"request": LatencyHistogram(), "stream": LatencyHistogram()}
+
+    # --- Circuit breaker ---
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if self._clock() - self._opened_at >= self.reset_timeout else "open"
+
+    def _admit(self) -> None:
+        with self._lock:
+            self._stats["requests"] += 1
+            state = self._state()
+            if state == "closed":
+                return
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return
+            self._stats["short_circuited"] += 1
+        raise CircuitOpenError(f"AI backend circuit is open after {self._failures} failed calls")
+
+    def _record_error(self, exc: BaseException) -> None:
+        if is_backend_failure(exc):
+            self._record(False)
+            return
+        with self._lock:
+            # Frees a half-open trial slot without closing or reopening the circuit.
+            self._trial_running = False
+            self._stats["client_errors"] += 1
+
+    def _record(self, success: bool) -> None:
+        with self._lock:
+            self._trial_running = False
+            if success:
+                self._stats["successes"] += 1
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._stats["failures"] += 1
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("AI backend failed %d times in a row; skipping it for %.0f s",
+                                   self._failures, self.reset_timeout)
+                self._opened_at = self._clock()
+
+    # --- Requests ---
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None:
+            try:
+                return min(max(float(retry_after), 0.0), self.backoff_max)
+            except ValueError:
+                pass
+        return self._jitter(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _send(self, body: Dict[str, Any], stream: bool) -> requests.Response:
+        """POSTs ``body``, retrying transient failures; returns a 2xx response or raises."""
+        attempt = 0
+        while True:
+            response = None
+            error: Optional[Exception] = None
+            start = self._clock()
+            with self._lock:
+                self._stats["attempts"] += 1
+            try:
+                response = self._session.post(self.url, json=body, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                error = exc
+            finally:
+                with self._lock:
+                    self._latency["request"].observe(self._clock() - start)
+            if response is not None and response.status_code < 400:
+                return response
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                response.close()
+                response.raise_for_status()
+            if attempt >= self.max_retries:
+                if response is not None:
+                    response.close()
+                    response.raise_for_status()
+                raise error
+            delay = self._backoff(attempt, response)
+            logger.info("AI backend %s; retrying in %.2f s",
+                        f"returned {response.status_code}" if response is not None else f"unreachable ({error})", delay)
+            if response is not None:
+                response.close()
+            with self._lock:
+                self._stats["retries"] += 1
+            self._sleep(delay)
+            attempt += 1
+
+    def complete(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """The decoded JSON reply to a chat-completions ``body``."""
+        self._admit()
+        with self._slots:
+            try:
+                response = self._send(body, stream=False)
+                data = response.json()
+            except Exception as exc:
+                self._record_error(exc)
+                raise
+        self._record(True)
+        return data
+
+    def stream_lines(self, body: Dict[str, Any]) -> Iterator[str]:
+        """The decoded lines of a streamed (``"stream": true``) reply, as they arrive."""
+        self._admit()
+        start = self._clock()
+        with self._slots:
+            try:
+                response = self._send({**body, "stream": True}, stream=True)
+            except Exception as exc:
+                self._record_error(exc)
+                with self._lock:
+                    self._latency["stream"].observe(self._clock() - start)
+                raise
+            success = False
+            try:
+                with response:
+                    # chunk_size=None hands over each chunk as it arrives instead of filling
+                    # 512-byte reads first. Lines are decoded here: SSE is UTF-8, while requests
+                    # assumes ISO-8859-1 for text/* without a charset.
+                    for raw in response.iter_lines(chunk_size=None):
+                        yield raw.decode("utf-8")
+                success = True
+            except GeneratorExit:
+                # The caller stopped reading (e.g. at [DONE]); the backend did its part.
+                success = True
+                raise
+            finally:
+                self._record(success)
+                with self._lock:
+                    self._latency["stream"].observe(self._clock() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["state"] = self._state()
+            stats["consecutive_failures"] = self._failures
+            stats["latency"] = {name: histogram.snapshot() for name, histogram in self._latency.items()}
+            return stats
+
+    def close(self) -> None:
+        self._session.close()
@@ -0,0 +1,120 @@
+"""
+Amenity bitmasks: each property's amenities as one integer over a fixed registry.
+
+``AMENITY_REGISTRY`` assigns every filterable amenity a bit (append-only: a
+name's position is its bit). ``parse_mask`` turns a comma-separated amenities
+field into that integer; the write helpers store it in ``properties.amenity_mask``
+when a property is written or imported, so filters never re-parse text.
+
+"Has all of these amenities" is then ``(mask & wanted) == wanted``: a residual
+SQL predicate covered by the search indexes, or, for amenity-only searches, one
+vectorized NumPy expression over an ``AmenityIndex`` of every property's mask.
+"""
+
+import functools
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+import db
+
+MASK_COLUMN = "amenity_mask"
+AMENITY_REGISTRY = (
+    'Swimming Pool', 'Gymnasium', '24x7 Security', 'Clubhouse',
+    'Reserved Parking', 'Power Backup', 'Elevator', 'Garden',
+)
+AMENITY_BITS = {name: 1 << bit for bit, name in enumerate(AMENITY_REGISTRY)}
+
+_lock = threading.Lock()
+_indexes: Dict[str, "AmenityIndex"] = {}
+
+
+def parse_amenities(text: Any) -> List[str]:
+    """Amenity names in a comma-separated amenities field, stripped and de-duplicated."""
+    if text is None or (isinstance(text, float) and math.isnan(text)):
+        return []
+    return list(dict.fromkeys(part.strip() for part in str(text).split(',') if part.strip()))
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_mask(text: str) -> int:
+    mask = 0
+    for name in parse_amenities(text):
+        mask |= AMENITY_BITS.get(name, 0)
+    return mask
+
+
+def parse_mask(text: Any) -> int:
+    """Bitmask of the registered amenities named in ``text`` (unknown names are ignored)."""
+    if text is None or (isinstance(text, float) and math.isnan(text)):
+        return 0
+    return _parse_mask(str(text))
+
+
+def masks_for(amenities: pd.Series) -> np.ndarray:
+    """``parse_mask`` over a Series (each distinct text is parsed once)."""
+    codes, uniques = pd.factorize(amenities, use_na_sentinel=True)
+    unique_masks = np.fromiter((parse_mask(text) for text in uniques), dtype=np.int64, count=len(uniques))
+    return np.where(codes >= 0, unique_masks[codes], 0).astype(np.int64)
+
+
+def names_of(mask: int) -> Tuple[str, ...]:
+    """Registered amenity names whose bits are set in ``mask``, in registry order."""
+    return tuple(name for name, bit in AMENITY_BITS.items() if mask & bit)
+
+
+def wanted_mask(names: Iterable[str]) -> Optional[int]:
+    """Mask requiring every name, or None if one is not in the registry."""
+    mask = 0
+    for name in names:
+        bit = AMENITY_BITS.get(name)
+        if bit is None:
+            return None
+        mask |= bit
+    return mask
+
+
+def matches(masks: np.ndarray, wanted: int) -> np.ndarray:
+    """Boolean array: which masks contain every bit of ``wanted``."""
+    wanted = np.int64(wanted)
+    return (masks & wanted) == wanted
+
+
+class AmenityIndex:
+    """Every property's rowid and amenity mask, for amenity-only filtering in NumPy."""
+
+    def __init__(self, rowids: np.ndarray, masks: np.ndarray, version: Optional[int] = None) -> None:
+        self.rowids = rowids
+        self.masks = masks
+        self.version = version
+
+    def select(self, wanted: int) -> np.ndarray:
+        """Rowids (ascending) of properties having every amenity in ``wanted``."""
+        return self.rowids[matches(self.masks, wanted)]
+
+
+def _load(db_path: str, version: int) -> AmenityIndex:
+    with db.connection(db_path) as conn:
+        rows = conn.execute(f"SELECT rowid, COALESCE({MASK_COLUMN}, 0) FROM properties ORDER BY rowid").fetchall()
+    data = np.array(rows, dtype=np.int64).reshape(-1, 2)
+    return AmenityIndex(data[:, 0].copy(), data[:, 1].copy(), version)
+
+
+def get_index(db_path: str) -> AmenityIndex:
+    """The ``AmenityIndex`` for ``db_path``, reloaded when the data version moves."""
+    db_path = str(db_path)
+    with _lock:
+        version = data_cache.data_version(db_path)
+        index = _indexes.get(db_path)
+        if index is None or index.version != version:
+            index = _indexes[db_path] = _load(db_path, version)
+        return index
+
+
+def clear() -> None:
+    with _lock:
+        _indexes.clear()
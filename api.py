@@ -1,22 +1,54 @@
+import itertools
+import json
+import math
 import re
-import sqlite3
 import logging
+from contextlib import asynccontextmanager
 from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field, field_validator
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
+import assistant_engine
+import client_requirements
+import data_cache
+import db
+import lead_scoring
+import market_stats
+import pricing
+import property_search
+import recommendation_index
+import text_search
+import typed_frames
+import utils
 from config import DB_FILE_PATH
 
 logger = logging.getLogger(__name__)
 
-api_app = FastAPI(title="Real Estate API")
+# NDJSON lines produced per trip to a reader thread in /recommendations/batch.
+BATCH_STREAM_LINES = 256
+# Keyset pagination for the /clients and /properties listings.
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_ROWS = 1000
+MAX_ESTIMATE_BATCH = 10000
+# Ids per "property_id IN (...)" query, under SQLite's default variable limit.
+ESTIMATE_QUERY_CHUNK = 900
+CLIENT_SUMMARY_FIELDS = ['client_id', 'name']
 
 
-class ClientSummary(BaseModel):
-    client_id: str
-    name: str
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema migrations, then the background price-score refresh; importing utils does neither.
+    await db.run_write(utils.startup, DB_FILE_PATH)
+    yield
+    db.shutdown_executor()
+
+
+api_app = FastAPI(title="Real Estate API", lifespan=lifespan)
 
 
 class RecommendationResponse(BaseModel):
@@ -30,6 +62,22 @@ class MessageResponse(BaseModel):
     client_id: str
 
 
+class BatchRecommendationRequest(BaseModel):
+    client_ids: Optional[List[str]] = None
+
+
+class PropertyFeatures(BaseModel):
+    arealocality: Optional[str] = None
+    propertytype: Optional[str] = None
+    bedroomsbhk: Optional[str] = None
+    areasqft: Optional[float] = Field(None, gt=0)
+
+
+class EstimateBatchRequest(BaseModel):
+    property_ids: List[str] = Field(default_factory=list, max_length=MAX_ESTIMATE_BATCH)
+    properties: List[PropertyFeatures] = Field(default_factory=list, max_length=MAX_ESTIMATE_BATCH)
+
+
 class ClientUpdate(BaseModel):
     name: str
     phone: str = Field(pattern=r"^\+?\d{10,15}$")
@@ -46,6 +94,12 @@ class ClientUpdate(BaseModel):
         return value
 
 
+class ChatRequest(BaseModel):
+    query: str = Field(min_length=1)
+    selected_client_id: Optional[str] = None
+    selected_property_id: Optional[str] = None
+
+
 class ClientCreate(BaseModel):
     name: str
     phone: str = Field(pattern=r"^\+?\d{10,15}$")
@@ -62,122 +116,466 @@ class ClientCreate(BaseModel):
 
 
 @api_app.get("/")
-def read_root():
+async def read_root():
     return {"status": "ok", "message": "API is running"}
 
 
-@api_app.get("/clients", response_model=List[ClientSummary])
-def get_all_clients():
-    try:
-        with sqlite3.connect(DB_FILE_PATH) as conn:
-            return pd.read_sql("SELECT client_id, name FROM clients", conn).to_dict(orient='records')
-    except Exception as e:
-        logger.exception("Failed to fetch clients")
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+@api_app.get("/stats/db-pool", response_model=Dict[str, Any])
+async def get_db_pool_stats():
+    return {**db.pool_stats(), "executor": db.executor_stats()}
 
 
-@api_app.get("/clients/{client_id}", response_model=Dict[str, Any])
-def get_client_details(client_id: str):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
-        client_details = pd.read_sql(
-            "SELECT * FROM clients WHERE client_id = ?",
-            conn,
-            params=(client_id,)
-        )
-        if client_details.empty:
-            raise HTTPException(status_code=404, detail="Client not found")
-        return client_details.iloc[0].to_dict()
+@api_app.get("/stats/cache", response_model=Dict[str, Any])
+async def get_cache_stats():
+    return data_cache.cache_stats()
 
 
-@api_app.post("/clients", response_model=MessageResponse)
-def create_client(client: ClientCreate):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+@api_app.get("/stats/ai-cache", response_model=Dict[str, Any])
+async def get_ai_cache_stats():
+    return assistant_engine.ai_cache_stats()
+
+
+@api_app.get("/stats/ai-client", response_model=Dict[str, Any])
+async def get_ai_client_stats():
+    return assistant_engine.ai_client_stats()
+
+
+# Blocking database work below runs on db's reader/writer threads; the async
+# handlers only validate, dispatch and map errors.
+
+def _fetch_client(db_path: str, client_id: str) -> Optional[pd.Series]:
+    with db.connection(db_path) as conn:
+        client_details = pd.read_sql("SELECT * FROM clients WHERE client_id = ?", conn, params=(client_id,))
+    return None if client_details.empty else client_details.iloc[0]
+
+
+def _table_columns(db_path: str, table: str) -> List[str]:
+    with db.connection(db_path) as conn:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _projection(db_path: str, table: str, key: str, fields: Optional[str], default: Optional[List[str]]) -> List[str]:
+    """Columns to select: the requested ``fields`` (validated against the table) or ``default``, key first."""
+    columns = _table_columns(db_path, table)
+    if fields:
+        requested = list(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
+        unknown = [field for field in requested if field not in columns]
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown)}")
+    else:
+        requested = default or columns
+    return [key] + [column for column in requested if column != key]
+
+
+def _fetch_page(db_path: str, table: str, key: str, columns: List[str], where: List[str], params: List[Any],
+                after: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """Up to ``limit`` rows with ``key`` greater than ``after``, in key order (index range scan)."""
+    clauses = [f'"{key}" IS NOT NULL', *where]
+    args = list(params)
+    if after is not None:
+        clauses.append(f'"{key}" > ?')
+        args.append(after)
+    select = ", ".join(f'"{column}"' for column in columns)
+    query = f'SELECT {select} FROM {table} WHERE {" AND ".join(clauses)} ORDER BY "{key}" LIMIT ?'
+    with db.connection(db_path) as conn:
+        cursor = conn.execute(query, (*args, limit))
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+
+async def _list_rows(response: Response, table: str, key: str, where: List[str], params: List[Any],
+                     after: Optional[str], limit: int, fields: Optional[str], default_fields: Optional[List[str]],
+                     output_format: str):
+    """One keyset page as a JSON list (next cursor in ``X-Next-Cursor``), or every row after ``after`` as NDJSON."""
+    db_path = DB_FILE_PATH
+    columns = await db.run_read(_projection, db_path, table, key, fields, default_fields)
+    if output_format == "ndjson":
+        async def stream():
+            cursor = after
+            while True:
+                rows = await db.run_read(_fetch_page, db_path, table, key, columns, where, params, cursor, EXPORT_CHUNK_ROWS)
+                if rows:
+                    yield "".join(json.dumps(row, default=str) + "\n" for row in rows)
+                if len(rows) < EXPORT_CHUNK_ROWS:
+                    return
+                cursor = rows[-1][key]
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    rows = await db.run_read(_fetch_page, db_path, table, key, columns, where, params, after, limit + 1)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1][key])
+    return rows
+
+
+def _load_properties(db_path: str) -> pd.DataFrame:
+    with db.connection(db_path) as conn:
+        properties_df = typed_frames.read_properties(conn)
+    properties_df['bhk'] = recommendation_index.bhk_numbers(properties_df['bedroomsbhk']).astype(int)
+    return properties_df
+
+
+def _insert_client(db_path: str, client: ClientCreate) -> str:
+    with db.connection(db_path) as conn:
         cursor = conn.cursor()
         last_id_row = cursor.execute("SELECT client_id FROM clients ORDER BY CAST(SUBSTR(client_id, 4) AS INTEGER) DESC LIMIT 1").fetchone()
         last_id = int(last_id_row[0].split('-')[1]) if last_id_row else 1000
         new_client_id = f"CL-{last_id + 1}"
         cursor.execute("INSERT INTO clients (client_id, name, phone, email, lookingfor, requirements, status) VALUES (?, ?, ?, ?, ?, ?, ?)", (new_client_id, client.name, client.phone, client.email, client.looking_for, client.requirements, "New"))
+        client_requirements.store(conn, new_client_id, client.requirements)
+        lead_scoring.rescore(conn, [new_client_id])
+        market_stats.add_clients(conn, [new_client_id])
         conn.commit()
-        return {"message": "Client added successfully!", "client_id": new_client_id}
+    data_cache.bump_version(db_path)
+    return new_client_id
 
 
-@api_app.put("/clients/{client_id}", response_model=MessageResponse)
-def update_client(client_id: str, client: ClientUpdate):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+def _update_client(db_path: str, client_id: str, client: ClientUpdate) -> int:
+    with db.connection(db_path) as conn:
         cursor = conn.cursor()
+        market_stats.remove_clients(conn, [client_id])
         cursor.execute("UPDATE clients SET name=?, phone=?, email=?, lookingfor=?, requirements=?, status=? WHERE client_id=?", (client.name, client.phone, client.email, client.looking_for, client.requirements, client.status, client_id))
+        updated = cursor.rowcount
+        if updated:
+            client_requirements.store(conn, client_id, client.requirements)
+            lead_scoring.rescore(conn, [client_id])
+        market_stats.add_clients(conn, [client_id])
         conn.commit()
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Client not found")
-        return {"message": "Client updated successfully!", "client_id": client_id}
+    if updated:
+        data_cache.bump_version(db_path)
+    return updated
 
 
-@api_app.delete("/clients/{client_id}", response_model=MessageResponse)
-def delete_client(client_id: str):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+def _delete_client(db_path: str, client_id: str) -> int:
+    with db.connection(db_path) as conn:
         cursor = conn.cursor()
+        market_stats.remove_clients(conn, [client_id])
         cursor.execute("DELETE FROM clients WHERE client_id = ?", (client_id,))
+        deleted = cursor.rowcount
+        client_requirements.delete(conn, client_id)
+        lead_scoring.rescore(conn, [client_id])
         conn.commit()
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Client not found")
-        return {"message": "Client deleted successfully!", "client_id": client_id}
+    if deleted:
+        data_cache.bump_version(db_path)
+    return deleted
 
 
-@api_app.get("/recommendations/{client_id}", response_model=RecommendationResponse)
-def get_recommendations_for_client(client_id: str):
-    try:
-        with sqlite3.connect(DB_FILE_PATH) as conn:
-            clients_df = pd.read_sql(
-                "SELECT * FROM clients WHERE client_id = ?",
-                conn,
-                params=(client_id,)
-            )
-            properties_df = pd.read_sql("SELECT * FROM properties", conn)
+def _recommend(db_path: str, client_id: str, sort: str = "match") -> Dict[str, Any]:
+    with db.connection(db_path) as conn:
+        clients_df = pd.read_sql("SELECT * FROM clients WHERE client_id = ?", conn, params=(client_id,))
         if clients_df.empty:
             raise HTTPException(status_code=404, detail="Client not found.")
         client_data = clients_df.iloc[0]
-        properties_df['bhk'] = properties_df['bedroomsbhk'].astype(str).str.extract(r'(\d+)').fillna(0).astype(int)
-        def find_budget(text):
-            match = re.search(r'Budget[^\d]*([\d,]+)L?', str(text), re.IGNORECASE)
-            if match:
-                return int(match.group(1).replace(',', '')) * 100000
-            match_rent = re.search(r'Rent[^\d]*([\d,]+)', str(text), re.IGNORECASE)
-            if match_rent:
-                return int(match_rent.group(1).replace(',', ''))
-            return 0
-        def find_location(text):
-            match = re.search(r'\bin\s+([\w\s]+)', str(text), re.IGNORECASE)
-            if match:
-                loc = match.group(1).strip()
-                return 'Any' if 'anywhere' in loc.lower() else loc
-            return 'Any'
-        req_budget = find_budget(client_data['requirements'])
-        req_locality = find_location(client_data['requirements'])
-        # Safely extract BHK, default to 0 if not found
-        bhk_match = re.search(r'(\d+)\s*BHK', str(client_data['requirements']))
-        req_bhk = int(bhk_match.group(1)) if bhk_match else 0
-        matches = properties_df[properties_df['listingtype'].str.lower() == client_data['lookingfor'].lower()]
-        matches = matches[matches['bhk'] >= req_bhk]
-        budget_ceil = req_budget * 1.10
-        if client_data['lookingfor'].lower() == 'sale':
-            matches = matches[matches['askingprice'] <= budget_ceil]
-        else:
-            matches = matches[matches['monthlyrent'] <= budget_ceil]
-        final_matches = pd.DataFrame()
-        if req_locality != 'Any':
-            strict_matches = matches[matches['arealocality'].str.contains(req_locality, case=False)]
-            if not strict_matches.empty:
-                final_matches = strict_matches
-        message = "Perfect matches found."
-        if final_matches.empty:
-            message = "No exact location match. Showing best matches from other areas."
-            final_matches = matches
-        if final_matches.empty:
-            return {"message": "No suitable properties found.", "recommendations": []}
-        results = final_matches.head(5).to_dict(orient='records')
-        return {"message": message, "client_details": client_data.to_dict(), "recommendations": results}
+        requirements = client_requirements.for_client(conn, client_id, client_data['requirements'])
+    properties_df = data_cache.get_frame(db_path, "api_properties", lambda: _load_properties(db_path))
+    req_budget, req_bhk, req_locality = requirements.budget, requirements.bhk, requirements.location
+    matches = properties_df[properties_df['listingtype'].str.lower() == client_data['lookingfor'].lower()]
+    matches = matches[matches['bhk'] >= req_bhk]
+    budget_ceil = req_budget * 1.10
+    if client_data['lookingfor'].lower() == 'sale':
+        matches = matches[matches['askingprice'] <= budget_ceil]
+    else:
+        matches = matches[matches['monthlyrent'] <= budget_ceil]
+    final_matches = pd.DataFrame()
+    if req_locality != 'Any':
+        strict_matches = matches[matches['arealocality'].str.contains(req_locality, case=False)]
+        if not strict_matches.empty:
+            final_matches = strict_matches
+    message = "Perfect matches found."
+    if final_matches.empty:
+        message = "No exact location match. Showing best matches from other areas."
+        final_matches = matches
+    if final_matches.empty:
+        return {"message": "No suitable properties found.", "recommendations": []}
+    if sort == "value" and recommendation_index.VALUE_COLUMN in final_matches.columns:
+        final_matches = final_matches.iloc[recommendation_index.value_order(final_matches[recommendation_index.VALUE_COLUMN])]
+    results = typed_frames.to_records(final_matches.head(5))
+    return {"message": message, "client_details": client_data.to_dict(), "recommendations": results}
+
+
+@api_app.get("/clients")
+async def get_all_clients(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    status: Optional[str] = None,
+    lookingfor: Optional[str] = None,
+    output_format: Literal["json", "ndjson"] = Query("json", alias="format"),
+):
+    """Clients in ``client_id`` order, ``limit`` per page; pass ``X-Next-Cursor`` back as ``after``."""
+    where, params = [], []
+    for column, value in (('status', status), ('lookingfor', lookingfor)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    try:
+        return await _list_rows(response, "clients", "client_id", where, params, after, limit, fields,
+                                CLIENT_SUMMARY_FIELDS, output_format)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Failed to fetch clients")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@api_app.get("/properties")
+async def get_properties(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    listingtype: Optional[Literal["Sale", "Rent"]] = None,
+    propertytype: Optional[str] = None,
+    locality: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    amenities: List[str] = Query(default_factory=list),
+    output_format: Literal["json", "ndjson"] = Query("json", alias="format"),
+):
+    """Properties in ``property_id`` order with the Property Explorer's filters.
+
+    The price range applies to the asking price for Sale and the monthly rent
+    for Rent, so it needs ``listingtype``; every listed amenity must be one of
+    the property's comma-separated amenities.
+    """
+    if (min_price is not None or max_price is not None) and listingtype is None:
+        raise HTTPException(status_code=422, detail="min_price/max_price need a listingtype")
+    filters = property_search.PropertyFilters(listingtype, propertytype, locality, min_price, max_price, tuple(amenities))
+    try:
+        where, params = await db.run_read(property_search.PropertySearch(DB_FILE_PATH).plan, filters)
+        return await _list_rows(response, "properties", "property_id", where, params, after, limit, fields,
+                                None, output_format)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Failed to fetch properties")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@api_app.get("/search")
+async def search_everything(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(text_search.SEARCH_LIMIT, ge=1, le=100),
+    kind: List[Literal["client", "property", "note"]] = Query(default_factory=list),
+):
+    """Ranked prefix search over clients, properties and communication-log notes.
+
+    Each hit is ``{kind, id, label, detail, rank}``; ``id`` is a client_id for
+    client and note hits. ``kind`` may be repeated to restrict the sources.
+    """
+    try:
+        results = await db.run_read(text_search.search, DB_FILE_PATH, q, limit, kind or None)
+    except Exception as e:
+        logger.exception("Search failed for q=%r", q)
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return [_json_safe(row) for row in results.to_dict(orient="records")]
+
+
+async def _market_rows(reader, *args) -> List[Dict[str, Any]]:
+    try:
+        frame = await db.run_read(market_stats.read, DB_FILE_PATH, reader, *args)
+    except Exception as e:
+        logger.exception("Failed to read market stats")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return [_json_safe(row) for row in frame.to_dict(orient="records")]
+
+
+@api_app.get("/market/price-per-sqft")
+async def get_market_price_per_sqft():
+    """Average sale price per sq.ft by locality, highest first."""
+    return await _market_rows(market_stats.price_per_sqft)
+
+
+@api_app.get("/market/bhk-demand")
+async def get_market_bhk_demand():
+    """Clients per requested BHK, most requested first."""
+    return await _market_rows(market_stats.bhk_demand)
+
+
+@api_app.get("/market/listings")
+async def get_market_listings(by: Literal["month", "propertytype", "arealocality", "listingtype"] = "month"):
+    """Listing counts per month (in order) or per property type, locality or listing type (largest first)."""
+    return await _market_rows(market_stats.listing_counts, by)
+
+
+@api_app.get("/market/days-on-market")
+async def get_market_days_on_market():
+    """Listings per listing age in days, youngest first."""
+    return await _market_rows(market_stats.days_on_market)
+
+
+@api_app.get("/clients/{client_id}", response_model=Dict[str, Any])
+async def get_client_details(client_id: str):
+    client_details = await db.run_read(_fetch_client, DB_FILE_PATH, client_id)
+    if client_details is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+    return client_details.to_dict()
+
+
+@api_app.post("/clients", response_model=MessageResponse)
+async def create_client(client: ClientCreate):
+    new_client_id = await db.run_write(_insert_client, DB_FILE_PATH, client)
+    return {"message": "Client added successfully!", "client_id": new_client_id}
+
+
+@api_app.put("/clients/{client_id}", response_model=MessageResponse)
+async def update_client(client_id: str, client: ClientUpdate):
+    if not await db.run_write(_update_client, DB_FILE_PATH, client_id, client):
+        raise HTTPException(status_code=404, detail="Client not found")
+    return {"message": "Client updated successfully!", "client_id": client_id}
+
+
+@api_app.delete("/clients/{client_id}", response_model=MessageResponse)
+async def delete_client(client_id: str):
+    if not await db.run_write(_delete_client, DB_FILE_PATH, client_id):
+        raise HTTPException(status_code=404, detail="Client not found")
+    return {"message": "Client deleted successfully!", "client_id": client_id}
+
+
+@api_app.get("/recommendations/{client_id}", response_model=RecommendationResponse)
+async def get_recommendations_for_client(client_id: str, sort: Literal["match", "value"] = "match"):
+    """``sort=value`` lists the most underpriced matches (stored ``price_gap_pct``) first."""
+    try:
+        return await db.run_read(_recommend, DB_FILE_PATH, client_id, sort)
     except HTTPException:
         raise
     except Exception as e:
         logger.exception("Failed generating recommendations for client_id=%s", client_id)
-        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+
+
+ESTIMATE_COLUMNS = ['property_id', 'listingtype', 'askingprice', *pricing.SOURCE_COLUMNS]
+
+
+def _estimate_properties(db_path: str, property_ids: List[str]) -> List[Dict[str, Any]]:
+    """One ``{property_id, ..., estimated_price}`` per known id, in request order."""
+    unique_ids = list(dict.fromkeys(property_ids))
+    with db.connection(db_path) as conn:
+        available = set(typed_frames.property_columns(conn))
+        frames = [
+            typed_frames.read_properties(
+                conn, where_sql=f" WHERE property_id IN ({', '.join('?' * len(chunk))})", params=chunk,
+                columns=[column for column in ESTIMATE_COLUMNS if column in available],
+            )
+            for chunk in (unique_ids[start:start + ESTIMATE_QUERY_CHUNK]
+                          for start in range(0, len(unique_ids), ESTIMATE_QUERY_CHUNK))
+        ]
+    properties = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['property_id'])
+    properties['estimated_price'] = pricing.predict_prices(properties).round(0)
+    by_id = {row['property_id']: row for row in typed_frames.to_records(properties)}
+    return [_json_safe(by_id[property_id]) for property_id in property_ids if property_id in by_id]
+
+
+def _estimate_features(properties: List[PropertyFeatures]) -> List[Dict[str, Any]]:
+    frame = pd.DataFrame([item.model_dump() for item in properties], columns=list(pricing.SOURCE_COLUMNS))
+    frame['estimated_price'] = pricing.predict_prices(frame).round(0)
+    return [_json_safe(row) for row in frame.to_dict(orient="records")]
+
+
+async def _run_estimate(func, *args) -> List[Dict[str, Any]]:
+    try:
+        return await db.run_read(func, *args)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.exception("Failed estimating prices")
+        raise HTTPException(status_code=500, detail=f"Error estimating prices: {str(e)}")
+
+
+@api_app.get("/properties/{property_id}/estimate", response_model=Dict[str, Any])
+async def get_property_estimate(property_id: str):
+    """The model's sale price estimate for one listing, next to its asking price."""
+    estimates = await _run_estimate(_estimate_properties, DB_FILE_PATH, [property_id])
+    if not estimates:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return estimates[0]
+
+
+@api_app.post("/estimate/batch")
+async def get_estimates_batch(request: EstimateBatchRequest):
+    """Estimates for stored listings (``property_ids``, unknown ids skipped) and/or ad-hoc
+    ``properties`` described by locality, property type, BHK and area, in that order."""
+    if not request.property_ids and not request.properties:
+        raise HTTPException(status_code=422, detail="Give property_ids and/or properties")
+    estimates = []
+    if request.property_ids:
+        estimates += await _run_estimate(_estimate_properties, DB_FILE_PATH, request.property_ids)
+    if request.properties:
+        estimates += await _run_estimate(_estimate_features, request.properties)
+    return estimates
+
+
+def _json_safe(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+def _encode_next(results, count: int) -> str:
+    return "".join(json.dumps(_json_safe(result), default=str) + "\n" for result in itertools.islice(results, count))
+
+
+@api_app.post("/recommendations/batch")
+async def get_recommendations_batch(request: BatchRecommendationRequest):
+    """Streams one NDJSON line per client, in request order (all clients when none are given)."""
+    results = utils.get_recommendations_bulk(request.client_ids, db_path=DB_FILE_PATH)
+    try:
+        first = await db.run_read(_encode_next, results, BATCH_STREAM_LINES)
+    except Exception as e:
+        logger.exception("Failed generating batch recommendations")
+        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+
+    async def stream():
+        chunk = first
+        while chunk:
+            yield chunk
+            chunk = await db.run_read(_encode_next, results, BATCH_STREAM_LINES)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def _next_event(events):
+    return next(events, None)
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    data = {key: value for key, value in event.items() if key != "type"}
+    return f"event: {event['type']}\ndata: {json.dumps(_json_safe(data), default=str)}\n\n"
+
+
+@api_app.post("/assistant/chat")
+async def assistant_chat(request: ChatRequest):
+    """Server-sent events: ``local`` (the local reply), ``token`` (model output as it arrives), then ``done``.
+
+    ``done`` carries the same reply ``assistant_engine.handle_chat_request``
+    returns. A failure after the stream started is sent as an ``error`` event.
+    """
+    events = assistant_engine.handle_chat_request_stream(
+        request.query, request.selected_client_id, request.selected_property_id
+    )
+    # Commands may write (notes, tasks), so the first event is produced on the writer thread.
+    try:
+        first = await db.run_write(_next_event, events)
+    except Exception as e:
+        logger.exception("Assistant chat failed for query=%r", request.query)
+        raise HTTPException(status_code=500, detail=f"Error handling chat request: {str(e)}")
+
+    async def stream():
+        event = first
+        while event is not None:
+            yield _sse(event)
+            try:
+                # Model tokens are network waits, kept off the database threads.
+                event = await run_in_threadpool(_next_event, events)
+            except Exception as e:
+                logger.exception("Assistant chat stream failed for query=%r", request.query)
+                yield _sse({"type": "error", "detail": str(e)})
+                return
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -1,25 +1,47 @@
+import json
 import logging
 import re
-from difflib import get_close_matches
+import threading
+from contextlib import closing
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
-import requests
 
+import ai_client
+import data_cache
+import db
+import entity_index
+import llm_cache
 import utils
 from config import AI_API_KEY, AI_BASE_URL, AI_MODEL
 
 logger = logging.getLogger(__name__)
 
-CLIENT_ID_PATTERN = re.compile(r"CL-\d+", re.IGNORECASE)
-PROPERTY_ID_PATTERN = re.compile(r"[A-Z]+-PROP-\d+", re.IGNORECASE)
+CLIENT_ID_PATTERN = entity_index.CLIENT_ID_PATTERN
+PROPERTY_ID_PATTERN = entity_index.PROPERTY_ID_PATTERN
+
+
+# Replies to repeated questions over unchanged data are served from here.
+_response_cache = llm_cache.ResponseCache()
+_ai_client: Optional[ai_client.AIClient] = None
+_ai_client_lock = threading.Lock()
 
 
 def is_ai_enabled() -> bool:
     return bool(AI_API_KEY)
 
 
+def ai_cache_stats() -> Dict[str, Any]:
+    return _response_cache.stats()
+
+
+def ai_client_stats() -> Dict[str, Any]:
+    """Request counters, circuit state and latency histograms of the AI backend client."""
+    client = _ai_client
+    return client.stats() if client is not None else {}
+
+
 def detect_intent(query: str) -> str:
     text = query.lower()
 
@@ -43,62 +65,13 @@ def _clean_query_fragment(text: str) -> str:
 
 
 def _resolve_client_reference(reference_text: str) -> Optional[str]:
-    clients_df = utils.get_all_clients_df()
-    if clients_df.empty or 'client_id' not in clients_df.columns:
-        return None
-
-    match = CLIENT_ID_PATTERN.search(reference_text)
-    if match:
-        client_id = match.group(0).upper()
-        if client_id in clients_df['client_id'].astype(str).str.upper().values:
-            return clients_df[clients_df['client_id'].astype(str).str.upper() == client_id].iloc[0]['client_id']
-
-    lower_text = reference_text.lower()
-    if 'name' in clients_df.columns:
-        name_matches = clients_df[clients_df['name'].astype(str).str.lower().str.contains(lower_text, na=False)]
-        if not name_matches.empty:
-            return name_matches.iloc[0]['client_id']
-
-        client_names = clients_df['name'].astype(str).tolist()
-        close_names = get_close_matches(reference_text, client_names, n=1, cutoff=0.5)
-        if close_names:
-            matched_row = clients_df[clients_df['name'].astype(str) == close_names[0]]
-            if not matched_row.empty:
-                return matched_row.iloc[0]['client_id']
-
-        tokens = [token for token in re.split(r"\s+", lower_text) if len(token) >= 3]
-        if tokens:
-            token_mask = pd.Series(False, index=clients_df.index)
-            for token in tokens:
-                token_mask = token_mask | clients_df['name'].astype(str).str.lower().str.contains(token, na=False)
-            token_matches = clients_df[token_mask]
-            if not token_matches.empty:
-                return token_matches.iloc[0]['client_id']
-
-    return None
+    index = entity_index.client_index(utils.DB_FILE_PATH, utils.get_all_clients_df)
+    return index.resolve_client(reference_text)
 
 
 def _resolve_property_reference(reference_text: str) -> Optional[str]:
-    properties_df = utils.get_all_properties_df()
-    if properties_df.empty or 'property_id' not in properties_df.columns:
-        return None
-
-    match = PROPERTY_ID_PATTERN.search(reference_text)
-    if match:
-        property_id = match.group(0).upper()
-        if property_id in properties_df['property_id'].astype(str).str.upper().values:
-            return properties_df[properties_df['property_id'].astype(str).str.upper() == property_id].iloc[0]['property_id']
-
-    if 'propertytype' in properties_df.columns and 'arealocality' in properties_df.columns:
-        text = reference_text.lower()
-        candidates = properties_df[
-            properties_df['propertytype'].astype(str).str.lower().str.contains(text, na=False) |
-            properties_df['arealocality'].astype(str).str.lower().str.contains(text, na=False)
-        ]
-        if not candidates.empty:
-            return candidates.iloc[0]['property_id']
-
-    return None
+    index = entity_index.property_index(utils.DB_FILE_PATH, utils.get_all_properties_df)
+    return index.resolve_property(reference_text)
 
 
 def _parse_due_date(query: str) -> date:
@@ -138,11 +111,58 @@ def handle_chat_request(
     selected_client_id: Optional[str] = None,
     selected_property_id: Optional[str] = None,
 ) -> Dict[str, Any]:
-    normalized_query = query.strip()
-    lower_query = normalized_query.lower()
+    normalized_query, resolved_client_id, resolved_property_id = _resolve_chat_references(
+        query, selected_client_id, selected_property_id
+    )
+    reply = _handle_command(normalized_query, selected_client_id, selected_property_id, resolved_client_id, resolved_property_id)
+    if reply is not None:
+        return reply
+    return generate_assistant_reply(normalized_query, resolved_client_id, resolved_property_id)
+
 
+def handle_chat_request_stream(
+    query: str,
+    selected_client_id: Optional[str] = None,
+    selected_property_id: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Streaming ``handle_chat_request``: yields events as the reply is produced.
+
+    - ``{"type": "local", "text": ...}``: the local reply, always first;
+    - ``{"type": "token", "text": ...}``: model output as it arrives (AI mode only);
+    - ``{"type": "done", "reply": ...}``: the same dict ``handle_chat_request`` returns.
+
+    Commands (notes, tasks, opening records) never reach the model, so they
+    yield only ``local`` and ``done``.
+    """
+    normalized_query, resolved_client_id, resolved_property_id = _resolve_chat_references(
+        query, selected_client_id, selected_property_id
+    )
+    reply = _handle_command(normalized_query, selected_client_id, selected_property_id, resolved_client_id, resolved_property_id)
+    if reply is not None:
+        yield {"type": "local", "text": reply["answer"]}
+        yield {"type": "done", "reply": reply}
+        return
+    yield from generate_assistant_reply_stream(normalized_query, resolved_client_id, resolved_property_id)
+
+
+def _resolve_chat_references(
+    query: str, selected_client_id: Optional[str], selected_property_id: Optional[str]
+) -> Tuple[str, Optional[str], Optional[str]]:
+    normalized_query = query.strip()
     resolved_client_id = _resolve_client_reference(normalized_query) or selected_client_id
     resolved_property_id = _resolve_property_reference(normalized_query) or selected_property_id
+    return normalized_query, resolved_client_id, resolved_property_id
+
+
+def _handle_command(
+    normalized_query: str,
+    selected_client_id: Optional[str],
+    selected_property_id: Optional[str],
+    resolved_client_id: Optional[str],
+    resolved_property_id: Optional[str],
+) -> Optional[Dict[str, Any]]:
+    """Runs note/task/open commands; None when the query is a question for the assistant."""
+    lower_query = normalized_query.lower()
 
     if any(term in lower_query for term in ["add note", "save note", "log note", "note to", "note for"]):
         target_client_id = _resolve_client_reference(normalized_query) or selected_client_id
@@ -151,7 +171,7 @@ def handle_chat_request(
                 "intent": "client_note",
                 "answer": "Tell me which client to save the note for, for example: add note for CL-1001: call tomorrow.",
                 "suggested_actions": ["Add a note for a client", "Select a client from the sidebar"],
-                "context": build_context(selected_client_id, selected_property_id),
+                "context": build_context(selected_client_id, selected_property_id, intent="client_note"),
                 "used_ai": False,
                 "action": None,
             }
@@ -159,7 +179,7 @@ def handle_chat_request(
         if note_text.lower().startswith(target_client_id.lower()):
             note_text = _clean_query_fragment(note_text[len(target_client_id):])
         save_client_note(target_client_id, note_text)
-        client_context = build_context(target_client_id, resolved_property_id)
+        client_context = build_context(target_client_id, resolved_property_id, intent="client_note")
         return {
             "intent": "client_note",
             "answer": f"Saved the note for {target_client_id}.",
@@ -176,7 +196,7 @@ def handle_chat_request(
                 "intent": "task_create",
                 "answer": "Tell me which client the task is for, for example: create task for CL-1001 tomorrow: call back.",
                 "suggested_actions": ["Choose a client", "Create a follow-up task"],
-                "context": build_context(selected_client_id, selected_property_id),
+                "context": build_context(selected_client_id, selected_property_id, intent="task_create"),
                 "used_ai": False,
                 "action": None,
             }
@@ -199,7 +219,7 @@ def handle_chat_request(
             "intent": "task_create",
             "answer": f"Created a {task_type.lower()} task for {target_client_id} due {due_date.isoformat()}.",
             "suggested_actions": ["Open the task page", "Add a note for the same client", "Show the related property"],
-            "context": build_context(target_client_id, resolved_property_id),
+            "context": build_context(target_client_id, resolved_property_id, intent="task_create"),
             "used_ai": False,
             "action": {"type": "focus_client", "client_id": target_client_id},
         }
@@ -210,7 +230,7 @@ def handle_chat_request(
                 "intent": "client",
                 "answer": f"Opening client {resolved_client_id}.",
                 "suggested_actions": ["Review recommendations", "Add a note", "Create a task"],
-                "context": build_context(resolved_client_id, resolved_property_id),
+                "context": build_context(resolved_client_id, resolved_property_id, intent="client"),
                 "used_ai": False,
                 "action": {"type": "focus_client", "client_id": resolved_client_id},
             }
@@ -220,12 +240,12 @@ def handle_chat_request(
                 "intent": "property",
                 "answer": f"Opening property {resolved_property_id}.",
                 "suggested_actions": ["Compare against client requirements", "Find related clients"],
-                "context": build_context(resolved_client_id, resolved_property_id),
+                "context": build_context(resolved_client_id, resolved_property_id, intent="property"),
                 "used_ai": False,
                 "action": {"type": "focus_property", "property_id": resolved_property_id},
             }
 
-    return generate_assistant_reply(normalized_query, resolved_client_id, resolved_property_id)
+    return None
 
 
 def _df_to_records(df: pd.DataFrame, columns: List[str], limit: int = 5) -> List[Dict[str, Any]]:
@@ -237,64 +257,114 @@ def _df_to_records(df: pd.DataFrame, columns: List[str], limit: int = 5) -> List
     return df[existing_columns].head(limit).to_dict(orient="records")
 
 
+OVERVIEW_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM clients) AS total_clients,
+        (SELECT COUNT(*) FROM properties) AS total_properties,
+        (SELECT COUNT(*) FROM clients WHERE status IN ('Negotiating', 'Site Visit Planned')) AS high_priority_clients,
+        (SELECT COUNT(*) FROM clients WHERE status = 'New') AS new_leads,
+        (SELECT COUNT(*) FROM tasks WHERE status = 'Pending') AS pending_tasks
+"""
+TOP_CLIENT_COLUMNS = ['client_id', 'name', 'status', 'lookingfor', 'score', 'rating', 'phone']
+PENDING_TASK_COLUMNS = ['task_id', 'client_id', 'client_name', 'task_description', 'due_date', 'status', 'property_id']
+SAMPLE_PROPERTY_COLUMNS = ['property_id', 'listingtype', 'propertytype', 'arealocality', 'askingprice', 'monthlyrent']
+# Intents whose local replies read the selected client's property matches: the
+# list for "recommendations", the count for the others ("client" leaves them out).
+RECOMMENDATION_INTENTS = {"recommendations", "tasks", "property", "market", "overview", "general"}
+
+
+def _table_columns(conn, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def _load_overview(db_path: str) -> pd.DataFrame:
+    with db.connection(db_path) as conn:
+        return pd.read_sql(OVERVIEW_QUERY, conn)
+
+
+def _pending_tasks(conn, limit: int) -> pd.DataFrame:
+    task_columns = [column for column in PENDING_TASK_COLUMNS if column != 'client_name']
+    task_columns = [f"t.{column}" for column in task_columns if column in _table_columns(conn, 'tasks')]
+    if 't.status' not in task_columns:
+        return pd.DataFrame()
+    # Dated tasks come straight off the (status, due_date) index in order;
+    # undated ones follow, as NaT sorted last in the old pandas version.
+    query = (
+        f"SELECT {', '.join(task_columns)}, c.name AS client_name FROM ("
+        "SELECT * FROM (SELECT 0 AS undated, * FROM tasks WHERE status = 'Pending' AND due_date > '' "
+        "ORDER BY due_date, task_id LIMIT ?) "
+        "UNION ALL "
+        "SELECT * FROM (SELECT 1 AS undated, * FROM tasks WHERE status = 'Pending' AND (due_date > '') IS NOT 1 "
+        "ORDER BY task_id LIMIT ?)"
+        ") t LEFT JOIN clients c ON c.client_id = t.client_id "
+        "ORDER BY t.undated, t.due_date, t.task_id LIMIT ?"
+    )
+    return pd.read_sql(query, conn, params=(limit, limit, limit))
+
+
 def build_context(
     selected_client_id: Optional[str] = None,
     selected_property_id: Optional[str] = None,
     limit: int = 5,
+    intent: Optional[str] = None,
 ) -> Dict[str, Any]:
-    clients_df = utils.get_all_clients_df()
-    properties_df = utils.get_all_properties_df()
-    tasks_df = utils.get_all_tasks()
-
-    overview = {
-        "total_clients": int(len(clients_df)),
-        "total_properties": int(len(properties_df)),
-        "high_priority_clients": int(clients_df['status'].isin(["Negotiating", "Site Visit Planned"]).sum()) if 'status' in clients_df.columns else 0,
-        "new_leads": int(clients_df['status'].eq("New").sum()) if 'status' in clients_df.columns else 0,
-        "pending_tasks": int(tasks_df['status'].eq("Pending").sum()) if 'status' in tasks_df.columns else 0,
-    }
+    """Builds the assistant context from SQL aggregates and LIMITed, projected reads.
+
+    Recommendations for the selected client are computed only when ``intent``
+    needs them, when the AI model (whose prompt lists them) is enabled, or when
+    no intent is given.
+    """
+    db_path = utils.DB_FILE_PATH
+    overview_row = data_cache.get_frame(db_path, "assistant_overview", lambda: _load_overview(db_path)).iloc[0]
+    overview = {key: int(value or 0) for key, value in overview_row.items()}
 
     top_clients = pd.DataFrame()
-    if not clients_df.empty:
+    if overview["total_clients"]:
         try:
-            top_clients = utils.get_clients_with_scores().head(limit)
+            top_clients = utils.get_clients_with_scores(limit=limit)
         except Exception:
-            top_clients = clients_df.head(limit)
-
-    pending_tasks = pd.DataFrame()
-    if not tasks_df.empty and 'status' in tasks_df.columns:
-        pending_tasks = tasks_df[tasks_df['status'] == 'Pending'].copy()
-        if 'due_date' in pending_tasks.columns:
-            pending_tasks['due_date_sort'] = pd.to_datetime(pending_tasks['due_date'], errors='coerce')
-            pending_tasks = pending_tasks.sort_values(by=['due_date_sort', 'task_id'], na_position='last')
+            with db.connection(db_path) as conn:
+                top_clients = pd.read_sql("SELECT * FROM clients LIMIT ?", conn, params=(limit,))
+
+    with db.connection(db_path) as conn:
+        pending_tasks = _pending_tasks(conn, limit) if overview["pending_tasks"] else pd.DataFrame()
+        property_columns = [column for column in SAMPLE_PROPERTY_COLUMNS if column in _table_columns(conn, 'properties')]
+        sample_properties = pd.DataFrame()
+        if property_columns and overview["total_properties"]:
+            sample_properties = pd.read_sql(
+                f"SELECT {', '.join(property_columns)} FROM properties LIMIT ?", conn, params=(limit,)
+            )
+        client_rows = pd.DataFrame()
+        if selected_client_id:
+            client_rows = pd.read_sql("SELECT * FROM clients WHERE client_id = ? LIMIT 1", conn, params=(selected_client_id,))
+        property_rows = pd.DataFrame()
+        if selected_property_id:
+            property_rows = pd.read_sql(
+                "SELECT * FROM properties WHERE property_id = ? LIMIT 1", conn, params=(selected_property_id,)
+            )
 
     selected_client = None
-    if selected_client_id and not clients_df.empty and 'client_id' in clients_df.columns:
-        client_rows = clients_df[clients_df['client_id'] == selected_client_id]
-        if not client_rows.empty:
-            selected_client = client_rows.iloc[0].to_dict()
-            latest_event = utils.get_latest_client_event(selected_client_id)
-            if latest_event is not None:
-                selected_client['latest_event'] = latest_event.to_dict() if hasattr(latest_event, 'to_dict') else latest_event
+    if not client_rows.empty:
+        selected_client = client_rows.iloc[0].to_dict()
+        latest_event = utils.get_latest_client_event(selected_client_id)
+        if latest_event is not None:
+            selected_client['latest_event'] = latest_event.to_dict() if hasattr(latest_event, 'to_dict') else latest_event
+        if intent is None or intent in RECOMMENDATION_INTENTS or is_ai_enabled():
             try:
                 selected_client['recommendations'] = utils.get_recommendations(selected_client_id).get('recommendations', [])
             except Exception as exc:
                 logger.debug("Recommendation lookup failed for client_id=%s: %s", selected_client_id, exc)
                 selected_client['recommendations'] = []
 
-    selected_property = None
-    if selected_property_id and not properties_df.empty and 'property_id' in properties_df.columns:
-        property_rows = properties_df[properties_df['property_id'] == selected_property_id]
-        if not property_rows.empty:
-            selected_property = property_rows.iloc[0].to_dict()
+    selected_property = property_rows.iloc[0].to_dict() if not property_rows.empty else None
 
     context = {
         "overview": overview,
-        "top_clients": _df_to_records(top_clients, ['client_id', 'name', 'status', 'lookingfor', 'score', 'rating', 'phone'], limit),
-        "pending_tasks": _df_to_records(pending_tasks, ['task_id', 'client_id', 'client_name', 'task_description', 'due_date', 'status', 'property_id'], limit),
+        "top_clients": _df_to_records(top_clients, TOP_CLIENT_COLUMNS, limit),
+        "pending_tasks": _df_to_records(pending_tasks, PENDING_TASK_COLUMNS, limit),
         "selected_client": selected_client,
         "selected_property": selected_property,
-        "sample_properties": _df_to_records(properties_df, ['property_id', 'listingtype', 'propertytype', 'arealocality', 'askingprice', 'monthlyrent'], limit),
+        "sample_properties": _df_to_records(sample_properties, SAMPLE_PROPERTY_COLUMNS, limit),
     }
     return context
 
@@ -488,9 +558,7 @@ def generate_assistant_reply(
     selected_client_id: Optional[str] = None,
     selected_property_id: Optional[str] = None,
 ) -> Dict[str, Any]:
-    context = build_context(selected_client_id, selected_property_id)
-    intent = detect_intent(query)
-    local_reply = _generate_local_reply(query, context)
+    intent, context, local_reply = _prepare_reply(query, selected_client_id, selected_property_id)
     llm_reply = None
 
     if is_ai_enabled():
@@ -509,6 +577,46 @@ def generate_assistant_reply(
     }
 
 
+def generate_assistant_reply_stream(
+    query: str,
+    selected_client_id: Optional[str] = None,
+    selected_property_id: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """``generate_assistant_reply`` as ``local`` / ``token`` / ``done`` events (see ``handle_chat_request_stream``)."""
+    intent, context, local_reply = _prepare_reply(query, selected_client_id, selected_property_id)
+    yield {"type": "local", "text": local_reply}
+
+    llm_reply = None
+    if is_ai_enabled():
+        tokens: List[str] = []
+        try:
+            for token in _stream_ai_model(query, context):
+                tokens.append(token)
+                yield {"type": "token", "text": token}
+            llm_reply = "".join(tokens).strip() or None
+        except Exception as exc:
+            logger.warning("AI model stream failed, falling back to local reply: %s", exc)
+
+    yield {
+        "type": "done",
+        "reply": {
+            "intent": intent,
+            "answer": llm_reply or local_reply,
+            "suggested_actions": _suggest_actions(intent, context),
+            "context": context,
+            "used_ai": bool(llm_reply),
+        },
+    }
+
+
+def _prepare_reply(
+    query: str, selected_client_id: Optional[str], selected_property_id: Optional[str]
+) -> Tuple[str, Dict[str, Any], str]:
+    intent = detect_intent(query)
+    context = build_context(selected_client_id, selected_property_id, intent=intent)
+    return intent, context, _generate_local_reply(query, context)
+
+
 def save_client_note(client_id: str, note: str) -> Dict[str, Any]:
     clean_note = note.strip()
     if not clean_note:
@@ -550,13 +658,19 @@ def create_follow_up_task(
     }
 
 
-def _call_ai_model(query: str, context: Dict[str, Any]) -> Optional[str]:
-    base_url = AI_BASE_URL.rstrip("/")
-    if base_url.endswith("/chat/completions"):
-        url = base_url
-    else:
-        url = f"{base_url}/chat/completions"
+def _get_ai_client() -> ai_client.AIClient:
+    """The shared client for the configured endpoint, rebuilt if the endpoint or key changes."""
+    global _ai_client
+    with _ai_client_lock:
+        if _ai_client is None or (_ai_client.base_url, _ai_client.api_key) != (AI_BASE_URL, AI_API_KEY):
+            if _ai_client is not None:
+                _ai_client.close()
+            _ai_client = ai_client.AIClient(AI_BASE_URL, AI_API_KEY)
+        return _ai_client
+
 
+def _chat_request(query: str, context: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """(JSON body, cache key) for a chat-completions call about ``query``."""
     system_prompt = (
         "You are an intelligent real estate assistant for an agent-facing CRM. "
         "Use only the provided context when possible. Be concise, practical, and action-oriented. "
@@ -571,30 +685,66 @@ def _call_ai_model(query: str, context: Dict[str, Any]) -> Optional[str]:
             "Call out if the user should select a client or property first.",
         ],
     }
+    # Serialized once: the same text is sent to the model and fingerprinted for the cache.
+    payload_text = json.dumps(user_payload, sort_keys=True, separators=(",", ":"), default=str)
+    key = llm_cache.cache_key(AI_MODEL, query, json.dumps(context, sort_keys=True, default=str))
+    body = {
+        "model": AI_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": payload_text},
+        ],
+        "temperature": 0.2,
+    }
+    return body, key
 
-    response = requests.post(
-        url,
-        headers={
-            "Authorization": f"Bearer {AI_API_KEY}",
-            "Content-Type": "application/json",
-        },
-        json={
-            "model": AI_MODEL,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"{user_payload}"},
-            ],
-            "temperature": 0.2,
-        },
-        timeout=25,
-    )
-    response.raise_for_status()
-    data = response.json()
+
+def _call_ai_model(query: str, context: Dict[str, Any]) -> Optional[str]:
+    body, key = _chat_request(query, context)
+    db_path = utils.DB_FILE_PATH
+    cached = _response_cache.get(db_path, key)
+    if cached is not None:
+        return cached
+
+    data = _get_ai_client().complete(body)
     choices = data.get("choices", [])
     if not choices:
         return None
     message = choices[0].get("message", {})
     content = message.get("content")
     if isinstance(content, str) and content.strip():
+        _response_cache.put(db_path, key, content.strip())
         return content.strip()
     return None
+
+
+def _stream_ai_model(query: str, context: Dict[str, Any]) -> Iterator[str]:
+    """Yields the model's reply as it arrives, from the endpoint's server-sent events.
+
+    A cached reply is yielded whole; a completed stream is cached like a
+    ``_call_ai_model`` reply.
+    """
+    body, key = _chat_request(query, context)
+    db_path = utils.DB_FILE_PATH
+    cached = _response_cache.get(db_path, key)
+    if cached is not None:
+        yield cached
+        return
+
+    tokens: List[str] = []
+    # Closed explicitly so the connection and concurrency slot are released at [DONE].
+    with closing(_get_ai_client().stream_lines(body)) as lines:
+        for line in lines:
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            token = (choices[0].get("delta") or {}).get("content")
+            if token:
+                tokens.append(token)
+                yield token
+    reply = "".join(tokens).strip()
+    if reply:
+        _response_cache.put(db_path, key, reply)
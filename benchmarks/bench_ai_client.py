@@ -0,0 +1,98 @@
+"""
+Bare requests.post per turn vs. ai_client.AIClient against a local flaky model server:
+per-call latency (new connection vs. keep-alive) and the share of turns that get a model reply.
+
+    python benchmarks/bench_ai_client.py --calls 200 --failure-rate 0.2
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ai_client import AIClient
+
+BODY = {"model": "benchmark", "messages": [{"role": "user", "content": "Summarize market activity"}]}
+
+
+def start_flaky_model(failure_rate, seed):
+    """Answers 503 to ``failure_rate`` of requests, like an overloaded hosted endpoint."""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; without TCP_NODELAY (which real
+        # servers set) keep-alive replies would wait on delayed ACKs.
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            with lock:
+                failed = rng.random() < failure_rate
+            content = json.dumps({"error": "overloaded"} if failed else
+                                 {"choices": [{"message": {"content": "ok"}}]}).encode()
+            self.send_response(503 if failed else 200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bare_call(url):
+    response = requests.post(url, json=BODY, timeout=25)
+    response.raise_for_status()
+    return response.json()
+
+
+def run(name, call, calls):
+    latencies, replies = [], 0
+    for _ in range(calls):
+        start = time.perf_counter()
+        try:
+            call()
+            replies += 1
+        except requests.RequestException:
+            pass
+        latencies.append(time.perf_counter() - start)
+    print(f"{name:>22}: median {statistics.median(latencies) * 1000:6.2f} ms/call | "
+          f"model replies {replies}/{calls} ({replies / calls:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--failure-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = start_flaky_model(args.failure_rate, seed=5)
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    run("requests.post per call", lambda: bare_call(url), args.calls)
+    # Short backoff so the benchmark measures the retries, not the sleeps.
+    client = AIClient(url, "benchmark", backoff_base=0.001, backoff_max=0.01, failure_threshold=10)
+    run("AIClient", lambda: client.complete(BODY), args.calls)
+    stats = client.stats()
+    print(f"AIClient retries: {stats['retries']}, circuit: {stats['state']}, "
+          f"request latency mean {stats['latency']['request']['mean'] * 1000:.2f} ms")
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
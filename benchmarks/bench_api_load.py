@@ -0,0 +1,147 @@
+"""
+Concurrent load test for the read-heavy API routes.
+
+Starts `uvicorn api:api_app` on a synthetic database (or targets --url) and
+fires requests at /clients, /clients/{id} and /recommendations/{id} from
+--concurrency parallel callers, reporting p50/p99 latency and throughput:
+    python benchmarks/bench_api_load.py --clients 5000 --properties 20000 --requests 3000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bench_batch_recommendations import make_clients
+from bench_recommendations import make_properties
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def build_database(path, n_clients, n_properties, seed=7):
+    rng = np.random.default_rng(seed)
+    clients = make_clients(n_clients, rng)
+    clients.insert(2, "phone", [f"98{i:08d}" for i in range(n_clients)])
+    clients.insert(3, "email", [f"c{i}@example.com" for i in range(n_clients)])
+    properties = make_properties(n_properties, rng)
+    conn = sqlite3.connect(path)
+    clients.to_sql("clients", conn, index=False)
+    properties.to_sql("properties", conn, index=False)
+    conn.execute("CREATE INDEX idx_clients_client_id ON clients (client_id)")
+    conn.commit()
+    conn.close()
+    return clients['client_id'].tolist()
+
+
+def start_server(db_path, port):
+    env = dict(os.environ, REAL_ESTATE_DB_PATH=db_path, REAL_ESTATE_LOG_LEVEL="WARNING")
+    # A long keep-alive: on a small box the load generator can be descheduled
+    # past uvicorn's 5 s default and race the server closing the connection.
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:api_app", "--port", str(port), "--log-level", "warning",
+         "--timeout-keep-alive", "300"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("API server did not start")
+
+
+async def run(url, paths, concurrency):
+    latencies = {}
+    queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+
+    async def worker(client):
+        while True:
+            try:
+                path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            route = "/" + path.strip("/").split("/")[0] + ("/{id}" if path.count("/") > 1 else "")
+            latencies.setdefault(route, []).append((time.perf_counter() - start) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+def report(latencies, elapsed):
+    every = [value for values in latencies.values() for value in values]
+    for route, values in sorted(latencies.items()) + [("all", every)]:
+        print(
+            f"{route:>22}: n={len(values):<6} p50={np.percentile(values, 50):8.2f} ms  "
+            f"p99={np.percentile(values, 99):8.2f} ms"
+        )
+    print(f"throughput: {len(every) / elapsed:.0f} req/s over {elapsed:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="Benchmark a running API instead of starting one")
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        if args.url:
+            url = args.url
+            export = httpx.get(f"{url}/clients", params={"format": "ndjson", "fields": "client_id"}, timeout=60)
+            client_ids = [json.loads(line)["client_id"] for line in export.text.splitlines()]
+        else:
+            client_ids = build_database(os.path.join(tmp, "bench.db"), args.clients, args.properties)
+            server = start_server(os.path.join(tmp, "bench.db"), args.port)
+            url = f"http://127.0.0.1:{args.port}"
+        try:
+            # Roughly one list call per 20 detail/recommendation calls.
+            paths = []
+            for _ in range(args.requests):
+                roll = rng.random()
+                client_id = client_ids[rng.integers(len(client_ids))]
+                if roll < 0.05:
+                    paths.append("/clients")
+                elif roll < 0.55:
+                    paths.append(f"/clients/{client_id}")
+                else:
+                    paths.append(f"/recommendations/{client_id}")
+            asyncio.run(run(url, paths[:args.concurrency], args.concurrency))  # warm-up
+            report(*asyncio.run(run(url, paths, args.concurrency)))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
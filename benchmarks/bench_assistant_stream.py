@@ -0,0 +1,108 @@
+"""
+Time to first output for assistant replies against a fake model server: blocking
+generate_assistant_reply vs. streamed events (local reply, first model token).
+
+    python benchmarks/bench_assistant_stream.py --tokens 60 --token-delay 0.02 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import assistant_engine
+import llm_cache
+
+QUERY = "Summarize market activity"
+
+
+def start_fake_model(tokens, token_delay):
+    """Chat-completions stand-in that produces one token every ``token_delay`` seconds."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            words = [f"word{i} " for i in range(tokens)]
+            if body.get("stream"):
+                # Chunked, one event per chunk, as hosted completion APIs send them.
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for word in words:
+                    time.sleep(token_delay)
+                    self.send_chunk(f"data: {json.dumps({'choices': [{'delta': {'content': word}}]})}\n\n".encode())
+                self.send_chunk(b"data: [DONE]\n\n")
+                self.send_chunk(b"")
+                return
+            time.sleep(token_delay * tokens)
+            reply = json.dumps({"choices": [{"message": {"content": "".join(words)}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def send_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def blocking_run():
+    start = time.perf_counter()
+    assistant_engine.generate_assistant_reply(QUERY)
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed, elapsed
+
+
+def streaming_run():
+    start = time.perf_counter()
+    local = first_token = None
+    for event in assistant_engine.handle_chat_request_stream(QUERY):
+        now = time.perf_counter() - start
+        if event["type"] == "local" and local is None:
+            local = now
+        elif event["type"] == "token" and first_token is None:
+            first_token = now
+    return local, first_token, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    server = start_fake_model(args.tokens, args.token_delay)
+    assistant_engine.AI_API_KEY = "benchmark"
+    assistant_engine.AI_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    # Every run goes to the model.
+    assistant_engine._response_cache = llm_cache.ResponseCache(ttl=0)
+
+    for name, run in (("blocking", blocking_run), ("streaming", streaming_run)):
+        run()
+        timings = [run() for _ in range(args.repeat)]
+        local, first_token, total = (statistics.median(column) for column in zip(*timings))
+        print(f"{name:>10}: first text {local * 1000:7.1f} ms | first model token {first_token * 1000:7.1f} ms"
+              f" | complete {total * 1000:7.1f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Assistant context-build latency as the tables grow.
+
+Timed once with a data_cache version bump before every call, as if a write
+had landed between two chat questions, and once against unchanged data.
+
+    python benchmarks/bench_build_context.py --sizes 1000 100000 1000000
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import assistant_engine
+import data_cache
+import utils
+
+
+def make_database(path, size):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE clients (client_id TEXT, name TEXT, phone INTEGER, email TEXT, lookingfor TEXT, requirements TEXT, status TEXT)")
+    conn.execute("CREATE TABLE properties (property_id TEXT, listingtype TEXT, propertytype TEXT, bedroomsbhk TEXT, arealocality TEXT, askingprice REAL, monthlyrent REAL)")
+    conn.execute("CREATE TABLE communication_log (log_id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT, timestamp TEXT, note TEXT)")
+    conn.execute("CREATE TABLE tasks (task_id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT, property_id TEXT, task_type TEXT, task_description TEXT, due_date TEXT, details TEXT, status TEXT)")
+    statuses = ["New", "Negotiating", "Site Visit Planned", "Converted"]
+    conn.executemany("INSERT INTO clients VALUES (?, ?, 9876543210, 'c@example.com', ?, ?, ?)", (
+        (f"CL-{1000 + i}", f"Client {i}", "Sale" if i % 2 else "Rent",
+         f"{1 + i % 4} BHK in Mira Road East, Budget {40 + i % 150}L" if i % 2 else f"{1 + i % 4} BHK Rent up to {15 + i % 60},000",
+         statuses[i % 4])
+        for i in range(size)
+    ))
+    conn.executemany("INSERT INTO properties VALUES (?, ?, 'Apartment', ?, 'Mira Road East', ?, ?)", (
+        (f"SALE-PROP-{1000 + i}", "Sale" if i % 2 else "Rent", f"{1 + i % 4} BHK",
+         (40 + i % 150) * 100000 if i % 2 else None, None if i % 2 else (15 + i % 60) * 1000)
+        for i in range(size)
+    ))
+    conn.executemany("INSERT INTO tasks (client_id, task_type, task_description, due_date, status) VALUES (?, 'Follow-up', 'Call back', ?, ?)", (
+        (f"CL-{1000 + i}", f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}", "Pending" if i % 3 else "Completed")
+        for i in range(0, size, 10)
+    ))
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"context_{size}.db")
+            make_database(path, size)
+            utils.DB_FILE_PATH = path
+            utils.initialize_database.__globals__['DB_FILE_PATH'] = path
+            start = time.perf_counter()
+            utils.initialize_database()
+            migrate_s = time.perf_counter() - start
+
+            results = []
+            for after_write in (True, False):
+                timings = []
+                for _ in range(args.runs):
+                    if after_write:
+                        data_cache.bump_version(path)
+                    start = time.perf_counter()
+                    assistant_engine.build_context("CL-1001", "SALE-PROP-1001", intent="overview")
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                results.append(f"p50 {statistics.median(timings):6.1f} ms / p99 {timings[int(len(timings) * 0.99) - 1]:6.1f} ms")
+            print(f"{size:>9,} rows: after a write {results[0]}; unchanged data {results[1]} "
+                  f"(one-off migration {migrate_s:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
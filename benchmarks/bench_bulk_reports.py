@@ -0,0 +1,83 @@
+"""
+Bulk PDF shortlists: one get_recommendations + generate_property_report per client vs. bulk_reports.
+
+Images come from an in-memory stand-in for the CDN (a 1600x1200 PNG per property
+type), so the numbers measure recommendation, decode and render cost only:
+    python benchmarks/bench_bulk_reports.py --clients 2000 --properties 50000 --workers 4
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bench_batch_recommendations import make_clients
+from bench_snapshot import make_database
+
+
+class MemoryFetcher:
+    def __init__(self):
+        self.photos = {}
+
+    def fetch_many(self, sources):
+        for source in sources:
+            if source not in self.photos:
+                buffer = BytesIO()
+                Image.effect_mandelbrot((1600, 1200), (-2.0, -1.2, 1.0, 1.2), 64).convert("RGB").save(buffer, format="PNG")
+                self.photos[source] = buffer.getvalue()
+        return [self.photos[source] for source in sources]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--properties", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--sequential-clients", type=int, default=200,
+                        help="clients timed on the per-client path (it is slow)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        make_database(db_path, args.properties, rng)
+        conn = sqlite3.connect(db_path)
+        conn.execute("ALTER TABLE properties ADD COLUMN furnishing TEXT")
+        conn.execute("ALTER TABLE properties ADD COLUMN image_1 TEXT")
+        make_clients(args.clients, rng).to_sql("clients", conn, index=False)
+        conn.commit()
+        conn.close()
+        import bulk_reports
+        import utils
+        # utils is already imported (by bench_batch_recommendations), so the
+        # REAL_ESTATE_DB_PATH variable would come too late.
+        utils.DB_FILE_PATH = db_path
+        utils.startup(db_path, refresh_prices=False)
+
+        fetcher = MemoryFetcher()
+        client_ids = [f"CL-{1000 + i}" for i in range(min(args.sequential_clients, args.clients))]
+        start = time.perf_counter()
+        for client_id in client_ids:
+            result = utils.get_recommendations(client_id)
+            if result["recommendations"]:
+                utils.generate_property_report(result["client_details"], result["recommendations"], fetcher)
+        seconds = time.perf_counter() - start
+        print(f"{'per client':>18}: {len(client_ids) / seconds:7.1f} reports/s ({len(client_ids)} clients)")
+
+        for workers in sorted({1, args.workers}):
+            output = os.path.join(tmp, f"reports-{workers}.zip")
+            report = bulk_reports.generate_reports(output, workers=workers, db_path=db_path, fetcher=fetcher)
+            print(f"{f'bulk, {workers} workers':>18}: {report.reports_per_second:7.1f} reports/s "
+                  f"({report.written} reports, {report.seconds:5.1f} s, {os.path.getsize(output) / 1e6:6.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
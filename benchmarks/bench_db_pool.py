@@ -0,0 +1,94 @@
+"""
+Per-request latency of a fresh sqlite3 connection vs. the shared pool.
+
+Simulates the `/clients/{client_id}` handler under concurrent load:
+    python benchmarks/bench_db_pool.py --clients 5000 --requests 4000 --workers 8
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db
+
+
+def build_database(path, n_clients):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE clients (client_id TEXT PRIMARY KEY, name TEXT, phone TEXT, "
+        "email TEXT, lookingfor TEXT, requirements TEXT, status TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO clients VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (f"CL-{1000 + i}", f"Client {i}", f"98{i:08d}", f"c{i}@example.com",
+             "Sale", "2 BHK in Mira Road East, Budget 85L", "New")
+            for i in range(n_clients)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def fresh_request(path, client_id):
+    with sqlite3.connect(path) as conn:
+        return pd.read_sql("SELECT * FROM clients WHERE client_id = ?", conn, params=(client_id,))
+
+
+def pooled_request(path, client_id):
+    with db.connection(path) as conn:
+        return pd.read_sql("SELECT * FROM clients WHERE client_id = ?", conn, params=(client_id,))
+
+
+def run(handler, path, client_ids, workers):
+    def timed(client_id):
+        start = time.perf_counter()
+        handler(path, client_id)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = sorted(executor.map(timed, client_ids))
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "mean_ms": statistics.fmean(latencies),
+        "req_per_s": len(latencies) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, args.clients)
+        client_ids = [f"CL-{1000 + random.randrange(args.clients)}" for _ in range(args.requests)]
+
+        for label, handler in (("fresh connect", fresh_request), ("pooled", pooled_request)):
+            result = run(handler, path, client_ids, args.workers)
+            print(
+                f"{label:>14}: p50={result['p50_ms']:.3f} ms  p99={result['p99_ms']:.3f} ms  "
+                f"mean={result['mean_ms']:.3f} ms  throughput={result['req_per_s']:.0f} req/s"
+            )
+        print("pool stats:", db.pool_stats())
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
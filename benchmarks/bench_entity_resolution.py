@@ -0,0 +1,127 @@
+"""
+Scan-based chat entity resolution vs. EntityIndex on a synthetic client book.
+
+    python benchmarks/bench_entity_resolution.py --clients 100000 --properties 100000
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from difflib import get_close_matches
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from entity_index import CLIENT_ID_PATTERN, PROPERTY_ID_PATTERN, EntityIndex
+
+FIRST = ["Asha", "Ravi", "Priya", "Rahul", "Sneha", "Vikas", "Meera", "Arjun", "Kavya", "Rohan", "Isha", "Karan",
+         "Neha", "Aditya", "Pooja", "Siddharth", "Ananya", "Manish", "Divya", "Nikhil"]
+LAST = ["Mehta", "Kumar", "Shah", "Patel", "Iyer", "Desai", "Joshi", "Nair", "Reddy", "Gupta", "Kapoor", "Singh",
+        "Rao", "Pillai", "Verma", "Chopra", "Bhat", "Menon", "Sharma", "Agarwal"]
+LOCALITIES = ["Mira Road East", "Bhayandar West", "Bhayandar East", "Shanti Nagar", "Kanakia", "Golden Nest"]
+TYPES = ["Apartment", "Bungalow", "Office Space", "Shop", "Villa"]
+QUERIES = [
+    "show client CL-1042", "open CL-99999", "show asha mehta", "what about ravi", "add note for priya shah: call later",
+    "focus on Kavya Nair", "show follow-up tasks", "summarize the market", "recommend properties for this client",
+    "show sidharth", "fetch rohan kapur details", "show SALE-PROP-1007", "open the bungalow in kanakia",
+    "open property in shanti nagar", "show office space", "how many leads are new",
+]
+
+
+def scan_client(clients_df, reference_text):
+    """The pre-index implementation of assistant_engine._resolve_client_reference."""
+    match = CLIENT_ID_PATTERN.search(reference_text)
+    if match:
+        client_id = match.group(0).upper()
+        if client_id in clients_df['client_id'].astype(str).str.upper().values:
+            return clients_df[clients_df['client_id'].astype(str).str.upper() == client_id].iloc[0]['client_id']
+    lower_text = reference_text.lower()
+    name_matches = clients_df[clients_df['name'].astype(str).str.lower().str.contains(lower_text, na=False)]
+    if not name_matches.empty:
+        return name_matches.iloc[0]['client_id']
+    close_names = get_close_matches(reference_text, clients_df['name'].astype(str).tolist(), n=1, cutoff=0.5)
+    if close_names:
+        return clients_df[clients_df['name'].astype(str) == close_names[0]].iloc[0]['client_id']
+    tokens = [token for token in re.split(r"\s+", lower_text) if len(token) >= 3]
+    if tokens:
+        token_mask = pd.Series(False, index=clients_df.index)
+        for token in tokens:
+            token_mask = token_mask | clients_df['name'].astype(str).str.lower().str.contains(token, na=False)
+        token_matches = clients_df[token_mask]
+        if not token_matches.empty:
+            return token_matches.iloc[0]['client_id']
+    return None
+
+
+def scan_property(properties_df, reference_text):
+    """The pre-index implementation of assistant_engine._resolve_property_reference."""
+    match = PROPERTY_ID_PATTERN.search(reference_text)
+    if match:
+        property_id = match.group(0).upper()
+        if property_id in properties_df['property_id'].astype(str).str.upper().values:
+            return properties_df[properties_df['property_id'].astype(str).str.upper() == property_id].iloc[0]['property_id']
+    text = reference_text.lower()
+    candidates = properties_df[
+        properties_df['propertytype'].astype(str).str.lower().str.contains(text, na=False) |
+        properties_df['arealocality'].astype(str).str.lower().str.contains(text, na=False)
+    ]
+    return candidates.iloc[0]['property_id'] if not candidates.empty else None
+
+
+def timed(function, queries, repeat):
+    timings = []
+    results = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            results.append(function(query))
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return results[:len(queries)], statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=100000)
+    parser.add_argument("--properties", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    clients = pd.DataFrame({
+        "client_id": [f"CL-{1000 + i}" for i in range(args.clients)],
+        "name": [f"{first} {initial}. {last}" for first, initial, last in zip(
+            rng.choice(FIRST, args.clients), rng.choice(list("ABCDEGHJKLMNPRSTV"), args.clients), rng.choice(LAST, args.clients))],
+    })
+    properties = pd.DataFrame({
+        "property_id": [f"SALE-PROP-{1000 + i}" for i in range(args.properties)],
+        "propertytype": rng.choice(TYPES, args.properties),
+        "arealocality": rng.choice(LOCALITIES, args.properties),
+    })
+
+    start = time.perf_counter()
+    client_index = EntityIndex(clients, 'client_id', ['name'], fuzzy_column='name')
+    property_index = EntityIndex(properties, 'property_id', ['propertytype', 'arealocality'])
+    build_s = time.perf_counter() - start
+
+    scan_results, scan_p50, scan_p99 = timed(lambda q: scan_client(clients, q), QUERIES, 1)
+    index_results, index_p50, index_p99 = timed(client_index.resolve_client, QUERIES, 50)
+    same = sum(a == b for a, b in zip(scan_results, index_results))
+    print(f"clients: {args.clients:,}  index build (both tables): {build_s:.2f} s")
+    print(f"client scan : p50 {scan_p50:8.2f} ms  p99 {scan_p99:8.2f} ms")
+    print(f"client index: p50 {index_p50:8.3f} ms  p99 {index_p99:8.3f} ms  ({same}/{len(QUERIES)} identical)")
+
+    scan_results, scan_p50, scan_p99 = timed(lambda q: scan_property(properties, q), QUERIES, 1)
+    index_results, index_p50, index_p99 = timed(property_index.resolve_property, QUERIES, 50)
+    same = sum(a == b for a, b in zip(scan_results, index_results))
+    print(f"property scan : p50 {scan_p50:8.2f} ms  p99 {scan_p99:8.2f} ms")
+    print(f"property index: p50 {index_p50:8.3f} ms  p99 {index_p99:8.3f} ms  ({same}/{len(QUERIES)} identical)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Excel import: whole-sheet pandas read + to_sql vs. the streaming importer.
+
+Writes a synthetic workbook (clients and listings sheets), then imports it in
+a fresh subprocess per approach and reports wall time and peak RSS:
+    python benchmarks/bench_excel_import.py --clients 200000 --properties 200000
+"""
+
+import argparse
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database_setup
+from bench_recommendations import LOCALITIES
+
+
+def write_workbook(path, clients, properties, rng):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Client_Database')
+    sheet.append(['ClientID', 'Client Name', 'Client Phone', 'Client Email', 'Looking For', 'Requirements', 'Status'])
+    for i in range(clients):
+        sheet.append([f'CL-{1000 + i}', f'Client {i}', 9000000000 + i, f'client{i}@example.com',
+                      'Sale' if i % 2 else 'Rent', f'{i % 4 + 1} BHK in {LOCALITIES[i % len(LOCALITIES)]}, Budget 85L',
+                      'New'])
+    sheet = workbook.create_sheet('Active_Listings')
+    sheet.append(['Property ID', 'Listing Type', 'Area / Locality', 'Bedrooms (BHK)', 'Amenities',
+                  'Asking Price (₹)', 'Monthly Rent (₹)'])
+    prices = rng.integers(20, 300, size=properties)
+    for i in range(properties):
+        sale = bool(i % 2)
+        sheet.append([f'PROP-{i}', 'Sale' if sale else 'Rent', LOCALITIES[i % len(LOCALITIES)], f'{i % 4 + 1} BHK',
+                      'Gymnasium, Garden' if i % 3 else None,
+                      int(prices[i]) * 100000 if sale else None, None if sale else int(prices[i]) * 1000])
+    workbook.save(path)
+
+
+def run_import(approach, workbook, db_path):
+    start = time.perf_counter()
+    if approach == 'pandas':
+        import pandas as pd
+        conn = sqlite3.connect(db_path)
+        for spec in database_setup.SHEETS:
+            frame = database_setup.clean_col_names(pd.read_excel(workbook, sheet_name=spec.sheet))
+            frame.rename(columns=spec.renames).to_sql(spec.table, conn, if_exists='replace', index=False)
+        conn.close()
+    else:
+        database_setup.setup_database(workbook, db_path, mode=approach)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=200000)
+    parser.add_argument("--properties", type=int, default=200000)
+    parser.add_argument("--run", nargs=3, metavar=("APPROACH", "WORKBOOK", "DB"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run_import(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workbook = os.path.join(tmp, "data.xlsx")
+        start = time.perf_counter()
+        write_workbook(workbook, args.clients, args.properties, np.random.default_rng(3))
+        print(f"workbook with {args.clients} clients and {args.properties} listings: "
+              f"{os.path.getsize(workbook) / 1e6:.1f} MB, written in {time.perf_counter() - start:.1f} s")
+        db_path = os.path.join(tmp, "bench.db")
+        # The streaming runs go last: "merge" re-imports over the rows "replace" loaded.
+        for approach in ("pandas", "replace", "merge"):
+            if approach == "pandas" and os.path.exists(db_path):
+                os.remove(db_path)
+            output = subprocess.run([sys.executable, __file__, "--run", approach, workbook, db_path],
+                                    check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            rows = args.clients + args.properties
+            print(f"{approach:>8}: {result['seconds']:6.1f} s  {rows / result['seconds']:8.0f} rows/s  "
+                  f"peak RSS {result['peak_mb']:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
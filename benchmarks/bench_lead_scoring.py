@@ -0,0 +1,79 @@
+"""
+Row-wise calculate_lead_score vs. the column-wise lead_scoring engine.
+
+    python benchmarks/bench_lead_scoring.py --clients 1000000 --apply-sample 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import client_requirements
+import lead_scoring
+from utils import calculate_lead_score
+
+REQUIREMENTS = [
+    "2 BHK in Bhayandar West, Budget 85L",
+    "3 BHK in Anywhere in Mira Bhayandar, Budget 140L",
+    "1 BHK in Mira Road East, Budget 45L",
+    "2 BHK Semi-Furnished in Mira Road East, Rent up to 45,000",
+    "1 BHK Rent up to 22,000 anywhere",
+    "3 BHK in Kanakia, Rent 60000",
+]
+STATUSES = ["New", "Negotiating", "Site Visit Planned", "Converted", "Closed Lost"]
+
+
+def make_clients(count, rng):
+    clients = pd.DataFrame({
+        "client_id": [f"CL-{1000 + i}" for i in range(count)],
+        "lookingfor": rng.choice(["Sale", "Rent"], size=count),
+        "requirements": rng.choice(REQUIREMENTS, size=count),
+        "status": rng.choice(STATUSES, size=count),
+    })
+    noted = clients["client_id"].sample(frac=0.4, random_state=1)
+    log_counts = pd.DataFrame({"client_id": noted.to_numpy(), "count": rng.integers(1, 8, size=len(noted))})
+    return clients, log_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=1000000)
+    parser.add_argument("--apply-sample", type=int, default=100000,
+                        help="clients scored with the row-wise apply (extrapolated to the full size)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    clients, log_counts = make_clients(args.clients, rng)
+
+    start = time.perf_counter()
+    parsed = client_requirements.parse_many(clients["requirements"])
+    parse_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = lead_scoring.score_clients(clients, parsed, log_counts)
+    vectorized_s = time.perf_counter() - start
+
+    sample = clients.head(args.apply_sample)
+    log_counts_dict = log_counts.set_index("client_id")["count"].to_dict()
+    start = time.perf_counter()
+    row_wise = sample.apply(lambda row: calculate_lead_score(row, log_counts_dict), axis=1)
+    apply_s = time.perf_counter() - start
+    assert vectorized["score"].head(len(sample)).tolist() == [score for score, _ in row_wise]
+    assert vectorized["rating"].head(len(sample)).tolist() == [rating for _, rating in row_wise]
+
+    print(f"clients: {args.clients:,}")
+    print(f"vectorized parse   : {parse_s:.2f} s (stored in client_requirements in the app)")
+    print(f"vectorized scoring : {vectorized_s:.3f} s")
+    print(f"row-wise apply     : {apply_s:.2f} s for {len(sample):,} "
+          f"(~{apply_s * args.clients / len(sample):.1f} s extrapolated); sampled results identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Market dashboards: recomputing the aggregates from raw frames vs. reading the market_stats tables.
+
+Reports the per-render cost of each approach, the full rebuild, the
+per-write delta the write helpers apply and the staleness check that runs
+after a data-version change:
+    python benchmarks/bench_market_stats.py --properties 500000 --clients 500000
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import market_stats
+from bench_lead_scoring import REQUIREMENTS
+from bench_snapshot import make_database
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=500000)
+    parser.add_argument("--clients", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        make_database(db_path, args.properties, rng)
+        conn = sqlite3.connect(db_path)
+        pd.DataFrame({
+            "client_id": [f"CL-{1000 + i}" for i in range(args.clients)],
+            "requirements": rng.choice(REQUIREMENTS, size=args.clients),
+        }).to_sql("clients", conn, index=False)
+        conn.execute("CREATE INDEX idx_properties_property_id ON properties (property_id)")
+        conn.execute("CREATE INDEX idx_clients_client_id ON clients (client_id)")
+        conn.commit()
+
+        def recompute():
+            properties = pd.read_sql("SELECT * FROM properties", conn)
+            clients = pd.read_sql("SELECT * FROM clients", conn)
+            return market_stats.from_frames(properties, clients)
+
+        start = time.perf_counter()
+        listings = market_stats.refresh(conn)
+        conn.commit()
+        print(f"full refresh ({listings} listings, {args.clients} clients): {time.perf_counter() - start:6.2f} s")
+        rows = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in market_stats.TABLES}
+        print(f"aggregate rows: {rows}")
+
+        print(f"{'read_sql + pandas':>20}: {timed(recompute, min(args.repeat, 3)):9.1f} ms per render")
+        print(f"{'market_stats tables':>20}: {timed(lambda: market_stats.read_all(conn), args.repeat):9.1f} ms per render")
+
+        def write_delta():
+            property_id = f"PROP-{rng.integers(args.properties)}"
+            client_id = f"CL-{1000 + rng.integers(args.clients)}"
+            market_stats.remove_properties(conn, [property_id])
+            market_stats.add_properties(conn, [property_id])
+            market_stats.remove_clients(conn, [client_id])
+            market_stats.add_clients(conn, [client_id])
+            conn.rollback()
+
+        print(f"{'write delta':>20}: {timed(write_delta, 50):9.2f} ms per property + client update")
+        assert not market_stats.needs_refresh(conn)
+        print(f"{'staleness check':>20}: {timed(lambda: market_stats.needs_refresh(conn), args.repeat):9.1f} ms "
+              "per data-version change")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Stored fair-price scores: refresh throughput, and value-sorted recommendations with
+inference per request vs. reading the stored price_gap_pct.
+
+    python benchmarks/bench_price_scores.py --properties 50000 --queries 50
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import price_scores
+import pricing
+from bench_recommendations import make_clients, make_properties, parse
+from recommendation_index import RecommendationIndex, value_order
+
+
+def inference_per_request(index, properties, client):
+    """Predict every candidate's price while answering the request, then sort on the gap."""
+    req_budget, req_bhk, req_location = parse(client)
+    tiers = index.match(client['lookingfor'], req_budget, req_bhk, req_location)
+    ordered = []
+    for tier in tiers:
+        candidates = properties.iloc[tier]
+        predicted = pricing.predict_prices(candidates).to_numpy()
+        gaps = price_scores.gap_pct(candidates['askingprice'].to_numpy(dtype=float), predicted, candidates['listingtype'])
+        ordered.append(tier[value_order(gaps)])
+    return ordered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(17)
+    properties = make_properties(args.properties, rng)
+    clients = [client for client in make_clients(args.queries * 2, rng) if client['lookingfor'] == 'Sale'][:args.queries]
+    pricing.get_model()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "prices.db")
+        with sqlite3.connect(db_path) as conn:
+            properties.to_sql("properties", conn, index=False)
+        start = time.perf_counter()
+        scored = price_scores.refresh_all(db_path)
+        seconds = time.perf_counter() - start
+        print(f"refresh_all: {scored} listings in {seconds:.2f} s ({scored / seconds:,.0f} listings/s)")
+        with sqlite3.connect(db_path) as conn:
+            start = time.perf_counter()
+            price_scores.refresh(conn)
+            print(f"refresh with nothing stale: {(time.perf_counter() - start) * 1000:.1f} ms")
+            stored = pd.read_sql("SELECT * FROM properties ORDER BY rowid", conn)
+
+    index = RecommendationIndex(stored)
+    per_request, from_columns = [], []
+    for client in clients:
+        req_budget, req_bhk, req_location = parse(client)
+        start = time.perf_counter()
+        inference_per_request(index, stored, client)
+        per_request.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        index.recommend(client, req_budget, req_bhk, req_location, sort='value')
+        from_columns.append(time.perf_counter() - start)
+    print(f"{'value sort, inference per request':>36}: {statistics.median(per_request) * 1000:8.2f} ms/query")
+    print(f"{'value sort, stored price_gap_pct':>36}: {statistics.median(from_columns) * 1000:8.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
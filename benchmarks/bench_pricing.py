@@ -0,0 +1,74 @@
+"""
+Price estimates for a batch of listings: per-row feature dicts vs. pricing.feature_matrix, plus model time.
+
+    python benchmarks/bench_pricing.py --properties 100000 --repeat 3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pricing
+import typed_frames
+from bench_recommendations import make_properties
+
+
+def per_row_features(properties, columns):
+    """The usual hand-written approach: one dict per listing, then a DataFrame."""
+    rows = []
+    for _, row in properties.iterrows():
+        features = dict.fromkeys(columns, 0)
+        digits = ''.join(ch for ch in str(row['bedroomsbhk']) if ch.isdigit())
+        features['bhk'] = int(digits) if digits else 0
+        features['areasqft'] = row['areasqft']
+        for field in pricing.ONE_HOT_FIELDS:
+            key = f"{field}_{row[field]}"
+            if key in features:
+                features[key] = 1
+        rows.append(features)
+    return pd.DataFrame(rows, columns=columns).to_numpy(dtype=float)
+
+
+def timed(fn, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    properties = make_properties(args.properties, np.random.default_rng(13))
+    typed = typed_frames.apply_dtypes(properties.copy())
+    _, load_seconds = timed(pricing.get_model, 1)
+    model = pricing.get_model()
+    print(f"model load (first call): {load_seconds:6.2f} s")
+
+    per_row, per_row_seconds = timed(lambda: per_row_features(properties, model.layout.columns), 1)
+    vectorized, vectorized_seconds = timed(lambda: pricing.feature_matrix(properties, model.layout), args.repeat)
+    _, typed_seconds = timed(lambda: pricing.feature_matrix(typed, model.layout), args.repeat)
+    assert np.array_equal(per_row, vectorized)
+    print(f"{'features, per-row dicts':>28}: {per_row_seconds * 1000:9.1f} ms")
+    print(f"{'features, vectorized':>28}: {vectorized_seconds * 1000:9.1f} ms")
+    print(f"{'features, vectorized, typed':>28}: {typed_seconds * 1000:9.1f} ms")
+
+    prices, predict_seconds = timed(lambda: pricing.predict_prices(typed), args.repeat)
+    print(f"{'predict_prices':>28}: {predict_seconds * 1000:9.1f} ms "
+          f"({len(prices) / predict_seconds:,.0f} listings/s, {prices.notna().sum()} estimated)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Property Explorer filtering: pandas over the full table vs. PropertySearch.
+
+The pandas path is what the explorer did on every rerun: copy the cached
+properties frame and filter it, with a Python `apply` for amenities. The
+indexed path runs PropertySearch's count and first page (LIMIT 1000); its
+amenity filters test the stored amenity bitmask (see amenity_index.py):
+    python benchmarks/bench_property_search.py --properties 500000 --repeat 5
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db
+import property_search
+from amenity_index import AMENITY_REGISTRY
+from bench_recommendations import LOCALITIES
+from property_search import PropertyFilters, PropertySearch
+
+AMENITIES = list(AMENITY_REGISTRY)
+
+SCENARIOS = [
+    ("listing type only", ("Sale", "All", "All", (0, 0), [])),
+    ("sale + price range", ("Sale", "All", "All", (5000000, 9000000), [])),
+    ("rent + type + locality + price", ("Rent", "Apartment", "Kanakia", (20000, 40000), [])),
+    ("locality only", ("All", "All", "Kanakia", (0, 0), [])),
+    ("two amenities", ("All", "All", "All", (0, 0), ["Gymnasium", "Swimming Pool"])),
+    ("sale + type + amenity", ("Sale", "Bungalow", "All", (0, 0), ["Garden"])),
+]
+
+
+def make_properties(count, rng):
+    is_sale = rng.random(count) < 0.5
+    amenity_count = rng.integers(0, 5, size=count)
+    return pd.DataFrame({
+        "property_id": [f"PROP-{i}" for i in range(count)],
+        "listingtype": np.where(is_sale, "Sale", "Rent"),
+        "propertytype": rng.choice(["Apartment", "Bungalow", "Office Space", "Shop"], size=count),
+        "bedroomsbhk": rng.choice(["1 BHK", "2 BHK", "3 BHK", "4 BHK"], size=count),
+        "arealocality": rng.choice(LOCALITIES, size=count),
+        "amenities": [", ".join(rng.choice(AMENITIES, size=n, replace=False)) for n in amenity_count],
+        "askingprice": np.where(is_sale, rng.integers(20, 300, size=count) * 100000.0, np.nan),
+        "monthlyrent": np.where(is_sale, np.nan, rng.integers(10, 90, size=count) * 1000.0),
+    })
+
+
+def pandas_filter(df, listing_type, prop_type, locality, selected_price, selected_amenities):
+    """The explorer's original apply_filters."""
+    price_col = property_search.PRICE_COLUMNS.get(listing_type)
+    filtered_df = df.copy()
+    if listing_type != "All":
+        filtered_df = filtered_df[filtered_df['listingtype'] == listing_type]
+    if prop_type != "All":
+        filtered_df = filtered_df[filtered_df['propertytype'] == prop_type]
+    if locality != "All":
+        filtered_df = filtered_df[filtered_df['arealocality'] == locality]
+    if selected_price[1] > 0 and price_col:
+        filtered_df[price_col] = pd.to_numeric(filtered_df[price_col], errors='coerce')
+        filtered_df = filtered_df.dropna(subset=[price_col])
+        filtered_df = filtered_df[(filtered_df[price_col] >= selected_price[0]) & (filtered_df[price_col] <= selected_price[1])]
+    if selected_amenities:
+        filtered_df = filtered_df[filtered_df['amenities'].apply(
+            lambda x: set(selected_amenities).issubset(set(property_search.parse_amenities(x)))
+        )]
+    return filtered_df
+
+
+def to_filters(listing_type, prop_type, locality, price, amenities):
+    return PropertyFilters(
+        listing_type=None if listing_type == "All" else listing_type,
+        property_type=None if prop_type == "All" else prop_type,
+        locality=None if locality == "All" else locality,
+        min_price=price[0] if price[1] > 0 else None,
+        max_price=price[1] if price[1] > 0 else None,
+        amenities=tuple(amenities),
+    )
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    properties = make_properties(args.properties, np.random.default_rng(5))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        conn = sqlite3.connect(path)
+        properties.to_sql("properties", conn, index=False)
+        # utils.initialize_database creates this one on real databases.
+        conn.execute("CREATE INDEX idx_properties_property_id ON properties (property_id)")
+        start = time.perf_counter()
+        property_search.ensure_schema(conn)
+        property_search.backfill(conn)
+        conn.commit()
+        conn.close()
+        print(f"indexes + amenity backfill for {args.properties} listings: {time.perf_counter() - start:.1f} s")
+
+        search = PropertySearch(path)
+        search.facets()
+        for label, scenario in SCENARIOS:
+            filters = to_filters(*scenario)
+            old_ms, expected = timed(lambda: pandas_filter(properties, *scenario), args.repeat)
+            new_ms, (total, page) = timed(lambda: (search.count(filters), search.search(filters)), args.repeat)
+            assert total == len(expected), (label, total, len(expected))
+            assert set(page['property_id']) <= set(expected['property_id'])
+            print(f"{label:>32}: {total:>7} matches  pandas={old_ms:8.1f} ms  indexed={new_ms:7.1f} ms  "
+                  f"({old_ms / new_ms:5.1f}x)")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Full-scan recommendations vs. RecommendationIndex on a synthetic inventory.
+
+    python benchmarks/bench_recommendations.py --properties 150000 --queries 200
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from recommendation_index import RecommendationIndex
+from utils import find_budget
+
+LOCALITIES = ["Mira Road East", "Bhayandar West", "Bhayandar East", "Shanti Nagar", "Golden Nest",
+              "Beverly Park", "Shivar Garden", "Jesal Park", "Kanakia"]
+
+
+def make_properties(count, rng):
+    listing_types = rng.choice(["Sale", "Rent"], size=count)
+    is_sale = listing_types == "Sale"
+    return pd.DataFrame({
+        "property_id": [f"PROP-{i}" for i in range(count)],
+        "listingtype": listing_types,
+        "propertytype": rng.choice(["Apartment", "Bungalow", "Office Space", "Shop"], size=count),
+        "bedroomsbhk": rng.choice(["1 BHK", "2 BHK", "3 BHK", "4 BHK", "5 BHK", None], size=count),
+        "arealocality": rng.choice(LOCALITIES, size=count),
+        "areasqft": rng.integers(400, 3000, size=count),
+        "askingprice": np.where(is_sale, rng.integers(20, 300, size=count) * 100000.0, np.nan),
+        "monthlyrent": np.where(is_sale, np.nan, rng.integers(10, 90, size=count) * 1000.0),
+    })
+
+
+def make_clients(count, rng):
+    clients = []
+    for i in range(count):
+        if rng.random() < 0.5:
+            clients.append(pd.Series({"client_id": f"CL-{i}", "lookingfor": "Sale",
+                                      "requirements": f"{rng.integers(1, 5)} BHK in {rng.choice(LOCALITIES)}, Budget {rng.integers(40, 200)}L"}))
+        else:
+            clients.append(pd.Series({"client_id": f"CL-{i}", "lookingfor": "Rent",
+                                      "requirements": f"{rng.integers(1, 5)} BHK in {rng.choice(LOCALITIES)}, Rent up to {rng.integers(15, 80)},000"}))
+    return clients
+
+
+def parse(client):
+    text = str(client['requirements'])
+    location = re.search(r'\bin\s+([\w\s]+)', text, re.IGNORECASE)
+    bhk = re.search(r'(\d+)\s*BHK', text)
+    return find_budget(text), int(bhk.group(1)) if bhk else 0, location.group(1).strip() if location else 'Any'
+
+
+def full_scan(properties_df, client):
+    """The pre-index implementation of utils.get_recommendations."""
+    properties_df = properties_df.copy()
+    req_budget, req_bhk, req_location = parse(client)
+    properties_df['bhk_numeric'] = pd.to_numeric(properties_df['bedroomsbhk'].astype(str).str.extract(r'(\d+)').iloc[:, 0], errors='coerce').fillna(0)
+    price_col = 'askingprice' if client['lookingfor'].lower() == 'sale' else 'monthlyrent'
+    properties_df['price_numeric'] = pd.to_numeric(properties_df[price_col], errors='coerce')
+    base_filter = (properties_df['listingtype'].str.lower() == client['lookingfor'].lower()) & (properties_df['bhk_numeric'] >= req_bhk)
+    budget_ceiling = req_budget * 1.15
+    tier1_filter = base_filter & (properties_df['price_numeric'] <= budget_ceiling)
+    if req_location != 'Any':
+        tier1_filter = tier1_filter & (properties_df['arealocality'].str.contains(req_location, case=False, na=False))
+    perfect = properties_df[tier1_filter]
+    good = properties_df[base_filter & (properties_df['price_numeric'] <= budget_ceiling)]
+    core = properties_df[base_filter]
+    return pd.concat([perfect, good, core]).drop_duplicates(subset=['property_id']).head(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=150000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    properties = make_properties(args.properties, rng)
+    clients = make_clients(args.queries, rng)
+
+    start = time.perf_counter()
+    index = RecommendationIndex(properties)
+    for key in ("sale", "rent"):
+        index._partition(key)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    scan_times, index_times = [], []
+    for client in clients[: min(len(clients), 20)]:
+        start = time.perf_counter()
+        expected = full_scan(properties, client)['property_id'].tolist()
+        scan_times.append((time.perf_counter() - start) * 1000)
+        got = [row['property_id'] for row in index.recommend(client, *parse(client))["recommendations"]]
+        assert got == expected, (client['requirements'], got, expected)
+
+    for client in clients:
+        req_budget, req_bhk, req_location = parse(client)
+        start = time.perf_counter()
+        index.recommend(client, req_budget, req_bhk, req_location)
+        index_times.append((time.perf_counter() - start) * 1000)
+
+    print(f"properties: {args.properties:,}  queries: {len(clients)}")
+    print(f"index build: {build_ms:.1f} ms (once per data version)")
+    print(f"full scan  : median {statistics.median(scan_times):.2f} ms/query")
+    print(f"index      : median {statistics.median(index_times):.2f} ms/query, "
+          f"p99 {sorted(index_times)[int(len(index_times) * 0.99) - 1]:.2f} ms")
+    print("results identical on the sampled clients")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Report image acquisition: sequential requests.get per property vs. report_images.ImageFetcher.
+
+A local HTTP server stands in for the image CDN and adds a fixed latency to every
+response. Reports the time to collect the images of one report, cold and warm cache:
+    python benchmarks/bench_report_images.py --properties 10 --latency 0.5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from report_images import ImageFetcher
+
+PROPERTY_TYPES = ["apartment", "bungalow", "office", "shop"]
+
+
+def start_server(latency, body):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--image-kb", type=int, default=200)
+    args = parser.parse_args()
+
+    server = start_server(args.latency, os.urandom(args.image_kb * 1024))
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    # Each report mixes the stock photos of a few property types, as get_property_images does.
+    urls = [f"{base}/{PROPERTY_TYPES[i % len(PROPERTY_TYPES)]}.jpeg" for i in range(args.properties)]
+
+    start = time.perf_counter()
+    for url in urls:
+        requests.get(url, timeout=5).content
+    print(f"{'sequential':>16}: {time.perf_counter() - start:6.2f} s for {len(urls)} images")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = ImageFetcher(os.path.join(tmp, "cache"))
+        for label in ("fetcher, cold", "fetcher, warm"):
+            start = time.perf_counter()
+            images = fetcher.fetch_many(urls)
+            print(f"{label:>16}: {time.perf_counter() - start:6.2f} s for {len(urls)} images "
+                  f"({sum(image is not None for image in images)} loaded)")
+        print(f"stats: {fetcher.stats()}")
+        fetcher.shutdown()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
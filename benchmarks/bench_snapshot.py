@@ -0,0 +1,96 @@
+"""
+Loading the properties table: `utils.get_all_properties_df` (pd.read_sql) vs. columnar snapshots.
+
+Each approach runs in a fresh subprocess and reports load time and the growth
+of peak RSS over the interpreter's baseline after imports:
+    python benchmarks/bench_snapshot.py --properties 500000
+"""
+
+import argparse
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bench_recommendations import make_properties
+
+APPROACHES = ["live", "arrow", "arrow-dtypes", "arrow-3-columns", "parquet"]
+MARKET_COLUMNS = ["listingtype", "arealocality", "askingprice"]
+
+
+def make_database(path, count, rng):
+    properties = make_properties(count, rng)
+    properties["listingdate"] = (np.datetime64("2024-01-01") + rng.integers(0, 600, size=count)).astype(str)
+    properties["listingdate"] += " 00:00:00"
+    properties["buildingsociety"] = rng.choice(["Dada Enclave", "Deep Towers", "Sea Breeze", "Sunrise Heights"], size=count)
+    properties["areasqft"] = rng.integers(300, 3000, size=count)
+    properties["amenities"] = rng.choice(["Gymnasium, Garden", "Swimming Pool", "Power Backup, Elevator", None], size=count)
+    properties["ownername"] = [f"Owner {i}" for i in range(count)]
+    properties["ownerphone"] = rng.integers(7000000000, 9999999999, size=count)
+    conn = sqlite3.connect(path)
+    properties.to_sql("properties", conn, index=False, dtype={"listingdate": "TIMESTAMP"})
+    conn.close()
+
+
+def run(approach, db_path, directory):
+    if approach == "live":
+        import utils
+        baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        frame = utils.get_all_properties_df()
+    else:
+        import snapshot
+        fmt_dir = os.path.join(directory, "parquet" if approach == "parquet" else "arrow")
+        baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        columns = {"properties": MARKET_COLUMNS} if approach == "arrow-3-columns" else None
+        frame = snapshot.load_snapshot(fmt_dir, ["properties"], columns, arrow_dtypes=approach == "arrow-dtypes")["properties"]
+    # Touch the data the way the Market Analysis page does.
+    mean_price = frame[frame["listingtype"] == "Sale"].groupby("arealocality")["askingprice"].mean()
+    seconds = time.perf_counter() - start
+    peak_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1024
+    print(json.dumps({"seconds": seconds, "peak_mb": peak_mb, "rows": len(frame), "groups": len(mean_price)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=500000)
+    parser.add_argument("--run", nargs=3, metavar=("APPROACH", "DB", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        make_database(db_path, args.properties, np.random.default_rng(7))
+        env = dict(os.environ, REAL_ESTATE_DB_PATH=db_path)
+        # Run the migrations utils.startup applies before timing anything.
+        subprocess.run([sys.executable, "-c", "import utils; utils.initialize_database()"], check=True, env=env,
+                       cwd=os.path.join(os.path.dirname(__file__), '..'), capture_output=True)
+
+        import snapshot
+        for fmt in ("arrow", "parquet"):
+            start = time.perf_counter()
+            snapshot.export_snapshot(db_path, os.path.join(tmp, fmt), fmt, tables=["properties"])
+            size = os.path.getsize(os.path.join(tmp, fmt, "properties" + snapshot.FORMATS[fmt]))
+            print(f"export {fmt:>7}: {time.perf_counter() - start:5.1f} s, {size / 1e6:6.1f} MB")
+
+        for approach in APPROACHES:
+            output = subprocess.run([sys.executable, __file__, "--run", approach, db_path, tmp],
+                                    check=True, capture_output=True, text=True, env=env).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{approach:>16}: {result['rows']} rows  load+aggregate {result['seconds'] * 1000:8.1f} ms  "
+                  f"peak RSS +{result['peak_mb']:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
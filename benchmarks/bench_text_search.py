@@ -0,0 +1,109 @@
+"""
+Home Quick Jump: pandas `str.contains` over the loaded frames vs. the FTS5 indexes.
+
+The pandas path is the sidebar's original per-keystroke filter (six substring
+scans, first five hits of each kind); the indexed path is
+`text_search.search` for clients/notes and properties:
+    python benchmarks/bench_text_search.py --clients 100000 --properties 200000 --repeat 5
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db
+import text_search
+from bench_batch_recommendations import make_clients
+from bench_recommendations import make_properties
+
+FIRST_NAMES = ["Devika", "Chaman", "Bhavani", "Arjun", "Meera", "Rohit", "Sana", "Kabir", "Isha", "Vikram"]
+LAST_NAMES = ["Khosla", "Seshadri", "Keer", "Patil", "Iyer", "Shah", "Nair", "Desai", "Rao", "Kapoor"]
+NOTES = ["Called, no answer", "Site visit planned for the weekend", "Wants a sea-facing flat near the station",
+         "Negotiating on the maintenance charges", "Prefers a higher floor with parking"]
+TERMS = ["devika", "kapoor", "9820", "cl-1234", "mira road", "sea fac"]
+
+
+def quick_jump_pandas(clients_df, properties_df, term):
+    """The sidebar's original filter."""
+    jump_term = term.strip().lower()
+    client_matches = clients_df[
+        clients_df['name'].astype(str).str.contains(jump_term, case=False, na=False) |
+        clients_df['phone'].astype(str).str.contains(jump_term, case=False, na=False) |
+        clients_df['client_id'].astype(str).str.contains(jump_term, case=False, na=False)
+    ].head(5)
+    property_matches = properties_df[
+        properties_df['property_id'].astype(str).str.contains(jump_term, case=False, na=False) |
+        properties_df['arealocality'].astype(str).str.contains(jump_term, case=False, na=False) |
+        properties_df['propertytype'].astype(str).str.contains(jump_term, case=False, na=False)
+    ].head(5)
+    return client_matches, property_matches
+
+
+def quick_jump_fts(path, term):
+    return (text_search.search(path, term, limit=10, kinds=('client', 'note')).drop_duplicates('id').head(5),
+            text_search.search(path, term, limit=5, kinds=('property',)))
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=100000)
+    parser.add_argument("--properties", type=int, default=200000)
+    parser.add_argument("--notes", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    clients = make_clients(args.clients, rng)
+    clients["name"] = [f"{first} {last}" for first, last in zip(rng.choice(FIRST_NAMES, size=args.clients),
+                                                                 rng.choice(LAST_NAMES, size=args.clients))]
+    clients["phone"] = rng.integers(7000000000, 9999999999, size=args.clients)
+    properties = make_properties(args.properties, rng)
+    properties["propertytype"] = rng.choice(["Apartment", "Bungalow", "Office Space", "Shop"], size=args.properties)
+    notes = pd.DataFrame({
+        "client_id": rng.choice(clients["client_id"], size=args.notes),
+        "timestamp": "2024-01-01 10:00:00",
+        "note": rng.choice(NOTES, size=args.notes),
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        conn = sqlite3.connect(path)
+        clients.to_sql("clients", conn, index=False)
+        properties.to_sql("properties", conn, index=False)
+        notes.to_sql("communication_log", conn, index=False)
+        start = time.perf_counter()
+        text_search.ensure_schema(conn)
+        conn.commit()
+        conn.close()
+        print(f"FTS5 index build ({args.clients} clients, {args.properties} properties, {args.notes} notes): "
+              f"{time.perf_counter() - start:.1f} s")
+
+        quick_jump_fts(path, "warm")
+        for term in TERMS:
+            old_ms = timed(lambda: quick_jump_pandas(clients, properties, term), args.repeat)
+            new_ms = timed(lambda: quick_jump_fts(path, term), args.repeat)
+            found = sum(len(frame) for frame in quick_jump_fts(path, term))
+            print(f"{term!r:>12}: {found:>2} hits  str.contains={old_ms:8.1f} ms  fts5={new_ms:6.1f} ms  "
+                  f"({old_ms / new_ms:6.1f}x)")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
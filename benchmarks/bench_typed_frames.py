@@ -0,0 +1,66 @@
+"""
+Loading properties with `pd.read_sql("SELECT * ...")` vs. `typed_frames.read_properties`.
+
+Reports load time and bytes per row of each frame, then the RecommendationIndex
+build and query time on top of each:
+    python benchmarks/bench_typed_frames.py --properties 500000 --queries 200
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import typed_frames
+from bench_recommendations import make_clients, parse
+from bench_snapshot import make_database
+from recommendation_index import RecommendationIndex
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    clients = make_clients(args.queries, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        make_database(db_path, args.properties, rng)
+        conn = sqlite3.connect(db_path)
+        loaders = {
+            "read_sql": lambda: pd.read_sql("SELECT * FROM properties", conn),
+            "typed_frames": lambda: typed_frames.read_properties(conn),
+        }
+        for name, loader in loaders.items():
+            frame, load_seconds = timed(loader)
+            index, build_seconds = timed(lambda: RecommendationIndex(frame))
+            latencies = []
+            for client in clients:
+                budget, bhk, location = parse(client)
+                start = time.perf_counter()
+                index.recommend(client, budget, bhk, location)
+                latencies.append(time.perf_counter() - start)
+            print(f"{name:>12}: load {load_seconds:6.2f} s  {typed_frames.memory_per_row(frame):7.0f} B/row  "
+                  f"index build {build_seconds:6.2f} s ({typed_frames.memory_per_row(index._frame):5.0f} B/row)  "
+                  f"query median {statistics.median(latencies) * 1000:6.2f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
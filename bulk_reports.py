@@ -0,0 +1,219 @@
+"""
+Batch PDF shortlists for many clients ("send every active client their shortlist").
+
+``generate_reports`` picks clients by id list and/or status, then:
+- computes all their recommendations with ``utils.get_recommendations_bulk``
+  (one index, shared core/locality lookups);
+- loads every distinct report image once through ``report_images`` and
+  decodes it once, downscaled to a JPEG no wider than ``IMAGE_MAX_PX``. fpdf
+  embeds JPEG bytes as they are, so no document decodes or re-encodes an
+  image again;
+- renders the PDFs with ``utils.render_property_report`` on a process pool
+  whose workers receive the prepared images once, at start-up;
+- writes ``Property_Report_<client_id>.pdf`` files into a directory, or into
+  a zip when ``output`` ends in ``.zip``.
+
+Clients without any recommendation get no report. ``progress`` is called
+with a ``ReportProgress`` after every client.
+
+    python bulk_reports.py reports.zip [--active | --status Negotiating ...] [--workers 4]
+"""
+
+import argparse
+import logging
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from PIL import Image
+
+import db
+import report_images
+import utils
+
+logger = logging.getLogger(__name__)
+
+INACTIVE_STATUSES = ("Deal Closed", "Lost Interest", "On Hold")
+REPORT_WORKERS = min(8, os.cpu_count() or 1)
+# Reports are planned (recommendations + image sources) this many clients at a time.
+PLAN_CHUNK = 500
+IMAGE_MAX_PX = 800
+JPEG_QUALITY = 85
+
+Job = Tuple[str, dict, list, list]
+
+
+class ReportProgress(NamedTuple):
+    clients: int
+    total: int
+    written: int
+    skipped: int
+    seconds: float
+
+    @property
+    def reports_per_second(self) -> float:
+        return self.written / self.seconds if self.seconds else 0.0
+
+
+def select_clients(db_path: str, client_ids: Optional[Sequence[str]] = None,
+                   statuses: Optional[Sequence[str]] = None, active_only: bool = False) -> List[str]:
+    """Client ids to report on, in table order (or ``client_ids`` order when given)."""
+    conditions, params = [], []
+    if statuses:
+        conditions.append(f"status IN ({', '.join('?' * len(statuses))})")
+        params.extend(statuses)
+    if active_only:
+        conditions.append(f"COALESCE(status, '') NOT IN ({', '.join('?' * len(INACTIVE_STATUSES))})")
+        params.extend(INACTIVE_STATUSES)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    with db.connection(db_path) as conn:
+        selected = [row[0] for row in conn.execute(f"SELECT client_id FROM clients{where} ORDER BY rowid", params)]
+    if client_ids is None:
+        return selected
+    allowed = set(selected)
+    return [client_id for client_id in dict.fromkeys(client_ids) if client_id in allowed]
+
+
+def prepare_image(content: Optional[bytes]) -> Optional[bytes]:
+    """Decodes once and re-encodes as a JPEG sized for the report; None when unreadable."""
+    if content is None:
+        return None
+    try:
+        with Image.open(BytesIO(content)) as image:
+            image = image.convert("RGB")
+            image.thumbnail((IMAGE_MAX_PX, IMAGE_MAX_PX))
+            buffer = BytesIO()
+            image.save(buffer, format="JPEG", quality=JPEG_QUALITY)
+    except (OSError, ValueError):
+        logger.warning("Unreadable report image; the report will show a placeholder", exc_info=True)
+        return None
+    return buffer.getvalue()
+
+
+def _plan(client_ids: List[str], db_path: str, images: Dict[str, Optional[bytes]],
+          fetcher) -> Iterator[Tuple[str, Optional[Job]]]:
+    """Yields (client id, render job or None) per client, loading images not seen yet."""
+    for start in range(0, len(client_ids), PLAN_CHUNK):
+        results = list(utils.get_recommendations_bulk(client_ids[start:start + PLAN_CHUNK], db_path=db_path))
+        recommendations = [prop for result in results for prop in result['recommendations']]
+        sources = iter(utils._report_image_sources(recommendations, db_path))
+        chunk_sources = [[next(sources) for _ in result['recommendations']] for result in results]
+        missing = list(dict.fromkeys(source for per_client in chunk_sources for source in per_client
+                                     if source not in images))
+        images.update(zip(missing, map(prepare_image, fetcher.fetch_many(missing))))
+        for result, per_client in zip(results, chunk_sources):
+            if not result['recommendations']:
+                yield result['client_id'], None
+            else:
+                yield result['client_id'], (result['client_id'], result.get('client_details', {}),
+                                            result['recommendations'], per_client)
+
+
+def _render(job: Job, images: Dict[str, Optional[bytes]]) -> Tuple[str, bytes]:
+    client_id, client_details, recommendations, sources = job
+    pdf = utils.render_property_report(client_details, recommendations, [images.get(source) for source in sources])
+    return f"Property_Report_{client_id}.pdf", pdf
+
+
+_worker_images: Dict[str, Optional[bytes]] = {}
+
+
+def _init_worker(images: Dict[str, Optional[bytes]]) -> None:
+    global _worker_images
+    _worker_images = images
+
+
+def _render_in_worker(job: Job) -> Tuple[str, bytes]:
+    return _render(job, _worker_images)
+
+
+class _Output:
+    """Writes reports into a directory, or a zip when the path ends in .zip."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._zip: Optional[zipfile.ZipFile] = None
+        if path.lower().endswith(".zip"):
+            parent = os.path.dirname(os.path.abspath(path))
+            os.makedirs(parent, exist_ok=True)
+            # The PDFs are already compressed; deflating them again costs time for nothing.
+            self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED)
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def write(self, filename: str, content: bytes) -> None:
+        if self._zip is not None:
+            self._zip.writestr(filename, content)
+        else:
+            with open(os.path.join(self.path, filename), "wb") as handle:
+                handle.write(content)
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+
+
+def generate_reports(output: str, client_ids: Optional[Sequence[str]] = None,
+                     statuses: Optional[Sequence[str]] = None, active_only: bool = False,
+                     workers: int = REPORT_WORKERS, db_path: Optional[str] = None, fetcher=None,
+                     progress: Optional[Callable[[ReportProgress], None]] = None) -> ReportProgress:
+    """Writes one PDF shortlist per selected client to ``output``; ``workers`` <= 1 renders in-process."""
+    db_path = db_path or utils.DB_FILE_PATH
+    selected = select_clients(db_path, client_ids, statuses, active_only)
+    start = time.perf_counter()
+    images: Dict[str, Optional[bytes]] = {}
+    planned = list(_plan(selected, db_path, images, fetcher or report_images))
+    jobs = [job for _, job in planned if job is not None]
+    skipped = len(planned) - len(jobs)
+    report = ReportProgress(skipped, len(selected), 0, skipped, time.perf_counter() - start)
+    logger.info("%d clients selected, %d with recommendations, %d images", len(selected), len(jobs), len(images))
+
+    output_files = _Output(output)
+    pool = None
+    try:
+        if workers > 1 and len(jobs) > 1:
+            pool = ProcessPoolExecutor(min(workers, len(jobs)), initializer=_init_worker, initargs=(images,))
+            rendered = pool.map(_render_in_worker, jobs, chunksize=max(1, min(16, len(jobs) // (workers * 4))))
+        else:
+            rendered = (_render(job, images) for job in jobs)
+        for filename, pdf in rendered:
+            output_files.write(filename, pdf)
+            report = report._replace(clients=report.clients + 1, written=report.written + 1,
+                                     seconds=time.perf_counter() - start)
+            if progress is not None:
+                progress(report)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        output_files.close()
+    logger.info("%d reports written to %s in %.1f s (%.1f reports/s)", report.written, output, report.seconds,
+                report.reports_per_second)
+    return report
+
+
+def _log_progress(report: ReportProgress) -> None:
+    if report.clients % 100 == 0 or report.clients == report.total:
+        logger.info("%d/%d clients, %d reports (%.1f reports/s)", report.clients, report.total, report.written,
+                    report.reports_per_second)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a PDF shortlist for every selected client.")
+    parser.add_argument("output", help="directory, or a path ending in .zip")
+    parser.add_argument("--db", default=utils.DB_FILE_PATH)
+    parser.add_argument("--client", action="append", dest="client_ids", help="client id (repeatable)")
+    parser.add_argument("--status", action="append", dest="statuses", help="client status (repeatable)")
+    parser.add_argument("--active", action="store_true", help=f"skip clients marked {', '.join(INACTIVE_STATUSES)}")
+    parser.add_argument("--workers", type=int, default=REPORT_WORKERS)
+    args = parser.parse_args()
+    # Migrations only: no background writer thread may be running when the worker pool forks.
+    utils.startup(args.db, refresh_prices=False)
+    generate_reports(args.output, args.client_ids, args.statuses, args.active, args.workers, args.db,
+                     progress=_log_progress)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Structured, stored parse of the free-text client ``requirements`` field.
+
+``parse`` turns text such as "2 BHK in Bhayandar West, Budget 85L" into a
+``ParsedRequirements`` (budget in rupees, minimum BHK, locality, whether the
+client is flexible on location). A locality naming "anywhere" parses to
+``'Any'``, so recommendations treat those clients as open to every locality.
+The result is written to the ``client_requirements`` side table whenever a
+client is written and read back by recommendations, lead scoring and the
+pages, so hot paths never re-run the regexes.
+
+Each stored row keeps the text it was parsed from and ``PARSER_VERSION``.
+Rows that no longer match their client (external edits, an older parser) are
+re-parsed in memory on read and rewritten by ``backfill``, which
+``utils.initialize_database`` runs as a migration.
+"""
+
+import functools
+import logging
+import re
+import sqlite3
+from typing import Any, Iterable, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+import db
+
+logger = logging.getLogger(__name__)
+
+PARSER_VERSION = 1
+TABLE = "client_requirements"
+COLUMNS = ('req_budget', 'req_bhk', 'req_location', 'flexible_location')
+
+_BUDGET_PATTERN = r'Budget[^\d]*([\d,]+)L?'
+_RENT_PATTERN = r'Rent[^\d]*([\d,]+)'
+_LOCATION_PATTERN = r'\bin\s+([\w\s]+)'
+_BHK_PATTERN = r'(\d+)\s*BHK'
+
+_BUDGET_RE = re.compile(_BUDGET_PATTERN, re.IGNORECASE)
+_RENT_RE = re.compile(_RENT_PATTERN, re.IGNORECASE)
+_LOCATION_RE = re.compile(_LOCATION_PATTERN, re.IGNORECASE)
+_BHK_RE = re.compile(_BHK_PATTERN)
+
+
+class ParsedRequirements(NamedTuple):
+    budget: int
+    bhk: int
+    location: str
+    flexible_location: bool
+
+
+def _amount(digits: str) -> int:
+    digits = digits.replace(',', '')
+    return int(digits) if digits else 0
+
+
+@functools.lru_cache(maxsize=8192)
+def _parse_text(text: str) -> ParsedRequirements:
+    match = _BUDGET_RE.search(text)
+    if match:
+        budget = _amount(match.group(1)) * 100000
+    else:
+        match_rent = _RENT_RE.search(text)
+        budget = _amount(match_rent.group(1)) if match_rent else 0
+
+    location_match = _LOCATION_RE.search(text)
+    location = location_match.group(1).strip() if location_match else 'Any'
+    if 'anywhere' in location.lower():
+        location = 'Any'
+
+    bhk_match = _BHK_RE.search(text)
+    bhk = int(bhk_match.group(1)) if bhk_match else 0
+    return ParsedRequirements(budget, bhk, location, 'anywhere' in text.lower())
+
+
+def parse(text: Any) -> ParsedRequirements:
+    """Parses one requirements string (memoized on the text)."""
+    return _parse_text(str(text))
+
+
+def parse_many(requirements: pd.Series) -> pd.DataFrame:
+    """Vectorized ``parse`` over a Series; one row per input with ``COLUMNS``."""
+    text = requirements.astype(str)
+    sale = text.str.extract(_BUDGET_PATTERN, flags=re.IGNORECASE)[0]
+    rent = text.str.extract(_RENT_PATTERN, flags=re.IGNORECASE)[0]
+    sale_amount = pd.to_numeric(sale.str.replace(',', ''), errors='coerce').fillna(0) * 100000
+    rent_amount = pd.to_numeric(rent.str.replace(',', ''), errors='coerce').fillna(0)
+    budget = np.where(sale.notna(), sale_amount, np.where(rent.notna(), rent_amount, 0)).astype(np.int64)
+    location = text.str.extract(_LOCATION_PATTERN, flags=re.IGNORECASE)[0].str.strip().fillna('Any')
+    location = location.mask(location.str.lower().str.contains('anywhere', regex=False), 'Any')
+    bhk = pd.to_numeric(text.str.extract(_BHK_PATTERN)[0], errors='coerce').fillna(0).astype(int)
+    flexible = text.str.lower().str.contains('anywhere', regex=False)
+    return pd.DataFrame(
+        {'req_budget': budget, 'req_bhk': bhk, 'req_location': location, 'flexible_location': flexible},
+        index=requirements.index,
+    )
+
+
+def ensure_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {TABLE} "
+        "(client_id TEXT PRIMARY KEY, requirements TEXT, parser_version INTEGER, "
+        "req_budget INTEGER, req_bhk INTEGER, req_location TEXT, flexible_location INTEGER)"
+    )
+
+
+def _row(client_id: str, requirements: Any) -> Tuple:
+    parsed = parse(requirements)
+    return (client_id, str(requirements), PARSER_VERSION, parsed.budget, parsed.bhk,
+            parsed.location, int(parsed.flexible_location))
+
+
+def store(conn: sqlite3.Connection, client_id: str, requirements: Any) -> ParsedRequirements:
+    """Parses and upserts one client's requirements inside the caller's transaction."""
+    store_many(conn, [(client_id, requirements)])
+    return parse(requirements)
+
+
+def store_many(conn: sqlite3.Connection, rows: Iterable[Tuple[str, Any]]) -> None:
+    ensure_table(conn)
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {TABLE} (client_id, requirements, parser_version, req_budget, "
+        "req_bhk, req_location, flexible_location) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [_row(client_id, requirements) for client_id, requirements in rows],
+    )
+
+
+def rename(conn: sqlite3.Connection, old_id: str, new_id: str) -> None:
+    ensure_table(conn)
+    conn.execute(f"UPDATE {TABLE} SET client_id = ? WHERE client_id = ?", (new_id, old_id))
+
+
+def delete(conn: sqlite3.Connection, client_id: str) -> None:
+    ensure_table(conn)
+    conn.execute(f"DELETE FROM {TABLE} WHERE client_id = ?", (client_id,))
+
+
+def backfill(conn: sqlite3.Connection) -> int:
+    """Brings the side table in line with ``clients``; returns the rows rewritten."""
+    ensure_table(conn)
+    stale = conn.execute(
+        f"SELECT c.client_id, c.requirements FROM clients c LEFT JOIN {TABLE} r ON r.client_id = c.client_id "
+        "WHERE r.client_id IS NULL OR r.parser_version IS NOT ? OR r.requirements IS NOT CAST(c.requirements AS TEXT)",
+        (PARSER_VERSION,),
+    ).fetchall()
+    store_many(conn, stale)
+    conn.execute(f"DELETE FROM {TABLE} WHERE client_id NOT IN (SELECT client_id FROM clients)")
+    return len(stale)
+
+
+def for_client(conn: sqlite3.Connection, client_id: str, requirements: Any) -> ParsedRequirements:
+    """Returns the stored parse for one client, parsing in memory if it is missing or stale."""
+    try:
+        row = conn.execute(
+            f"SELECT requirements, parser_version, req_budget, req_bhk, req_location, flexible_location "
+            f"FROM {TABLE} WHERE client_id = ?",
+            (client_id,),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    if row is None or row[0] != str(requirements) or row[1] != PARSER_VERSION:
+        return parse(requirements)
+    return ParsedRequirements(int(row[2]), int(row[3]), row[4], bool(row[5]))
+
+
+def _load(db_path: str) -> pd.DataFrame:
+    try:
+        with db.connection(db_path) as conn:
+            return pd.read_sql(f"SELECT * FROM {TABLE}", conn)
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        logger.debug("No %s table in %s; parsing requirements in memory", TABLE, db_path)
+        return pd.DataFrame(columns=['client_id', 'requirements', 'parser_version', *COLUMNS])
+
+
+def lookup(db_path: str, clients: pd.DataFrame) -> pd.DataFrame:
+    """Returns ``COLUMNS`` aligned to ``clients`` (which needs client_id and requirements).
+
+    Stored rows come from a ``data_cache`` snapshot; only clients whose stored
+    parse is missing or stale are parsed, with the vectorized ``parse_many``.
+    """
+    stored = data_cache.get_frame(db_path, TABLE, lambda: _load(db_path))
+    stored = stored.drop_duplicates(subset=['client_id']).set_index('client_id')
+    keys = clients['client_id']
+    text = clients['requirements'].astype(str)
+    found = stored.reindex(keys)
+    fresh = (found['requirements'].to_numpy() == text.to_numpy()) & (found['parser_version'].to_numpy() == PARSER_VERSION)
+
+    result = pd.DataFrame(index=clients.index)
+    result['req_budget'] = pd.to_numeric(found['req_budget'], errors='coerce').fillna(0).astype(np.int64).to_numpy()
+    result['req_bhk'] = pd.to_numeric(found['req_bhk'], errors='coerce').fillna(0).astype(int).to_numpy()
+    result['req_location'] = found['req_location'].fillna('Any').astype(object).to_numpy()
+    result['flexible_location'] = pd.to_numeric(found['flexible_location'], errors='coerce').fillna(0).astype(bool).to_numpy()
+    stale = np.flatnonzero(~fresh)
+    if len(stale):
+        reparsed = parse_many(clients['requirements'].iloc[stale])
+        for column in COLUMNS:
+            result.iloc[stale, result.columns.get_loc(column)] = reparsed[column].to_numpy()
+    return result
+
+
+def from_row(row: Any) -> ParsedRequirements:
+    """Reads ``COLUMNS`` off a row that went through ``lookup``, else parses its text."""
+    if 'req_budget' in row:
+        return ParsedRequirements(int(row['req_budget']), int(row['req_bhk']), row['req_location'],
+                                  bool(row['flexible_location']))
+    return parse(row['requirements'])
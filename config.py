@@ -6,6 +6,9 @@ BASE_DIR = Path(__file__).resolve().parent
 
 DB_FILE_PATH = os.getenv("REAL_ESTATE_DB_PATH", str(BASE_DIR / "real_estate.db"))
 MEDIA_DIR = os.getenv("REAL_ESTATE_MEDIA_DIR", str(BASE_DIR / "uploads" / "media"))
+SNAPSHOT_DIR = os.getenv("REAL_ESTATE_SNAPSHOT_DIR", str(BASE_DIR / "data" / "snapshot"))
+PRICE_MODEL_PATH = os.getenv("REAL_ESTATE_PRICE_MODEL", str(BASE_DIR / "notebooks" / "price_predictor_model.joblib"))
+PRICE_MODEL_COLUMNS_PATH = os.getenv("REAL_ESTATE_PRICE_MODEL_COLUMNS", str(BASE_DIR / "notebooks" / "model_columns.json"))
 
 API_HOST = os.getenv("REAL_ESTATE_API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("REAL_ESTATE_API_PORT", "8000"))
@@ -14,6 +17,11 @@ STREAMLIT_PORT = int(os.getenv("REAL_ESTATE_STREAMLIT_PORT", "8501"))
 AI_API_KEY = os.getenv("REAL_ESTATE_AI_API_KEY", os.getenv("OPENAI_API_KEY", ""))
 AI_BASE_URL = os.getenv("REAL_ESTATE_AI_BASE_URL", os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"))
 AI_MODEL = os.getenv("REAL_ESTATE_AI_MODEL", os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+AI_CACHE_TTL_SECONDS = float(os.getenv("REAL_ESTATE_AI_CACHE_TTL", "600"))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("REAL_ESTATE_AI_CACHE_SIZE", "256"))
+AI_TIMEOUT_SECONDS = float(os.getenv("REAL_ESTATE_AI_TIMEOUT", "25"))
+AI_MAX_RETRIES = int(os.getenv("REAL_ESTATE_AI_MAX_RETRIES", "3"))
+AI_MAX_CONCURRENCY = int(os.getenv("REAL_ESTATE_AI_MAX_CONCURRENCY", "4"))
 
 LOG_LEVEL = os.getenv("REAL_ESTATE_LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
@@ -0,0 +1,126 @@
+"""
+Process-wide snapshot cache for the clients/properties/tasks DataFrames.
+
+Snapshots are keyed by a per-database data version. The version moves when
+either a write helper calls ``bump_version`` or SQLite's ``PRAGMA data_version``
+reports a commit from any other connection (another thread, the API process or
+a manual edit). Reads return the cached frame until the version changes.
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+import pandas as pd
+
+import db
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+_versions: Dict[str, int] = {}
+# db path -> [probe connection, last seen PRAGMA data_version]
+_probes: Dict[str, list] = {}
+# (db path, snapshot name) -> (version, frame)
+_snapshots: Dict[Tuple[str, str], Tuple[int, pd.DataFrame]] = {}
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _read_data_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def _invalidate(db_path: str) -> None:
+    stale_keys = [key for key in _snapshots if key[0] == db_path]
+    for key in stale_keys:
+        del _snapshots[key]
+    _stats["invalidations"] += 1
+
+
+def data_version(db_path: str) -> int:
+    """Returns the current data version of ``db_path``.
+
+    A dedicated probe connection never writes, so its ``PRAGMA data_version``
+    changes on every commit made anywhere else.
+    """
+    db_path = str(db_path)
+    with _lock:
+        probe = _probes.get(db_path)
+        if probe is None:
+            # Let the pool switch the file to WAL first; that switch would
+            # otherwise register as a commit on the probe.
+            db.get_connection(db_path)
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            _probes[db_path] = [conn, _read_data_version(conn)]
+            # Writes made while no probe was watching cannot be ruled out.
+            _versions[db_path] = _versions[db_path] + 1 if db_path in _versions else 0
+        else:
+            current = _read_data_version(probe[0])
+            if current != probe[1]:
+                probe[1] = current
+                _versions[db_path] = _versions.get(db_path, 0) + 1
+                _invalidate(db_path)
+        return _versions[db_path]
+
+
+def bump_version(db_path: str) -> int:
+    """Marks ``db_path`` as changed. Called by the write helpers after commit."""
+    db_path = str(db_path)
+    with _lock:
+        _versions[db_path] = _versions.get(db_path, 0) + 1
+        probe = _probes.get(db_path)
+        if probe is not None:
+            # Our own commit is already accounted for by the bump above.
+            probe[1] = _read_data_version(probe[0])
+        _invalidate(db_path)
+        return _versions[db_path]
+
+
+def get_frame(db_path: str, name: str, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """Returns a copy of the cached ``name`` snapshot, calling ``loader`` on a miss.
+
+    The version is read before loading, so a write that lands while the loader
+    runs moves the version and the next read reloads.
+    """
+    db_path = str(db_path)
+    version = data_version(db_path)
+    with _lock:
+        entry = _snapshots.get((db_path, name))
+        if entry is not None and entry[0] == version:
+            _stats["hits"] += 1
+            return entry[1].copy()
+        _stats["misses"] += 1
+
+    frame = loader()
+    with _lock:
+        _snapshots[(db_path, name)] = (version, frame)
+    return frame.copy()
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Returns hit/miss counters plus the cached snapshots and versions."""
+    with _lock:
+        stats: Dict[str, Any] = dict(_stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["snapshots"] = sorted(f"{path}:{name}" for path, name in _snapshots)
+        stats["versions"] = dict(_versions)
+    return stats
+
+
+def clear() -> None:
+    """Drops every snapshot and probe connection (used in tests).
+
+    Versions are kept so anything stamped with an older version stays stale.
+    """
+    with _lock:
+        _snapshots.clear()
+        for conn, _ in _probes.values():
+            try:
+                conn.close()
+            except sqlite3.Error:
+                logger.debug("Failed to close data-version probe", exc_info=True)
+        _probes.clear()
+        for key in _stats:
+            _stats[key] = 0
@@ -1,77 +1,317 @@
+"""
+Loads the clients and active listings from the Excel workbook into SQLite.
+
+Rows are streamed from the workbook (openpyxl read-only mode) and written in
+batched ``executemany`` transactions of ``CHUNK_ROWS`` rows, so memory stays
+bounded by one chunk whatever the size of the sheet. Key indexes are built
+after a fresh load rather than maintained row by row.
+
+``mode='merge'`` (the default) upserts on the key column: existing rows are
+updated in place, so their rowids and the tasks and communication log that
+refer to them are kept. ``mode='replace'`` drops and recreates the tables, as
+the original pandas import did.
+
+The import writes past the app's write helpers, so afterwards
+``sync_derived_tables`` runs ``utils.initialize_database`` and the price-score
+refresh on the target file to bring the side tables (parsed requirements, lead
+scores, amenities, search, market stats, price scores) in line with it.
+"""
+
+import argparse
 import os
 import re
 import sqlite3
 import logging
-import pandas as pd
+import time
+from datetime import date, datetime, time as dt_time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from openpyxl import load_workbook
 
+import amenity_index
+import price_scores
+import utils
 from config import DB_FILE_PATH
 
 logger = logging.getLogger(__name__)
 
+CHUNK_ROWS = 5000
+STAGING_TABLE = "import_staging"
+# pandas' default ``na_values``: cells holding exactly one of these were read
+# as NaN by the original ``pd.read_excel`` import and stored as NULL.
+NA_STRINGS = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A',
+    'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+
+class SheetSpec(NamedTuple):
+    sheet: str
+    table: str
+    key: str
+    renames: Dict[str, str]
+
+
+SHEETS = (
+    SheetSpec('Client_Database', 'clients', 'client_id',
+              {'clientid': 'client_id', 'clientname': 'name', 'clientphone': 'phone', 'clientemail': 'email'}),
+    SheetSpec('Active_Listings', 'properties', 'property_id', {'propertyid': 'property_id'}),
+)
+
+
+class ImportProgress(NamedTuple):
+    table: str
+    rows: int
+    inserted: int
+    updated: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def clean_col_name(col: Any) -> str:
+    return re.sub(r'[^A-Za-z0-9_]+', '', str(col)).lower()
+
 
 def clean_col_names(df):
     """Cleans column names to be database-friendly."""
-    cols = df.columns
-    new_cols = [re.sub(r'[^A-Za-z0-9_]+', '', col).lower() for col in cols]
-    df.columns = new_cols
+    df.columns = [clean_col_name(col) for col in df.columns]
     return df
 
 
-def setup_database(excel_file_path='data/Real_Estate_data.xlsx', db_file_path=DB_FILE_PATH):
+def _header(raw: Sequence[Any], renames: Dict[str, str]) -> List[str]:
+    # Mirrors pandas: blank headers become "Unnamed: n", repeats get ".1", ".2", ...
+    seen: Dict[str, int] = {}
+    columns = []
+    for position, name in enumerate(raw):
+        name = f"Unnamed: {position}" if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(renames.get(clean_col_name(name), clean_col_name(name)))
+    return columns
+
+
+def _sql_value(value: Any) -> Any:
+    if isinstance(value, str):
+        return None if value in NA_STRINGS else value
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, (date, dt_time)):
+        return value.isoformat()
+    return value
+
+
+def iter_sheet_chunks(excel_file_path: str, spec: SheetSpec,
+                      chunk_rows: int = CHUNK_ROWS) -> Tuple[List[str], Iterator[List[Tuple[Any, ...]]]]:
+    """The sheet's cleaned column names and an iterator over its rows in chunks of ``chunk_rows``."""
+    workbook = load_workbook(excel_file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook[spec.sheet].iter_rows(values_only=True)
+        columns = _header(next(rows, ()), spec.renames)
+    except Exception:
+        workbook.close()
+        raise
+
+    def chunks():
+        try:
+            chunk = []
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                row = tuple(_sql_value(value) for value in row[:len(columns)])
+                chunk.append(row + (None,) * (len(columns) - len(row)))
+                if len(chunk) >= chunk_rows:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            workbook.close()
+
+    return columns, chunks()
+
+
+def _with_amenity_mask(columns: List[str], chunk: List[Tuple[Any, ...]]) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+    # Parse amenities once at import; searches filter on the stored bitmask.
+    if 'amenities' not in columns or amenity_index.MASK_COLUMN in columns:
+        return columns, chunk
+    position = columns.index('amenities')
+    return columns + [amenity_index.MASK_COLUMN], [row + (amenity_index.parse_mask(row[position]),) for row in chunk]
+
+
+def _column_type(values: Sequence[Any]) -> str:
+    # The types pandas.to_sql would have declared for the same column.
+    present = [value for value in values if value is not None]
+    if not present:
+        return "TEXT"
+    if all(isinstance(value, bool) for value in present):
+        return "INTEGER"
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        has_float = any(isinstance(value, float) for value in present)
+        return "REAL" if has_float or len(present) < len(values) else "INTEGER"
+    if all(isinstance(value, str) and re.fullmatch(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d+)?", value)
+           for value in present):
+        return "TIMESTAMP"
+    return "TEXT"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _existing_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+
+
+def _prepare_table(conn: sqlite3.Connection, table: str, columns: List[str],
+                   chunk: List[Tuple[Any, ...]], mode: str) -> bool:
+    """Creates ``table`` (or adds missing columns) from the first chunk; returns whether it was created."""
+    if mode == 'replace':
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+    existing = _existing_columns(conn, table)
+    types = {column: _column_type([row[i] for row in chunk]) for i, column in enumerate(columns)}
+    if not existing:
+        definition = ", ".join(f"{_quote(column)} {types[column]}" for column in columns)
+        conn.execute(f"CREATE TABLE {_quote(table)} ({definition})")
+        return True
+    for column in columns:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(column)} {types[column]}")
+    return False
+
+
+def _merge_chunk(conn: sqlite3.Connection, table: str, key: str, columns: List[str],
+                 chunk: List[Tuple[Any, ...]]) -> Tuple[int, int]:
+    """Upserts ``chunk`` on ``key`` through a staging table; returns (inserted, updated)."""
+    names = ", ".join(_quote(column) for column in columns)
+    conn.execute(f"DROP TABLE IF EXISTS temp.{STAGING_TABLE}")
+    conn.execute(f"CREATE TEMP TABLE {STAGING_TABLE} ({names})")
+    conn.executemany(f"INSERT INTO temp.{STAGING_TABLE} VALUES ({', '.join('?' * len(columns))})", chunk)
+    # Last row wins when the sheet repeats a key within the chunk.
+    conn.execute(
+        f"DELETE FROM temp.{STAGING_TABLE} WHERE {_quote(key)} IS NOT NULL AND rowid NOT IN "
+        f"(SELECT MAX(rowid) FROM temp.{STAGING_TABLE} GROUP BY {_quote(key)})"
+    )
+    assignments = ", ".join(f"{_quote(column)} = s.{_quote(column)}" for column in columns if column != key)
+    updated = 0
+    if assignments:
+        updated = conn.execute(
+            f"UPDATE {_quote(table)} SET {assignments} FROM temp.{STAGING_TABLE} s "
+            f"WHERE {_quote(table)}.{_quote(key)} = s.{_quote(key)}"
+        ).rowcount
+    inserted = conn.execute(
+        f"INSERT INTO {_quote(table)} ({names}) SELECT {names} FROM temp.{STAGING_TABLE} s "
+        f"WHERE s.{_quote(key)} IS NULL OR NOT EXISTS "
+        f"(SELECT 1 FROM {_quote(table)} t WHERE t.{_quote(key)} = s.{_quote(key)})"
+    ).rowcount
+    conn.execute(f"DROP TABLE temp.{STAGING_TABLE}")
+    return inserted, updated
+
+
+def import_sheet(conn: sqlite3.Connection, excel_file_path: str, spec: SheetSpec, mode: str = 'merge',
+                 chunk_rows: int = CHUNK_ROWS,
+                 progress: Optional[Callable[[ImportProgress], None]] = None) -> ImportProgress:
+    """Streams one sheet into its table, committing every ``chunk_rows`` rows."""
+    columns, chunks = iter_sheet_chunks(excel_file_path, spec, chunk_rows)
+    if spec.key not in columns:
+        raise ValueError(f"Sheet {spec.sheet!r} has no {spec.key!r} column")
+    key_index = f"idx_{spec.table}_{spec.key}"
+    start = time.perf_counter()
+    report = ImportProgress(spec.table, 0, 0, 0, 0.0)
+    created = False
+    for number, chunk in enumerate(chunks):
+        chunk_columns, chunk = _with_amenity_mask(columns, chunk)
+        if number == 0:
+            created = _prepare_table(conn, spec.table, chunk_columns, chunk, mode)
+            if not created:
+                # Merging into rows already there: every chunk looks its keys up.
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {key_index} ON {_quote(spec.table)} ({_quote(spec.key)})")
+        if created:
+            conn.executemany(
+                f"INSERT INTO {_quote(spec.table)} ({', '.join(_quote(column) for column in chunk_columns)}) "
+                f"VALUES ({', '.join('?' * len(chunk_columns))})", chunk,
+            )
+            inserted, updated = len(chunk), 0
+        else:
+            inserted, updated = _merge_chunk(conn, spec.table, spec.key, chunk_columns, chunk)
+        conn.commit()
+        report = ImportProgress(spec.table, report.rows + len(chunk), report.inserted + inserted,
+                                report.updated + updated, time.perf_counter() - start)
+        logger.info("%s: %d rows imported (%.0f rows/s)", spec.table, report.rows, report.rows_per_second)
+        if progress is not None:
+            progress(report)
+    if report.rows == 0:
+        created = _prepare_table(conn, spec.table, _with_amenity_mask(columns, [])[0], [], mode)
+    if created:
+        # A fresh table is indexed once, after the load.
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {key_index} ON {_quote(spec.table)} ({_quote(spec.key)})")
+        conn.commit()
+    return report._replace(seconds=time.perf_counter() - start)
+
+
+def sync_derived_tables(db_file_path: str) -> None:
+    """Rebuilds the side tables the write helpers normally maintain from the imported rows."""
+    try:
+        utils.initialize_database(db_file_path)
+    except sqlite3.OperationalError:
+        # Sheets without the app's columns make a file the app cannot open either.
+        logger.warning("Imported tables in %s lack columns the app needs; derived tables not refreshed",
+                       db_file_path, exc_info=True)
+        return
+    price_scores.refresh_all(db_file_path)
+
+
+def setup_database(excel_file_path='data/Real_Estate_data.xlsx', db_file_path=DB_FILE_PATH, mode='merge',
+                   chunk_rows=CHUNK_ROWS, progress=None):
     """
     Initializes the SQLite database.
-    - Creates tables for clients and properties.
-    - Loads initial data from the Excel file.
+    - Creates or updates the clients and properties tables.
+    - Streams the initial data from the Excel file (see the module docstring).
+    - Refreshes the derived tables from the imported rows.
+    Returns one ImportProgress per table.
     """
-    logger.info("Starting database setup")
+    logger.info("Starting database setup (%s)", mode)
 
     if not os.path.exists(excel_file_path):
         raise FileNotFoundError(f"Excel file not found at {excel_file_path}")
+    if mode not in ('merge', 'replace'):
+        raise ValueError(f"Unknown import mode {mode!r}; expected 'merge' or 'replace'")
 
     # Connect to the SQLite database (this will create the file if it doesn't exist)
     conn = sqlite3.connect(db_file_path)
+    conn.execute("PRAGMA synchronous = NORMAL")
     logger.info("Connected to database at '%s'", db_file_path)
 
-    # --- Load and Clean Data from Excel ---
-    # Load and clean clients data
-    try:
-        clients_df = pd.read_excel(excel_file_path, sheet_name='Client_Database')
-        clients_df = clean_col_names(clients_df)
-        # Rename for clarity
-        clients_df.rename(columns={'clientid': 'client_id', 'clientname': 'name',
-                                   'clientphone': 'phone', 'clientemail': 'email'},
-                          inplace=True)
-    except Exception as e:
-        conn.close()
-        raise ValueError(f"Error loading clients data: {str(e)}")
-
-    # Load and clean active listings data
-    try:
-        properties_df = pd.read_excel(excel_file_path, sheet_name='Active_Listings')
-        properties_df = clean_col_names(properties_df)
-        # Rename for clarity
-        properties_df.rename(columns={'propertyid': 'property_id'}, inplace=True)
-    except Exception as e:
-        conn.close()
-        raise ValueError(f"Error loading properties data: {str(e)}")
-
-    # --- Write Data to SQLite Tables ---
+    reports = []
     try:
-        # The 'if_exists='replace'' will drop the table first if it exists and create a new one.
-        # This is useful for re-running the script during development.
-        clients_df.to_sql('clients', conn, if_exists='replace', index=False)
-        logger.info("Created 'clients' table and loaded data")
-
-        properties_df.to_sql('properties', conn, if_exists='replace', index=False)
-        logger.info("Created 'properties' table and loaded data")
-    except Exception as e:
-        logger.exception("Database setup failed while writing tables")
+        for spec in SHEETS:
+            try:
+                reports.append(import_sheet(conn, excel_file_path, spec, mode, chunk_rows, progress))
+            except (KeyError, ValueError) as e:
+                conn.rollback()
+                raise ValueError(f"Error loading {spec.table} data: {str(e)}")
+            logger.info("Loaded '%s': %d rows (%d new, %d updated) in %.1f s",
+                        spec.table, reports[-1].rows, reports[-1].inserted, reports[-1].updated, reports[-1].seconds)
     finally:
         # Close the connection
         conn.close()
         logger.info("Database connection closed")
+    sync_derived_tables(db_file_path)
+    return reports
 
 
 if __name__ == "__main__":
-    setup_database()
-    logger.info("Database setup complete")
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Import the Excel workbook into the SQLite database.")
+    parser.add_argument("excel_file_path", nargs="?", default='data/Real_Estate_data.xlsx')
+    parser.add_argument("--db", default=DB_FILE_PATH)
+    parser.add_argument("--replace", action="store_true", help="drop and recreate the tables instead of merging")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    setup_database(args.excel_file_path, args.db, 'replace' if args.replace else 'merge', args.chunk_rows)
+    logger.info("Database setup complete")
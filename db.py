@@ -0,0 +1,233 @@
+"""
+Shared SQLite connection management for the Streamlit pages and the API.
+
+Every thread gets one long-lived connection per database file. Connections are
+opened in WAL mode with tuned pragmas and a large prepared-statement cache, so
+repeated queries skip both the connect cost and SQL compilation.
+
+Async callers (the FastAPI handlers) hand their blocking work to ``run_read``
+or ``run_write`` instead of running it on the event loop. Reads go to a pool of
+long-lived worker threads, each holding its own pooled connection, so WAL
+readers run side by side; writes go to a single writer thread, which keeps
+SQLite's one-writer rule from turning into busy-timeout waits.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Applied to every new connection. journal_mode=WAL is persisted in the file,
+# the rest are per-connection settings.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",  # ~16 MB page cache
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+STATEMENT_CACHE_SIZE = 256
+# Same sizing rule as ThreadPoolExecutor's default.
+READ_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+T = TypeVar("T")
+
+
+class ConnectionPool:
+    """Hands out one pooled connection per (thread, database file).
+
+    Connections of threads that have exited (Streamlit starts a fresh script
+    thread per rerun) are reaped the next time a connection is opened.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[Any, sqlite3.Connection] = {}
+        self._threads: Dict[int, threading.Thread] = {}
+        self._stats = {"opened": 0, "reused": 0, "closed": 0}
+
+    def _open(self, db_path: str) -> sqlite3.Connection:
+        # check_same_thread=False only so the reaper can close connections of
+        # dead threads; a live connection is never shared between threads.
+        conn = sqlite3.connect(
+            db_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            try:
+                conn.execute(pragma)
+            except sqlite3.Error as exc:
+                logger.debug("Could not apply '%s' on %s: %s", pragma, db_path, exc)
+        return conn
+
+    def acquire(self, db_path: str) -> sqlite3.Connection:
+        """Returns this thread's connection to ``db_path``, opening it if needed."""
+        db_path = str(db_path)
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        conn = connections.get(db_path)
+        if conn is not None:
+            with self._lock:
+                self._stats["reused"] += 1
+            return conn
+
+        self._reap_dead_threads()
+        conn = self._open(db_path)
+        connections[db_path] = conn
+        thread = threading.current_thread()
+        with self._lock:
+            self._connections[(thread.ident, db_path)] = conn
+            self._threads[thread.ident] = thread
+            self._stats["opened"] += 1
+        logger.debug("Opened pooled connection to %s for thread %s", db_path, thread.name)
+        return conn
+
+    @contextmanager
+    def connection(self, db_path: str) -> Iterator[sqlite3.Connection]:
+        """Same contract as ``with sqlite3.connect(...)``: commit on success,
+        roll back on error, but the connection stays open for reuse."""
+        conn = self.acquire(db_path)
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def _reap_dead_threads(self) -> None:
+        with self._lock:
+            dead_idents = [ident for ident, thread in self._threads.items() if not thread.is_alive()]
+            if not dead_idents:
+                return
+            dead_keys = [key for key in self._connections if key[0] in dead_idents]
+            stale = [self._connections.pop(key) for key in dead_keys]
+            for ident in dead_idents:
+                del self._threads[ident]
+            self._stats["closed"] += len(stale)
+        for conn in stale:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                logger.debug("Failed to close stale pooled connection", exc_info=True)
+
+    def close_all(self) -> None:
+        """Closes every pooled connection (used on shutdown and in tests)."""
+        with self._lock:
+            stale = list(self._connections.values())
+            self._connections.clear()
+            self._threads.clear()
+            self._stats["closed"] += len(stale)
+        # Other threads' local maps still hold the closed handles; a fresh
+        # thread-local makes every thread reconnect on its next acquire.
+        self._local = threading.local()
+        for conn in stale:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                logger.debug("Failed to close pooled connection", exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["open"] = len(self._connections)
+            stats["threads"] = len(self._threads)
+            stats["databases"] = len({key[1] for key in self._connections})
+        total = stats["opened"] + stats["reused"]
+        stats["reuse_ratio"] = round(stats["reused"] / total, 4) if total else 0.0
+        stats["timestamp"] = time.time()
+        return stats
+
+
+_pool = ConnectionPool()
+
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """Returns the calling thread's pooled connection to ``db_path``."""
+    return _pool.acquire(db_path)
+
+
+def connection(db_path: str):
+    """Context manager yielding a pooled connection, committing on exit."""
+    return _pool.connection(db_path)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Returns counters describing pool usage (opened, reused, open, ...)."""
+    return _pool.stats()
+
+
+def close_all() -> None:
+    _pool.close_all()
+
+
+class DatabaseExecutor:
+    """Reader and writer thread pools for running blocking database work from async code."""
+
+    def __init__(self, read_workers: int = READ_WORKERS) -> None:
+        self.read_workers = read_workers
+        self._lock = threading.Lock()
+        self._readers: Optional[ThreadPoolExecutor] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._stats = {"reads": 0, "writes": 0}
+
+    def _executor(self, kind: str) -> ThreadPoolExecutor:
+        with self._lock:
+            self._stats[kind + "s"] += 1
+            if kind == "read":
+                if self._readers is None:
+                    self._readers = ThreadPoolExecutor(self.read_workers, thread_name_prefix="db-read")
+                return self._readers
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(1, thread_name_prefix="db-write")
+            return self._writer
+
+    async def run(self, kind: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor(kind), functools.partial(func, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["read_workers"] = self.read_workers
+        return stats
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executors = [executor for executor in (self._readers, self._writer) if executor is not None]
+            self._readers = self._writer = None
+        for executor in executors:
+            executor.shutdown(wait=True)
+
+
+_executor = DatabaseExecutor()
+
+
+async def run_read(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Runs ``func(*args, **kwargs)`` on a database reader thread and awaits the result."""
+    return await _executor.run("read", func, *args, **kwargs)
+
+
+async def run_write(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Runs ``func(*args, **kwargs)`` on the single database writer thread and awaits the result."""
+    return await _executor.run("write", func, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Any]:
+    return _executor.stats()
+
+
+def shutdown_executor() -> None:
+    """Stops the reader/writer threads; they are recreated on the next call."""
+    _executor.shutdown()
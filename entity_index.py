@@ -0,0 +1,240 @@
+"""
+Prebuilt lookup structures for resolving chat references to clients and properties.
+
+``EntityIndex`` replaces the per-message scans in ``assistant_engine``:
+
+- IDs (``CL-1001``, ``SALE-PROP-1001``) resolve through an exact hash map on the
+  upper-cased ID;
+- substring lookups ("rows whose name contains X") walk the shortest
+  character-trigram posting list of X in row order and verify each candidate,
+  so the first hit is the same row a full ``str.contains`` scan would return;
+- fuzzy name matching returns exactly what ``get_close_matches`` (cutoff
+  0.5, ties to the larger string) would. difflib's ``real_quick_ratio`` and
+  ``quick_ratio`` bounds need only the name lengths and character counts, so
+  they are computed for every name at once. ``ratio`` then runs on the names
+  whose bounds reach the cutoff, best bound first, and stops once no
+  remaining bound can beat the best ratio found.
+
+Resolution follows the original fallback order: ID, whole-text substring of a
+name, closest name, then any query token inside a name; properties try the ID,
+then a substring of the property type or locality.
+
+One index per entity kind and database is kept, stamped with the ``data_cache``
+version and rebuilt on the first lookup after a change.
+"""
+
+import logging
+import re
+import threading
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+
+logger = logging.getLogger(__name__)
+
+CLIENT_ID_PATTERN = re.compile(r"CL-\d+", re.IGNORECASE)
+PROPERTY_ID_PATTERN = re.compile(r"[A-Z]+-PROP-\d+", re.IGNORECASE)
+FUZZY_CUTOFF = 0.5
+TOKEN_MIN_LENGTH = 3
+
+_lock = threading.Lock()
+_indexes: Dict[Tuple[str, str], "EntityIndex"] = {}
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _TextField:
+    """Distinct lower-cased values of one column with a trigram index.
+
+    Values are kept in order of first appearance, so walking a posting list
+    visits candidates in table order.
+    """
+
+    def __init__(self, values: Iterable[str]) -> None:
+        first_seen: Dict[str, int] = {}
+        for position, value in enumerate(values):
+            first_seen.setdefault(value.lower(), position)
+        self.values = list(first_seen)
+        self.first_positions = list(first_seen.values())
+        self.postings: Dict[str, List[int]] = {}
+        for slot, value in enumerate(self.values):
+            for gram in _trigrams(value):
+                self.postings.setdefault(gram, []).append(slot)
+
+    def first_containing(self, needle: str) -> Optional[int]:
+        """Lowest row position whose value contains ``needle`` (already lower-cased)."""
+        if len(needle) < 3:
+            slots = range(len(self.values))
+        else:
+            lists = [self.postings.get(gram) for gram in _trigrams(needle)]
+            if not all(lists):
+                return None
+            slots = min(lists, key=len)
+        for slot in slots:
+            if needle in self.values[slot]:
+                return self.first_positions[slot]
+        return None
+
+
+def _ratio_bound(matches: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """difflib's ``2.0 * matches / length`` (1.0 for two empty strings), element-wise."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(lengths > 0, 2.0 * matches / lengths, 1.0)
+
+
+class _FuzzyNames:
+    """Distinct names with per-character counts, for exact ``get_close_matches`` lookups."""
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self.names = list(dict.fromkeys(names))
+        self.lengths = np.fromiter((len(name) for name in self.names), dtype=np.int64, count=len(self.names))
+        self.alphabet: Dict[str, int] = {}
+        rows, columns, values = [], [], []
+        for position, name in enumerate(self.names):
+            for char, count in Counter(name).items():
+                rows.append(self.alphabet.setdefault(char, len(self.alphabet)))
+                columns.append(position)
+                values.append(count)
+        # One row of counts per character, so a lookup reads only the query's characters.
+        self.counts = np.zeros((len(self.alphabet), len(self.names)), dtype=np.int32)
+        self.counts[rows, columns] = values
+
+    def closest(self, text: str, cutoff: float = FUZZY_CUTOFF) -> Optional[str]:
+        totals = self.lengths + len(text)
+        candidates = np.flatnonzero(_ratio_bound(np.minimum(self.lengths, len(text)), totals) >= cutoff)
+        matches = np.zeros(len(candidates), dtype=np.int64)
+        for char, count in Counter(text).items():
+            row = self.alphabet.get(char)
+            if row is not None:
+                matches += np.minimum(self.counts[row, candidates], count)
+        bounds = _ratio_bound(matches, totals[candidates])
+        keep = bounds >= cutoff
+        candidates, bounds = candidates[keep], bounds[keep]
+        order = np.argsort(-bounds, kind='stable')
+
+        matcher = SequenceMatcher()
+        matcher.set_seq2(text)
+        best: Optional[Tuple[float, str]] = None
+        for position, bound in zip(candidates[order].tolist(), bounds[order].tolist()):
+            if best is not None and bound < best[0]:
+                break
+            name = self.names[position]
+            matcher.set_seq1(name)
+            score = matcher.ratio()
+            if score >= cutoff and (best is None or (score, name) > best):
+                best = (score, name)
+        return best[1] if best is not None else None
+
+
+class EntityIndex:
+    """ID hash map plus text indexes over one entity table (clients or properties)."""
+
+    def __init__(self, frame: pd.DataFrame, id_column: str, text_columns: Iterable[str],
+                 fuzzy_column: Optional[str] = None, version: Optional[int] = None) -> None:
+        self.version = version
+        self.ids = frame[id_column].tolist() if id_column in frame.columns else []
+        self.by_id: Dict[str, str] = {}
+        for entity_id in self.ids:
+            self.by_id.setdefault(str(entity_id).upper(), entity_id)
+        self.fields = {
+            column: _TextField(frame[column].astype(str)) for column in text_columns if column in frame.columns
+        }
+        self.first_by_name: Dict[str, str] = {}
+        self.fuzzy = None
+        if fuzzy_column and fuzzy_column in frame.columns:
+            names = frame[fuzzy_column].astype(str).tolist()
+            for name, entity_id in zip(names, self.ids):
+                self.first_by_name.setdefault(name, entity_id)
+            self.fuzzy = _FuzzyNames(names)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def by_exact_id(self, entity_id: str) -> Optional[str]:
+        return self.by_id.get(entity_id.upper())
+
+    def first_containing(self, needle: str, columns: Iterable[str]) -> Optional[str]:
+        """First row (table order) where any of ``columns`` contains ``needle``, case-insensitively."""
+        hits = [self.fields[column].first_containing(needle.lower()) for column in columns if column in self.fields]
+        hits = [hit for hit in hits if hit is not None]
+        return self.ids[min(hits)] if hits else None
+
+    def closest_name(self, text: str) -> Optional[str]:
+        if self.fuzzy is None:
+            return None
+        name = self.fuzzy.closest(text)
+        return self.first_by_name.get(name) if name is not None else None
+
+    # --- Resolution in the assistant's fallback order ---
+
+    def resolve_client(self, reference_text: str) -> Optional[str]:
+        if not self.ids:
+            return None
+        match = CLIENT_ID_PATTERN.search(reference_text)
+        if match:
+            client_id = self.by_exact_id(match.group(0))
+            if client_id is not None:
+                return client_id
+        if 'name' not in self.fields:
+            return None
+
+        lower_text = reference_text.lower()
+        client_id = self.first_containing(lower_text, ['name'])
+        if client_id is not None:
+            return client_id
+        client_id = self.closest_name(reference_text)
+        if client_id is not None:
+            return client_id
+
+        tokens = [token for token in re.split(r"\s+", lower_text) if len(token) >= TOKEN_MIN_LENGTH]
+        hits = [self.fields['name'].first_containing(token) for token in tokens]
+        hits = [hit for hit in hits if hit is not None]
+        return self.ids[min(hits)] if hits else None
+
+    def resolve_property(self, reference_text: str) -> Optional[str]:
+        if not self.ids:
+            return None
+        match = PROPERTY_ID_PATTERN.search(reference_text)
+        if match:
+            property_id = self.by_exact_id(match.group(0))
+            if property_id is not None:
+                return property_id
+        if 'propertytype' in self.fields and 'arealocality' in self.fields:
+            return self.first_containing(reference_text, ['propertytype', 'arealocality'])
+        return None
+
+
+def _get(db_path: str, kind: str, build: Callable[[int], EntityIndex]) -> EntityIndex:
+    db_path = str(db_path)
+    with _lock:
+        version = data_cache.data_version(db_path)
+        index = _indexes.get((db_path, kind))
+        if index is None or index.version != version:
+            index = build(version)
+            _indexes[(db_path, kind)] = index
+            logger.debug("Built %s entity index for %s with %d rows", kind, db_path, len(index))
+        return index
+
+
+def client_index(db_path: str, loader: Callable[[], pd.DataFrame]) -> EntityIndex:
+    """Client index for ``db_path`` (``loader`` returns the clients snapshot)."""
+    return _get(db_path, "clients", lambda version: EntityIndex(
+        loader(), 'client_id', ['name'], fuzzy_column='name', version=version))
+
+
+def property_index(db_path: str, loader: Callable[[], pd.DataFrame]) -> EntityIndex:
+    """Property index for ``db_path`` (``loader`` returns the properties snapshot)."""
+    return _get(db_path, "properties", lambda version: EntityIndex(
+        loader(), 'property_id', ['propertytype', 'arealocality'], version=version))
+
+
+def clear() -> None:
+    with _lock:
+        _indexes.clear()
@@ -0,0 +1,226 @@
+"""
+Column-wise lead scoring and the persisted ``client_scores`` table.
+
+``score_clients`` computes the same score and rating as
+``utils.calculate_lead_score`` for a whole clients frame at once: the budget
+points, the "anywhere" penalty, communication-log activity and status bonus are
+each a NumPy ``select``/``where`` over precomputed arrays, and log counts are
+attached with a join instead of per-row dictionary lookups.
+
+``client_scores`` keeps one scored row per client together with the inputs it
+was scored from (looking-for, requirements, status, log count). Client write
+helpers call ``rescore`` for the clients they touched inside their own
+transaction; ``refresh`` rescores only rows whose inputs no longer match and
+runs from ``utils.initialize_database``, and again from ``prepare`` before a
+read whenever the data version moved and the stored inputs differ. Reads are
+an indexed ``ORDER BY score DESC``.
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import client_requirements
+import data_cache
+
+logger = logging.getLogger(__name__)
+
+SALE_BUDGET_TIERS = ((10000000, 30), (5000000, 15))
+RENT_BUDGET_TIERS = ((50000, 30), (25000, 15))
+FLEXIBLE_LOCATION_PENALTY = 10
+POINTS_PER_NOTE = 10
+STATUS_POINTS = {'Negotiating': 40, 'Site Visit Planned': 25}
+RATINGS = ((70, "🔥 Hot"), (40, "🟢 Warm"))
+DEFAULT_RATING = "🔵 Cold"
+
+SCORING_VERSION = 1
+TABLE = "client_scores"
+
+_lock = threading.Lock()
+# db path -> data version at which the stored inputs last matched the clients
+_checked: Dict[str, int] = {}
+
+
+def _budget_points(budget: np.ndarray, tiers) -> np.ndarray:
+    return np.select([budget > threshold for threshold, _ in tiers], [points for _, points in tiers], 0)
+
+
+def log_counts_for(clients: pd.DataFrame, log_counts: pd.DataFrame) -> np.ndarray:
+    """Joins ``log_counts`` (client_id, count) onto ``clients``; 0 where a client has no notes."""
+    counts = log_counts.drop_duplicates(subset=['client_id']).set_index('client_id')['count']
+    joined = counts.reindex(clients['client_id'].to_numpy())
+    return pd.to_numeric(joined, errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+
+def score_arrays(looking_for: np.ndarray, budget: np.ndarray, flexible_location: np.ndarray,
+                 log_count: np.ndarray, status: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Scores and ratings from aligned per-client arrays."""
+    budget = np.asarray(budget, dtype=np.int64)
+    score = np.where(
+        looking_for == 'Sale',
+        _budget_points(budget, SALE_BUDGET_TIERS),
+        _budget_points(budget, RENT_BUDGET_TIERS),
+    ).astype(np.int64)
+    score -= np.where(np.asarray(flexible_location, dtype=bool), FLEXIBLE_LOCATION_PENALTY, 0)
+    score += np.asarray(log_count, dtype=np.int64) * POINTS_PER_NOTE
+    score += np.select([status == name for name in STATUS_POINTS], list(STATUS_POINTS.values()), 0)
+    rating = np.select([score >= threshold for threshold, _ in RATINGS], [label for _, label in RATINGS],
+                       DEFAULT_RATING).astype(object)
+    return score, rating
+
+
+def score_clients(clients: pd.DataFrame, parsed: pd.DataFrame, log_counts: pd.DataFrame) -> pd.DataFrame:
+    """Returns ``score`` and ``rating`` columns aligned to ``clients``.
+
+    ``parsed`` is ``client_requirements.lookup`` output for the same rows and
+    ``log_counts`` has one ``client_id``/``count`` row per client with notes.
+    """
+    score, rating = score_arrays(
+        clients['lookingfor'].to_numpy(dtype=object),
+        parsed['req_budget'].to_numpy(),
+        parsed['flexible_location'].to_numpy(),
+        log_counts_for(clients, log_counts),
+        clients['status'].to_numpy(dtype=object),
+    )
+    return pd.DataFrame({'score': score, 'rating': rating}, index=clients.index)
+
+
+def ensure_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {TABLE} "
+        "(client_id TEXT PRIMARY KEY, score INTEGER, rating TEXT, scoring_version INTEGER, "
+        "lookingfor TEXT, requirements TEXT, status TEXT, log_count INTEGER)"
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_score ON {TABLE} (score DESC, client_id)")
+
+
+_INPUTS_QUERY = """
+    SELECT c.client_id, c.lookingfor, c.requirements, c.status, COALESCE(l.log_count, 0) AS log_count
+    FROM clients c
+    LEFT JOIN (SELECT client_id, COUNT(*) AS log_count FROM communication_log GROUP BY client_id) l
+        ON l.client_id = c.client_id
+"""
+
+
+def _read_inputs(conn: sqlite3.Connection, query: str, params) -> pd.DataFrame:
+    # Plain cursor reads: pandas rolls the whole transaction back on a failed
+    # read_sql, which would discard the caller's client write.
+    cursor = conn.execute(query, params)
+    return pd.DataFrame(cursor.fetchall(), columns=[column[0] for column in cursor.description])
+
+
+def _write(conn: sqlite3.Connection, inputs: pd.DataFrame) -> None:
+    parsed = client_requirements.parse_many(inputs['requirements'])
+    score, rating = score_arrays(
+        inputs['lookingfor'].to_numpy(dtype=object),
+        parsed['req_budget'].to_numpy(),
+        parsed['flexible_location'].to_numpy(),
+        inputs['log_count'].to_numpy(),
+        inputs['status'].to_numpy(dtype=object),
+    )
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {TABLE} (client_id, score, rating, scoring_version, lookingfor, "
+        "requirements, status, log_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (client_id, int(points), label, SCORING_VERSION, looking_for, requirements, status, int(log_count))
+            for client_id, points, label, looking_for, requirements, status, log_count in zip(
+                inputs['client_id'], score, rating, inputs['lookingfor'], inputs['requirements'],
+                inputs['status'], inputs['log_count'],
+            )
+        ],
+    )
+
+
+def rescore(conn: sqlite3.Connection, client_ids: Iterable[Optional[str]]) -> None:
+    """Rescores ``client_ids`` inside the caller's transaction; ids no longer in clients are dropped.
+
+    Runs in a savepoint so a schema that cannot be scored (e.g. no
+    communication_log yet) never fails the client write itself; the affected
+    rows keep their old inputs and ``refresh`` picks them up later.
+    """
+    client_ids = list(dict.fromkeys(client_id for client_id in client_ids if client_id is not None))
+    if not client_ids:
+        return
+    placeholders = ", ".join("?" * len(client_ids))
+    conn.execute("SAVEPOINT rescore_clients")
+    try:
+        ensure_table(conn)
+        conn.execute(f"DELETE FROM {TABLE} WHERE client_id IN ({placeholders})", client_ids)
+        _write(conn, _read_inputs(conn, f"{_INPUTS_QUERY} WHERE c.client_id IN ({placeholders})", client_ids))
+    except sqlite3.Error:
+        logger.warning("Could not rescore clients %s", client_ids, exc_info=True)
+        conn.execute("ROLLBACK TO rescore_clients")
+    conn.execute("RELEASE rescore_clients")
+
+
+_STALE_QUERY = f"""
+    SELECT i.* FROM ({_INPUTS_QUERY}) i LEFT JOIN {TABLE} s ON s.client_id = i.client_id
+    WHERE s.client_id IS NULL OR s.scoring_version IS NOT ? OR s.lookingfor IS NOT i.lookingfor
+        OR s.requirements IS NOT i.requirements OR s.status IS NOT i.status OR s.log_count IS NOT i.log_count
+"""
+_ORPHANS_QUERY = f"SELECT client_id FROM {TABLE} WHERE client_id NOT IN (SELECT client_id FROM clients)"
+
+
+def refresh(conn: sqlite3.Connection) -> int:
+    """Rescores clients whose stored inputs are missing or out of date; returns how many."""
+    ensure_table(conn)
+    stale = _read_inputs(conn, _STALE_QUERY, (SCORING_VERSION,))
+    _write(conn, stale)
+    conn.execute(f"DELETE FROM {TABLE} WHERE client_id NOT IN (SELECT client_id FROM clients)")
+    return len(stale)
+
+
+def needs_refresh(conn: sqlite3.Connection) -> bool:
+    """Whether ``refresh`` has work to do: a missing table, or stored inputs that no longer match.
+
+    Compares the same inputs as ``refresh`` rather than row counts, so in-place
+    edits made behind the hooks' back (an import, another process, a manual
+    edit) are caught too.
+    """
+    try:
+        stale = conn.execute(
+            f"SELECT EXISTS ({_STALE_QUERY} LIMIT 1) OR EXISTS ({_ORPHANS_QUERY})", (SCORING_VERSION,)
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        return True
+    return bool(stale)
+
+
+def prepare(db_path: str, conn: sqlite3.Connection) -> int:
+    """Runs ``refresh`` on ``conn`` if the data changed since the last check and left scores stale.
+
+    Returns how many clients were rescored; a refresh is committed and bumps
+    the data version.
+    """
+    db_path = str(db_path)
+    version = data_cache.data_version(db_path)
+    with _lock:
+        if _checked.get(db_path) == version:
+            return 0
+    rescored = 0
+    if needs_refresh(conn):
+        rescored = refresh(conn)
+        conn.commit()
+        version = data_cache.bump_version(db_path)
+    with _lock:
+        _checked[db_path] = version
+    return rescored
+
+
+def clear() -> None:
+    with _lock:
+        _checked.clear()
+
+
+def read_scores(conn: sqlite3.Connection, limit: Optional[int] = None, offset: int = 0) -> pd.DataFrame:
+    """Clients with ``score``/``rating``, highest score first, via the score index."""
+    return pd.read_sql(
+        f"SELECT c.*, s.score, s.rating FROM {TABLE} s JOIN clients c ON c.client_id = s.client_id "
+        "ORDER BY s.score DESC, s.client_id LIMIT ? OFFSET ?",
+        conn,
+        params=(-1 if limit is None else int(limit), int(offset)),
+    )
@@ -0,0 +1,113 @@
+"""
+Response cache for the assistant's chat-completion calls.
+
+Every AI-enabled assistant turn used to post a fresh request, even for the
+quick-prompt buttons ("Who needs follow-up today?") asked again and again
+against unchanged data. ``ResponseCache`` keeps replies keyed on:
+- the model name;
+- the normalized query: lower-cased, punctuation dropped, whitespace
+  collapsed, so "Who needs follow-up today?" and "who needs follow-up today"
+  share an entry;
+- a fingerprint (SHA-256) of the serialized context sent with the query.
+
+Entries expire after ``ttl`` seconds, and the least recently used are
+evicted beyond ``max_entries``. Entries are stamped with the
+``data_cache.data_version`` of the database they describe. Any commit moves
+that version, and the next lookup then drops every entry for that database.
+
+Only successful, non-empty replies are stored. ``stats`` reports hits,
+misses, expirations, evictions, invalidations and the hit rate.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import data_cache
+from config import AI_CACHE_MAX_ENTRIES, AI_CACHE_TTL_SECONDS
+
+_NON_WORD = re.compile(r"[^\w\s-]+")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", str(query).lower()).split())
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(model: str, query: str, context_text: str) -> str:
+    return fingerprint("\x1f".join((model, normalize_query(query), fingerprint(context_text))))
+
+
+class ResponseCache:
+    """Size-bounded LRU of model replies with a TTL, invalidated per database on data changes."""
+
+    def __init__(self, ttl: float = AI_CACHE_TTL_SECONDS, max_entries: int = AI_CACHE_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (db path, key) -> (expires at, reply)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        # db path -> data version the cached entries were stored under
+        self._versions: Dict[str, int] = {}
+        self._stats = {"hits": 0, "misses": 0, "expirations": 0, "evictions": 0, "invalidations": 0}
+
+    def _check_version(self, db_path: str) -> None:
+        version = data_cache.data_version(db_path)
+        if self._versions.get(db_path, version) != version:
+            stale = [entry for entry in self._entries if entry[0] == db_path]
+            for entry in stale:
+                del self._entries[entry]
+            self._stats["invalidations"] += 1
+        self._versions[db_path] = version
+
+    def get(self, db_path: str, key: str) -> Optional[str]:
+        db_path = str(db_path)
+        with self._lock:
+            self._check_version(db_path)
+            entry = self._entries.get((db_path, key))
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[(db_path, key)]
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end((db_path, key))
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, db_path: str, key: str, reply: str) -> None:
+        db_path = str(db_path)
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._check_version(db_path)
+            self._entries[(db_path, key)] = (self._clock() + self.ttl, reply)
+            self._entries.move_to_end((db_path, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+            stats["entries"] = len(self._entries)
+            return stats
+
+    def clear(self) -> None:
+        """Drops every entry and resets the counters (used in tests)."""
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            for key in self._stats:
+                self._stats[key] = 0
@@ -0,0 +1,358 @@
+"""
+Materialized market aggregates for the dashboard pages and the ``/market`` API.
+
+Three small tables summarize the properties and clients tables:
+- ``market_listing_stats``: one row per locality × property type × listing
+  type × listing month, holding the listing count plus the sum and count of
+  sale price-per-sq.ft values;
+- ``market_listing_days``: listings per listing day, for the time-on-market
+  histogram (the age itself depends on today, so it is computed on read);
+- ``market_bhk_demand``: clients per requested BHK ("Other" when the
+  requirements name none).
+
+Write helpers keep them current inside their own transaction. They call
+``remove_properties``/``remove_clients`` for the touched ids before changing
+rows and ``add_properties``/``add_clients`` afterwards, so each write applies a
+signed delta to the affected groups. ``refresh`` rebuilds everything from
+scratch. It runs from ``utils.initialize_database``, and again on read whenever
+the data version moved and ``needs_refresh`` finds the stored aggregates out of
+line with a read-only recomputation from the source tables.
+
+The readers return small frames whose size depends on the number of
+localities, months and BHK values, not on the number of rows.
+``from_frames`` computes the same frames from raw DataFrames, for columnar
+snapshots and for checking the tables.
+"""
+
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+import pandas as pd
+
+import client_requirements
+import data_cache
+import db
+
+logger = logging.getLogger(__name__)
+
+LISTING_TABLE = "market_listing_stats"
+DAYS_TABLE = "market_listing_days"
+DEMAND_TABLE = "market_bhk_demand"
+TABLES = (LISTING_TABLE, DAYS_TABLE, DEMAND_TABLE)
+LISTING_KEYS = ('arealocality', 'propertytype', 'listingtype', 'month')
+GROUPINGS = ('month', 'propertytype', 'arealocality', 'listingtype')
+OTHER_BHK = "Other"
+
+T = TypeVar("T")
+
+# Missing keys are stored as '' so they still conflict on the primary key.
+_LISTING_ROWS_SQL = """
+    SELECT COALESCE(arealocality, ''), COALESCE(propertytype, ''), COALESCE(listingtype, ''),
+           COALESCE(strftime('%Y-%m', listingdate), ''),
+           ? * COUNT(*), ? * COALESCE(SUM(ppsf), 0), ? * COUNT(ppsf)
+    FROM (SELECT arealocality, propertytype, listingtype, listingdate,
+                 CASE WHEN listingtype = 'Sale' AND areasqft > 0 AND askingprice IS NOT NULL
+                      THEN askingprice * 1.0 / areasqft END AS ppsf
+          FROM properties WHERE {where})
+    GROUP BY 1, 2, 3, 4
+"""
+_DAY_ROWS_SQL = """
+    SELECT date(listingdate) AS day, ? * COUNT(*) FROM properties
+    WHERE ({where}) AND day IS NOT NULL GROUP BY day
+"""
+
+_lock = threading.Lock()
+_ready: Dict[str, int] = {}
+
+
+def ensure_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {LISTING_TABLE} (arealocality TEXT NOT NULL, propertytype TEXT NOT NULL, "
+        "listingtype TEXT NOT NULL, month TEXT NOT NULL, listings INTEGER NOT NULL, ppsf_sum REAL NOT NULL, "
+        "ppsf_count INTEGER NOT NULL, PRIMARY KEY (arealocality, propertytype, listingtype, month))"
+    )
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {DAYS_TABLE} (day TEXT PRIMARY KEY, listings INTEGER NOT NULL)")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {DEMAND_TABLE} (bhk TEXT PRIMARY KEY, clients INTEGER NOT NULL)")
+
+
+def bhk_label(requirements: Any) -> str:
+    """The BHK demand bucket for one client's requirements, e.g. "2 BHK"."""
+    bhk = client_requirements.parse(requirements).bhk
+    return f"{bhk} BHK" if bhk else OTHER_BHK
+
+
+# --- Maintenance ---
+
+def _apply_properties(conn: sqlite3.Connection, where: str, params: List[Any], sign: int) -> None:
+    conn.execute(
+        f"INSERT INTO {LISTING_TABLE} ({', '.join(LISTING_KEYS)}, listings, ppsf_sum, ppsf_count) "
+        f"{_LISTING_ROWS_SQL.format(where=where)} "
+        f"ON CONFLICT ({', '.join(LISTING_KEYS)}) DO UPDATE SET listings = listings + excluded.listings, "
+        "ppsf_sum = ppsf_sum + excluded.ppsf_sum, ppsf_count = ppsf_count + excluded.ppsf_count",
+        [sign, sign, sign, *params],
+    )
+    conn.execute(
+        f"INSERT INTO {DAYS_TABLE} (day, listings) {_DAY_ROWS_SQL.format(where=where)} "
+        "ON CONFLICT (day) DO UPDATE SET listings = listings + excluded.listings",
+        [sign, *params],
+    )
+    if sign < 0:
+        conn.execute(f"DELETE FROM {LISTING_TABLE} WHERE listings <= 0")
+        conn.execute(f"DELETE FROM {DAYS_TABLE} WHERE listings <= 0")
+
+
+def _apply_clients(conn: sqlite3.Connection, requirements: Iterable[Any], sign: int) -> None:
+    counts = Counter(bhk_label(text) for text in requirements)
+    conn.executemany(
+        f"INSERT INTO {DEMAND_TABLE} (bhk, clients) VALUES (?, ?) "
+        "ON CONFLICT (bhk) DO UPDATE SET clients = clients + excluded.clients",
+        [(label, sign * count) for label, count in counts.items()],
+    )
+    if sign < 0:
+        conn.execute(f"DELETE FROM {DEMAND_TABLE} WHERE clients <= 0")
+
+
+def _ids(ids: Iterable[Optional[str]]) -> List[str]:
+    return list(dict.fromkeys(value for value in ids if value is not None))
+
+
+def _delta(conn: sqlite3.Connection, kind: str, ids: Iterable[Optional[str]], sign: int) -> None:
+    """Applies a signed delta for ``ids`` inside the caller's transaction.
+
+    Runs in a savepoint so it never fails the write itself. On error the
+    aggregate tables are dropped instead, and the next read rebuilds them.
+    """
+    ids = _ids(ids)
+    if not ids:
+        return
+    placeholders = ", ".join("?" * len(ids))
+    if not conn.in_transaction:
+        # A SAVEPOINT outside a transaction opens one that its RELEASE commits;
+        # ``remove_*`` runs before the caller's first write, so open it here.
+        conn.execute("BEGIN")
+    conn.execute("SAVEPOINT market_stats")
+    try:
+        ensure_tables(conn)
+        if kind == 'properties':
+            _apply_properties(conn, f"property_id IN ({placeholders})", ids, sign)
+        else:
+            rows = conn.execute(f"SELECT requirements FROM clients WHERE client_id IN ({placeholders})", ids)
+            _apply_clients(conn, (row[0] for row in rows), sign)
+    except sqlite3.Error:
+        logger.warning("Could not update market stats for %s %s; dropping them for a rebuild", kind, ids,
+                       exc_info=True)
+        conn.execute("ROLLBACK TO market_stats")
+        drop(conn)
+    conn.execute("RELEASE market_stats")
+
+
+def add_properties(conn: sqlite3.Connection, property_ids: Iterable[Optional[str]]) -> None:
+    """Counts the current rows of ``property_ids``; call after inserting or updating them."""
+    _delta(conn, 'properties', property_ids, 1)
+
+
+def remove_properties(conn: sqlite3.Connection, property_ids: Iterable[Optional[str]]) -> None:
+    """Uncounts the current rows of ``property_ids``; call before updating or deleting them."""
+    _delta(conn, 'properties', property_ids, -1)
+
+
+def add_clients(conn: sqlite3.Connection, client_ids: Iterable[Optional[str]]) -> None:
+    _delta(conn, 'clients', client_ids, 1)
+
+
+def remove_clients(conn: sqlite3.Connection, client_ids: Iterable[Optional[str]]) -> None:
+    _delta(conn, 'clients', client_ids, -1)
+
+
+def drop(conn: sqlite3.Connection) -> None:
+    for table in TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def refresh(conn: sqlite3.Connection) -> int:
+    """Rebuilds every aggregate from the properties and clients tables; returns the listings counted."""
+    ensure_tables(conn)
+    for table in TABLES:
+        conn.execute(f"DELETE FROM {table}")
+    _apply_properties(conn, "1", [], 1)
+    _apply_clients(conn, (row[0] for row in conn.execute("SELECT requirements FROM clients")), 1)
+    return conn.execute(f"SELECT COALESCE(SUM(listings), 0) FROM {LISTING_TABLE}").fetchone()[0]
+
+
+def _listings_stale(conn: sqlite3.Connection) -> bool:
+    keys = ', '.join(LISTING_KEYS)
+    matched = ' AND '.join(f"s.{key} = e.{key}" for key in LISTING_KEYS)
+    # ppsf_sum is a float the deltas add up in a different order than a rebuild.
+    return bool(conn.execute(
+        f"WITH expected ({keys}, listings, ppsf_sum, ppsf_count) AS MATERIALIZED ({_LISTING_ROWS_SQL.format(where='1')}) "
+        f"SELECT EXISTS (SELECT 1 FROM expected e LEFT JOIN {LISTING_TABLE} s ON {matched} "
+        "WHERE s.listings IS NOT e.listings OR s.ppsf_count IS NOT e.ppsf_count "
+        "OR ABS(s.ppsf_sum - e.ppsf_sum) > 1e-6 * MAX(1, ABS(e.ppsf_sum))) "
+        f"OR EXISTS (SELECT 1 FROM {LISTING_TABLE} s WHERE NOT EXISTS (SELECT 1 FROM expected e WHERE {matched}))",
+        [1, 1, 1],
+    ).fetchone()[0])
+
+
+def _days_stale(conn: sqlite3.Connection) -> bool:
+    return bool(conn.execute(
+        f"WITH expected (day, listings) AS MATERIALIZED ({_DAY_ROWS_SQL.format(where='1')}) "
+        f"SELECT EXISTS (SELECT 1 FROM expected e LEFT JOIN {DAYS_TABLE} s ON s.day = e.day "
+        "WHERE s.listings IS NOT e.listings) "
+        f"OR EXISTS (SELECT 1 FROM {DAYS_TABLE} s WHERE NOT EXISTS (SELECT 1 FROM expected e WHERE e.day = s.day))",
+        [1],
+    ).fetchone()[0])
+
+
+def _demand_stale(conn: sqlite3.Connection) -> bool:
+    expected = Counter(bhk_label(row[0]) for row in conn.execute("SELECT requirements FROM clients"))
+    return dict(conn.execute(f"SELECT bhk, clients FROM {DEMAND_TABLE}").fetchall()) != dict(expected)
+
+
+def needs_refresh(conn: sqlite3.Connection) -> bool:
+    """Whether the tables are missing or differ from the properties and clients tables.
+
+    Recomputes the aggregates read-only and compares them with the stored
+    rows, so in-place edits made behind the hooks' back (an import, another
+    process, a manual edit) are caught even when no row counts change.
+    """
+    present = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ({', '.join('?' * len(TABLES))})",
+        TABLES,
+    ).fetchone()[0]
+    if present != len(TABLES):
+        return True
+    try:
+        return _listings_stale(conn) or _days_stale(conn) or _demand_stale(conn)
+    except sqlite3.OperationalError:
+        return True
+
+
+def _prepare(db_path: str, conn: sqlite3.Connection) -> None:
+    version = data_cache.data_version(db_path)
+    with _lock:
+        if _ready.get(db_path) == version:
+            return
+    if needs_refresh(conn):
+        logger.info("Rebuilt market stats: %d listings", refresh(conn))
+        conn.commit()
+    with _lock:
+        _ready[db_path] = data_cache.data_version(db_path)
+
+
+def clear() -> None:
+    with _lock:
+        _ready.clear()
+
+
+# --- Reads ---
+
+def _frame(conn: sqlite3.Connection, query: str, columns: List[str], params: Tuple = ()) -> pd.DataFrame:
+    return pd.DataFrame(conn.execute(query, params).fetchall(), columns=columns)
+
+
+def price_per_sqft(conn: sqlite3.Connection) -> pd.DataFrame:
+    """Average sale price per sq.ft by locality (``arealocality``, ``price_per_sqft``, ``listings``), highest first."""
+    return _frame(
+        conn,
+        f"SELECT arealocality, SUM(ppsf_sum) / SUM(ppsf_count) AS price_per_sqft, SUM(ppsf_count) AS listings "
+        f"FROM {LISTING_TABLE} WHERE listingtype = 'Sale' AND arealocality != '' "
+        "GROUP BY arealocality HAVING SUM(ppsf_count) > 0 ORDER BY price_per_sqft DESC, arealocality",
+        ['arealocality', 'price_per_sqft', 'listings'],
+    )
+
+
+def listing_counts(conn: sqlite3.Connection, by: str = 'month') -> pd.DataFrame:
+    """Listings per ``by`` (one of ``GROUPINGS``): months in order, anything else largest first."""
+    if by not in GROUPINGS:
+        raise ValueError(f"Unknown grouping {by!r}; expected one of {GROUPINGS}")
+    order = "month" if by == 'month' else f"listings DESC, {by}"
+    return _frame(
+        conn,
+        f"SELECT {by}, SUM(listings) AS listings FROM {LISTING_TABLE} WHERE {by} != '' GROUP BY {by} ORDER BY {order}",
+        [by, 'listings'],
+    )
+
+
+def days_on_market(conn: sqlite3.Connection, now: Optional[datetime] = None) -> pd.DataFrame:
+    """Listings per age in days (``days``, ``listings``), youngest first; future listing dates are left out."""
+    days = _frame(conn, f"SELECT day, listings FROM {DAYS_TABLE} ORDER BY day DESC", ['day', 'listings'])
+    return _ages(pd.to_datetime(days['day']), days['listings'], now)
+
+
+def bhk_demand(conn: sqlite3.Connection) -> pd.DataFrame:
+    """Clients per requested BHK (``bhk``, ``clients``), most requested first."""
+    return _frame(conn, f"SELECT bhk, clients FROM {DEMAND_TABLE} ORDER BY clients DESC, bhk", ['bhk', 'clients'])
+
+
+def total_listings(conn: sqlite3.Connection) -> int:
+    return conn.execute(f"SELECT COALESCE(SUM(listings), 0) FROM {LISTING_TABLE}").fetchone()[0]
+
+
+def read_all(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Everything the dashboards show, keyed like ``from_frames``."""
+    stats: Dict[str, Any] = {
+        'total_listings': total_listings(conn),
+        'price_per_sqft': price_per_sqft(conn),
+        'bhk_demand': bhk_demand(conn),
+        'days_on_market': days_on_market(conn),
+    }
+    for by in GROUPINGS:
+        stats[f'listings_by_{by}'] = listing_counts(conn, by)
+    return stats
+
+
+def read(db_path: str, reader: Callable[..., T], *args: Any) -> T:
+    """Runs ``reader(conn, *args)`` on ``db_path``, rebuilding the tables first if they are missing or stale."""
+    db_path = str(db_path)
+    with db.connection(db_path) as conn:
+        _prepare(db_path, conn)
+        return reader(conn, *args)
+
+
+def load(db_path: str) -> Dict[str, Any]:
+    return read(db_path, read_all)
+
+
+# --- The same aggregates from raw frames ---
+
+def _ages(listed: pd.Series, listings: pd.Series, now: Optional[datetime]) -> pd.DataFrame:
+    days = (pd.Timestamp(now or datetime.now()) - listed.dt.normalize()).dt.days
+    ages = pd.DataFrame({'days': days, 'listings': listings}).dropna()
+    ages = ages[ages['days'] >= 0].astype({'days': int, 'listings': int})
+    return ages.groupby('days', as_index=False)['listings'].sum()
+
+
+def from_frames(properties: pd.DataFrame, clients: pd.DataFrame, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """``read_all``'s frames computed directly from properties and clients DataFrames."""
+    listed = pd.to_datetime(properties['listingdate'], errors='coerce', format='mixed')
+    frame = pd.DataFrame({
+        'arealocality': properties['arealocality'],
+        'propertytype': properties['propertytype'],
+        'listingtype': properties['listingtype'],
+        'month': listed.dt.strftime('%Y-%m'),
+    })
+    sale = (properties['listingtype'] == 'Sale') & (pd.to_numeric(properties['areasqft'], errors='coerce') > 0)
+    frame['price_per_sqft'] = (properties['askingprice'] / properties['areasqft']).where(sale)
+
+    ppsf = (frame[sale].dropna(subset=['arealocality']).groupby('arealocality')['price_per_sqft']
+            .agg(price_per_sqft='mean', listings='count').reset_index())
+    ppsf = ppsf[ppsf['listings'] > 0].sort_values(['price_per_sqft', 'arealocality'], ascending=[False, True])
+    demand = clients['requirements'].map(bhk_label).value_counts().rename_axis('bhk').reset_index(name='clients')
+    stats: Dict[str, Any] = {
+        'total_listings': len(properties),
+        'price_per_sqft': ppsf.reset_index(drop=True),
+        'bhk_demand': demand.sort_values(['clients', 'bhk'], ascending=[False, True]).reset_index(drop=True),
+        'days_on_market': _ages(listed.dropna(), pd.Series(1, index=listed.dropna().index), now),
+    }
+    for by in GROUPINGS:
+        counts = frame[by].dropna().value_counts().rename_axis(by).reset_index(name='listings')
+        if by == 'month':
+            counts = counts.sort_values('month')
+        else:
+            counts = counts.sort_values(['listings', by], ascending=[False, True])
+        stats[f'listings_by_{by}'] = counts.reset_index(drop=True)
+    return stats
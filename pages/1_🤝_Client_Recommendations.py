@@ -6,6 +6,7 @@ import re
 from datetime import datetime
 
 st.set_page_config(page_title="Client Recommendations", page_icon="🤝", layout="wide")
+utils.startup()
 
 def get_clients():
     """Fetches all clients from the database."""
@@ -56,12 +57,15 @@ if not client_list:
     st.sidebar.warning("No clients found.")
 else:
     selected_client_str = st.sidebar.selectbox("Select Client:", options=client_list)
+    sort_label = st.sidebar.radio("Sort by:", options=["Best match", "Best value"], horizontal=True,
+                                  help="Best value lists the most underpriced listings (vs. the price model) first.")
     if selected_client_str:
         client_id = selected_client_str.split(' - ')[0]
         try:
-            data = utils.get_recommendations(client_id)
+            data = utils.get_recommendations(client_id, sort='value' if sort_label == "Best value" else 'match')
             client_details = data.get("client_details", {})
             recommendations = data.get("recommendations", [])
+            client_requirements = utils.get_client_requirements(client_id, client_details.get('requirements', ''))
             st.header(f"Showing Recommendations for: {client_details.get('name')}")
             if recommendations:
                 pdf_bytes = utils.generate_property_report(client_details, recommendations)
@@ -78,6 +82,8 @@ else:
             else:
                 for prop in recommendations:
                     prop_title = f"{prop.get('bedroomsbhk', '')} {prop.get('propertytype', '')} in {prop.get('arealocality', '')}"
+                    price_check = utils.describe_price_gap(prop.get('price_gap_pct'))
+                    if price_check: prop_title += f" · {price_check}"
                     with st.expander(prop_title, expanded=False):
                         col1, col2 = st.columns([1, 1.5])
                         with col1:
@@ -118,12 +124,12 @@ else:
                         with col2:
                             if client_details.get('lookingfor') == 'Sale' and prop.get('askingprice'): st.metric("Asking Price", f"₹ {utils.format_indian_currency(prop.get('askingprice'))}")
                             elif client_details.get('lookingfor') == 'Rent' and prop.get('monthlyrent'): st.metric("Monthly Rent", f"₹ {utils.format_indian_currency(prop.get('monthlyrent'))} / month")
+                            if price_check: st.caption(f"Estimated sale price ₹ {utils.format_indian_currency(prop.get('predicted_price'))} · {price_check}")
                             st.subheader("Key Details")
                             d_col1, d_col2, d_col3 = st.columns(3); d_col1.metric("Area", f"{prop.get('areasqft', 'N/A'):,} sq.ft."); d_col2.metric("Bathrooms", prop.get('bathrooms', 'N/A')); d_col3.metric("Property Age", f"{prop.get('propertyageyrs', 'N/A')} yrs")
                             st.write("---"); st.subheader("✅ Requirement Match")
                             req_col1, prop_col1 = st.columns(2)
-                            req_budget = utils.find_budget(client_details.get('requirements', ''))
-                            req_bhk_match = re.search(r'(\d+)\s*BHK', str(client_details.get('requirements', ''))); req_bhk = int(req_bhk_match.group(1)) if req_bhk_match else 0
+                            req_budget, req_bhk = client_requirements.budget, client_requirements.bhk
                             prop_bhk_match = re.search(r'(\d+)', str(prop.get('bedroomsbhk', ''))); prop_bhk = int(prop_bhk_match.group(1)) if prop_bhk_match else 0
                             prop_price = prop.get('askingprice') if client_details.get('lookingfor') == 'Sale' else prop.get('monthlyrent', 0)
                             bhk_match_icon = "✅" if prop_bhk >= req_bhk else "⚠️"; budget_match_icon = "✅" if prop_price is not None and prop_price <= (req_budget * 1.15) else "⚠️"
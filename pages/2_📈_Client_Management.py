@@ -13,6 +13,7 @@ import utils
 
 
 st.set_page_config(page_title="Client Management", page_icon="📈", layout="wide")
+utils.startup()
 st.title("📈 Client Relationship Management")
 
 try:
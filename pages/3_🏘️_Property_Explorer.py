@@ -3,45 +3,39 @@ import pandas as pd
 import utils
 
 st.set_page_config(page_title="Property Explorer", page_icon="🏘️", layout="wide")
+utils.startup()
 st.title("🏘️ Property Explorer")
 st.markdown("Use the advanced filters in the sidebar to search the entire property database.")
 
 try:
-    all_properties_df = utils.get_all_properties_df()
+    facets = utils.get_property_facets()
 except Exception as e:
     st.error(f"Error loading properties: {str(e)}")
-    all_properties_df = pd.DataFrame()
+    st.stop()
 
 focused_property_id = st.session_state.get("home_property_jump_id")
 
 st.sidebar.header("Search Filters")
 listing_type = st.sidebar.selectbox(
     "Listing Type:",
-    options=["All"] + list(all_properties_df['listingtype'].unique()),
+    options=["All"] + facets.values['listingtype'],
     index=0
 )
 prop_type = st.sidebar.selectbox(
     "Property Type:",
-    options=["All"] + list(all_properties_df['propertytype'].unique()),
+    options=["All"] + facets.values['propertytype'],
     index=0
 )
 locality = st.sidebar.selectbox(
     "Area / Locality:",
-    options=["All"] + sorted(list(all_properties_df['arealocality'].unique())),
+    options=["All"] + facets.values['arealocality'],
     index=0
 )
 
-price_col = None
-if listing_type == 'Sale':
-    price_col = 'askingprice'
-elif listing_type == 'Rent':
-    price_col = 'monthlyrent'
-
 min_price, max_price = 0, 0
-if price_col:
-    valid_prices = pd.to_numeric(all_properties_df[price_col], errors='coerce').dropna()
-    if not valid_prices.empty:
-        min_price, max_price = int(valid_prices.min()), int(valid_prices.max())
+low, high = facets.price_ranges.get(listing_type, (None, None))
+if low is not None and high is not None:
+    min_price, max_price = int(low), int(high)
 
 if min_price < max_price:
     selected_price = st.sidebar.slider(
@@ -52,49 +46,35 @@ else:
     selected_price = (0, 0)
 
 st.sidebar.subheader("Filter by Amenities")
-possible_amenities = [
-    'Swimming Pool', 'Gymnasium', '24x7 Security', 'Clubhouse',
-    'Reserved Parking', 'Power Backup', 'Elevator', 'Garden'
-]
+possible_amenities = utils.get_amenity_options()
 selected_amenities = st.sidebar.multiselect(
     "Select desired amenities:",
     options=possible_amenities
 )
 
-def apply_filters(df, listing_type, prop_type, locality, price_col, selected_price, selected_amenities):
-    """Applies all filters to the properties DataFrame."""
-    filtered_df = df.copy()
-    if listing_type != "All":
-        filtered_df = filtered_df[filtered_df['listingtype'] == listing_type]
-    if prop_type != "All":
-        filtered_df = filtered_df[filtered_df['propertytype'] == prop_type]
-    if locality != "All":
-        filtered_df = filtered_df[filtered_df['arealocality'] == locality]
-    if selected_price[1] > 0 and price_col:
-        filtered_df[price_col] = pd.to_numeric(filtered_df[price_col], errors='coerce')
-        filtered_df = filtered_df.dropna(subset=[price_col])
-        filtered_df = filtered_df[
-            (filtered_df[price_col] >= selected_price[0]) &
-            (filtered_df[price_col] <= selected_price[1])
-        ]
-    if selected_amenities:
-        filtered_df = filtered_df[filtered_df['amenities'].apply(
-            lambda x: set(selected_amenities).issubset(set(utils.extract_amenities(x)))
-        )]
-    return filtered_df
-
-filtered_df = apply_filters(
-    all_properties_df, listing_type, prop_type, locality,
-    price_col, selected_price, selected_amenities
+# Filtering runs as one indexed SQL query (see property_search.py); only the
+# first page of matches is loaded.
+total_matches, filtered_df = utils.search_properties(
+    listing_type=None if listing_type == "All" else listing_type,
+    property_type=None if prop_type == "All" else prop_type,
+    locality=None if locality == "All" else locality,
+    min_price=selected_price[0] if selected_price[1] > 0 else None,
+    max_price=selected_price[1] if selected_price[1] > 0 else None,
+    amenities=tuple(selected_amenities),
 )
 
-if focused_property_id and focused_property_id not in filtered_df['property_id'].values:
-    focused_row = all_properties_df[all_properties_df['property_id'] == focused_property_id]
-    if not focused_row.empty:
-        filtered_df = pd.concat([focused_row, filtered_df], ignore_index=True)
+focused_property = utils.get_property_by_id(focused_property_id) if focused_property_id else None
+if focused_property is not None and focused_property_id not in filtered_df['property_id'].values:
+    filtered_df = pd.concat([focused_property.to_frame().T, filtered_df], ignore_index=True)
+
+if 'price_gap_pct' in filtered_df.columns:
+    filtered_df['price_check'] = filtered_df['price_gap_pct'].map(utils.describe_price_gap)
 
 st.header("Filtered Property Listings")
-st.markdown(f"Found **{len(filtered_df)}** matching properties.")
+if total_matches > len(filtered_df):
+    st.markdown(f"Found **{total_matches}** matching properties (showing the first {len(filtered_df)}).")
+else:
+    st.markdown(f"Found **{total_matches}** matching properties.")
 st.dataframe(
     filtered_df,
     use_container_width=True,
@@ -108,8 +88,8 @@ selected_property = None
 if 'property_selection_df' in st.session_state and st.session_state['property_selection_df']['selection']['rows']:
     selected_index = st.session_state['property_selection_df']['selection']['rows'][0]
     selected_property = filtered_df.iloc[selected_index]
-elif focused_property_id and focused_property_id in all_properties_df['property_id'].values:
-    selected_property = all_properties_df[all_properties_df['property_id'] == focused_property_id].iloc[0]
+elif focused_property is not None:
+    selected_property = focused_property
 
 if selected_property is not None:
     if focused_property_id == selected_property['property_id']:
@@ -121,11 +101,16 @@ if selected_property is not None:
         st.markdown(f"**{selected_property.get('propertytype', 'Property')}** in **{selected_property.get('arealocality', 'Unknown')}**")
         st.markdown(f"**Listing Type:** {selected_property.get('listingtype', 'N/A')}")
         st.markdown(f"**Status:** {selected_property.get('listingstatus', 'N/A')}")
-        if selected_property.get('askingprice'):
+        if pd.notna(selected_property.get('askingprice')) and selected_property.get('askingprice'):
             st.markdown(f"**Asking Price:** ₹{int(float(selected_property.get('askingprice'))):,}")
-        if selected_property.get('monthlyrent'):
+        if pd.notna(selected_property.get('predicted_price')) and selected_property.get('predicted_price'):
+            st.markdown(f"**Estimated Sale Price:** ₹{int(float(selected_property.get('predicted_price'))):,}")
+        price_check = utils.describe_price_gap(selected_property.get('price_gap_pct'))
+        if price_check:
+            st.markdown(f"**Price Check:** {price_check}")
+        if pd.notna(selected_property.get('monthlyrent')) and selected_property.get('monthlyrent'):
             st.markdown(f"**Monthly Rent:** ₹{int(float(selected_property.get('monthlyrent'))):,}")
-        if selected_property.get('areasqft'):
+        if pd.notna(selected_property.get('areasqft')) and selected_property.get('areasqft'):
             st.markdown(f"**Area:** {selected_property.get('areasqft')} sq.ft.")
     with detail_col2:
         st.markdown("**Amenities**")
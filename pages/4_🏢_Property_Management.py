@@ -15,6 +15,7 @@ with media upload capabilities.
 
 
 st.set_page_config(page_title="Property Management", page_icon="🏢", layout="wide")
+utils.startup()
 st.title("🏢 Property Management")
 
 tab1, tab2 = st.tabs(["**➕ Add New Property**", "**✏️ Edit / Delete Property**"])
@@ -116,7 +117,7 @@ with tab1:
 with tab2:
     st.header("Edit or Delete an Existing Listing")
     try:
-        properties_df = utils.get_all_properties_df()
+        properties_df = utils.get_all_properties_df(include_media=True)
     except Exception as e:
         st.error(f"Error loading properties: {str(e)}")
         properties_df = pd.DataFrame()
@@ -161,9 +162,9 @@ with tab2:
             st.subheader("Update Details")
             # (Edit form is unchanged)
             edited_data = {col: st.text_input(f"{col.replace('_', ' ').title()}",
-                                              value=val)
+                                              value=None if pd.isna(val) else str(val))
                            for col, val in selected_prop.items()
-                           if col not in ['property_id', 'display']}
+                           if col not in ['property_id', 'display', *utils.DERIVED_PROPERTY_COLUMNS]}
             save_button, delete_button = st.columns(2)
             if save_button.form_submit_button("💾 Save Changes"):
                 try:
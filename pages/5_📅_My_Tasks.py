@@ -7,6 +7,7 @@ import utils
 def main():
     """Main function for the Task Manager page."""
     st.set_page_config(page_title="Task Manager", page_icon="📅", layout="wide")
+    utils.startup()
     st.title("📅 My Tasks")
     st.markdown("A central place to track all your client-related tasks.")
 
@@ -7,6 +7,7 @@ import utils
 
 
 st.set_page_config(page_title="AI Assistant", page_icon="🤖", layout="wide")
+utils.startup()
 st.title("🤖 AI Assistant")
 st.markdown("Chat naturally. Ask for summaries, tell it to add notes, create tasks, open client records, or fetch property details.")
 
@@ -96,7 +97,7 @@ if st.button("Reset conversation"):
 st.divider()
 
 with st.expander("Current context snapshot", expanded=False):
-    context = assistant_engine.build_context(selected_client_id, selected_property_id)
+    context = assistant_engine.build_context(selected_client_id, selected_property_id, intent="overview")
     left, right = st.columns(2)
     with left:
         st.markdown("**Overview**")
@@ -127,12 +128,39 @@ query = chat_prompt or pending_prompt
 if query:
     st.session_state.assistant_last_user_query = query
     st.session_state.assistant_messages.append({"role": "user", "content": query})
-    with st.spinner("Thinking..."):
-        reply = assistant_engine.handle_chat_request(
-            query,
-            selected_client_id=selected_client_id,
-            selected_property_id=selected_property_id,
-        )
+
+for message in st.session_state.assistant_messages:
+    avatar = "🤖" if message["role"] == "assistant" else "🧑"
+    with st.chat_message(message["role"], avatar=avatar):
+        st.markdown(message["content"])
+
+if query:
+    reply = {}
+    with st.chat_message("assistant", avatar="🤖"):
+        # The local reply shows at once; model tokens replace it as they arrive.
+        # If the stream fails partway, the partial tokens are cleared and the
+        # local reply shown instead.
+        local_box = st.empty()
+        stream_box = st.empty()
+
+        def stream_reply():
+            for event in assistant_engine.handle_chat_request_stream(
+                query,
+                selected_client_id=selected_client_id,
+                selected_property_id=selected_property_id,
+            ):
+                if event["type"] == "local":
+                    local_box.markdown(event["text"])
+                elif event["type"] == "token":
+                    local_box.empty()
+                    yield event["text"]
+                else:
+                    reply.update(event["reply"])
+
+        stream_box.write_stream(stream_reply())
+        if not reply.get("used_ai"):
+            stream_box.empty()
+            local_box.markdown(reply["answer"])
     st.session_state.assistant_messages.append({"role": "assistant", "content": reply["answer"]})
     st.session_state.assistant_last_reply = reply
 
@@ -150,11 +178,6 @@ if query:
         st.session_state.home_property_jump_id = action.get("property_id")
         st.switch_page("pages/3_🏘️_Property_Explorer.py")
 
-for message in st.session_state.assistant_messages:
-    avatar = "🤖" if message["role"] == "assistant" else "🧑"
-    with st.chat_message(message["role"], avatar=avatar):
-        st.markdown(message["content"])
-
 last_reply = st.session_state.get("assistant_last_reply")
 if last_reply:
     with st.container(border=True):
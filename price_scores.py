@@ -0,0 +1,246 @@
+"""
+Stored fair-price scores: ``predicted_price`` and ``price_gap_pct`` on every listing.
+
+``pricing.predict_prices`` is too slow to run over the inventory on each page
+load, so its output is kept on the ``properties`` table:
+- ``predicted_price``: the model's sale price estimate (NULL without a usable area);
+- ``price_gap_pct``: how far a Sale listing's asking price is above (+) or below (-)
+  that estimate, in percent. NULL for rentals and listings without an asking price.
+
+``price_score_inputs`` records, per listing, the inputs and model file each score
+was computed from, so stale rows can be found with one join, as
+``lead_scoring`` does for client scores.
+
+Maintenance:
+- ``rescore`` runs inside the property write helpers' transactions;
+- ``refresh_all`` rescores stale rows in ``REFRESH_BATCH`` batches, each
+  batch in its own transaction;
+- ``refresh_in_background`` runs ``refresh_all`` on a daemon thread.
+  ``utils.startup`` (the API lifespan and the Streamlit pages) starts it
+  when ``needs_refresh`` says so, which includes the model file having
+  changed. ``python price_scores.py refresh`` does the same in the foreground.
+
+Readers (Property Explorer, ``RecommendationIndex.recommend(sort='value')``)
+only read the columns, with no model inference in the request path. Without
+scikit-learn or joblib nothing is scored and the columns stay NULL.
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+import db
+import pricing
+from config import DB_FILE_PATH, PRICE_MODEL_PATH
+
+logger = logging.getLogger(__name__)
+
+PREDICTED_COLUMN = 'predicted_price'
+GAP_COLUMN = 'price_gap_pct'
+COLUMNS = (PREDICTED_COLUMN, GAP_COLUMN)
+INPUTS_TABLE = 'price_score_inputs'
+INPUT_COLUMNS = ('listingtype', 'arealocality', 'propertytype', 'bedroomsbhk', 'areasqft', 'askingprice')
+REFRESH_BATCH = 5000
+# |price_gap_pct| at or beyond which a listing is flagged as under- or overpriced.
+FLAG_THRESHOLD_PCT = 10.0
+
+
+def model_signature(model_path: str = PRICE_MODEL_PATH) -> Optional[str]:
+    """Identifies the model file scores were computed with; None when it cannot be used."""
+    if not pricing.available():
+        return None
+    try:
+        stat = os.stat(model_path)
+    except OSError:
+        return None
+    return f"{os.path.basename(model_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def price_flag(gap_pct) -> Optional[str]:
+    if gap_pct is None or pd.isna(gap_pct):
+        return None
+    if gap_pct <= -FLAG_THRESHOLD_PCT:
+        return "Underpriced"
+    if gap_pct >= FLAG_THRESHOLD_PCT:
+        return "Overpriced"
+    return "Fair price"
+
+
+def gap_pct(asking: np.ndarray, predicted: np.ndarray, listing_types: Iterable) -> np.ndarray:
+    """Percent by which ``asking`` exceeds ``predicted``, for Sale listings only."""
+    asking = np.asarray(asking, dtype=float)
+    predicted = np.asarray(predicted, dtype=float)
+    is_sale = np.array([isinstance(value, str) and value.lower() == 'sale' for value in listing_types], dtype=bool)
+    valid = is_sale & (asking > 0) & (predicted > 0)
+    gaps = np.full(len(asking), np.nan)
+    gaps[valid] = (asking[valid] - predicted[valid]) / predicted[valid] * 100
+    return gaps
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(properties)")}
+    if columns:
+        for column in COLUMNS:
+            if column not in columns:
+                conn.execute(f"ALTER TABLE properties ADD COLUMN {column} REAL")
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {INPUTS_TABLE} (property_id TEXT PRIMARY KEY, model TEXT, "
+        # Untyped columns keep values exactly as read from properties, for IS NOT comparisons.
+        f"{', '.join(INPUT_COLUMNS)})"
+    )
+
+
+def _input_columns(conn: sqlite3.Connection) -> List[str]:
+    available = {row[1] for row in conn.execute("PRAGMA table_info(properties)")}
+    return [column for column in INPUT_COLUMNS if column in available]
+
+
+def _read_inputs(conn: sqlite3.Connection, where_sql: str, params) -> pd.DataFrame:
+    # Plain cursor reads, as in lead_scoring: a failed pd.read_sql rolls back the caller's write.
+    columns = _input_columns(conn)
+    select = ", ".join(f"p.{column}" for column in ['property_id', *columns])
+    # rowid: properties has no index on property_id, so updates go by rowid.
+    cursor = conn.execute(f"SELECT p.rowid AS row_id, {select} FROM properties p{where_sql}", params)
+    return pd.DataFrame(cursor.fetchall(), columns=[column[0] for column in cursor.description])
+
+
+def _write(conn: sqlite3.Connection, rows: pd.DataFrame, signature: str) -> None:
+    if rows.empty:
+        return
+    predicted = pricing.predict_prices(rows).round(0).to_numpy()
+    asking = pd.to_numeric(rows['askingprice'], errors='coerce') if 'askingprice' in rows else pd.Series(np.nan, index=rows.index)
+    listing_types = rows['listingtype'] if 'listingtype' in rows else [None] * len(rows)
+    gaps = np.round(gap_pct(asking.to_numpy(dtype=float), predicted, listing_types), 1)
+    conn.executemany(
+        f"UPDATE properties SET {PREDICTED_COLUMN} = ?, {GAP_COLUMN} = ? WHERE rowid = ?",
+        [(None if np.isnan(price) else float(price), None if np.isnan(gap) else float(gap), int(row_id))
+         for row_id, price, gap in zip(rows['row_id'], predicted, gaps)],
+    )
+    inputs = [column for column in INPUT_COLUMNS if column in rows.columns]
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {INPUTS_TABLE} (property_id, model, {', '.join(inputs)}) "
+        f"VALUES ({', '.join('?' * (len(inputs) + 2))})",
+        [(row[0], signature, *row[1:])
+         for row in rows[['property_id', *inputs]].astype(object).where(rows.notna(), None).itertuples(index=False)],
+    )
+
+
+def rescore(conn: sqlite3.Connection, property_ids: Iterable[Optional[str]]) -> None:
+    """Rescores ``property_ids`` inside the caller's transaction; ids no longer in properties are dropped.
+
+    Runs in a savepoint: when the model cannot be loaded or the table lacks
+    the inputs, the property write still goes through and the listing is left
+    for the next refresh.
+    """
+    property_ids = list(dict.fromkeys(property_id for property_id in property_ids if property_id is not None))
+    signature = model_signature()
+    if not property_ids or signature is None:
+        return
+    placeholders = ", ".join("?" * len(property_ids))
+    conn.execute("SAVEPOINT rescore_prices")
+    try:
+        ensure_schema(conn)
+        conn.execute(f"DELETE FROM {INPUTS_TABLE} WHERE property_id IN ({placeholders})", property_ids)
+        _write(conn, _read_inputs(conn, f" WHERE p.property_id IN ({placeholders})", property_ids), signature)
+    except (sqlite3.Error, OSError, RuntimeError, ValueError):
+        logger.warning("Could not rescore prices for %s", property_ids, exc_info=True)
+        conn.execute("ROLLBACK TO rescore_prices")
+    conn.execute("RELEASE rescore_prices")
+
+
+def delete(conn: sqlite3.Connection, property_ids: Iterable[str]) -> None:
+    ensure_schema(conn)
+    conn.executemany(f"DELETE FROM {INPUTS_TABLE} WHERE property_id = ?", [(property_id,) for property_id in property_ids])
+
+
+def _stale_sql(conn: sqlite3.Connection) -> str:
+    stale_checks = " OR ".join(f"s.{column} IS NOT p.{column}" for column in _input_columns(conn))
+    return (f" LEFT JOIN {INPUTS_TABLE} s ON s.property_id = p.property_id WHERE p.property_id IS NOT NULL "
+            f"AND (s.property_id IS NULL OR s.model IS NOT ?{' OR ' + stale_checks if stale_checks else ''})")
+
+
+def refresh(conn: sqlite3.Connection, limit: Optional[int] = None) -> int:
+    """Rescores up to ``limit`` listings whose stored inputs are missing or stale; returns how many."""
+    signature = model_signature()
+    if signature is None:
+        return 0
+    ensure_schema(conn)
+    stale = _read_inputs(conn, f"{_stale_sql(conn)} LIMIT ?", (signature, -1 if limit is None else int(limit)))
+    _write(conn, stale, signature)
+    conn.execute(f"DELETE FROM {INPUTS_TABLE} WHERE property_id NOT IN (SELECT property_id FROM properties)")
+    return len(stale)
+
+
+def needs_refresh(conn: sqlite3.Connection) -> bool:
+    """Whether ``refresh`` has work: a new model file, a missing table or inputs that no longer match.
+
+    Compares the stored inputs as ``refresh`` does, so in-place edits made
+    behind the helpers' back are caught, not only added rows.
+    """
+    signature = model_signature()
+    if signature is None:
+        return False
+    try:
+        return bool(conn.execute(
+            f"SELECT EXISTS (SELECT 1 FROM properties p{_stale_sql(conn)} LIMIT 1)", (signature,)
+        ).fetchone()[0])
+    except sqlite3.OperationalError:
+        return True
+
+
+def refresh_all(db_path: str, batch_size: int = REFRESH_BATCH) -> int:
+    """Rescores every stale listing, one ``batch_size`` transaction at a time; returns how many."""
+    total = 0
+    while True:
+        with db.connection(db_path) as conn:
+            scored = refresh(conn, batch_size)
+            conn.commit()
+        if scored:
+            data_cache.bump_version(db_path)
+        total += scored
+        if scored < batch_size:
+            break
+    logger.info("Price scores refreshed for %d listings in %s", total, db_path)
+    return total
+
+
+_lock = threading.Lock()
+_refreshes: Dict[str, threading.Thread] = {}
+
+
+def _run_refresh(db_path: str) -> None:
+    try:
+        refresh_all(db_path)
+    except Exception:
+        logger.exception("Background price score refresh failed for %s", db_path)
+
+
+def refresh_in_background(db_path: str) -> threading.Thread:
+    """Starts ``refresh_all`` on a daemon thread unless one is already running for ``db_path``."""
+    with _lock:
+        thread = _refreshes.get(db_path)
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_run_refresh, args=(db_path,), name="price-scores", daemon=True)
+            _refreshes[db_path] = thread
+            thread.start()
+        return thread
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rescore listings whose stored price scores are missing or stale.")
+    parser.add_argument("command", choices=["refresh"])
+    parser.add_argument("--db", default=DB_FILE_PATH)
+    parser.add_argument("--batch-size", type=int, default=REFRESH_BATCH)
+    args = parser.parse_args()
+    refresh_all(args.db, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
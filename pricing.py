@@ -0,0 +1,145 @@
+"""
+Sale price estimates from the model trained in ``notebooks/01_data_exploration.ipynb``.
+
+The notebook fitted a RandomForestRegressor on archived sales with
+``pd.get_dummies(..., drop_first=True)`` over locality and property type, and
+saved the model with joblib next to the feature column list
+(``model_columns.json``):
+    bhk, areasqft, arealocality_<name>..., propertytype_<name>...
+
+``predict_prices`` builds that feature matrix for a whole frame in one
+vectorized pass. ``bhk`` is parsed from ``bedroomsbhk`` the way the notebook
+did. Each one-hot group is filled from the categorical codes of its source
+column, and a value the model never saw (or the dropped first category)
+leaves its group all zero. Rows without a usable ``areasqft`` get NaN.
+
+The model is loaded once per process, on first use. joblib/scikit-learn are
+optional; ``available()`` reports whether they are installed, and the
+prediction functions raise ``RuntimeError`` when they are not.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import PRICE_MODEL_COLUMNS_PATH, PRICE_MODEL_PATH
+from recommendation_index import bhk_numbers
+
+try:
+    import joblib
+except ImportError:  # pragma: no cover - exercised only without joblib
+    joblib = None
+
+logger = logging.getLogger(__name__)
+
+ONE_HOT_FIELDS = ('arealocality', 'propertytype')
+# Columns predict_prices reads from a properties frame.
+SOURCE_COLUMNS = ('bedroomsbhk', 'areasqft') + ONE_HOT_FIELDS
+
+
+class FeatureLayout(NamedTuple):
+    columns: List[str]
+    # model column -> position for the plain numeric features
+    numeric: Dict[str, int]
+    # source column -> (categories, positions of their one-hot columns)
+    one_hot: Dict[str, Tuple[List[str], np.ndarray]]
+
+
+def feature_layout(columns: List[str]) -> FeatureLayout:
+    numeric: Dict[str, int] = {}
+    groups: Dict[str, List[Tuple[str, int]]] = {}
+    for position, column in enumerate(columns):
+        field, _, value = column.partition('_')
+        if field in ONE_HOT_FIELDS and value:
+            groups.setdefault(field, []).append((value, position))
+        else:
+            numeric[column] = position
+    one_hot = {field: ([value for value, _ in pairs], np.array([position for _, position in pairs]))
+               for field, pairs in groups.items()}
+    return FeatureLayout(list(columns), numeric, one_hot)
+
+
+def _numeric_source(properties: pd.DataFrame, column: str) -> np.ndarray:
+    if column in properties.columns:
+        return pd.to_numeric(properties[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    if column == 'bhk' and 'bedroomsbhk' in properties.columns:
+        return bhk_numbers(properties['bedroomsbhk']).to_numpy(dtype=float)
+    return np.zeros(len(properties))
+
+
+def feature_matrix(properties: pd.DataFrame, layout: FeatureLayout) -> np.ndarray:
+    """The model's input matrix for ``properties`` (one row per property, ``layout.columns`` order)."""
+    features = np.zeros((len(properties), len(layout.columns)))
+    for column, position in layout.numeric.items():
+        features[:, position] = _numeric_source(properties, column)
+    rows = np.arange(len(properties))
+    for field, (categories, positions) in layout.one_hot.items():
+        if field not in properties.columns:
+            continue
+        codes = pd.Categorical(properties[field].astype(object), categories=categories).codes
+        known = codes >= 0
+        features[rows[known], positions[codes[known]]] = 1.0
+    return features
+
+
+class PriceModel:
+    def __init__(self, model: Any, columns: List[str]) -> None:
+        self.model = model
+        self.layout = feature_layout(columns)
+
+    def predict(self, properties: pd.DataFrame) -> pd.Series:
+        """Estimated sale price per row of ``properties``, aligned with its index."""
+        features = feature_matrix(properties, self.layout)
+        valid = np.isfinite(features).all(axis=1)
+        if 'areasqft' in self.layout.numeric:
+            valid &= features[:, self.layout.numeric['areasqft']] > 0
+        prices = np.full(len(properties), np.nan)
+        if valid.any():
+            prices[valid] = self.model.predict(pd.DataFrame(features[valid], columns=self.layout.columns))
+        return pd.Series(prices, index=properties.index, name='predicted_price')
+
+
+_lock = threading.Lock()
+_model: Optional[PriceModel] = None
+
+
+def available() -> bool:
+    return joblib is not None
+
+
+def load_model(model_path: str = PRICE_MODEL_PATH, columns_path: str = PRICE_MODEL_COLUMNS_PATH) -> PriceModel:
+    if joblib is None:
+        raise RuntimeError("Price estimates need scikit-learn and joblib: pip install scikit-learn joblib")
+    with open(columns_path, encoding='utf-8') as handle:
+        columns = json.load(handle)
+    model = joblib.load(model_path)
+    logger.info("Loaded price model %s (%d features)", model_path, len(columns))
+    return PriceModel(model, columns)
+
+
+def get_model() -> PriceModel:
+    """The process-wide model, loaded on first use."""
+    global _model
+    model = _model
+    if model is None:
+        with _lock:
+            if _model is None:
+                _model = load_model()
+            model = _model
+    return model
+
+
+def predict_prices(properties_df: pd.DataFrame) -> pd.Series:
+    """Estimated sale prices for a properties frame (NaN where there is no usable area)."""
+    return get_model().predict(properties_df)
+
+
+def clear() -> None:
+    """Forgets the loaded model (used in tests)."""
+    global _model
+    with _lock:
+        _model = None
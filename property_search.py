@@ -0,0 +1,289 @@
+"""
+Indexed property search behind the Property Explorer and ``GET /properties``.
+
+The explorer's filters (listing type, property type, locality, price range,
+amenities) are translated into one SQL query over the ``properties`` table
+instead of filtering a full DataFrame on every rerun:
+
+- composite indexes on ``(listingtype, propertytype, arealocality, price)``,
+  one per price column, serve the equality filters and the price range;
+- the small planner in ``PropertySearch.plan`` fills index columns the user left
+  at "All" with the column's full (cached) value list whenever a later index
+  column is constrained, so SQLite seeks the index instead of scanning it;
+- amenities in ``amenity_index.AMENITY_REGISTRY`` are matched against the
+  ``properties.amenity_mask`` bitmask, ``(amenity_mask & wanted) = wanted``,
+  which the search indexes cover. Amenity-only searches filter every mask in
+  NumPy (``amenity_index.AmenityIndex``) and fetch the page by rowid;
+- other amenity names fall back to the ``property_amenities`` join table.
+
+Masks and amenity rows are written together with the property by the ``utils``
+write helpers. ``property_amenity_sources`` keeps the text each property's rows
+were parsed from so ``backfill`` (run by ``utils.initialize_database``) can
+repair rows written behind their back. ``PropertySearch`` itself only reads:
+it runs on the API's reader threads, so it never creates the schema or
+backfills.
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import amenity_index
+import data_cache
+import db
+from amenity_index import MASK_COLUMN, parse_amenities
+
+logger = logging.getLogger(__name__)
+
+AMENITIES_TABLE = "property_amenities"
+SOURCES_TABLE = "property_amenity_sources"
+PRICE_COLUMNS = {'Sale': 'askingprice', 'Rent': 'monthlyrent'}
+INDEX_COLUMNS = ('listingtype', 'propertytype', 'arealocality')
+# amenity_mask and property_id last make counts with an amenity filter index-only.
+SEARCH_INDEXES = {
+    f"idx_properties_search_{price_col}": (*INDEX_COLUMNS, price_col, MASK_COLUMN, 'property_id')
+    for price_col in PRICE_COLUMNS.values()
+}
+# Columns with more distinct values than this are not expanded into IN lists.
+IN_LIST_LIMIT = 64
+SEARCH_LIMIT = 1000
+
+_lock = threading.Lock()
+_facets: Dict[str, Tuple[int, "Facets"]] = {}
+
+
+class PropertyFilters(NamedTuple):
+    """Explorer filters; ``None`` means "All"."""
+    listing_type: Optional[str] = None
+    property_type: Optional[str] = None
+    locality: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    amenities: Tuple[str, ...] = ()
+
+
+class Facets(NamedTuple):
+    """Distinct filter values and the price range per listing type."""
+    values: Dict[str, List[Any]]
+    has_nulls: Dict[str, bool]
+    price_ranges: Dict[str, Tuple[Optional[float], Optional[float]]]
+
+
+# --- Schema and write-time maintenance ---
+
+def _index_columns(conn: sqlite3.Connection, name: str) -> Tuple[str, ...]:
+    return tuple(row[2] for row in conn.execute(f"PRAGMA index_info({name})"))
+
+
+def ensure_schema(conn: sqlite3.Connection) -> bool:
+    """Creates the amenity tables, mask column and search indexes; True if the mask column was just added."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(properties)")}
+    added = bool(columns) and MASK_COLUMN not in columns
+    if added:
+        conn.execute(f"ALTER TABLE properties ADD COLUMN {MASK_COLUMN} INTEGER")
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {AMENITIES_TABLE} "
+        "(amenity TEXT NOT NULL, property_id TEXT NOT NULL, PRIMARY KEY (amenity, property_id)) WITHOUT ROWID"
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{AMENITIES_TABLE}_property ON {AMENITIES_TABLE} (property_id)")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {SOURCES_TABLE} (property_id TEXT PRIMARY KEY, amenities TEXT)")
+    for name, columns in SEARCH_INDEXES.items():
+        try:
+            existing = _index_columns(conn, name)
+            if existing and existing != columns:
+                conn.execute(f"DROP INDEX {name}")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON properties ({', '.join(columns)})")
+        except sqlite3.OperationalError as exc:
+            logger.debug("Could not create %s: %s", name, exc)
+    return added
+
+
+def store_many(conn: sqlite3.Connection, rows: Iterable[Tuple[str, Any]]) -> None:
+    """Replaces the amenity mask and rows of each (property_id, amenities text) inside the caller's transaction."""
+    ensure_schema(conn)
+    rows = [(property_id, amenities) for property_id, amenities in rows if property_id is not None]
+    if not rows:
+        return
+    conn.executemany(
+        f"UPDATE properties SET {MASK_COLUMN} = ? WHERE property_id = ?",
+        [(amenity_index.parse_mask(amenities), property_id) for property_id, amenities in rows],
+    )
+    conn.executemany(f"DELETE FROM {AMENITIES_TABLE} WHERE property_id = ?", [(property_id,) for property_id, _ in rows])
+    conn.executemany(
+        f"INSERT OR IGNORE INTO {AMENITIES_TABLE} (amenity, property_id) VALUES (?, ?)",
+        [(amenity, property_id) for property_id, amenities in rows for amenity in parse_amenities(amenities)],
+    )
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {SOURCES_TABLE} (property_id, amenities) VALUES (?, ?)",
+        [(property_id, None if amenities is None else str(amenities)) for property_id, amenities in rows],
+    )
+
+
+def store(conn: sqlite3.Connection, property_id: str, amenities: Any) -> None:
+    store_many(conn, [(property_id, amenities)])
+
+
+def rename(conn: sqlite3.Connection, old_id: str, new_id: str) -> None:
+    ensure_schema(conn)
+    conn.execute(f"UPDATE {AMENITIES_TABLE} SET property_id = ? WHERE property_id = ?", (new_id, old_id))
+    conn.execute(f"UPDATE {SOURCES_TABLE} SET property_id = ? WHERE property_id = ?", (new_id, old_id))
+
+
+def delete(conn: sqlite3.Connection, property_id: str) -> None:
+    ensure_schema(conn)
+    conn.execute(f"DELETE FROM {AMENITIES_TABLE} WHERE property_id = ?", (property_id,))
+    conn.execute(f"DELETE FROM {SOURCES_TABLE} WHERE property_id = ?", (property_id,))
+
+
+def backfill(conn: sqlite3.Connection) -> int:
+    """Re-parses properties whose amenity mask or rows are missing or stale; returns how many."""
+    ensure_schema(conn)
+    stale = conn.execute(
+        f"SELECT p.property_id, p.amenities FROM properties p LEFT JOIN {SOURCES_TABLE} s ON s.property_id = p.property_id "
+        f"WHERE p.property_id IS NOT NULL AND (s.property_id IS NULL OR s.amenities IS NOT CAST(p.amenities AS TEXT) "
+        f"OR p.{MASK_COLUMN} IS NULL)"
+    ).fetchall()
+    store_many(conn, stale)
+    for table in (AMENITIES_TABLE, SOURCES_TABLE):
+        conn.execute(f"DELETE FROM {table} WHERE property_id NOT IN (SELECT property_id FROM properties)")
+    return len(stale)
+
+
+# --- Search ---
+
+class PropertySearch:
+    """Plans and runs explorer searches against one database file."""
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = str(db_path)
+
+    def facets(self) -> Facets:
+        """Distinct listing types, property types and localities plus price ranges, cached per data version."""
+        version = data_cache.data_version(self.db_path)
+        with _lock:
+            cached = _facets.get(self.db_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with db.connection(self.db_path) as conn:
+            values, has_nulls = {}, {}
+            for column in INDEX_COLUMNS:
+                distinct = [row[0] for row in conn.execute(f"SELECT DISTINCT {column} FROM properties")]
+                values[column] = sorted(value for value in distinct if value is not None)
+                has_nulls[column] = len(values[column]) != len(distinct)
+            price_ranges = {
+                listing_type: tuple(conn.execute(
+                    f"SELECT MIN({price_col}), MAX({price_col}) FROM properties WHERE listingtype = ?", (listing_type,)
+                ).fetchone())
+                for listing_type, price_col in PRICE_COLUMNS.items()
+            }
+        facets = Facets(values, has_nulls, price_ranges)
+        with _lock:
+            _facets[self.db_path] = (version, facets)
+        return facets
+
+    def plan(self, filters: PropertyFilters) -> Tuple[List[str], List[Any]]:
+        """WHERE clauses and parameters for ``filters``, shaped for the composite indexes."""
+        price_col = PRICE_COLUMNS.get(filters.listing_type)
+        has_price = price_col is not None and (filters.min_price is not None or filters.max_price is not None)
+        chosen = [filters.listing_type, filters.property_type, filters.locality]
+        facets = self.facets()
+
+        where: List[str] = []
+        params: List[Any] = []
+        expanding = True
+        for position, (column, value) in enumerate(zip(INDEX_COLUMNS, chosen)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+                continue
+            later_constrained = has_price or any(later is not None for later in chosen[position + 1:])
+            values = facets.values[column]
+            expanding = expanding and later_constrained and not facets.has_nulls[column] and 0 < len(values) <= IN_LIST_LIMIT
+            if expanding:
+                where.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if has_price:
+            if filters.min_price is not None:
+                where.append(f"{price_col} >= ?")
+                params.append(filters.min_price)
+            if filters.max_price is not None:
+                where.append(f"{price_col} <= ?")
+                params.append(filters.max_price)
+        amenities = list(dict.fromkeys(filters.amenities))
+        wanted = amenity_index.wanted_mask(amenities)
+        if amenities and wanted is not None:
+            where.append(f"({MASK_COLUMN} & ?) = ?")
+            params.extend([wanted, wanted])
+        elif amenities and where:
+            # The index narrows the candidates; each one is checked with a primary-key probe.
+            for amenity in amenities:
+                where.append(f"EXISTS (SELECT 1 FROM {AMENITIES_TABLE} WHERE amenity = ? AND property_id = properties.property_id)")
+                params.append(amenity)
+        elif amenities:
+            # Amenities are the only filter: intersect their rows first and look the properties up by id.
+            joins = " ".join(
+                f"JOIN {AMENITIES_TABLE} a{i} ON a{i}.amenity = ? AND a{i}.property_id = a0.property_id"
+                for i in range(1, len(amenities))
+            )
+            where.append(f"property_id IN (SELECT a0.property_id FROM {AMENITIES_TABLE} a0 {joins} WHERE a0.amenity = ?)")
+            params.extend(amenities[1:] + amenities[:1])
+        return where, params
+
+    def _where_sql(self, filters: PropertyFilters) -> Tuple[str, List[Any]]:
+        where, params = self.plan(filters)
+        return (f" WHERE {' AND '.join(where)}" if where else ""), params
+
+    def _mask_only(self, filters: PropertyFilters) -> Optional[int]:
+        # Registered amenities and nothing else: answered from the AmenityIndex.
+        # (A price range only applies together with a listing type.)
+        if not filters.amenities or any(value is not None for value in filters[:3]):
+            return None
+        return amenity_index.wanted_mask(filters.amenities)
+
+    def _amenity_rowids(self, wanted: int) -> np.ndarray:
+        return amenity_index.get_index(self.db_path).select(wanted)
+
+    def count(self, filters: PropertyFilters) -> int:
+        wanted = self._mask_only(filters)
+        if wanted is not None:
+            return len(self._amenity_rowids(wanted))
+        where_sql, params = self._where_sql(filters)
+        with db.connection(self.db_path) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM properties{where_sql}", params).fetchone()[0]
+
+    def search(self, filters: PropertyFilters, limit: int = SEARCH_LIMIT,
+               columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Up to ``limit`` matching rows, in index order."""
+        select = ", ".join(f'"{column}"' for column in columns) if columns else "*"
+        wanted = self._mask_only(filters)
+        if wanted is not None:
+            rowids = [int(rowid) for rowid in self._amenity_rowids(wanted)[:int(limit)]]
+            with db.connection(self.db_path) as conn:
+                return pd.read_sql(
+                    f"SELECT {select} FROM properties WHERE rowid IN ({', '.join('?' * len(rowids)) or 'NULL'}) ORDER BY rowid",
+                    conn, params=rowids,
+                )
+        where_sql, params = self._where_sql(filters)
+        with db.connection(self.db_path) as conn:
+            return pd.read_sql(f"SELECT {select} FROM properties{where_sql} LIMIT ?", conn, params=(*params, int(limit)))
+
+    def explain(self, filters: PropertyFilters) -> List[str]:
+        """SQLite's query plan for ``search(filters)``, one line per step."""
+        where_sql, params = self._where_sql(filters)
+        with db.connection(self.db_path) as conn:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN SELECT * FROM properties{where_sql} LIMIT 1", params).fetchall()
+        return [row[-1] for row in rows]
+
+    def get(self, property_id: str) -> Optional[pd.Series]:
+        with db.connection(self.db_path) as conn:
+            rows = pd.read_sql("SELECT * FROM properties WHERE property_id = ? LIMIT 1", conn, params=(property_id,))
+        return None if rows.empty else rows.iloc[0]
+
+
+def clear() -> None:
+    with _lock:
+        _facets.clear()
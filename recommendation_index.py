@@ -0,0 +1,465 @@
+"""
+Indexed property recommendations.
+
+``RecommendationIndex`` is built once from the properties snapshot and answers
+``utils.get_recommendations`` queries without rescanning the table:
+
+- rows are partitioned by lower-cased ``listingtype``;
+- each partition keeps its rows bucketed by BHK, a price-sorted array per
+  price column and an inverted index from locality to rows;
+- a query is a bisect on the price array plus sorted-array intersections.
+
+Results follow the original tiering exactly: perfect matches (BHK, budget and
+locality), then in-budget matches, then core matches (listing type and BHK),
+de-duplicated on ``property_id`` and capped at ``MAX_RECOMMENDATIONS``.
+With ``sort='value'`` each tier is ordered by the stored ``price_gap_pct``
+(most underpriced first, unscored listings last) before the cap is applied.
+
+One index is kept per database file and stamped with the ``data_cache`` data
+version. Property write helpers patch it in place; any other change to the
+database (including one racing such a write) makes it stale and it is
+rebuilt on the next query.
+"""
+
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+import db
+import typed_frames
+
+logger = logging.getLogger(__name__)
+
+MAX_RECOMMENDATIONS = 10
+BUDGET_TOLERANCE = 1.15
+PRICE_COLUMNS = ('askingprice', 'monthlyrent')
+# Stored by price_scores; read as-is, never computed here.
+VALUE_COLUMN = 'price_gap_pct'
+SORTS = ('match', 'value')
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def price_column_for(looking_for: str) -> str:
+    return 'askingprice' if looking_for.lower() == 'sale' else 'monthlyrent'
+
+
+def bhk_numbers(bedrooms: pd.Series) -> pd.Series:
+    """The number in each ``bedroomsbhk`` value ("3 BHK" -> 3), 0 when there is none.
+
+    For a categorical column only the categories are parsed.
+    """
+    if isinstance(bedrooms.dtype, pd.CategoricalDtype):
+        per_category = bhk_numbers(pd.Series(bedrooms.cat.categories, dtype=object)).to_numpy()
+        # Code -1 (missing) picks the trailing 0.
+        return pd.Series(np.append(per_category, 0)[bedrooms.cat.codes.to_numpy()], index=bedrooms.index)
+    return pd.to_numeric(bedrooms.astype(str).str.extract(r'(\d+)').iloc[:, 0], errors='coerce').fillna(0)
+
+
+def _partition_keys(listing_types: pd.Series) -> List[Optional[str]]:
+    if isinstance(listing_types.dtype, pd.CategoricalDtype):
+        keys = [value.lower() if isinstance(value, str) else None for value in listing_types.cat.categories]
+        keys.append(None)
+        return np.asarray(keys, dtype=object)[listing_types.cat.codes.to_numpy()].tolist()
+    return [value.lower() if isinstance(value, str) else None for value in listing_types]
+
+
+class _Partition:
+    """Lookup structures for the rows sharing one listing type."""
+
+    def __init__(self, positions: np.ndarray, frame: pd.DataFrame) -> None:
+        self.positions = positions
+        bhk = frame['bhk_numeric'].to_numpy()[positions]
+        self.bhk_buckets: Dict[float, np.ndarray] = {}
+        for value in np.unique(bhk):
+            self.bhk_buckets[value] = positions[bhk == value]
+
+        self.price_index: Dict[str, tuple] = {}
+        for column in PRICE_COLUMNS:
+            if column not in frame.columns:
+                continue
+            prices = frame[f'_{column}_numeric'].to_numpy()[positions]
+            valid = ~np.isnan(prices)
+            order = np.argsort(prices[valid], kind='stable')
+            self.price_index[column] = (prices[valid][order], positions[valid][order])
+
+        self.localities: Dict[str, np.ndarray] = {}
+        if 'arealocality' in frame.columns:
+            localities = frame['arealocality'].to_numpy()[positions]
+            groups: Dict[str, List[int]] = {}
+            for position, locality in zip(positions.tolist(), localities):
+                if isinstance(locality, str):
+                    groups.setdefault(locality, []).append(position)
+            self.localities = {key: np.asarray(value, dtype=np.int64) for key, value in groups.items()}
+
+    def core(self, req_bhk: int) -> np.ndarray:
+        buckets = [rows for bhk, rows in self.bhk_buckets.items() if bhk >= req_bhk]
+        if not buckets:
+            return _EMPTY
+        return np.sort(np.concatenate(buckets))
+
+    def within_budget(self, price_col: str, ceiling: float) -> np.ndarray:
+        if price_col not in self.price_index:
+            return _EMPTY
+        sorted_prices, positions = self.price_index[price_col]
+        cutoff = np.searchsorted(sorted_prices, ceiling, side='right')
+        return np.sort(positions[:cutoff])
+
+    def in_locality(self, req_location: str) -> np.ndarray:
+        # Same semantics as Series.str.contains(req_location, case=False).
+        pattern = re.compile(req_location, re.IGNORECASE)
+        matches = [rows for locality, rows in self.localities.items() if pattern.search(locality)]
+        if not matches:
+            return _EMPTY
+        return np.sort(np.concatenate(matches))
+
+
+class RecommendationIndex:
+    """Partitioned, price-sorted view of the properties table."""
+
+    def __init__(self, properties_df: pd.DataFrame, version: Optional[int] = None) -> None:
+        self.version = version
+        self._frame = self._prepare(properties_df.reset_index(drop=True))
+        self._alive = np.ones(len(self._frame), dtype=bool)
+        self._partitions: Dict[str, _Partition] = {}
+        self._dirty = set(self._partition_keys())
+
+    @staticmethod
+    def _prepare(frame: pd.DataFrame) -> pd.DataFrame:
+        frame = frame.copy()
+        frame['bhk_numeric'] = bhk_numbers(frame['bedroomsbhk'])
+        for column in PRICE_COLUMNS:
+            if column in frame.columns:
+                frame[f'_{column}_numeric'] = pd.to_numeric(frame[column], errors='coerce').astype(float)
+        frame['_partition'] = _partition_keys(frame['listingtype'])
+        frame['_value'] = (pd.to_numeric(frame[VALUE_COLUMN], errors='coerce').astype(float)
+                           if VALUE_COLUMN in frame.columns else np.nan)
+        return frame
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    def _partition_keys(self) -> set:
+        return {key for key in self._frame['_partition'] if key is not None}
+
+    def _partition(self, key: str) -> Optional[_Partition]:
+        if key in self._dirty:
+            positions = np.flatnonzero(self._alive & (self._frame['_partition'] == key).to_numpy())
+            self._partitions[key] = _Partition(positions.astype(np.int64), self._frame)
+            self._dirty.discard(key)
+        return self._partitions.get(key)
+
+    # --- Incremental maintenance ---
+    def remove(self, property_ids: Iterable[str]) -> None:
+        ids = set(property_ids)
+        hit = self._alive & self._frame['property_id'].isin(ids).to_numpy()
+        self._dirty.update(key for key in self._frame.loc[hit, '_partition'] if key is not None)
+        self._alive &= ~hit
+
+    def upsert(self, rows: pd.DataFrame) -> None:
+        """Applies freshly read ``properties`` rows, keyed on ``property_id``.
+
+        Rows that keep their ``property_id`` keep their table position; new ids
+        are appended, matching SQLite's rowid order.
+        """
+        if rows.empty:
+            return
+        prepared = self._conform(self._prepare(rows.reset_index(drop=True)))
+        position_by_id = {
+            pid: pos for pos, pid in zip(np.flatnonzero(self._alive).tolist(), self._frame['property_id'].to_numpy()[self._alive])
+        }
+        appended = []
+        for label, row in prepared.iterrows():
+            position = position_by_id.get(row['property_id'])
+            if position is None:
+                appended.append(label)
+                continue
+            self._dirty.add(self._frame.at[position, '_partition'])
+            for column in prepared.columns:
+                if column not in self._frame.columns:
+                    self._frame[column] = None
+                self._frame.at[position, column] = row[column]
+            self._dirty.add(row['_partition'])
+        if appended:
+            # Sliced from ``prepared`` so the rows keep its (conformed) dtypes.
+            new_rows = prepared.loc[appended]
+            self._frame = pd.concat([self._frame, new_rows], ignore_index=True)
+            self._alive = np.concatenate([self._alive, np.ones(len(new_rows), dtype=bool)])
+            self._dirty.update(new_rows['_partition'])
+        self._dirty.discard(None)
+
+    def _conform(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Gives ``rows`` the index frame's dtypes so they can be written into it.
+
+        Categorical columns get the union of both sets of categories. A column
+        whose fresh values do not fit the frame's dtype falls back to ``object``
+        on both sides.
+        """
+        for column in rows.columns.intersection(self._frame.columns):
+            dtype = self._frame[column].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                categories = dtype.categories.union(pd.Index(rows[column].dropna().unique()))
+                self._frame[column] = self._frame[column].cat.set_categories(categories)
+                rows[column] = rows[column].astype(self._frame[column].dtype)
+            elif rows[column].dtype != dtype:
+                try:
+                    rows[column] = rows[column].astype(dtype)
+                except (TypeError, ValueError):
+                    self._frame[column] = self._frame[column].astype(object)
+                    rows[column] = rows[column].astype(object)
+        return rows
+
+    # --- Queries ---
+    def match(self, looking_for: str, req_budget: float, req_bhk: int, req_location: str):
+        """Returns the (perfect, in-budget, core) row positions, each in table order."""
+        partition = self._partition(looking_for.lower())
+        if partition is None:
+            return _EMPTY, _EMPTY, _EMPTY
+        core = partition.core(req_bhk)
+        budget = partition.within_budget(price_column_for(looking_for), req_budget * BUDGET_TOLERANCE)
+        good = np.intersect1d(core, budget, assume_unique=True)
+        perfect = good
+        if req_location != 'Any':
+            perfect = np.intersect1d(good, partition.in_locality(req_location), assume_unique=True)
+        return perfect, good, core
+
+    def recommend(self, client_data: pd.Series, req_budget: float, req_bhk: int, req_location: str,
+                  limit: int = MAX_RECOMMENDATIONS, sort: str = 'match') -> Dict[str, Any]:
+        """Builds the same response as the original full-scan ``get_recommendations``."""
+        if sort not in SORTS:
+            raise ValueError(f"Unknown recommendation sort {sort!r}; expected one of {SORTS}")
+        tiers = self.match(client_data['lookingfor'], req_budget, req_bhk, req_location)
+        perfect, good, _ = tiers
+        if sort == 'value':
+            values = self._frame['_value'].to_numpy()
+            tiers = tuple(tier[value_order(values[tier])] for tier in tiers)
+        chosen = self._select(tiers, limit)
+        return {
+            "message": _message(len(chosen), len(perfect) > 0, len(good) > 0),
+            "client_details": client_data.to_dict(),
+            "recommendations": self.records(chosen, price_column_for(client_data['lookingfor'])),
+        }
+
+    def recommend_many(self, clients: pd.DataFrame, parsed: pd.DataFrame,
+                       limit: int = MAX_RECOMMENDATIONS) -> List[Dict[str, Any]]:
+        """Batch form of ``recommend`` for many clients, returned in ``clients`` order.
+
+        ``parsed`` holds ``req_budget``, ``req_bhk`` and ``req_location`` aligned
+        with ``clients``. Clients sharing (listing type, BHK, location) share one
+        core/locality lookup; their budgets are matched in a single pass with
+        ``_first_within_budget``.
+        """
+        clients = clients.reset_index(drop=True)
+        parsed = parsed.reset_index(drop=True)
+        looking_for = clients['lookingfor'].astype(str)
+        groups = pd.DataFrame({
+            'partition': looking_for.str.lower(),
+            'req_bhk': parsed['req_bhk'],
+            'req_location': parsed['req_location'],
+        }).groupby(['partition', 'req_bhk', 'req_location'], sort=False, dropna=False).indices
+        budgets = parsed['req_budget'].to_numpy(dtype=float)
+        numeric_prices = {column: self._numeric_prices(column) for column in PRICE_COLUMNS}
+
+        selections: List[Any] = [None] * len(clients)
+        for (key, req_bhk, req_location), members in groups.items():
+            partition = self._partition(key)
+            if partition is None:
+                for member in members:
+                    selections[member] = ([], False, False)
+                continue
+            core = partition.core(req_bhk)
+            prices = numeric_prices[price_column_for(key)][core]
+            ceilings = budgets[members] * BUDGET_TOLERANCE
+            good = _first_within_budget(core, prices, ceilings, limit)
+            perfect = good
+            if req_location != 'Any':
+                in_locality = np.isin(core, partition.in_locality(req_location), assume_unique=True)
+                perfect = _first_within_budget(core[in_locality], prices[in_locality], ceilings, limit)
+            core_head = core[:limit]
+            for offset, member in enumerate(members):
+                chosen = self._select((perfect[offset], good[offset], core_head), limit)
+                selections[member] = (chosen, len(perfect[offset]) > 0, len(good[offset]) > 0)
+
+        needed = sorted({position for chosen, _, _ in selections for position in chosen})
+        internal = [column for column in self._frame.columns if column.startswith('_')]
+        base_records = dict(zip(needed, typed_frames.to_records(self._frame.iloc[needed].drop(columns=internal))))
+        client_records = clients.to_dict(orient='records')
+
+        results = []
+        for member, (chosen, has_perfect, has_good) in enumerate(selections):
+            price_values = numeric_prices[price_column_for(looking_for[member])]
+            recommendations = []
+            for position in chosen:
+                record = dict(base_records[position])
+                record['price_numeric'] = float(price_values[position])
+                recommendations.append(record)
+            results.append({
+                "message": _message(len(chosen), has_perfect, has_good),
+                "client_details": client_records[member],
+                "recommendations": recommendations,
+            })
+        return results
+
+    def _numeric_prices(self, column: str) -> np.ndarray:
+        if f'_{column}_numeric' not in self._frame.columns:
+            return np.full(len(self._frame), np.nan)
+        return self._frame[f'_{column}_numeric'].to_numpy()
+
+    def _select(self, tiers, limit: int) -> List[int]:
+        """Concatenates the tiers in order, keeping the first row per property_id."""
+        property_ids = self._frame['property_id'].to_numpy()
+        chosen, seen = [], set()
+        for tier in tiers:
+            for position in np.asarray(tier).tolist():
+                if len(chosen) >= limit:
+                    break
+                if property_ids[position] not in seen:
+                    seen.add(property_ids[position])
+                    chosen.append(position)
+        return chosen
+
+    def records(self, positions: List[int], price_col: str) -> List[Dict[str, Any]]:
+        internal = [column for column in self._frame.columns if column.startswith('_')]
+        rows = self._frame.iloc[positions].drop(columns=internal)
+        rows['price_numeric'] = pd.to_numeric(rows[price_col], errors='coerce')
+        return typed_frames.to_records(rows)
+
+
+def value_order(gaps: np.ndarray) -> np.ndarray:
+    """Stable order of ``gaps`` from most underpriced to most overpriced, NaN last."""
+    gaps = np.asarray(gaps, dtype=float)
+    return np.argsort(np.where(np.isnan(gaps), np.inf, gaps), kind='stable')
+
+
+def _message(found: int, has_perfect: bool, has_good: bool) -> str:
+    if not found:
+        return "No suitable properties found."
+    if has_perfect:
+        return f"Found {found} great matches!"
+    if has_good:
+        return "No exact location matches, showing similar properties."
+    return "No matches in budget, showing similar properties."
+
+
+# Below this many in-budget candidates, sorting them outright is cheaper than
+# scanning the candidate list for the first ``limit`` hits.
+SPARSE_BUDGET_MATCHES = 2048
+_SCAN_BLOCK = 256
+
+
+def _first_within_budget(candidates: np.ndarray, prices: np.ndarray, ceilings: np.ndarray,
+                         limit: int) -> List[np.ndarray]:
+    """For each ceiling, the first ``limit`` candidates (table order) priced at or under it.
+
+    A sort-merge of the price-sorted candidates against the ceilings gives the
+    number of hits per ceiling. Sparse ceilings take their hits straight from
+    the price order; dense ones broadcast-compare growing blocks of the
+    candidate list against all pending ceilings at once.
+    """
+    unique_ceilings, inverse = np.unique(ceilings, return_inverse=True)
+    valid = ~np.isnan(prices)
+    order = np.argsort(prices[valid], kind='stable')
+    sorted_prices = prices[valid][order]
+    by_price = candidates[valid][order]
+    counts = np.searchsorted(sorted_prices, unique_ceilings, side='right')
+
+    found: List[Any] = [None] * len(unique_ceilings)
+    for i in np.flatnonzero(counts <= SPARSE_BUDGET_MATCHES):
+        found[i] = np.sort(by_price[:counts[i]])[:limit]
+
+    pending = np.flatnonzero(counts > SPARSE_BUDGET_MATCHES)
+    hits: Dict[int, List[int]] = {int(i): [] for i in pending}
+    start, block = 0, _SCAN_BLOCK
+    while pending.size and start < len(candidates):
+        stop = min(start + block, len(candidates))
+        mask = prices[start:stop][None, :] <= unique_ceilings[pending][:, None]
+        still_pending = []
+        for row, i in zip(mask, pending.tolist()):
+            hits[i].extend(candidates[start:stop][row][:limit - len(hits[i])].tolist())
+            if len(hits[i]) < limit:
+                still_pending.append(i)
+        pending = np.asarray(still_pending, dtype=np.int64)
+        start, block = stop, block * 2
+    for i, positions in hits.items():
+        found[i] = np.asarray(positions, dtype=np.int64)
+
+    return [found[i] for i in inverse]
+
+
+_lock = threading.RLock()
+_indexes: Dict[str, RecommendationIndex] = {}
+
+
+def get_index(db_path: str, loader: Callable[[], pd.DataFrame]) -> RecommendationIndex:
+    """Returns the index for ``db_path``, rebuilding it if the data version moved."""
+    db_path = str(db_path)
+    with _lock:
+        version = data_cache.data_version(db_path)
+        index = _indexes.get(db_path)
+        if index is None or index.version != version:
+            index = RecommendationIndex(loader(), version=version)
+            _indexes[db_path] = index
+            logger.debug("Built recommendation index for %s with %d rows", db_path, len(index))
+        return index
+
+
+def pending_update(db_path: str) -> Optional[int]:
+    """Call before a property write: returns the index version if it is current."""
+    db_path = str(db_path)
+    with _lock:
+        index = _indexes.get(db_path)
+        if index is None or index.version != data_cache.data_version(db_path):
+            return None
+        return index.version
+
+
+def before_commit(db_path: str) -> None:
+    """Call inside a property write's transaction, after its last write.
+
+    The transaction holds SQLite's write lock by then, so every other commit
+    has either landed already or waits for ours. Reading the data version
+    here counts the ones that landed; ``bump_version`` would otherwise fold
+    them into our own commit.
+    """
+    data_cache.data_version(db_path)
+
+
+def apply_property_changes(db_path: str, property_ids: Iterable[str], pending: Optional[int]) -> None:
+    """Patches the index with the current rows of ``property_ids`` after a write.
+
+    ``pending`` is the value ``pending_update`` returned before the write; when
+    the index was already stale it is simply left to be rebuilt. The patch is
+    only stamped current if the data version moved by exactly the writer's own
+    ``bump_version``. Any other commit seen in between (another thread or
+    process) would be hidden by the stamp, so the index is dropped instead.
+    """
+    db_path = str(db_path)
+    property_ids = [pid for pid in property_ids if pid is not None]
+    with _lock:
+        index = _indexes.get(db_path)
+        if pending is None or index is None or index.version != pending or not property_ids:
+            return
+        placeholders = ", ".join("?" for _ in property_ids)
+        with db.connection(db_path) as conn:
+            rows = typed_frames.read_properties(
+                conn, where_sql=f" WHERE property_id IN ({placeholders})", params=property_ids,
+                columns=[column for column in index._frame.columns if column in typed_frames.property_columns(conn, True)],
+            )
+        # Read after the rows, so a commit that landed before them is caught here.
+        if data_cache.data_version(db_path) != pending + 1:
+            logger.debug("Concurrent write to %s; dropping the recommendation index", db_path)
+            del _indexes[db_path]
+            return
+        index.remove(set(property_ids) - set(rows['property_id']))
+        index.upsert(rows)
+        index.version = pending + 1
+
+
+def clear() -> None:
+    with _lock:
+        _indexes.clear()
@@ -0,0 +1,195 @@
+"""
+Image acquisition for the PDF property reports.
+
+``generate_property_report`` needs one picture per recommended property. Fetching
+them one after another with a 5 s timeout each made a report of ten properties
+take up to 50 s against a slow CDN, and the same stock photos were downloaded
+again for every report. ``ImageFetcher.fetch_many``:
+- reads local files (uploaded ``image_1`` paths) directly;
+- downloads each distinct URL once, on a bounded thread pool with a shared
+  ``requests`` session, and gives up on whatever is not back by the deadline;
+- keeps downloaded bytes in an on-disk cache under ``MEDIA_DIR``. Cache hits
+  refresh the file's mtime, and the least recently used files are evicted once
+  the cache grows past ``max_bytes``.
+
+A source that cannot be read comes back as None and the report draws its
+placeholder box instead.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import MEDIA_DIR
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(MEDIA_DIR, "report_cache")
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+FETCH_WORKERS = 8
+FETCH_TIMEOUT = 5.0
+CACHE_SUFFIX = ".img"
+
+
+def is_url(source: Any) -> bool:
+    return isinstance(source, str) and source.lower().startswith(("http://", "https://"))
+
+
+def is_local_file(source: Any) -> bool:
+    return isinstance(source, str) and bool(source) and not is_url(source) and os.path.isfile(source)
+
+
+class ImageFetcher:
+    """Concurrent image loader with an on-disk, size-bounded LRU cache for remote images."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES,
+                 workers: int = FETCH_WORKERS, timeout: float = FETCH_TIMEOUT) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._session: Optional[requests.Session] = None
+        self._stats = {"local": 0, "cache_hits": 0, "downloads": 0, "failures": 0, "timeouts": 0, "evictions": 0}
+
+    def _cache_path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + CACHE_SUFFIX)
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="report-images")
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+            return self._executor
+
+    def cached(self, url: str) -> Optional[bytes]:
+        path = self._cache_path(url)
+        try:
+            with open(path, "rb") as handle:
+                content = handle.read()
+            os.utime(path)
+        except OSError:
+            return None
+        self._count("cache_hits")
+        return content
+
+    def _store(self, url: str, content: bytes) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as temp:
+                temp.write(content)
+            os.replace(temp_path, self._cache_path(url))
+        except OSError:
+            logger.warning("Could not cache report image %s", url, exc_info=True)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self.evict()
+
+    def evict(self) -> int:
+        """Deletes the least recently used cache files until the cache fits ``max_bytes``."""
+        with self._lock:
+            try:
+                entries = [entry for entry in os.scandir(self.cache_dir)
+                           if entry.is_file() and entry.name.endswith(CACHE_SUFFIX)]
+            except OSError:
+                return 0
+            files = sorted(((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries))
+            total = sum(size for _, size, _ in files)
+            removed = 0
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            self._stats["evictions"] += removed
+            return removed
+
+    def _read_local(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as handle:
+                content = handle.read()
+        except OSError:
+            logger.warning("Could not read report image %s", path, exc_info=True)
+            return None
+        self._count("local")
+        return content
+
+    def _download(self, url: str) -> Optional[bytes]:
+        try:
+            response = self._session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException:
+            logger.warning("Image fetch failed for report: %s", url, exc_info=True)
+            self._count("failures")
+            return None
+        self._count("downloads")
+        self._store(url, response.content)
+        return response.content
+
+    def _load(self, source: str) -> Optional[bytes]:
+        if not is_url(source):
+            return self._read_local(source)
+        content = self.cached(source)
+        return content if content is not None else self._download(source)
+
+    def fetch_many(self, sources: Sequence[Optional[str]]) -> List[Optional[bytes]]:
+        """Image bytes for each source (URL or local path), None where it could not be read in time."""
+        distinct = list(dict.fromkeys(source for source in sources if source))
+        if not distinct:
+            return [None] * len(sources)
+        pool = self._pool()
+        futures = {source: pool.submit(self._load, source) for source in distinct}
+        # Downloads still running at the deadline finish in the background and
+        # land in the cache for the next report.
+        _, pending = wait(futures.values(), timeout=self.timeout + 1)
+        self._count("timeouts", len(pending))
+        loaded: Dict[str, Optional[bytes]] = {
+            source: future.result() if future.done() and future.exception() is None else None
+            for source, future in futures.items()
+        }
+        return [loaded.get(source) if source else None for source in sources]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, session = self._executor, self._session
+            self._executor = self._session = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if session is not None:
+            session.close()
+
+
+_fetcher = ImageFetcher()
+
+
+def fetch_many(sources: Sequence[Optional[str]]) -> List[Optional[bytes]]:
+    return _fetcher.fetch_many(sources)
+
+
+def stats() -> Dict[str, Any]:
+    return _fetcher.stats()
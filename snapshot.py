@@ -0,0 +1,214 @@
+"""
+Columnar snapshots of the real estate tables for analytics and batch jobs.
+
+``export_snapshot`` copies clients, properties, tasks and communication_log
+out of SQLite into one typed file per table. The file is Arrow IPC
+(``.arrow``) by default, or Parquet (``.parquet``). A ``manifest.json``
+records when the snapshot was taken and how many rows each table has.
+``load_snapshot`` reads the tables back. Arrow files are memory-mapped, so
+loading a table costs little more than the columns a job actually touches.
+Readers like the Market Analysis page can use a snapshot instead of running
+``pd.read_sql`` against the live database.
+
+Column types come from what SQLite actually stores, checked in one pass per
+table:
+- integer-only columns become ``int64`` and numeric ones ``float64``;
+- TIMESTAMP/DATE columns become timestamps;
+- anything else becomes a string.
+
+Rows are streamed in ``EXPORT_CHUNK_ROWS`` batches, and each file is written
+next to its final path and then renamed into place.
+
+pyarrow is optional; the functions raise ``RuntimeError`` when it is missing.
+
+    python snapshot.py export [--dir data/snapshot] [--format parquet]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+import db
+from config import DB_FILE_PATH, SNAPSHOT_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - exercised only without pyarrow
+    pa = ipc = pq = None
+
+logger = logging.getLogger(__name__)
+
+TABLES = ('clients', 'properties', 'tasks', 'communication_log')
+FORMATS = {'arrow': '.arrow', 'parquet': '.parquet'}
+MANIFEST = "manifest.json"
+EXPORT_CHUNK_ROWS = 50000
+_TIMESTAMP_TYPES = ('TIMESTAMP', 'DATETIME', 'DATE')
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("Snapshots need pyarrow: pip install pyarrow")
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _schema(conn: sqlite3.Connection, table: str) -> "pa.Schema":
+    """Arrow schema for ``table`` from its declared types and the storage classes actually present."""
+    declared = [(row[1], (row[2] or '').upper()) for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+    probes = ", ".join(
+        f"MAX(typeof({_quote(name)}) = '{storage}')"
+        for name, _ in declared for storage in ('integer', 'real', 'text', 'blob')
+    )
+    flags = conn.execute(f"SELECT {probes} FROM {_quote(table)}").fetchone() if declared else ()
+    fields = []
+    for position, (name, declared_type) in enumerate(declared):
+        has_int, has_real, has_text, has_blob = (bool(flag) for flag in flags[position * 4:position * 4 + 4])
+        if has_blob:
+            arrow_type = pa.binary()
+        elif has_text and declared_type in _TIMESTAMP_TYPES and not (has_int or has_real):
+            arrow_type = pa.timestamp('us')
+        elif has_text or not (has_int or has_real):
+            arrow_type = pa.string()
+        elif has_real:
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.int64()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def _batch(rows: List[Sequence[Any]], schema: "pa.Schema") -> "pa.RecordBatch":
+    columns = list(zip(*rows))
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_timestamp(field.type):
+            # Same parsing the pages apply to listing dates; unparseable text becomes null.
+            arrays.append(pa.array(pd.to_datetime(pd.Series(values, dtype=object), errors='coerce', format='mixed'),
+                                   type=field.type, from_pandas=True))
+        elif pa.types.is_string(field.type):
+            arrays.append(pa.array([None if value is None else str(value) for value in values], type=field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _writer(path: str, schema: "pa.Schema", fmt: str):
+    if fmt == 'parquet':
+        return pq.ParquetWriter(path, schema)
+    return ipc.new_file(path, schema)
+
+
+def export_table(conn: sqlite3.Connection, table: str, path: str, fmt: str = 'arrow',
+                 chunk_rows: int = EXPORT_CHUNK_ROWS) -> int:
+    """Writes ``table`` to ``path``; returns the number of rows."""
+    _require_pyarrow()
+    schema = _schema(conn, table)
+    cursor = conn.execute(f"SELECT {', '.join(_quote(field.name) for field in schema)} FROM {_quote(table)}")
+    rows = 0
+    partial = path + ".partial"
+    with _writer(partial, schema, fmt) as writer:
+        for chunk in iter(lambda: cursor.fetchmany(chunk_rows), []):
+            writer.write_batch(_batch(chunk, schema))
+            rows += len(chunk)
+    os.replace(partial, path)
+    return rows
+
+
+def export_snapshot(db_path: str = DB_FILE_PATH, directory: str = SNAPSHOT_DIR, fmt: str = 'arrow',
+                    tables: Sequence[str] = TABLES) -> Dict[str, Any]:
+    """Exports ``tables`` (those that exist) from ``db_path`` into ``directory``; returns the manifest."""
+    _require_pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown snapshot format {fmt!r}; expected one of {sorted(FORMATS)}")
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"created_at": datetime.now().isoformat(timespec='seconds'), "source": str(db_path),
+                "format": fmt, "tables": {}}
+    with db.connection(db_path) as conn:
+        present = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        # One read transaction, so every table comes from the same state of the database.
+        conn.execute("BEGIN")
+        try:
+            for table in tables:
+                if table not in present:
+                    continue
+                filename = table + FORMATS[fmt]
+                rows = export_table(conn, table, os.path.join(directory, filename), fmt)
+                manifest["tables"][table] = {"file": filename, "rows": rows}
+                logger.info("Exported %s: %d rows", table, rows)
+        finally:
+            conn.rollback()
+    with open(os.path.join(directory, MANIFEST + ".partial"), "w") as handle:
+        json.dump(manifest, handle, indent=2)
+    os.replace(os.path.join(directory, MANIFEST + ".partial"), os.path.join(directory, MANIFEST))
+    return manifest
+
+
+def read_manifest(directory: str = SNAPSHOT_DIR) -> Optional[Dict[str, Any]]:
+    """The snapshot's manifest, or None when ``directory`` holds no snapshot."""
+    try:
+        with open(os.path.join(directory, MANIFEST)) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def load_table(table: str, directory: str = SNAPSHOT_DIR, columns: Optional[Sequence[str]] = None) -> "pa.Table":
+    """One table of the snapshot as an Arrow table (memory-mapped for Arrow files)."""
+    _require_pyarrow()
+    manifest = read_manifest(directory)
+    if manifest is None or table not in manifest["tables"]:
+        raise FileNotFoundError(f"No snapshot of {table!r} in {directory}")
+    path = os.path.join(directory, manifest["tables"][table]["file"])
+    if path.endswith(FORMATS['parquet']):
+        return pq.read_table(path, columns=columns, memory_map=True)
+    arrow_table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return arrow_table.select(list(columns)) if columns else arrow_table
+
+
+def load_snapshot(directory: str = SNAPSHOT_DIR, tables: Optional[Sequence[str]] = None,
+                  columns: Optional[Dict[str, Sequence[str]]] = None,
+                  arrow_dtypes: bool = False) -> Dict[str, pd.DataFrame]:
+    """Snapshot tables as DataFrames, keyed by table name.
+
+    ``columns`` restricts a table to the listed columns. With ``arrow_dtypes``
+    the frames keep the Arrow buffers (``pd.ArrowDtype``) instead of converting
+    to NumPy, which keeps memory-mapped data off the heap.
+    """
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"No snapshot in {directory}")
+    frames = {}
+    for table in tables or list(manifest["tables"]):
+        arrow_table = load_table(table, directory, (columns or {}).get(table))
+        frames[table] = arrow_table.to_pandas(types_mapper=pd.ArrowDtype) if arrow_dtypes else arrow_table.to_pandas()
+    return frames
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the database tables to a columnar snapshot.")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--db", default=DB_FILE_PATH)
+    parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--format", choices=sorted(FORMATS), default='arrow')
+    args = parser.parse_args()
+    manifest = export_snapshot(args.db, args.dir, args.format)
+    for table, info in manifest["tables"].items():
+        logger.info("%s: %d rows -> %s", table, info["rows"], os.path.join(args.dir, info["file"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+import os
+import shutil
+import tempfile
+
+# config reads the database path when first imported; point it at a scratch copy
+# of the shipped database first, so the suite never writes to real_estate.db.
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="real-estate-tests-")
+_SHIPPED_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "real_estate.db")
+os.environ["REAL_ESTATE_DB_PATH"] = os.path.join(_SCRATCH_DIR, "real_estate.db")
+shutil.copyfile(_SHIPPED_DB, os.environ["REAL_ESTATE_DB_PATH"])
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_SCRATCH_DIR, ignore_errors=True)
@@ -0,0 +1,189 @@
+import json
+import os
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ai_client
+from ai_client import AIClient, CircuitOpenError
+
+REPLY = {"choices": [{"message": {"content": "Hello"}}]}
+
+
+@pytest.fixture
+def backend():
+    """Chat-completions stand-in answering with the queued (status, headers) pairs, then 200s."""
+    state = {"queue": [], "calls": [], "ports": set()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            state["calls"].append(body)
+            state["ports"].add(self.client_address[1])
+            status, headers = state["queue"].pop(0) if state["queue"] else (200, {})
+            if status == 200 and body.get("stream"):
+                payload = "".join(f"data: {json.dumps({'choices': [{'delta': {'content': word}}]})}\n\n"
+                                  for word in ("Hel", "lo")) + "data: [DONE]\n\n"
+            else:
+                payload = json.dumps(REPLY if status == 200 else {"error": status})
+            content = payload.encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(url, **kwargs):
+    sleeps = []
+    clock = Clock()
+    options = dict(max_retries=2, backoff_base=0.5, backoff_max=4.0, failure_threshold=2, reset_timeout=30,
+                   clock=clock, sleep=sleeps.append, jitter=lambda low, high: high)
+    options.update(kwargs)
+    return AIClient(url, "test-key", **options), sleeps, clock
+
+
+def test_transient_errors_are_retried_with_backoff(backend):
+    client, sleeps, _ = make_client(backend["url"])
+    backend["queue"] = [(503, {}), (429, {"Retry-After": "3"})]
+    assert client.complete({"model": "m"}) == REPLY
+    assert len(backend["calls"]) == 3
+    # 0.5 s jittered backoff, then the server's Retry-After.
+    assert sleeps == [0.5, 3.0]
+    stats = client.stats()
+    assert (stats["attempts"], stats["retries"], stats["successes"], stats["failures"]) == (3, 2, 1, 0)
+    assert stats["latency"]["request"]["count"] == 3
+
+
+def test_keep_alive_connections_are_reused(backend):
+    client, _, _ = make_client(backend["url"])
+    for _ in range(5):
+        client.complete({"model": "m"})
+    assert len(backend["calls"]) == 5
+    assert len(backend["ports"]) == 1
+
+
+def test_client_errors_are_not_retried_and_do_not_trip_the_circuit(backend):
+    client, sleeps, _ = make_client(backend["url"])
+    backend["queue"] = [(400, {}), (401, {})]
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.complete({"model": "m"})
+    assert len(backend["calls"]) == 2 and sleeps == []
+    assert client.state() == "closed"
+    stats = client.stats()
+    assert (stats["successes"], stats["failures"], stats["client_errors"]) == (0, 0, 2)
+
+
+def test_client_errors_keep_the_failure_streak_and_an_open_circuit(backend):
+    client, _, clock = make_client(backend["url"], max_retries=0)
+    backend["queue"] = [(503, {}), (400, {}), (503, {}), (401, {})]
+    for expected in (503, 400, 503):
+        with pytest.raises(requests.HTTPError) as error:
+            client.complete({"model": "m"})
+        assert error.value.response.status_code == expected
+    assert client.state() == "open"
+
+    clock.now = 30
+    # A rejected trial neither closes the circuit nor restarts its timer; the next call is the new trial.
+    with pytest.raises(requests.HTTPError):
+        client.complete({"model": "m"})
+    assert client.state() == "half-open"
+    assert client.complete({"model": "m"}) == REPLY
+    stats = client.stats()
+    assert client.state() == "closed"
+    assert (stats["successes"], stats["failures"], stats["client_errors"]) == (1, 2, 2)
+
+
+def test_circuit_opens_after_repeated_failures_and_recovers(backend):
+    client, _, clock = make_client(backend["url"], max_retries=1)
+    backend["queue"] = [(503, {})] * 4
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.complete({"model": "m"})
+    assert client.state() == "open" and len(backend["calls"]) == 4
+
+    with pytest.raises(CircuitOpenError):
+        client.complete({"model": "m"})
+    assert len(backend["calls"]) == 4
+
+    clock.now = 30
+    assert client.state() == "half-open"
+    assert client.complete({"model": "m"}) == REPLY
+    assert client.state() == "closed"
+    stats = client.stats()
+    assert stats["short_circuited"] == 1 and stats["consecutive_failures"] == 0
+
+
+def test_failed_trial_reopens_the_circuit(backend):
+    client, _, clock = make_client(backend["url"], max_retries=0, failure_threshold=1)
+    backend["queue"] = [(500, {}), (502, {})]
+    with pytest.raises(requests.HTTPError):
+        client.complete({"model": "m"})
+    clock.now = 30
+    with pytest.raises(requests.HTTPError):
+        client.complete({"model": "m"})
+    assert client.state() == "open"
+    clock.now = 45
+    with pytest.raises(CircuitOpenError):
+        client.complete({"model": "m"})
+
+
+def test_unreachable_backend_is_retried_then_raises():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        # Bound but not listening: connections are refused.
+        client, sleeps, _ = make_client(f"http://127.0.0.1:{sock.getsockname()[1]}/v1", failure_threshold=1)
+        with pytest.raises(requests.ConnectionError):
+            client.complete({"model": "m"})
+    assert sleeps == [0.5, 1.0]
+    assert client.state() == "open"
+
+
+def test_stream_lines_retries_before_the_first_byte(backend):
+    client, _, _ = make_client(backend["url"])
+    backend["queue"] = [(503, {})]
+    lines = [line for line in client.stream_lines({"model": "m"}) if line]
+    assert lines[-1] == "data: [DONE]" and len(lines) == 3
+    assert backend["calls"][-1]["stream"] is True
+    stats = client.stats()
+    assert stats["retries"] == 1 and stats["successes"] == 1
+    assert stats["latency"]["stream"]["count"] == 1
+
+
+def test_histogram_buckets():
+    histogram = ai_client.LatencyHistogram((0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(seconds)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"le_0.1": 2, "le_1": 1, "inf": 1}
+    assert snapshot["count"] == 4 and snapshot["sum"] == pytest.approx(3.65)
+
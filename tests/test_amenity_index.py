@@ -0,0 +1,56 @@
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import amenity_index
+import property_search
+from database_setup import setup_database
+
+
+def test_parse_mask_uses_registry_bits():
+    gym, pool = amenity_index.AMENITY_BITS['Gymnasium'], amenity_index.AMENITY_BITS['Swimming Pool']
+    assert amenity_index.parse_mask("Gymnasium, Swimming Pool,Gymnasium") == gym | pool
+    assert amenity_index.parse_mask("Jacuzzi, Gymnasium") == gym
+    assert amenity_index.parse_mask(None) == 0
+    assert amenity_index.parse_mask(float("nan")) == 0
+    assert amenity_index.names_of(gym | pool) == ('Swimming Pool', 'Gymnasium')
+
+
+def test_masks_for_and_matches():
+    masks = amenity_index.masks_for(pd.Series(["Garden", None, "Garden, Elevator", np.nan, ""]))
+    garden, elevator = amenity_index.AMENITY_BITS['Garden'], amenity_index.AMENITY_BITS['Elevator']
+    assert masks.tolist() == [garden, 0, garden | elevator, 0, 0]
+    assert amenity_index.matches(masks, garden).tolist() == [True, False, True, False, False]
+    assert amenity_index.matches(masks, garden | elevator).tolist() == [False, False, True, False, False]
+    assert amenity_index.wanted_mask(["Garden", "Elevator"]) == garden | elevator
+    assert amenity_index.wanted_mask(["Garden", "Jacuzzi"]) is None
+
+
+def test_ensure_schema_adds_mask_and_upgrades_indexes(tmp_path):
+    conn = sqlite3.connect(tmp_path / "old.db")
+    pd.DataFrame({"property_id": ["P1", "P2"], "listingtype": ["Sale", "Rent"], "propertytype": ["Shop", "Shop"],
+                  "arealocality": ["Kanakia", "Kanakia"], "amenities": ["Garden", None],
+                  "askingprice": [1.0, None], "monthlyrent": [None, 2.0]}).to_sql("properties", conn, index=False)
+    conn.execute("CREATE INDEX idx_properties_search_askingprice ON properties (listingtype, askingprice)")
+    assert property_search.ensure_schema(conn)
+    assert property_search.backfill(conn) == 2
+    assert conn.execute("SELECT amenity_mask FROM properties ORDER BY property_id").fetchall() == [
+        (amenity_index.AMENITY_BITS['Garden'],), (0,)]
+    assert property_search._index_columns(conn, "idx_properties_search_askingprice") == \
+        property_search.SEARCH_INDEXES["idx_properties_search_askingprice"]
+    assert not property_search.ensure_schema(conn)
+    conn.close()
+
+
+def test_setup_database_stores_masks(tmp_path):
+    db_path = tmp_path / "import.db"
+    setup_database(db_file_path=str(db_path))
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT amenities, amenity_mask FROM properties").fetchall()
+    conn.close()
+    assert rows and all(mask == amenity_index.parse_mask(text) for text, mask in rows)
@@ -1,10 +1,13 @@
+import json
 import sys
 import os
 import sqlite3
+import pandas as pd
 import pytest
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import api
+import property_search
 from fastapi.testclient import TestClient
 
 
@@ -149,4 +152,148 @@ def test_recommendations_success(test_client):
     body = response.json()
     assert "message" in body
     assert "recommendations" in body
-    assert len(body["recommendations"]) > 0
\ No newline at end of file
+    assert len(body["recommendations"]) > 0
+
+
+def test_batch_recommendations_streams_ndjson(test_client):
+    response = test_client.post("/recommendations/batch", json={"client_ids": ["CL-1001", "CL-9999"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["client_id"] for line in lines] == ["CL-1001", "CL-9999"]
+    assert lines[0]["recommendations"][0]["property_id"] == "SALE-PROP-1001"
+    assert lines[1]["recommendations"] == []
+
+
+def test_recommendations_see_external_property_changes(test_client):
+    assert len(test_client.get("/recommendations/CL-1001").json()["recommendations"]) == 1
+    conn = sqlite3.connect(api.DB_FILE_PATH)
+    conn.execute("UPDATE properties SET askingprice = 99000000 WHERE property_id = 'SALE-PROP-1001'")
+    conn.commit()
+    conn.close()
+    assert test_client.get("/recommendations/CL-1001").json()["recommendations"] == []
+
+
+def _add_listings(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("ALTER TABLE properties ADD COLUMN propertytype TEXT")
+    conn.execute("ALTER TABLE properties ADD COLUMN amenities TEXT")
+    conn.executemany(
+        "INSERT INTO clients VALUES (?, ?, '9876543210', 'c@example.com', ?, '2 BHK Budget 50L', ?)",
+        [(f"CL-{1002 + i}", f"Client {i}", "Rent" if i % 2 else "Sale", "Negotiating" if i % 3 == 0 else "New")
+         for i in range(6)],
+    )
+    conn.executemany(
+        "INSERT INTO properties VALUES (?, ?, '2 BHK', ?, ?, ?, ?, ?)",
+        [
+            ("SALE-PROP-1002", "Sale", "Kanakia", 9000000, None, "Apartment", "Gymnasium, Swimming Pool"),
+            ("SALE-PROP-1003", "Sale", "Kanakia", None, None, "Apartment", "Gymnasium"),
+            ("RENT-PROP-1004", "Rent", "Kanakia", None, 30000, "Shop", "Power Backup"),
+        ],
+    )
+    # Rows written past the helpers get their amenity masks from the startup backfill.
+    property_search.backfill(conn)
+    conn.commit()
+    conn.close()
+
+
+def test_clients_keyset_pagination_and_filters(test_client):
+    _add_listings(api.DB_FILE_PATH)
+    first = test_client.get("/clients", params={"limit": 4})
+    assert [row["client_id"] for row in first.json()] == ["CL-1001", "CL-1002", "CL-1003", "CL-1004"]
+    assert set(first.json()[0]) == {"client_id", "name"}
+    second = test_client.get("/clients", params={"limit": 4, "after": first.headers["X-Next-Cursor"]})
+    assert [row["client_id"] for row in second.json()] == ["CL-1005", "CL-1006", "CL-1007"]
+    assert "X-Next-Cursor" not in second.headers
+
+    filtered = test_client.get("/clients", params={"status": "Negotiating", "fields": "status,lookingfor"})
+    assert filtered.json() == [
+        {"client_id": "CL-1002", "status": "Negotiating", "lookingfor": "Sale"},
+        {"client_id": "CL-1005", "status": "Negotiating", "lookingfor": "Rent"},
+    ]
+    assert test_client.get("/clients", params={"fields": "password"}).status_code == 422
+
+
+def test_properties_filters_and_ndjson_export(test_client, monkeypatch):
+    _add_listings(api.DB_FILE_PATH)
+    params = {"listingtype": "Sale", "locality": "Kanakia", "max_price": 9500000, "fields": "askingprice"}
+    assert test_client.get("/properties", params=params).json() == [
+        {"property_id": "SALE-PROP-1002", "askingprice": 9000000.0},
+    ]
+    amenities = test_client.get("/properties", params=[("amenities", "Gymnasium"), ("fields", "propertytype")])
+    assert [row["property_id"] for row in amenities.json()] == ["SALE-PROP-1002", "SALE-PROP-1003"]
+    assert test_client.get("/properties", params={"min_price": 1}).status_code == 422
+
+    monkeypatch.setattr(api, "EXPORT_CHUNK_ROWS", 2)
+    export = test_client.get("/properties", params={"format": "ndjson", "fields": "listingtype"})
+    assert export.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in export.text.splitlines()]
+    assert [line["property_id"] for line in lines] == [
+        "RENT-PROP-1004", "SALE-PROP-1001", "SALE-PROP-1002", "SALE-PROP-1003",
+    ]
+
+
+def test_search_endpoint(test_client):
+    _add_listings(api.DB_FILE_PATH)
+    hits = test_client.get("/search", params={"q": "kana"}).json()
+    assert {hit["id"] for hit in hits} == {"SALE-PROP-1002", "SALE-PROP-1003", "RENT-PROP-1004"}
+    assert hits[0]["kind"] == "property" and hits[0]["label"].endswith("· Kanakia")
+    clients = test_client.get("/search", params=[("q", "client 3"), ("kind", "client"), ("kind", "note")]).json()
+    assert [(hit["kind"], hit["id"]) for hit in clients] == [("client", "CL-1005")]
+    assert test_client.get("/search", params={"q": "kana", "limit": 1}).json()[0]["id"] in {hit["id"] for hit in hits}
+    assert test_client.get("/search", params={"q": "kana", "kind": "task"}).status_code == 422
+
+
+def test_market_endpoints(test_client):
+    _add_listings(api.DB_FILE_PATH)
+    conn = sqlite3.connect(api.DB_FILE_PATH)
+    conn.execute("ALTER TABLE properties ADD COLUMN listingdate TEXT")
+    conn.execute("ALTER TABLE properties ADD COLUMN areasqft INTEGER")
+    conn.execute("UPDATE properties SET listingdate = '2024-10-23 00:00:00', areasqft = 1000")
+    conn.execute("UPDATE properties SET listingdate = '2024-11-02 00:00:00' WHERE property_id = 'RENT-PROP-1004'")
+    conn.commit()
+    conn.close()
+
+    assert test_client.get("/market/price-per-sqft").json() == [
+        {"arealocality": "Kanakia", "price_per_sqft": 9000.0, "listings": 1},
+        {"arealocality": "Mira Road", "price_per_sqft": 4800.0, "listings": 1},
+    ]
+    assert test_client.get("/market/listings").json() == [
+        {"month": "2024-10", "listings": 3}, {"month": "2024-11", "listings": 1}]
+    assert test_client.get("/market/listings", params={"by": "propertytype"}).json() == [
+        {"propertytype": "Apartment", "listings": 2}, {"propertytype": "Shop", "listings": 1}]
+    assert test_client.get("/market/listings", params={"by": "bedroomsbhk"}).status_code == 422
+    assert sum(row["listings"] for row in test_client.get("/market/days-on-market").json()) == 4
+    assert test_client.get("/market/bhk-demand").json() == [{"bhk": "2 BHK", "clients": 7}]
+
+    test_client.put("/clients/CL-1002", json={"name": "Client 0", "phone": "9876543210", "email": "c@example.com",
+                                              "looking_for": "Sale", "requirements": "3 BHK Budget 90L", "status": "New"})
+    test_client.delete("/clients/CL-1003")
+    assert test_client.get("/market/bhk-demand").json() == [
+        {"bhk": "2 BHK", "clients": 5}, {"bhk": "3 BHK", "clients": 1}]
+
+
+def test_price_estimate_endpoints(test_client):
+    pytest.importorskip("sklearn")
+    import pricing
+    _add_listings(api.DB_FILE_PATH)
+    conn = sqlite3.connect(api.DB_FILE_PATH)
+    conn.execute("ALTER TABLE properties ADD COLUMN areasqft INTEGER")
+    conn.execute("UPDATE properties SET areasqft = 1000 WHERE property_id != 'SALE-PROP-1003'")
+    conn.commit()
+    conn.close()
+
+    estimate = test_client.get("/properties/SALE-PROP-1002/estimate").json()
+    assert estimate["askingprice"] == 9000000 and estimate["estimated_price"] > 0
+    assert test_client.get("/properties/SALE-PROP-9999/estimate").status_code == 404
+
+    response = test_client.post("/estimate/batch", json={
+        "property_ids": ["SALE-PROP-1003", "SALE-PROP-9999", "SALE-PROP-1002"],
+        "properties": [{"arealocality": "Kanakia", "propertytype": "Apartment", "bedroomsbhk": "2 BHK", "areasqft": 1000}],
+    })
+    assert response.status_code == 200
+    first, second, adhoc = response.json()
+    assert first["property_id"] == "SALE-PROP-1003" and first["estimated_price"] is None
+    assert second["estimated_price"] == estimate["estimated_price"] == adhoc["estimated_price"]
+    assert round(pricing.predict_prices(pd.DataFrame([adhoc]))[0]) == adhoc["estimated_price"]
+    assert test_client.post("/estimate/batch", json={}).status_code == 422
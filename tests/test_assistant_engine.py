@@ -1,7 +1,10 @@
+import json
 import os
 import sqlite3
 import sys
+import threading
 from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pandas as pd
 import pytest
@@ -9,6 +12,7 @@ import pytest
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import assistant_engine
+import llm_cache
 import utils
 
 
@@ -152,3 +156,145 @@ def test_create_follow_up_task_persists_to_tasks(assistant_db):
     assert row[4] == "2026-04-22"
     assert row[5] == "Assistant-created task"
     assert row[6] == "Pending"
+
+
+def test_build_context_skips_recommendations_unless_the_intent_needs_them(assistant_db, monkeypatch):
+    calls = []
+    original = utils.get_recommendations
+    monkeypatch.setattr(utils, "get_recommendations", lambda client_id: calls.append(client_id) or original(client_id))
+
+    context = assistant_engine.build_context("CL-1001", intent="client")
+    assert "recommendations" not in context["selected_client"]
+    assert calls == []
+
+    context = assistant_engine.build_context("CL-1001", intent="recommendations")
+    assert [row["property_id"] for row in context["selected_client"]["recommendations"]] == ["SALE-PROP-1001"]
+    assert calls == ["CL-1001"]
+
+
+@pytest.mark.parametrize("query", [
+    "Show follow-up tasks", "Recommend properties", "Give me an overview", "Market trends", "Any apartment listings?",
+    "Hello", "What is the client status?",
+])
+def test_local_replies_match_a_full_context(assistant_db, query):
+    # With no intent, build_context reads everything, as it did before it was trimmed per intent.
+    expected = assistant_engine._generate_local_reply(query, assistant_engine.build_context("CL-1001"))
+    assert assistant_engine.generate_assistant_reply(query, "CL-1001")["answer"] == expected
+
+
+def test_build_context_reads_counts_and_limited_rows(assistant_db):
+    conn = sqlite3.connect(assistant_db)
+    conn.executemany(
+        "INSERT INTO tasks (client_id, task_type, task_description, due_date, status) VALUES ('CL-1001', 'Follow-up', ?, ?, ?)",
+        [("Undated call", None, "Pending"), ("Early call", "2026-04-02", "Pending"), ("Done", "2026-01-01", "Completed")],
+    )
+    conn.commit()
+    conn.close()
+
+    context = assistant_engine.build_context(limit=2, intent="overview")
+    assert context["overview"] == {
+        "total_clients": 1, "total_properties": 1, "high_priority_clients": 0, "new_leads": 1, "pending_tasks": 3,
+    }
+    assert [task["task_description"] for task in context["pending_tasks"]] == ["Early call", "Visit the shortlisted apartment"]
+    assert context["pending_tasks"][0]["client_name"] == "Asha Mehta"
+    assert context["sample_properties"][0]["property_id"] == "SALE-PROP-1001"
+    assert context["selected_client"] is None
+
+
+@pytest.fixture
+def chat_server(monkeypatch):
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests_seen.append(body)
+            content = f"Reply {len(requests_seen)} ✓"
+            if body.get("stream"):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for token in content.split(" "):
+                    chunk = {"choices": [{"delta": {"content": token + " "}}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                return
+            reply = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(assistant_engine, "AI_API_KEY", "test-key")
+    monkeypatch.setattr(assistant_engine, "AI_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    monkeypatch.setattr(assistant_engine, "_response_cache", llm_cache.ResponseCache(ttl=60, max_entries=8))
+    yield requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+def test_ai_replies_are_cached_until_the_data_changes(assistant_db, chat_server):
+    first = assistant_engine.generate_assistant_reply("Who needs follow-up today?")
+    again = assistant_engine.generate_assistant_reply("who needs follow-up today")
+    assert first["used_ai"] and again["used_ai"]
+    assert first["answer"] == again["answer"] == "Reply 1 ✓"
+    assert len(chat_server) == 1
+    payload = json.loads(chat_server[0]["messages"][1]["content"])
+    assert payload["query"] == "Who needs follow-up today?"
+    assert payload["context"]["overview"]["total_clients"] == 1
+
+    # A different selection sends a different context.
+    assistant_engine.generate_assistant_reply("Who needs follow-up today?", selected_client_id="CL-1001")
+    assert len(chat_server) == 2
+
+    utils.add_communication_note("CL-1001", "Called about the site visit")
+    assert assistant_engine.generate_assistant_reply("Who needs follow-up today?")["answer"] == "Reply 3 ✓"
+    stats = assistant_engine.ai_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3 and stats["invalidations"] == 1
+
+
+def test_streamed_reply_starts_with_the_local_answer(assistant_db, chat_server):
+    events = list(assistant_engine.handle_chat_request_stream("Summarize market activity"))
+    assert events[0]["type"] == "local" and events[0]["text"]
+    tokens = [event["text"] for event in events if event["type"] == "token"]
+    assert tokens == ["Reply ", "1 ", "✓ "]
+    done = events[-1]
+    assert done["type"] == "done" and done["reply"]["used_ai"]
+    assert done["reply"]["answer"] == "Reply 1 ✓"
+    assert chat_server[0]["stream"] is True
+
+    # Served from the cache in one piece, shared with the blocking path.
+    cached = list(assistant_engine.handle_chat_request_stream("summarize market activity!"))
+    assert [event["text"] for event in cached if event["type"] == "token"] == ["Reply 1 ✓"]
+    assert assistant_engine.generate_assistant_reply("Summarize market activity")["answer"] == "Reply 1 ✓"
+    assert len(chat_server) == 1
+
+    command = list(assistant_engine.handle_chat_request_stream("add note for CL-1001: call tomorrow"))
+    assert [event["type"] for event in command] == ["local", "done"]
+    assert command[-1]["reply"]["answer"] == "Saved the note for CL-1001."
+    assert len(chat_server) == 1
+
+
+def test_chat_endpoint_sends_server_sent_events(assistant_db, chat_server):
+    from fastapi.testclient import TestClient
+    import api
+
+    response = TestClient(api.api_app).post("/assistant/chat", json={"query": "Summarize market activity"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        kind, data = block.split("\n")
+        events.append((kind[len("event: "):], json.loads(data[len("data: "):])))
+    assert [kind for kind, _ in events] == ["local", "token", "token", "token", "done"]
+    assert "".join(data["text"] for kind, data in events if kind == "token").strip() == "Reply 1 ✓"
+    assert events[-1][1]["reply"]["used_ai"] is True
+    assert TestClient(api.api_app).post("/assistant/chat", json={"query": ""}).status_code == 422
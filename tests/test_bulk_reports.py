@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import sys
+import zipfile
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import bulk_reports
+import data_cache
+import recommendation_index
+import utils
+
+CLIENTS = [
+    ("CL-1001", "Asha", "Sale", "2 BHK in Mira Road, Budget 60L", "Negotiating"),
+    ("CL-1002", "Ravi", "Rent", "1 BHK Rent 20000", "New"),
+    ("CL-1003", "Meena", "Sale", "3 BHK Budget 90L", "Deal Closed"),
+    ("CL-1004", "Kiran", "Sale", "2 BHK Budget 80L", "Lost Interest"),
+    ("CL-1005", "Dev", "Commercial", "Office space", "Actively Searching"),
+]
+
+
+class StubFetcher:
+    """Returns a large PNG for every source and records what was asked for."""
+
+    def __init__(self):
+        self.requested = []
+
+    def fetch_many(self, sources):
+        self.requested.append(list(sources))
+        buffer = BytesIO()
+        Image.new("RGB", (1600, 1200), "orange").save(buffer, format="PNG")
+        return [buffer.getvalue() for _ in sources]
+
+
+@pytest.fixture
+def reports_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "reports.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE clients (client_id TEXT PRIMARY KEY, name TEXT, phone TEXT, email TEXT, "
+                 "lookingfor TEXT, requirements TEXT, status TEXT)")
+    conn.execute("CREATE TABLE properties (property_id TEXT PRIMARY KEY, listingtype TEXT, propertytype TEXT, "
+                 "bedroomsbhk TEXT, arealocality TEXT, areasqft INTEGER, askingprice REAL, monthlyrent REAL, "
+                 "furnishing TEXT, ownername TEXT, ownerphone INTEGER, image_1 TEXT)")
+    conn.executemany("INSERT INTO clients (client_id, name, lookingfor, requirements, status) VALUES (?, ?, ?, ?, ?)",
+                     CLIENTS)
+    conn.executemany("INSERT INTO properties VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)", [
+        ("SALE-PROP-1001", "Sale", "Apartment", "2 BHK", "Mira Road", 650, 5200000.0, None, "Semi", "Owner A", 9000000001),
+        ("SALE-PROP-1002", "Sale", "Bungalow", "3 BHK", "Kanakia", 1800, 8500000.0, None, "Full", "Owner B", 9000000002),
+        ("RENT-PROP-1003", "Rent", "Apartment", "1 BHK", "Kanakia", 480, None, 18000.0, "None", "Owner C", 9000000003),
+    ])
+    conn.commit()
+    conn.close()
+    data_cache.clear()
+    recommendation_index.clear()
+    monkeypatch.setattr(utils, "DB_FILE_PATH", db_path)
+    yield db_path
+    recommendation_index.clear()
+    data_cache.clear()
+
+
+def test_select_clients_by_status_and_ids(reports_db):
+    assert bulk_reports.select_clients(reports_db, active_only=True) == ["CL-1001", "CL-1002", "CL-1005"]
+    assert bulk_reports.select_clients(reports_db, statuses=["New", "Deal Closed"]) == ["CL-1002", "CL-1003"]
+    assert bulk_reports.select_clients(reports_db, ["CL-1004", "CL-1001", "CL-9999"], active_only=True) == ["CL-1001"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_generate_reports_writes_one_pdf_per_client(reports_db, tmp_path, workers):
+    fetcher = StubFetcher()
+    seen = []
+    report = bulk_reports.generate_reports(str(tmp_path / "out.zip"), active_only=True, workers=workers,
+                                           fetcher=fetcher, progress=seen.append)
+    # The commercial client has no listing type to match, so gets no report.
+    assert (report.total, report.written, report.skipped, report.clients) == (3, 2, 1, 3)
+    assert [progress.written for progress in seen] == [1, 2]
+    with zipfile.ZipFile(tmp_path / "out.zip") as archive:
+        names = sorted(archive.namelist())
+        assert names == ["Property_Report_CL-1001.pdf", "Property_Report_CL-1002.pdf"]
+        assert all(archive.read(name).startswith(b"%PDF") for name in names)
+    # Every distinct stock photo was fetched once for the whole batch.
+    requested = [source for batch in fetcher.requested for source in batch]
+    assert len(requested) == len(set(requested)) == 2
+
+    single = utils.generate_property_report(*_first_result(), fetcher=fetcher)
+    assert single.startswith(b"%PDF")
+
+
+def test_generate_reports_to_directory(reports_db, tmp_path):
+    report = bulk_reports.generate_reports(str(tmp_path / "reports"), client_ids=["CL-1002"], workers=1,
+                                           fetcher=StubFetcher())
+    assert report.written == 1
+    assert os.listdir(tmp_path / "reports") == ["Property_Report_CL-1002.pdf"]
+
+
+def test_prepare_image_downscales_to_jpeg():
+    buffer = BytesIO()
+    Image.new("RGBA", (2400, 1200), "teal").save(buffer, format="PNG")
+    with Image.open(BytesIO(bulk_reports.prepare_image(buffer.getvalue()))) as image:
+        assert image.format == "JPEG" and image.size == (bulk_reports.IMAGE_MAX_PX, 400)
+    assert bulk_reports.prepare_image(b"not an image") is None
+    assert bulk_reports.prepare_image(None) is None
+
+
+def _first_result():
+    result = next(utils.get_recommendations_bulk(["CL-1001"]))
+    return result["client_details"], result["recommendations"]
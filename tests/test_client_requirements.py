@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import client_requirements
+import data_cache
+import utils
+from client_requirements import ParsedRequirements
+
+SAMPLES = [
+    "2 BHK in Bhayandar West, Budget ₹85L",
+    "3 BHK in Anywhere in Mira Bhayandar, Budget 1,40L",
+    "2 BHK Semi-Furnished in Mira Road East, Rent up to ₹48,000",
+    "Rent up to 48k, flexible, anywhere",
+    "1 BHK Budget ,",
+    "Office space, no budget given",
+    "",
+    None,
+]
+
+
+def test_parse_examples():
+    assert client_requirements.parse(SAMPLES[0]) == ParsedRequirements(8500000, 2, "Bhayandar West", False)
+    assert client_requirements.parse(SAMPLES[1]) == ParsedRequirements(14000000, 3, "Any", True)
+    assert client_requirements.parse(SAMPLES[2]) == ParsedRequirements(48000, 2, "Mira Road East", False)
+    assert client_requirements.parse(SAMPLES[4]) == ParsedRequirements(0, 1, "Any", False)
+    assert utils.find_budget(SAMPLES[3]) == 48
+
+
+def test_parse_many_matches_parse():
+    frame = client_requirements.parse_many(pd.Series(SAMPLES))
+    for text, row in zip(SAMPLES, frame.itertuples(index=False)):
+        assert ParsedRequirements(row.req_budget, row.req_bhk, row.req_location, row.flexible_location) == client_requirements.parse(text)
+
+
+@pytest.fixture
+def requirements_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "requirements.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE clients (client_id TEXT PRIMARY KEY, name TEXT, phone TEXT, email TEXT, lookingfor TEXT, requirements TEXT, status TEXT)"
+    )
+    conn.execute("CREATE TABLE tasks (task_id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT)")
+    conn.execute("CREATE TABLE communication_log (log_id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT, timestamp TEXT, note TEXT)")
+    conn.execute("INSERT INTO clients VALUES ('CL-1001', 'Asha Mehta', '9876543210', 'asha@example.com', 'Sale', '2 BHK Budget 50L in Mira Road', 'New')")
+    conn.execute("INSERT INTO clients VALUES ('CL-1002', 'Ravi Kumar', '9123456789', 'ravi@example.com', 'Rent', '1 BHK Rent 20000 anywhere', 'New')")
+    conn.commit()
+    conn.close()
+    data_cache.clear()
+    monkeypatch.setattr(utils, "DB_FILE_PATH", str(db_path))
+    yield db_path
+    data_cache.clear()
+
+
+def stored_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = dict(conn.execute("SELECT client_id, req_budget FROM client_requirements").fetchall())
+    conn.close()
+    return rows
+
+
+def test_backfill_migrates_existing_clients(requirements_db):
+    conn = sqlite3.connect(requirements_db)
+    assert client_requirements.backfill(conn) == 2
+    conn.commit()
+    assert client_requirements.backfill(conn) == 0
+    conn.close()
+    assert stored_rows(requirements_db) == {"CL-1001": 5000000, "CL-1002": 20000}
+
+
+def test_write_helpers_keep_the_side_table_current(requirements_db):
+    utils.add_new_client("Priya Shah", "9000000000", "priya@example.com", "Sale", "3 BHK Budget 90L in Kanakia")
+    assert stored_rows(requirements_db) == {"CL-1003": 9000000}
+
+    utils.update_client_details("CL-1003", {"requirements": "3 BHK Budget 95L in Kanakia"})
+    assert stored_rows(requirements_db) == {"CL-1003": 9500000}
+    assert utils.get_client_requirements("CL-1003", "3 BHK Budget 95L in Kanakia").budget == 9500000
+
+    utils.delete_client_by_id("CL-1003")
+    assert stored_rows(requirements_db) == {}
+
+
+def test_lookup_reparses_only_stale_rows(requirements_db):
+    conn = sqlite3.connect(requirements_db)
+    client_requirements.backfill(conn)
+    # A stored row with a deliberately wrong value proves lookup reads it back.
+    conn.execute("UPDATE client_requirements SET req_bhk = 7 WHERE client_id = 'CL-1001'")
+    conn.execute("UPDATE clients SET requirements = '2 BHK Rent 30000' WHERE client_id = 'CL-1002'")
+    conn.commit()
+    conn.close()
+
+    clients = utils.get_all_clients_df()
+    parsed = client_requirements.lookup(utils.DB_FILE_PATH, clients).set_index(clients['client_id'])
+    assert parsed.loc["CL-1001", "req_bhk"] == 7
+    assert parsed.loc["CL-1002", "req_budget"] == 30000
+    assert not parsed.loc["CL-1002", "flexible_location"]
+
+
+def test_lead_scores_use_parsed_requirements(requirements_db):
+    scores = utils.get_clients_with_scores().set_index('client_id')['score']
+    # Rent 20000 earns no budget points; "anywhere" costs 10.
+    assert scores["CL-1002"] == -10
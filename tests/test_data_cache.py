@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import data_cache
+import utils
+
+
+@pytest.fixture
+def cached_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "cache.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE clients (client_id TEXT PRIMARY KEY, name TEXT, phone TEXT, email TEXT, lookingfor TEXT, requirements TEXT, status TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE properties (property_id TEXT PRIMARY KEY, listingtype TEXT, propertytype TEXT, bedroomsbhk TEXT, arealocality TEXT, askingprice REAL, monthlyrent REAL)"
+    )
+    conn.execute(
+        "CREATE TABLE tasks (task_id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT, property_id TEXT, task_type TEXT, task_description TEXT, due_date TEXT, details TEXT, status TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE communication_log (log_id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT, timestamp TEXT, note TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO clients VALUES ('CL-1001', 'Asha Mehta', '9876543210', 'asha@example.com', 'Sale', '2 BHK Budget 50L in Mira Road', 'New')"
+    )
+    conn.commit()
+    conn.close()
+    data_cache.clear()
+    monkeypatch.setattr(utils, "DB_FILE_PATH", str(db_path))
+    yield db_path
+    data_cache.clear()
+
+
+def test_repeated_reads_hit_the_cache(cached_db):
+    first = utils.get_all_clients_df()
+    second = utils.get_all_clients_df()
+    stats = data_cache.cache_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert first.equals(second)
+
+
+def test_returned_frames_are_copies(cached_db):
+    frame = utils.get_all_clients_df()
+    frame['score'] = 1
+    assert 'score' not in utils.get_all_clients_df().columns
+
+
+def test_write_helpers_invalidate_snapshot(cached_db):
+    assert len(utils.get_all_clients_df()) == 1
+    utils.add_new_client("Ravi Kumar", "9123456789", "ravi@example.com", "Rent", "1 BHK Rent 20000")
+    assert len(utils.get_all_clients_df()) == 2
+
+    utils.add_task("CL-1001", "Negotiation", "Discuss offer", "2026-05-01")
+    assert utils.get_all_clients_df().set_index('client_id').loc['CL-1001', 'status'] == "Negotiating"
+    assert len(utils.get_all_tasks()) == 1
+
+    utils.delete_client_by_id("CL-1001")
+    assert "CL-1001" not in utils.get_all_clients_df()['client_id'].values
+    assert utils.get_all_tasks().empty
+
+
+def test_external_commit_is_never_served_stale(cached_db):
+    assert utils.get_all_properties_df().empty
+
+    conn = sqlite3.connect(cached_db)
+    conn.execute("INSERT INTO properties VALUES ('SALE-PROP-1001', 'Sale', 'Apartment', '2 BHK', 'Mira Road', 4800000, NULL)")
+    conn.commit()
+    conn.close()
+
+    properties = utils.get_all_properties_df()
+    assert properties['property_id'].tolist() == ['SALE-PROP-1001']
+    assert data_cache.cache_stats()["misses"] == 2
@@ -22,4 +22,110 @@ def test_setup_database(tmp_path):
     tables = cursor.fetchall()
     assert ('clients',) in tables
     assert ('properties',) in tables
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+def write_workbook(path, clients, properties):
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    for title, rows in (('Client_Database', clients), ('Active_Listings', properties)):
+        sheet = workbook.create_sheet(title)
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+
+
+CLIENT_HEADER = ['ClientID', 'Client Name', 'Client Phone', 'Status']
+PROPERTY_HEADER = ['Property ID', 'Listing Date', 'Amenities', 'Asking Price (₹)']
+
+
+def test_setup_database_streams_in_chunks_and_merges(tmp_path):
+    from datetime import datetime
+    db_path = str(tmp_path / 'import.db')
+    workbook = str(tmp_path / 'data.xlsx')
+    clients = [CLIENT_HEADER] + [[f'CL-{1000 + i}', f'Client {i}', 9800000000 + i, 'New'] for i in range(7)]
+    properties = [PROPERTY_HEADER, ['SALE-PROP-1', datetime(2024, 10, 23), 'Gymnasium, Garden', 4500000],
+                  [None] * 4, ['RENT-PROP-2', None, None, None]]
+    write_workbook(workbook, clients, properties)
+
+    reports = []
+    setup_database(workbook, db_path, mode='replace', chunk_rows=3, progress=reports.append)
+    assert [(r.table, r.rows) for r in reports] == [('clients', 3), ('clients', 6), ('clients', 7), ('properties', 2)]
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT * FROM properties ORDER BY property_id").fetchall() == [
+        ('RENT-PROP-2', None, None, None, 0), ('SALE-PROP-1', '2024-10-23 00:00:00', 'Gymnasium, Garden', 4500000.0, 130),
+    ]
+    assert ('idx_clients_client_id',) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+    conn.execute("CREATE TABLE IF NOT EXISTS communication_log (client_id TEXT, note TEXT)")
+    conn.execute("INSERT INTO communication_log (client_id, note) VALUES ('CL-1002', 'Called')")
+    rowids = dict(conn.execute("SELECT client_id, rowid FROM clients").fetchall())
+    conn.commit()
+
+    # Merge: updates in place, adds new keys and columns, keeps other tables; the last duplicate wins.
+    clients = [CLIENT_HEADER + ['Email'], ['CL-1002', 'Renamed', 1, 'Negotiating', 'a@example.com'],
+               ['CL-2000', 'New Client', 2, 'New', None], ['CL-1002', 'Renamed Twice', 1, 'Negotiating', None]]
+    write_workbook(workbook, clients, properties[:2])
+    reports = setup_database(workbook, db_path)
+    assert [(r.table, r.inserted, r.updated) for r in reports] == [('clients', 1, 1), ('properties', 0, 1)]
+    assert conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0] == 8
+    assert conn.execute("SELECT rowid, name, email FROM clients WHERE client_id = 'CL-1002'").fetchone() == (
+        rowids['CL-1002'], 'Renamed Twice', None)
+    assert conn.execute("SELECT note FROM communication_log").fetchall() == [('Called',)]
+    conn.close()
+
+
+def test_setup_database_reports_missing_sheets(tmp_path):
+    from openpyxl import Workbook
+    workbook = str(tmp_path / 'empty.xlsx')
+    Workbook().save(workbook)
+    with pytest.raises(ValueError, match="Error loading clients data"):
+        setup_database(workbook, str(tmp_path / 'import.db'))
+    with pytest.raises(ValueError):
+        setup_database(db_file_path=str(tmp_path / 'import.db'), mode='append')
+
+
+def test_setup_database_stores_na_markers_as_null(tmp_path):
+    db_path = str(tmp_path / 'na.db')
+    workbook = str(tmp_path / 'na.xlsx')
+    properties = [PROPERTY_HEADER + ['Bedrooms (BHK)'], ['SALE-PROP-1', 'N/A', 'NA', 4500000, 'N/A'],
+                  ['SALE-PROP-2', 'n/a', ' N/A ', '', '2 BHK']]
+    write_workbook(workbook, [CLIENT_HEADER, ['CL-1001', 'Asha', 9800000000, 'NULL']], properties)
+    setup_database(workbook, db_path, mode='replace')
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT status FROM clients").fetchall() == [(None,)]
+    assert conn.execute("SELECT listingdate, amenities, askingprice, bedroomsbhk FROM properties ORDER BY property_id").fetchall() == [
+        (None, None, 4500000.0, None), (None, ' N/A ', None, '2 BHK'),
+    ]
+    conn.close()
+
+
+def test_merge_import_refreshes_the_derived_tables(tmp_path):
+    import lead_scoring
+    import market_stats
+    import price_scores
+    db_path = str(tmp_path / 'derived.db')
+    workbook = str(tmp_path / 'derived.xlsx')
+    client_header = CLIENT_HEADER + ['Looking For', 'Requirements']
+    property_header = ['Property ID', 'Listing Type', 'Property Type', 'Area/Locality', 'Listing Date',
+                       'Bedrooms (BHK)', 'Area (SqFt)', 'Amenities', 'Asking Price (₹)']
+    write_workbook(workbook, [client_header, ['CL-1001', 'Asha', 9800000000, 'New', 'Sale', '2 BHK Budget 120L']],
+                   [property_header, ['SALE-PROP-1', 'Sale', 'Apartment', 'Mira Road East', '2024-10-23', '2 BHK',
+                                      1000, 'Gymnasium', 5000000]])
+    setup_database(workbook, db_path, mode='replace')
+
+    write_workbook(workbook, [client_header, ['CL-1001', 'Asha', 9800000000, 'Negotiating', 'Sale', '3 BHK Budget 120L']],
+                   [property_header, ['SALE-PROP-1', 'Sale', 'Apartment', 'Mira Road East', '2024-10-23', '2 BHK',
+                                      1000, 'Garden', 8000000]])
+    setup_database(workbook, db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT score, status FROM client_scores").fetchall() == [(70, 'Negotiating')]
+    assert conn.execute("SELECT req_bhk FROM client_requirements").fetchall() == [(3,)]
+    assert conn.execute("SELECT bhk, clients FROM market_bhk_demand").fetchall() == [('3 BHK', 1)]
+    assert conn.execute("SELECT ppsf_sum FROM market_listing_stats").fetchall() == [(8000.0,)]
+    assert conn.execute("SELECT amenity FROM property_amenities").fetchall() == [('Garden',)]
+    assert not lead_scoring.needs_refresh(conn) and not market_stats.needs_refresh(conn)
+    if price_scores.model_signature() is not None:
+        assert conn.execute("SELECT askingprice FROM price_score_inputs").fetchall() == [(8000000.0,)]
+    conn.close()
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db
+
+
+@pytest.fixture
+def pool_db(tmp_path):
+    db_path = str(tmp_path / "pool.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE clients (client_id TEXT PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+    yield db_path
+    db.close_all()
+
+
+def test_connection_is_reused_within_a_thread(pool_db):
+    first = db.get_connection(pool_db)
+    second = db.get_connection(pool_db)
+    assert first is second
+
+
+def test_each_thread_gets_its_own_connection(pool_db):
+    main_conn = db.get_connection(pool_db)
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(db.get_connection(pool_db)))
+    worker.start()
+    worker.join()
+    assert seen and seen[0] is not main_conn
+
+
+def test_connection_applies_wal_and_pragmas(pool_db):
+    conn = db.get_connection(pool_db)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_context_commits_and_rolls_back(pool_db):
+    with db.connection(pool_db) as conn:
+        conn.execute("INSERT INTO clients VALUES ('CL-1001', 'Asha')")
+
+    with pytest.raises(RuntimeError):
+        with db.connection(pool_db) as conn:
+            conn.execute("INSERT INTO clients VALUES ('CL-1002', 'Ravi')")
+            raise RuntimeError("boom")
+
+    check = sqlite3.connect(pool_db)
+    rows = check.execute("SELECT client_id FROM clients").fetchall()
+    check.close()
+    assert rows == [("CL-1001",)]
+
+
+def test_pool_stats_and_dead_thread_reaping(pool_db):
+    db.close_all()
+    worker = threading.Thread(target=lambda: db.get_connection(pool_db))
+    worker.start()
+    worker.join()
+    db.get_connection(pool_db)
+    db.get_connection(pool_db)
+
+    stats = db.pool_stats()
+    assert stats["opened"] >= 2
+    assert stats["reused"] >= 1
+    # The worker's connection was closed when the main thread opened its own.
+    assert stats["open"] == 1
+
+
+def test_async_reads_run_on_reader_threads_and_writes_on_one_writer(pool_db):
+    def insert(client_id):
+        with db.connection(pool_db) as conn:
+            conn.execute("INSERT INTO clients VALUES (?, 'Asha')", (client_id,))
+        return threading.current_thread().name
+
+    def count():
+        with db.connection(pool_db) as conn:
+            return conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0], threading.current_thread().name
+
+    async def scenario():
+        writers = await asyncio.gather(*(db.run_write(insert, f"CL-{1000 + i}") for i in range(20)))
+        reads = await asyncio.gather(*(db.run_read(count) for _ in range(20)))
+        return writers, reads
+
+    writers, reads = asyncio.run(scenario())
+    assert len(set(writers)) == 1 and writers[0].startswith("db-write")
+    assert all(rows == 20 and name.startswith("db-read") for rows, name in reads)
+    db.shutdown_executor()
+
+
+def test_async_errors_propagate_to_the_caller(pool_db):
+    def failing():
+        with db.connection(pool_db) as conn:
+            conn.execute("INSERT INTO missing_table VALUES (1)")
+
+    with pytest.raises(sqlite3.OperationalError):
+        asyncio.run(db.run_write(failing))
@@ -0,0 +1,92 @@
+import os
+import random
+import sqlite3
+import sys
+from difflib import get_close_matches
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import data_cache
+import entity_index
+from entity_index import EntityIndex
+
+CLIENTS = pd.DataFrame({
+    "client_id": ["CL-1001", "CL-1002", "CL-1003", "CL-1004", "CL-1005"],
+    "name": ["Asha Mehta", "Ravi Kumar", "Priya Shah", "Ravi Shankar", None],
+})
+PROPERTIES = pd.DataFrame({
+    "property_id": ["SALE-PROP-1001", "RENT-PROP-1002", "SALE-PROP-1003"],
+    "propertytype": ["Apartment", "Office Space", "Bungalow"],
+    "arealocality": ["Mira Road East", "Bhayandar West", "Kanakia"],
+})
+
+
+@pytest.fixture
+def clients():
+    return EntityIndex(CLIENTS, 'client_id', ['name'], fuzzy_column='name')
+
+
+def test_ids_resolve_through_the_hash_map(clients):
+    assert clients.resolve_client("show cl-1003 please") == "CL-1003"
+    # Unknown IDs fall through to the name stages.
+    assert clients.resolve_client("open CL-9999 for priya") == "CL-1003"
+
+
+def test_substring_matches_return_the_first_row_in_table_order(clients):
+    assert clients.resolve_client("ravi") == "CL-1002"
+    assert clients.resolve_client("shah") == "CL-1003"
+    assert clients.resolve_client("none") == "CL-1005"
+
+
+def test_fuzzy_then_token_fallbacks(clients):
+    assert clients.resolve_client("Ravi Shankr") == "CL-1004"
+    assert clients.resolve_client("call back mehta tomorrow") == "CL-1001"
+    assert clients.resolve_client("xyz") is None
+
+
+def test_fuzzy_matches_get_close_matches():
+    rng = random.Random(3)
+    first = ["Asha", "Ravi", "Priya", "Bhavya", "Kavya", "Siddharth", "Isha", "Om"]
+    last = ["Mehta", "Kumar", "Shah", "Garg", "Nair", "Iyer", "Agarwal", ""]
+    names = CLIENTS["name"].astype(str).tolist() + [f"{f} {l}".strip() for f in first for l in last]
+    fuzzy = entity_index._FuzzyNames(names)
+    queries = ["Bhaya", "Ravi Shankr", "sidharth", "Kavya Nar", "om", "", "Agarwal ji", "xyz", "a", "Asha  Mehta"]
+    for _ in range(200):
+        name = rng.choice(names)
+        cut = rng.randrange(len(name) + 1)
+        queries.append(name[:cut] + "".join(rng.choice("aehiknrsy ") for _ in range(rng.randrange(3))) + name[cut + 1:])
+    for query in queries:
+        expected = get_close_matches(query, names, n=1, cutoff=entity_index.FUZZY_CUTOFF)
+        assert fuzzy.closest(query) == (expected[0] if expected else None), query
+
+
+def test_property_resolution():
+    properties = EntityIndex(PROPERTIES, 'property_id', ['propertytype', 'arealocality'])
+    assert properties.resolve_property("show rent-prop-1002") == "RENT-PROP-1002"
+    assert properties.resolve_property("kanakia") == "SALE-PROP-1003"
+    assert properties.resolve_property("office") == "RENT-PROP-1002"
+    assert properties.resolve_property("open the villa") is None
+
+
+def test_index_is_rebuilt_after_a_write(tmp_path):
+    db_path = str(tmp_path / "entities.db")
+    conn = sqlite3.connect(db_path)
+    CLIENTS.to_sql("clients", conn, index=False)
+    conn.close()
+    load = lambda: pd.read_sql("SELECT * FROM clients", sqlite3.connect(db_path))
+
+    data_cache.clear()
+    entity_index.clear()
+    first = entity_index.client_index(db_path, load)
+    assert entity_index.client_index(db_path, load) is first
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO clients VALUES ('CL-1006', 'Meera Iyer')")
+    conn.commit()
+    conn.close()
+    assert entity_index.client_index(db_path, load).resolve_client("meera") == "CL-1006"
+    entity_index.clear()
+    data_cache.clear()
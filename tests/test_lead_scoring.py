@@ -0,0 +1,138 @@
+import os
+import random
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import client_requirements
+import data_cache
+import lead_scoring
+import utils
+
+REQUIREMENTS = [
+    "2 BHK in Bhayandar West, Budget 85L",
+    "3 BHK in Anywhere in Mira Bhayandar, Budget 140L",
+    "1 BHK Budget 50L",
+    "2 BHK in Mira Road East, Rent up to 45,000",
+    "Rent up to 60,000 anywhere",
+    "Rent 25000",
+    "Office space, no budget given",
+    None,
+]
+STATUSES = ["New", "Negotiating", "Site Visit Planned", "Converted", None]
+
+
+def make_clients(count, seed=3):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "client_id": [f"CL-{1000 + i}" for i in range(count)],
+        "lookingfor": [rng.choice(["Sale", "Rent", "sale", None]) for _ in range(count)],
+        "requirements": [rng.choice(REQUIREMENTS) for _ in range(count)],
+        "status": [rng.choice(STATUSES) for _ in range(count)],
+    })
+
+
+def test_vectorized_scores_match_calculate_lead_score():
+    clients = make_clients(500)
+    log_counts = pd.DataFrame({"client_id": clients["client_id"].sample(200, random_state=1),
+                               "count": [random.Random(i).randrange(1, 6) for i in range(200)]})
+    log_counts_dict = log_counts.set_index("client_id")["count"].to_dict()
+
+    result = lead_scoring.score_clients(clients, client_requirements.parse_many(clients["requirements"]), log_counts)
+    expected = clients.apply(lambda row: utils.calculate_lead_score(row, log_counts_dict), axis=1)
+
+    assert result["score"].tolist() == [score for score, _ in expected]
+    assert result["rating"].tolist() == [rating for _, rating in expected]
+
+
+def test_empty_inputs():
+    clients = make_clients(0)
+    empty_logs = pd.DataFrame(columns=["client_id", "count"])
+    result = lead_scoring.score_clients(clients, client_requirements.parse_many(clients["requirements"]), empty_logs)
+    assert result.empty and list(result.columns) == ["score", "rating"]
+
+
+@pytest.fixture
+def scores_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "scores.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE clients (client_id TEXT PRIMARY KEY, name TEXT, phone TEXT, email TEXT, lookingfor TEXT, requirements TEXT, status TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE tasks (task_id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT, property_id TEXT, task_type TEXT, task_description TEXT, due_date TEXT, details TEXT, status TEXT)"
+    )
+    conn.execute("CREATE TABLE communication_log (log_id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT, timestamp TEXT, note TEXT)")
+    conn.executemany(
+        "INSERT INTO clients VALUES (?, ?, '9876543210', 'x@example.com', ?, ?, ?)",
+        [
+            ("CL-1001", "Asha", "Sale", "2 BHK Budget 120L in Mira Road", "New"),
+            ("CL-1002", "Ravi", "Rent", "1 BHK Rent 20000 anywhere", "New"),
+            ("CL-1003", "Meera", "Sale", "3 BHK Budget 60L", "Site Visit Planned"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    data_cache.clear()
+    monkeypatch.setattr(utils, "DB_FILE_PATH", str(db_path))
+    yield db_path
+    data_cache.clear()
+
+
+def recomputed_scores():
+    clients = utils.get_all_clients_df()
+    with sqlite3.connect(utils.DB_FILE_PATH) as conn:
+        logs = pd.read_sql("SELECT client_id, COUNT(*) AS count FROM communication_log GROUP BY client_id", conn)
+    scores = lead_scoring.score_clients(clients, client_requirements.parse_many(clients["requirements"]), logs)
+    return dict(zip(clients["client_id"], scores["score"]))
+
+
+def stored_scores():
+    return dict(zip(*[utils.get_clients_with_scores()[column] for column in ("client_id", "score")]))
+
+
+def test_client_scores_are_maintained_by_write_helpers(scores_db):
+    assert stored_scores() == recomputed_scores() == {"CL-1001": 30, "CL-1002": -10, "CL-1003": 40}
+
+    utils.add_communication_note("CL-1002", "Called")
+    utils.add_task("CL-1001", "Negotiation", "Discuss offer", "2026-05-01")
+    utils.update_client_details("CL-1003", {"requirements": "3 BHK Budget 110L"})
+    utils.add_new_client("Priya", "9000000000", "p@example.com", "Rent", "2 BHK Rent 60000")
+    utils.delete_client_by_id("CL-1002")
+
+    assert stored_scores() == recomputed_scores() == {"CL-1001": 70, "CL-1003": 55, "CL-1004": 30}
+
+
+def test_scores_read_in_order_with_limit_and_offset(scores_db):
+    top = utils.get_clients_with_scores(limit=2)
+    assert top["client_id"].tolist() == ["CL-1003", "CL-1001"]
+    assert top["rating"].tolist() == ["🟢 Warm", "🔵 Cold"]
+    assert utils.get_clients_with_scores(limit=2, offset=2)["client_id"].tolist() == ["CL-1002"]
+
+
+def test_refresh_rescores_only_changed_clients(scores_db):
+    utils.get_clients_with_scores()
+    conn = sqlite3.connect(scores_db)
+    conn.execute("UPDATE clients SET status = 'Negotiating' WHERE client_id = 'CL-1002'")
+    assert lead_scoring.refresh(conn) == 1
+    assert lead_scoring.refresh(conn) == 0
+    conn.commit()
+    conn.close()
+    assert stored_scores()["CL-1002"] == 30
+
+
+def test_scores_follow_edits_made_behind_the_helpers(scores_db):
+    assert stored_scores()["CL-1002"] == -10
+    conn = sqlite3.connect(scores_db)
+    conn.execute("UPDATE clients SET status = 'Negotiating' WHERE client_id = 'CL-1002'")
+    conn.execute("UPDATE clients SET requirements = '3 BHK Budget 110L in Mira Road' WHERE client_id = 'CL-1003'")
+    conn.commit()
+    conn.close()
+
+    assert stored_scores() == recomputed_scores() == {"CL-1001": 30, "CL-1002": 30, "CL-1003": 55}
+    with sqlite3.connect(scores_db) as conn:
+        assert not lead_scoring.needs_refresh(conn)
@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import data_cache
+import llm_cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "cache.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE clients (client_id TEXT)")
+    data_cache.clear()
+    yield path
+    data_cache.clear()
+
+
+def test_keys_ignore_case_punctuation_and_spacing():
+    key = llm_cache.cache_key("model-a", "Who needs follow-up today?", "{}")
+    assert llm_cache.cache_key("model-a", "  who needs FOLLOW-UP today ", "{}") == key
+    assert llm_cache.cache_key("model-b", "Who needs follow-up today?", "{}") != key
+    assert llm_cache.cache_key("model-a", "Who needs follow-up today?", '{"a":1}') != key
+    assert llm_cache.cache_key("model-a", "Who needs follow up today?", "{}") != key
+
+
+def test_entries_expire_and_least_recently_used_are_evicted(db_path):
+    clock = Clock()
+    cache = llm_cache.ResponseCache(ttl=10, max_entries=2, clock=clock)
+    cache.put(db_path, "a", "reply a")
+    cache.put(db_path, "b", "reply b")
+    assert cache.get(db_path, "a") == "reply a"
+    cache.put(db_path, "c", "reply c")
+    assert cache.get(db_path, "b") is None
+    clock.now = 10
+    assert cache.get(db_path, "a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (1, 2, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(1 / 3, abs=1e-4) and stats["entries"] == 1
+
+
+def test_commits_from_any_connection_invalidate(db_path):
+    cache = llm_cache.ResponseCache(ttl=60, max_entries=8)
+    cache.put(db_path, "a", "reply a")
+    assert cache.get(db_path, "a") == "reply a"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO clients VALUES ('CL-1001')")
+    assert cache.get(db_path, "a") is None
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,140 @@
+import os
+import random
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import data_cache
+import market_stats
+import utils
+
+LOCALITIES = ["Mira Road East", "Bhayandar West", "Kanakia", None]
+REQUIREMENTS = ["2 BHK in Kanakia, Budget 85L", "3BHK Budget 140L", "1 BHK Rent 20000", "Office space", None]
+
+
+def make_rows(count, seed=5):
+    rng = random.Random(seed)
+    properties, clients = [], []
+    for i in range(count):
+        listing_type = rng.choice(["Sale", "Rent"])
+        properties.append((
+            f"PROP-{1000 + i}", listing_type, rng.choice(["Apartment", "Shop", None]), rng.choice(LOCALITIES),
+            rng.choice([None, "2030-01-05 00:00:00", f"2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 28):02d} 00:00:00"]),
+            rng.choice([0, 650, 980, 1400]),
+            rng.randrange(20, 200) * 100000.0 if listing_type == "Sale" and rng.random() > 0.2 else None,
+            "Gymnasium",
+        ))
+        clients.append((f"CL-{1000 + i}", f"Client {i}", "Sale", rng.choice(REQUIREMENTS), "New"))
+    return properties, clients
+
+
+@pytest.fixture
+def market_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "market.db")
+    properties, clients = make_rows(300)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE clients (client_id TEXT PRIMARY KEY, name TEXT, phone TEXT, email TEXT, "
+                 "lookingfor TEXT, requirements TEXT, status TEXT)")
+    conn.execute("CREATE TABLE communication_log (log_id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT, "
+                 "timestamp TEXT, note TEXT)")
+    conn.execute("CREATE TABLE tasks (task_id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT, status TEXT)")
+    conn.execute("CREATE TABLE properties (property_id TEXT PRIMARY KEY, listingtype TEXT, propertytype TEXT, "
+                 "arealocality TEXT, listingdate TEXT, areasqft INTEGER, askingprice REAL, amenities TEXT, "
+                 + "".join(f"image_{i} TEXT, " for i in range(1, 11)) + "video TEXT)")
+    conn.executemany("INSERT INTO properties (property_id, listingtype, propertytype, arealocality, listingdate, "
+                     "areasqft, askingprice, amenities) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", properties)
+    conn.executemany("INSERT INTO clients (client_id, name, lookingfor, requirements, status) VALUES (?, ?, ?, ?, ?)",
+                     clients)
+    conn.commit()
+    conn.close()
+    data_cache.clear()
+    market_stats.clear()
+    monkeypatch.setattr(utils, "DB_FILE_PATH", db_path)
+    yield db_path
+    data_cache.clear()
+    market_stats.clear()
+
+
+def recomputed(db_path):
+    with sqlite3.connect(db_path) as conn:
+        properties = pd.read_sql("SELECT * FROM properties", conn)
+        clients = pd.read_sql("SELECT * FROM clients", conn)
+    return market_stats.from_frames(properties, clients)
+
+
+def assert_same_stats(stats, expected):
+    assert stats.keys() == expected.keys()
+    assert stats['total_listings'] == expected['total_listings']
+    for name, frame in expected.items():
+        if isinstance(frame, pd.DataFrame):
+            pd.testing.assert_frame_equal(stats[name], frame, check_dtype=False, obj=name)
+
+
+def test_aggregates_match_recomputation(market_db):
+    stats = utils.get_market_stats()
+    assert_same_stats(stats, recomputed(market_db))
+    assert stats['listings_by_month']['month'].is_monotonic_increasing
+    assert stats['days_on_market']['days'].min() >= 0
+    assert set(stats['bhk_demand']['bhk']) == {"1 BHK", "2 BHK", "3 BHK", "Other"}
+    with pytest.raises(ValueError):
+        market_stats.read(market_db, market_stats.listing_counts, "bedroomsbhk")
+
+
+def test_write_helpers_apply_deltas(market_db):
+    utils.get_market_stats()
+    utils.add_new_property({"listingtype": "Sale", "propertytype": "Bungalow", "arealocality": "Kanakia",
+                            "listingdate": "2024-03-09 00:00:00", "areasqft": 2000, "askingprice": 30000000.0,
+                            "amenities": "Garden"}, [], None)
+    utils.update_property_details("PROP-1001", {"arealocality": "Jesal Park", "askingprice": 5500000.0})
+    utils.update_property_details("PROP-1002", {"property_id": "PROP-2002", "listingdate": "2024-12-31"})
+    utils.delete_property_by_id("PROP-1003")
+    utils.add_new_client("Priya", "9000000000", "p@example.com", "Rent", "4 BHK Rent 90000")
+    utils.update_client_details("CL-1004", {"requirements": "5 BHK Budget 300L"})
+    utils.delete_client_by_id("CL-1005")
+
+    with sqlite3.connect(market_db) as conn:
+        # The write helpers kept the tables current; no rebuild was needed.
+        assert not market_stats.needs_refresh(conn)
+        assert_same_stats(market_stats.read_all(conn), recomputed(market_db))
+    bhk = utils.get_market_stats()['bhk_demand'].set_index('bhk')['clients']
+    assert bhk["4 BHK"] == 1 and bhk["5 BHK"] == 1
+
+
+def test_rows_written_behind_the_helpers_trigger_a_rebuild(market_db):
+    utils.get_market_stats()
+    conn = sqlite3.connect(market_db)
+    conn.execute("INSERT INTO properties (property_id, listingtype, arealocality) VALUES ('PROP-9999', 'Rent', 'Kanakia')")
+    conn.execute(f"DROP TABLE {market_stats.DEMAND_TABLE}")
+    conn.commit()
+    assert market_stats.needs_refresh(conn)
+    conn.close()
+    assert_same_stats(utils.get_market_stats(), recomputed(market_db))
+
+
+def test_deltas_commit_with_the_callers_write(market_db):
+    utils.get_market_stats()
+    conn = sqlite3.connect(market_db)
+    market_stats.remove_properties(conn, ["PROP-1001"])
+    assert conn.in_transaction
+    conn.rollback()
+    conn.close()
+    with sqlite3.connect(market_db) as conn:
+        assert_same_stats(market_stats.read_all(conn), recomputed(market_db))
+
+
+def test_in_place_edits_behind_the_helpers_trigger_a_rebuild(market_db):
+    utils.get_market_stats()
+    conn = sqlite3.connect(market_db)
+    conn.execute("UPDATE properties SET askingprice = askingprice * 3, arealocality = 'Jesal Park' "
+                 "WHERE property_id = 'PROP-1001'")
+    conn.execute("UPDATE clients SET requirements = '6 BHK Budget 500L' WHERE client_id = 'CL-1001'")
+    conn.commit()
+    assert market_stats.needs_refresh(conn)
+    conn.close()
+    stats = utils.get_market_stats()
+    assert_same_stats(stats, recomputed(market_db))
+    assert stats['bhk_demand'].set_index('bhk')['clients']["6 BHK"] == 1
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import data_cache
+import price_scores
+import pricing
+import recommendation_index
+import utils
+
+PROPERTIES = pd.DataFrame({
+    "property_id": [f"SALE-PROP-{1001 + i}" for i in range(6)],
+    "listingtype": ["Sale", "Sale", "Rent", "Sale", "Sale", "Rent"],
+    "propertytype": ["Apartment", "Apartment", "Apartment", "Shop", "Bungalow", "Office Space"],
+    "arealocality": ["Kanakia", "Golden Nest", "Kanakia", "Beverly Park", "Mira Road East", "Shanti Nagar"],
+    "bedroomsbhk": ["2 BHK", "3 BHK", "1 BHK", None, "4 BHK", None],
+    "areasqft": [650, 1100, 500, 300, None, 900],
+    "askingprice": [6500000, 9000000, None, 4000000, 30000000, None],
+    "monthlyrent": [None, None, 18000, None, None, 60000],
+    "amenities": ["Lift, Gymnasium", None, "Lift", None, "Garden", None],
+})
+
+
+@pytest.fixture
+def price_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "prices.db")
+    conn = sqlite3.connect(db_path)
+    PROPERTIES.to_sql("properties", conn, index=False)
+    for column in [f"image_{i}" for i in range(1, 11)] + ["video"]:
+        conn.execute(f"ALTER TABLE properties ADD COLUMN {column} TEXT")
+    conn.commit()
+    conn.close()
+    data_cache.clear()
+    recommendation_index.clear()
+    monkeypatch.setattr(utils, "DB_FILE_PATH", db_path)
+    yield db_path
+    recommendation_index.clear()
+    data_cache.clear()
+
+
+def stored(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql("SELECT * FROM properties ORDER BY rowid", conn).set_index("property_id")
+
+
+def test_gap_is_for_sale_listings_only():
+    gaps = price_scores.gap_pct([110, 90, 100, 100, None], [100, 100, 100, 0, 100], ["Sale", "sale", "Rent", "Sale", "Sale"])
+    np.testing.assert_allclose(gaps, [10.0, -10.0, np.nan, np.nan, np.nan])
+    assert [price_scores.price_flag(gap) for gap in (-25.0, -3.0, 9.9, 10.0, None, np.nan)] == [
+        "Underpriced", "Fair price", "Fair price", "Overpriced", None, None]
+
+
+def test_refresh_scores_every_listing_once(price_db):
+    pytest.importorskip("sklearn")
+    assert price_scores.refresh_all(price_db, batch_size=4) == len(PROPERTIES)
+    with sqlite3.connect(price_db) as conn:
+        assert not price_scores.needs_refresh(conn)
+        assert price_scores.refresh(conn) == 0
+
+    rows = stored(price_db)
+    expected = pricing.predict_prices(PROPERTIES.set_index("property_id")).round(0)
+    pd.testing.assert_series_equal(rows["predicted_price"], expected, check_names=False)
+    sale = rows["listingtype"] == "Sale"
+    gaps = (rows["askingprice"] - rows["predicted_price"]) / rows["predicted_price"] * 100
+    pd.testing.assert_series_equal(rows.loc[sale, "price_gap_pct"], gaps[sale].round(1), check_names=False)
+    assert rows.loc[~sale, "price_gap_pct"].isna().all()
+    # No area, no estimate.
+    assert np.isnan(rows.at["SALE-PROP-1005", "predicted_price"])
+
+
+def test_write_helpers_rescore_changed_listings(price_db):
+    pytest.importorskip("sklearn")
+    price_scores.refresh_all(price_db)
+    before = stored(price_db).at["SALE-PROP-1001", "price_gap_pct"]
+
+    utils.update_property_details("SALE-PROP-1001", {"askingprice": 3000000})
+    new_row = PROPERTIES.iloc[0].drop("property_id").to_dict()
+    utils.add_new_property(new_row, [], None)
+    utils.delete_property_by_id("SALE-PROP-1002")
+
+    rows = stored(price_db)
+    assert rows.at["SALE-PROP-1001", "price_gap_pct"] < before
+    assert rows.at["SALE-PROP-1007", "predicted_price"] == rows.at["SALE-PROP-1001", "predicted_price"]
+    with sqlite3.connect(price_db) as conn:
+        assert not price_scores.needs_refresh(conn)
+        assert price_scores.refresh(conn) == 0
+
+
+def test_in_place_edits_behind_the_helpers_need_a_refresh(price_db):
+    pytest.importorskip("sklearn")
+    price_scores.refresh_all(price_db)
+    with sqlite3.connect(price_db) as conn:
+        conn.execute("UPDATE properties SET askingprice = 3000000 WHERE property_id = 'SALE-PROP-1001'")
+        assert price_scores.needs_refresh(conn)
+        assert price_scores.refresh(conn) == 1
+        assert not price_scores.needs_refresh(conn)
+
+
+def test_startup_migrates_and_refreshes_in_the_background(price_db):
+    pytest.importorskip("sklearn")
+    with sqlite3.connect(price_db) as conn:
+        conn.execute("ALTER TABLE properties ADD COLUMN listingdate TEXT")
+    utils.startup(price_db)
+    price_scores.refresh_in_background(price_db).join(timeout=60)
+    with sqlite3.connect(price_db) as conn:
+        assert not price_scores.needs_refresh(conn)
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'client_scores'").fetchone()[0] == 1
+    assert stored(price_db)["predicted_price"].notna().sum() == len(PROPERTIES) - 1
+
+
+def test_value_sort_orders_each_tier_by_stored_gap():
+    properties = PROPERTIES.assign(bedroomsbhk="2 BHK", price_gap_pct=[12.0, -30.0, None, None, -5.0, None])
+    index = recommendation_index.RecommendationIndex(properties)
+    client = pd.Series({"client_id": "CL-1001", "lookingfor": "Sale"})
+
+    by_match = index.recommend(client, 1e9, 2, "Any")["recommendations"]
+    by_value = index.recommend(client, 1e9, 2, "Any", sort="value")["recommendations"]
+    assert [row["property_id"] for row in by_match] == ["SALE-PROP-1001", "SALE-PROP-1002", "SALE-PROP-1004", "SALE-PROP-1005"]
+    assert [row["property_id"] for row in by_value] == ["SALE-PROP-1002", "SALE-PROP-1005", "SALE-PROP-1001", "SALE-PROP-1004"]
+    with pytest.raises(ValueError):
+        index.recommend(client, 1e9, 2, "Any", sort="cheapest")
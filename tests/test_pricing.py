@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pricing
+import typed_frames
+from config import PRICE_MODEL_COLUMNS_PATH
+
+with open(PRICE_MODEL_COLUMNS_PATH, encoding='utf-8') as handle:
+    MODEL_COLUMNS = json.load(handle)
+
+PROPERTIES = pd.DataFrame({
+    "property_id": [f"PROP-{i}" for i in range(7)],
+    "arealocality": ["Kanakia", "Beverly Park", "Mira Road East", None, "Shanti Nagar", "Kanakia", "Golden Nest"],
+    "propertytype": ["Apartment", "Shop", "Office Space", "Bungalow", None, "Shop", "Apartment"],
+    "bedroomsbhk": ["2 BHK", None, "3BHK", "4 BHK", "1 BHK", "Studio", "2 BHK"],
+    "areasqft": [650, 300, 1200, 2400, None, 0, 900],
+})
+
+
+def notebook_features(properties):
+    """The notebook's encoding: extracted bhk, then get_dummies aligned to model_columns.json."""
+    frame = properties.copy()
+    frame["bhk"] = frame["bedroomsbhk"].astype(str).str.extract(r'(\d+)').fillna(0).astype(int)
+    dummies = pd.get_dummies(frame[["arealocality", "propertytype", "bhk", "areasqft"]],
+                             columns=["arealocality", "propertytype"])
+    return dummies.reindex(columns=MODEL_COLUMNS, fill_value=0).astype(float)
+
+
+class SumModel:
+    def predict(self, features):
+        return features.to_numpy().sum(axis=1)
+
+
+def test_feature_matrix_matches_notebook_encoding():
+    layout = pricing.feature_layout(MODEL_COLUMNS)
+    assert set(layout.one_hot) == {"arealocality", "propertytype"}
+    expected = notebook_features(PROPERTIES).to_numpy()
+    np.testing.assert_array_equal(pricing.feature_matrix(PROPERTIES, layout), expected)
+    typed = typed_frames.apply_dtypes(PROPERTIES.copy())
+    assert isinstance(typed["arealocality"].dtype, pd.CategoricalDtype)
+    np.testing.assert_array_equal(pricing.feature_matrix(typed, layout), expected)
+
+
+def test_rows_without_area_get_no_estimate():
+    prices = pricing.PriceModel(SumModel(), MODEL_COLUMNS).predict(PROPERTIES.set_index("property_id"))
+    assert prices.index.tolist() == PROPERTIES["property_id"].tolist()
+    assert prices.isna().tolist() == [False, False, False, False, True, True, False]
+    # bhk + areasqft + the one-hot flags that are set
+    assert prices["PROP-0"] == 2 + 650 + 1
+    assert prices["PROP-1"] == 0 + 300 + 1
+
+
+def test_shipped_model_predicts_in_batch():
+    pytest.importorskip("sklearn")
+    pricing.clear()
+    model = pricing.get_model()
+    assert pricing.get_model() is model
+    prices = pricing.predict_prices(PROPERTIES)
+    valid = prices.notna().to_numpy()
+    expected = model.model.predict(notebook_features(PROPERTIES)[valid])
+    np.testing.assert_allclose(prices[valid].to_numpy(), expected)
+    assert (prices[valid] > 0).all()
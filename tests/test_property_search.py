@@ -0,0 +1,199 @@
+import os
+import random
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import data_cache
+import property_search
+import utils
+from property_search import PropertyFilters, PropertySearch
+
+AMENITIES = ['Swimming Pool', 'Gymnasium', '24x7 Security', 'Clubhouse', 'Garden']
+LOCALITIES = ["Mira Road East", "Bhayandar West", "Kanakia", None]
+
+
+def explorer_filters(df, listing_type, prop_type, locality, price_col, selected_price, selected_amenities):
+    """The Property Explorer's original pandas filtering, kept as the reference."""
+    filtered_df = df.copy()
+    if listing_type != "All":
+        filtered_df = filtered_df[filtered_df['listingtype'] == listing_type]
+    if prop_type != "All":
+        filtered_df = filtered_df[filtered_df['propertytype'] == prop_type]
+    if locality != "All":
+        filtered_df = filtered_df[filtered_df['arealocality'] == locality]
+    if selected_price[1] > 0 and price_col:
+        filtered_df[price_col] = pd.to_numeric(filtered_df[price_col], errors='coerce')
+        filtered_df = filtered_df.dropna(subset=[price_col])
+        filtered_df = filtered_df[
+            (filtered_df[price_col] >= selected_price[0]) &
+            (filtered_df[price_col] <= selected_price[1])
+        ]
+    if selected_amenities:
+        filtered_df = filtered_df[filtered_df['amenities'].apply(
+            lambda x: set(selected_amenities).issubset(set(utils.extract_amenities(x)))
+        )]
+    return filtered_df
+
+
+def make_properties(count, seed=3):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        listing_type = rng.choice(["Sale", "Rent"])
+        rows.append({
+            "property_id": f"{listing_type.upper()}-PROP-{1000 + i}",
+            "listingtype": listing_type,
+            "propertytype": rng.choice(["Apartment", "Bungalow", "Shop"]),
+            "arealocality": rng.choice(LOCALITIES),
+            "amenities": rng.choice([None, ", ".join(rng.sample(AMENITIES, rng.randrange(0, 4)))]),
+            "askingprice": rng.randrange(20, 200) * 100000.0 if listing_type == "Sale" else None,
+            "monthlyrent": rng.randrange(10, 80) * 1000.0 if listing_type == "Rent" else None,
+        })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def search_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "search.db")
+    properties = make_properties(400)
+    conn = sqlite3.connect(db_path)
+    properties.to_sql("properties", conn, index=False)
+    for column in [f"image_{i}" for i in range(1, 11)] + ["video"]:
+        conn.execute(f"ALTER TABLE properties ADD COLUMN {column} TEXT")
+    # Searches only read; utils.startup() runs this backfill in the app.
+    property_search.backfill(conn)
+    conn.commit()
+    conn.close()
+    data_cache.clear()
+    property_search.clear()
+    monkeypatch.setattr(utils, "DB_FILE_PATH", db_path)
+    yield db_path, properties
+    property_search.clear()
+    data_cache.clear()
+
+
+CASES = [
+    ("All", "All", "All", (0, 0), []),
+    ("Sale", "All", "All", (3000000, 9000000), []),
+    ("Rent", "Shop", "All", (20000, 50000), ["Gymnasium"]),
+    ("All", "All", "Kanakia", (0, 0), []),
+    ("All", "Bungalow", "All", (0, 0), ["Swimming Pool", "Garden"]),
+    ("Sale", "Apartment", "Mira Road East", (0, 19000000), []),
+]
+
+
+@pytest.mark.parametrize("listing_type,prop_type,locality,price,amenities", CASES)
+def test_search_matches_explorer_filters(search_db, listing_type, prop_type, locality, price, amenities):
+    db_path, properties = search_db
+    price_col = property_search.PRICE_COLUMNS.get(listing_type)
+    expected = explorer_filters(properties, listing_type, prop_type, locality, price_col, price, amenities)
+
+    filters = PropertyFilters(
+        listing_type=None if listing_type == "All" else listing_type,
+        property_type=None if prop_type == "All" else prop_type,
+        locality=None if locality == "All" else locality,
+        min_price=price[0] if price[1] > 0 else None,
+        max_price=price[1] if price[1] > 0 else None,
+        amenities=tuple(amenities),
+    )
+    search = PropertySearch(db_path)
+    assert search.count(filters) == len(expected)
+    assert sorted(search.search(filters, limit=1000)['property_id']) == sorted(expected['property_id'])
+    assert len(search.search(filters, limit=5)) == min(5, len(expected))
+
+
+def test_planner_seeks_the_composite_index(search_db):
+    db_path, _ = search_db
+    search = PropertySearch(db_path)
+    plan = " ".join(search.explain(PropertyFilters(listing_type="Rent", locality="Kanakia", min_price=20000, max_price=30000)))
+    assert "idx_properties_search_monthlyrent" in plan and "monthlyrent>?" in plan
+    # arealocality has NULLs, so it cannot be filled in and the price becomes a residual filter.
+    where, _ = search.plan(PropertyFilters(listing_type="Rent", min_price=20000))
+    assert where == ["listingtype = ?", "propertytype IN (?, ?, ?)", "monthlyrent >= ?"]
+    # Locality alone: listingtype and propertytype are filled in from the facets.
+    where, _ = search.plan(PropertyFilters(locality="Kanakia"))
+    assert where[:2] == ["listingtype IN (?, ?)", "propertytype IN (?, ?, ?)"]
+    assert "idx_properties_search" in " ".join(search.explain(PropertyFilters(locality="Kanakia")))
+
+
+def test_registered_amenities_filter_on_the_mask(search_db):
+    db_path, properties = search_db
+    search = PropertySearch(db_path)
+    where, params = search.plan(PropertyFilters(listing_type="Sale", amenities=("Garden", "Gymnasium")))
+    assert where[-1] == "(amenity_mask & ?) = ?" and params[-2:] == [params[-1]] * 2
+
+    # Amenity-only searches are answered from the NumPy index.
+    filters = PropertyFilters(amenities=("Gymnasium", "Swimming Pool"))
+    expected = explorer_filters(properties, "All", "All", "All", None, (0, 0), ["Gymnasium", "Swimming Pool"])
+    assert search.count(filters) == len(expected)
+    assert list(search.search(filters, limit=3)['property_id']) == list(expected['property_id'][:3])
+    assert search.search(PropertyFilters(amenities=("Elevator",))).empty
+
+    # Names outside the registry fall back to the join table.
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE properties SET amenities = 'Jacuzzi, Garden' WHERE property_id = 'SALE-PROP-1000'")
+    conn.commit()
+    property_search.backfill(conn)
+    conn.commit()
+    conn.close()
+    where, _ = search.plan(PropertyFilters(amenities=("Jacuzzi",)))
+    assert "property_amenities" in where[0]
+    assert list(search.search(PropertyFilters(amenities=("Jacuzzi", "Garden")))['property_id']) == ['SALE-PROP-1000']
+
+
+def test_facets(search_db):
+    db_path, properties = search_db
+    facets = PropertySearch(db_path).facets()
+    assert facets.values['arealocality'] == ["Bhayandar West", "Kanakia", "Mira Road East"]
+    assert facets.has_nulls['arealocality'] and not facets.has_nulls['listingtype']
+    assert facets.price_ranges['Rent'] == (properties['monthlyrent'].min(), properties['monthlyrent'].max())
+
+
+def test_write_helpers_keep_amenities_in_sync(search_db):
+    db_path, _ = search_db
+    gym = PropertyFilters(amenities=("Gymnasium", "Elevator"))
+    before = PropertySearch(db_path).count(gym)
+
+    utils.update_property_details("SALE-PROP-1000", {"amenities": "Gymnasium, Elevator"})
+    assert PropertySearch(db_path).count(gym) == before + 1
+    new_id = utils.add_new_property(
+        {"listingtype": "Sale", "propertytype": "Shop", "amenities": "Elevator,Gymnasium"}, [], None,
+    )
+    assert new_id in set(PropertySearch(db_path).search(gym)['property_id'])
+    utils.delete_property_by_id(new_id)
+    assert PropertySearch(db_path).count(gym) == before + 1
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE properties SET amenities = 'Garden' WHERE property_id = 'SALE-PROP-1000'")
+    conn.commit()
+    assert property_search.backfill(conn) == 1
+    conn.commit()
+    conn.close()
+    assert PropertySearch(db_path).count(gym) == before
+
+
+def test_extract_amenities():
+    assert utils.extract_amenities(" Gymnasium,Garden , ,Gymnasium") == ["Gymnasium", "Garden"]
+    assert utils.extract_amenities(None) == []
+    assert utils.extract_amenities(float("nan")) == []
+
+
+def test_search_and_facets_only_read(tmp_path):
+    db_path = str(tmp_path / "unmigrated.db")
+    conn = sqlite3.connect(db_path)
+    make_properties(20).to_sql("properties", conn, index=False)
+    conn.commit()
+    schema = conn.execute("SELECT name FROM sqlite_master ORDER BY name").fetchall()
+    conn.close()
+
+    search = PropertySearch(db_path)
+    search.facets()
+    assert len(search.search(PropertyFilters(listing_type="Sale"))) > 0
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT name FROM sqlite_master ORDER BY name").fetchall() == schema
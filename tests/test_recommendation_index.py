@@ -0,0 +1,252 @@
+import os
+import random
+import re
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import client_requirements
+import data_cache
+import recommendation_index
+import typed_frames
+import utils
+from recommendation_index import RecommendationIndex
+
+LOCALITIES = ["Mira Road East", "Bhayandar West", "Bhayandar East", "Shanti Nagar", "Kanakia", None]
+
+
+def full_scan_recommendations(properties_df, client_data):
+    """The original pandas implementation, kept as the reference for tiering."""
+    properties_df = properties_df.copy()
+    req_budget = utils.find_budget(client_data['requirements'])
+    req_location_match = re.search(r'\bin\s+([\w\s]+)', str(client_data['requirements']), re.IGNORECASE)
+    req_location = req_location_match.group(1).strip() if req_location_match else 'Any'
+    if 'anywhere' in req_location.lower(): req_location = 'Any'
+    req_bhk_match = re.search(r'(\d+)\s*BHK', str(client_data['requirements']))
+    req_bhk = int(req_bhk_match.group(1)) if req_bhk_match else 0
+    properties_df['bhk_numeric'] = pd.to_numeric(properties_df['bedroomsbhk'].astype(str).str.extract(r'(\d+)').iloc[:, 0], errors='coerce').fillna(0)
+    price_col = 'askingprice' if client_data['lookingfor'].lower() == 'sale' else 'monthlyrent'
+    properties_df['price_numeric'] = pd.to_numeric(properties_df[price_col], errors='coerce')
+    base_filter = (properties_df['listingtype'].str.lower() == client_data['lookingfor'].lower()) & (properties_df['bhk_numeric'] >= req_bhk)
+    budget_ceiling = req_budget * 1.15
+    tier1_filter = base_filter & (properties_df['price_numeric'] <= budget_ceiling)
+    if req_location != 'Any':
+        tier1_filter = tier1_filter & (properties_df['arealocality'].str.contains(req_location, case=False, na=False))
+    perfect_matches = properties_df[tier1_filter]
+    good_matches = properties_df[base_filter & (properties_df['price_numeric'] <= budget_ceiling)]
+    core_matches = properties_df[base_filter]
+    final_recs = pd.concat([perfect_matches, good_matches, core_matches]).drop_duplicates(subset=['property_id']).head(10)
+    if not final_recs.empty:
+        if not perfect_matches.empty: message = f"Found {len(final_recs)} great matches!"
+        elif not good_matches.empty: message = "No exact location matches, showing similar properties."
+        else: message = "No matches in budget, showing similar properties."
+    else:
+        message = "No suitable properties found."
+    return message, final_recs.to_dict(orient='records')
+
+
+def make_properties(count, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        listing_type = rng.choice(["Sale", "Rent", "sale"])
+        rows.append({
+            "property_id": f"{listing_type.upper()}-PROP-{1000 + i}",
+            "listingtype": listing_type,
+            "bedroomsbhk": rng.choice(["1 BHK", "2 BHK", "3 BHK", "4 BHK", None]),
+            "arealocality": rng.choice(LOCALITIES),
+            "askingprice": rng.choice([None, rng.randrange(20, 200) * 100000]) if listing_type != "Rent" else None,
+            "monthlyrent": rng.choice([None, rng.randrange(10, 80) * 1000]) if listing_type == "Rent" else None,
+        })
+    return pd.DataFrame(rows)
+
+
+CLIENTS = [
+    ("Sale", "2 BHK in Bhayandar West, Budget 85L"),
+    ("Sale", "3 BHK in Anywhere in Mira Bhayandar, Budget 140L"),
+    ("Sale", "1 BHK Budget 10L"),
+    ("Rent", "2 BHK Semi-Furnished in Mira Road East, Rent up to 45,000"),
+    ("Rent", "4 BHK in Kanakia, Rent 1"),
+    ("Rent", "Office space, no budget given"),
+]
+
+
+def assert_same(left, right):
+    assert left[0] == right[0]
+    assert len(left[1]) == len(right[1])
+    for a, b in zip(left[1], right[1]):
+        assert a.keys() == b.keys()
+        for key in a:
+            both_nan = isinstance(a[key], float) and isinstance(b[key], float) and np.isnan(a[key]) and np.isnan(b[key])
+            assert both_nan or a[key] == b[key], key
+
+
+@pytest.mark.parametrize("looking_for,requirements", CLIENTS)
+def test_index_matches_full_scan(looking_for, requirements):
+    properties = make_properties(400)
+    client = pd.Series({"client_id": "CL-1", "lookingfor": looking_for, "requirements": requirements})
+    index = RecommendationIndex(properties)
+
+    parsed = client_requirements.parse(requirements)
+    result = index.recommend(client, parsed.budget, parsed.bhk, parsed.location)
+
+    assert_same((result["message"], result["recommendations"]), full_scan_recommendations(properties, client))
+
+
+def test_incremental_changes_match_rebuild():
+    properties = make_properties(200)
+    index = RecommendationIndex(properties)
+    client = pd.Series({"client_id": "CL-1", "lookingfor": "Sale", "requirements": "2 BHK in Kanakia, Budget 90L"})
+    index.recommend(client, 9000000, 2, "Kanakia")
+
+    changed = properties.copy()
+    changed.loc[5, ["listingtype", "arealocality", "askingprice", "bedroomsbhk", "monthlyrent"]] = ["Sale", "Kanakia", 100000, "3 BHK", None]
+    removed_id = changed.loc[changed['listingtype'] == 'Sale', 'property_id'].iloc[0]
+    changed = changed[changed['property_id'] != removed_id].reset_index(drop=True)
+    changed.loc[len(changed)] = ["SALE-PROP-9999", "Sale", "2 BHK", "Kanakia", 200000, 0.0]
+
+    index.remove([removed_id])
+    index.upsert(changed.loc[changed['property_id'].isin([properties.loc[5, 'property_id'], "SALE-PROP-9999"])])
+
+    incremental = index.recommend(client, 9000000, 2, "Kanakia")
+    assert_same((incremental["message"], incremental["recommendations"]), full_scan_recommendations(changed, client))
+
+
+def test_typed_frame_matches_full_scan_and_keeps_dtypes_on_upsert():
+    conn = sqlite3.connect(":memory:")
+    make_properties(400).to_sql("properties", conn, index=False, dtype={"askingprice": "REAL", "monthlyrent": "REAL"})
+    index = RecommendationIndex(typed_frames.read_properties(conn))
+    for looking_for, requirements in CLIENTS:
+        client = pd.Series({"client_id": "CL-1", "lookingfor": looking_for, "requirements": requirements})
+        parsed = client_requirements.parse(requirements)
+        result = index.recommend(client, parsed.budget, parsed.bhk, parsed.location)
+        expected = full_scan_recommendations(pd.read_sql("SELECT * FROM properties", conn), client)
+        assert_same((result["message"], result["recommendations"]), expected)
+
+    conn.execute("INSERT INTO properties VALUES ('SALE-PROP-9999', 'Sale', '5 BHK', 'Jesal Park', 9000000, NULL)")
+    conn.execute("UPDATE properties SET arealocality = 'Golden Nest' WHERE property_id = 'SALE-PROP-1000'")
+    index.upsert(typed_frames.read_properties(conn, where_sql=" WHERE property_id IN ('SALE-PROP-1000', 'SALE-PROP-9999')"))
+    assert isinstance(index._frame['arealocality'].dtype, pd.CategoricalDtype)
+    client = pd.Series({"client_id": "CL-1", "lookingfor": "Sale", "requirements": "5 BHK in Jesal Park, Budget 100L"})
+    assert [rec["property_id"] for rec in index.recommend(client, 10000000, 5, "Jesal Park")["recommendations"]] == ["SALE-PROP-9999"]
+    client = pd.Series({"client_id": "CL-2", "lookingfor": "Sale", "requirements": "2 BHK in Golden Nest, Budget 90L"})
+    parsed = client_requirements.parse(client["requirements"])
+    result = index.recommend(client, parsed.budget, parsed.bhk, parsed.location)
+    assert_same((result["message"], result["recommendations"]),
+                full_scan_recommendations(pd.read_sql("SELECT * FROM properties", conn), client))
+
+
+@pytest.fixture
+def recommendation_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "recs.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE clients (client_id TEXT PRIMARY KEY, name TEXT, phone TEXT, email TEXT, lookingfor TEXT, requirements TEXT, status TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE properties (property_id TEXT PRIMARY KEY, listingtype TEXT, bedroomsbhk TEXT, arealocality TEXT, askingprice REAL, monthlyrent REAL)"
+    )
+    conn.execute(
+        "INSERT INTO clients VALUES ('CL-1001', 'Asha Mehta', '9876543210', 'asha@example.com', 'Sale', '2 BHK Budget 50L in Mira Road', 'New')"
+    )
+    conn.execute("INSERT INTO properties VALUES ('SALE-PROP-1001', 'Sale', '2 BHK', 'Mira Road', 4800000, NULL)")
+    conn.commit()
+    conn.close()
+    data_cache.clear()
+    recommendation_index.clear()
+    monkeypatch.setattr(utils, "DB_FILE_PATH", str(db_path))
+    yield db_path
+    recommendation_index.clear()
+    data_cache.clear()
+
+
+def test_property_writes_patch_the_index_in_place(recommendation_db):
+    assert len(utils.get_recommendations("CL-1001")["recommendations"]) == 1
+    index = recommendation_index.get_index(utils.DB_FILE_PATH, utils.get_all_properties_df)
+
+    utils.update_property_details("SALE-PROP-1001", {"askingprice": 9900000})
+    assert recommendation_index.get_index(utils.DB_FILE_PATH, utils.get_all_properties_df) is index
+    result = utils.get_recommendations("CL-1001")
+    assert result["message"] == "No matches in budget, showing similar properties."
+
+    utils.delete_property_by_id("SALE-PROP-1001")
+    assert recommendation_index.get_index(utils.DB_FILE_PATH, utils.get_all_properties_df) is index
+    assert utils.get_recommendations("CL-1001")["recommendations"] == []
+
+
+def test_external_write_rebuilds_the_index(recommendation_db):
+    assert utils.get_recommendations("CL-1001")["message"] == "Found 1 great matches!"
+    conn = sqlite3.connect(recommendation_db)
+    conn.execute("INSERT INTO properties VALUES ('SALE-PROP-1002', 'Sale', '3 BHK', 'Mira Road', 4000000, NULL)")
+    conn.commit()
+    conn.close()
+    assert utils.get_recommendations("CL-1001")["message"] == "Found 2 great matches!"
+
+
+def test_recommend_many_matches_single_queries():
+    properties = make_properties(600)
+    clients = pd.DataFrame([
+        {"client_id": f"CL-{i}", "lookingfor": looking_for, "requirements": requirements}
+        for i, (looking_for, requirements) in enumerate(CLIENTS * 3)
+    ])
+    index = RecommendationIndex(properties)
+    batch = index.recommend_many(clients, utils.parse_requirements_bulk(clients['requirements']))
+    assert len(batch) == len(clients)
+    for (_, client), result in zip(clients.iterrows(), batch):
+        expected = full_scan_recommendations(properties, client)
+        assert_same((result["message"], result["recommendations"]), expected)
+        assert result["client_details"] == client.to_dict()
+
+
+def test_recommend_many_dense_budget_scan(monkeypatch):
+    monkeypatch.setattr(recommendation_index, "SPARSE_BUDGET_MATCHES", 2)
+    test_recommend_many_matches_single_queries()
+
+
+def test_get_recommendations_bulk_streams_in_request_order(recommendation_db):
+    results = list(utils.get_recommendations_bulk(["CL-9999", "CL-1001"]))
+    assert [result["client_id"] for result in results] == ["CL-9999", "CL-1001"]
+    assert results[0]["message"] == "Client not found."
+    single = utils.get_recommendations("CL-1001")
+    assert results[1]["message"] == single["message"]
+    assert [row["property_id"] for row in results[1]["recommendations"]] == ["SALE-PROP-1001"]
+
+
+def test_write_racing_a_patch_rebuilds_the_index(recommendation_db, monkeypatch):
+    assert utils.get_recommendations("CL-1001")["message"] == "Found 1 great matches!"
+    bump_version = data_cache.bump_version
+
+    def bump_then_external_write(db_path):
+        version = bump_version(db_path)
+        conn = sqlite3.connect(recommendation_db)
+        conn.execute("INSERT INTO properties (property_id, listingtype, bedroomsbhk, arealocality, askingprice) "
+                     "VALUES ('SALE-PROP-1003', 'Sale', '2 BHK', 'Mira Road', 4500000)")
+        conn.commit()
+        conn.close()
+        return version
+
+    monkeypatch.setattr(data_cache, "bump_version", bump_then_external_write)
+    utils.update_property_details("SALE-PROP-1001", {"askingprice": 4700000})
+    monkeypatch.setattr(data_cache, "bump_version", bump_version)
+    ids = [row["property_id"] for row in utils.get_recommendations("CL-1001")["recommendations"]]
+    assert ids == ["SALE-PROP-1001", "SALE-PROP-1003"]
+
+
+def test_write_landing_before_ours_rebuilds_the_index(recommendation_db):
+    assert utils.get_recommendations("CL-1001")["message"] == "Found 1 great matches!"
+    pending = recommendation_index.pending_update(utils.DB_FILE_PATH)
+    conn = sqlite3.connect(recommendation_db)
+    conn.execute("INSERT INTO properties (property_id, listingtype, bedroomsbhk, arealocality, askingprice) "
+                 "VALUES ('SALE-PROP-1003', 'Sale', '2 BHK', 'Mira Road', 4500000)")
+    conn.commit()
+    conn.close()
+    # What the write helpers do around their own commit.
+    recommendation_index.before_commit(utils.DB_FILE_PATH)
+    data_cache.bump_version(utils.DB_FILE_PATH)
+    recommendation_index.apply_property_changes(utils.DB_FILE_PATH, ["SALE-PROP-1001"], pending)
+    assert utils.get_recommendations("CL-1001")["message"] == "Found 2 great matches!"
@@ -0,0 +1,123 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import report_images
+import utils
+from report_images import ImageFetcher
+
+
+def png_bytes(color):
+    buffer = BytesIO()
+    Image.new("RGB", (40, 30), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+PHOTOS = {"/apartment.png": png_bytes("red"), "/shop.png": png_bytes("blue")}
+
+
+@pytest.fixture
+def image_server():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            if self.path == "/slow.png":
+                time.sleep(1.5)
+            body = PHOTOS.get(self.path, png_bytes("green") if self.path == "/slow.png" else None)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", hits
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    fetcher = ImageFetcher(str(tmp_path / "cache"), workers=4, timeout=0.3)
+    yield fetcher
+    fetcher.shutdown()
+
+
+def test_downloads_once_and_serves_from_cache(image_server, fetcher):
+    base, hits = image_server
+    sources = [f"{base}/apartment.png", f"{base}/shop.png", f"{base}/apartment.png", None, f"{base}/missing.png"]
+    assert fetcher.fetch_many(sources) == [PHOTOS["/apartment.png"], PHOTOS["/shop.png"], PHOTOS["/apartment.png"], None, None]
+    assert sorted(hits) == ["/apartment.png", "/missing.png", "/shop.png"]
+
+    # A fresh fetcher on the same directory (e.g. the next Streamlit run) reuses the cache.
+    again = ImageFetcher(fetcher.cache_dir, timeout=0.3)
+    assert again.fetch_many(sources[:2]) == [PHOTOS["/apartment.png"], PHOTOS["/shop.png"]]
+    assert len(hits) == 3 and again.stats()["cache_hits"] == 2
+    again.shutdown()
+
+
+def test_slow_images_time_out_without_blocking_the_rest(image_server, fetcher):
+    base, _ = image_server
+    start = time.perf_counter()
+    images = fetcher.fetch_many([f"{base}/slow.png", f"{base}/shop.png", f"{base}/slow.png"])
+    assert time.perf_counter() - start < 1.4
+    assert images == [None, PHOTOS["/shop.png"], None]
+    assert fetcher.stats()["failures"] == 1
+
+
+def test_cache_evicts_least_recently_used(image_server, tmp_path):
+    base, _ = image_server
+    fetcher = ImageFetcher(str(tmp_path / "cache"), max_bytes=len(PHOTOS["/apartment.png"]) + 10, timeout=0.3)
+    fetcher.fetch_many([f"{base}/apartment.png"])
+    time.sleep(0.05)
+    fetcher.fetch_many([f"{base}/shop.png"])
+    assert fetcher.cached(f"{base}/apartment.png") is None
+    assert fetcher.cached(f"{base}/shop.png") == PHOTOS["/shop.png"]
+    assert fetcher.stats()["evictions"] == 1
+    fetcher.shutdown()
+
+
+def test_report_prefers_uploaded_image(image_server, fetcher, tmp_path, monkeypatch):
+    base, hits = image_server
+    upload = tmp_path / "SALE-PROP-1001_img1.png"
+    upload.write_bytes(PHOTOS["/shop.png"])
+    db_path = str(tmp_path / "report.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE properties (property_id TEXT PRIMARY KEY, image_1 TEXT)")
+        conn.executemany("INSERT INTO properties VALUES (?, ?)",
+                         [("SALE-PROP-1001", str(upload)), ("SALE-PROP-1002", "/gone/SALE-PROP-1002_img1.png")])
+    monkeypatch.setattr(utils, "DB_FILE_PATH", db_path)
+    monkeypatch.setattr(utils, "get_property_images", lambda prop_type: [f"{base}/apartment.png"])
+
+    recommendations = [
+        {"property_id": "SALE-PROP-1001", "propertytype": "Apartment", "askingprice": 5200000.0, "areasqft": 650},
+        {"property_id": "SALE-PROP-1002", "propertytype": "Apartment", "askingprice": 6100000.0, "areasqft": 700},
+        {"property_id": "SALE-PROP-1003", "propertytype": "Shop", "image_1": None, "askingprice": 9000000.0, "areasqft": 300},
+    ]
+    assert utils._report_image_sources(recommendations) == [str(upload), f"{base}/apartment.png", f"{base}/apartment.png"]
+    pdf = utils.generate_property_report({"name": "Asha", "lookingfor": "Sale", "requirements": "2 BHK"},
+                                         recommendations, fetcher)
+    assert pdf.startswith(b"%PDF")
+    assert hits == ["/apartment.png"]
+    assert fetcher.stats()["local"] == 1
+    assert report_images.is_local_file(str(upload)) and not report_images.is_local_file(f"{base}/apartment.png")
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import snapshot
+import utils
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def source_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "live.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE clients (client_id TEXT, name TEXT, phone INTEGER)")
+    conn.executemany("INSERT INTO clients VALUES (?, ?, ?)", [("CL-1", "Asha", 9820012345), ("CL-2", "Ravi", None)])
+    conn.execute("CREATE TABLE properties (property_id TEXT, listingdate TIMESTAMP, areasqft INTEGER, "
+                 "askingprice REAL, floornumber INTEGER, pincode INTEGER)")
+    conn.executemany("INSERT INTO properties VALUES (?, ?, ?, ?, ?, ?)", [
+        ("P-1", "2024-10-23 00:00:00", 950, 4500000, 3, 401107),
+        ("P-2", "2024-11-02", 1200, None, "Ground", None),
+        ("P-3", None, 600, 2500000.5, 1, 401105),
+    ])
+    conn.execute("CREATE TABLE tasks (task_id INTEGER PRIMARY KEY, client_id TEXT, due_date TEXT)")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(utils, "DB_FILE_PATH", db_path)
+    return db_path
+
+
+def test_export_and_load_typed_columns(source_db, tmp_path):
+    directory = str(tmp_path / "snap")
+    manifest = utils.export_snapshot(directory)
+    assert {table: info["rows"] for table, info in manifest["tables"].items()} == {
+        "clients": 2, "properties": 3, "tasks": 0}
+    assert utils.get_snapshot_info(directory)["created_at"] == manifest["created_at"]
+
+    frames = utils.load_snapshot_frames(directory=directory)
+    properties = frames["properties"]
+    assert properties.dtypes.astype(str).to_dict() == {
+        "property_id": "object", "listingdate": "datetime64[us]", "areasqft": "int64", "askingprice": "float64",
+        "floornumber": "object", "pincode": "float64",
+    }
+    assert list(properties["listingdate"]) == [pd.Timestamp("2024-10-23"), pd.Timestamp("2024-11-02"), pd.NaT]
+    # A column holding text and numbers keeps every value, as text.
+    assert list(properties["floornumber"]) == ["3", "Ground", "1"]
+    assert frames["clients"]["phone"].tolist()[0] == 9820012345
+    assert frames["tasks"].empty and list(frames["tasks"].columns) == ["task_id", "client_id", "due_date"]
+
+
+def test_parquet_columns_and_arrow_dtypes(source_db, tmp_path):
+    directory = str(tmp_path / "snap")
+    snapshot.export_snapshot(source_db, directory, fmt="parquet")
+    assert sorted(os.listdir(directory)) == ["clients.parquet", "manifest.json", "properties.parquet", "tasks.parquet"]
+    frames = snapshot.load_snapshot(directory, ["properties"], columns={"properties": ["property_id", "areasqft"]},
+                                    arrow_dtypes=True)
+    assert list(frames) == ["properties"]
+    assert frames["properties"].dtypes.astype(str).tolist() == ["string[pyarrow]", "int64[pyarrow]"]
+    assert frames["properties"]["areasqft"].sum() == 2750
+
+    with pytest.raises(ValueError):
+        snapshot.export_snapshot(source_db, directory, fmt="csv")
+    with pytest.raises(FileNotFoundError):
+        snapshot.load_snapshot(str(tmp_path / "missing"))
+    assert utils.get_snapshot_info(str(tmp_path / "missing")) is None
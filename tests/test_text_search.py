@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import data_cache
+import text_search
+import utils
+
+CLIENTS = pd.DataFrame({
+    "client_id": ["CL-1001", "CL-1002", "CL-1003"],
+    "name": ["Devika Khosla", "Chaman Seshadri", "Mira Kapoor"],
+    "phone": [9820012345, 9930054321, 8850011111],
+    "email": ["devika@example.com", None, "mira@example.com"],
+    "status": ["New", "Negotiating", "New"],
+})
+PROPERTIES = pd.DataFrame({
+    "property_id": ["SALE-PROP-1001", "RENT-PROP-1002", "SALE-SHOP-1003"],
+    "propertytype": ["Apartment", "Apartment", "Shop"],
+    "arealocality": ["Mira Road East", "Kanakia", None],
+    "listingtype": ["Sale", "Rent", "Sale"],
+})
+
+
+@pytest.fixture
+def search_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "search.db")
+    conn = sqlite3.connect(db_path)
+    CLIENTS.to_sql("clients", conn, index=False)
+    PROPERTIES.to_sql("properties", conn, index=False)
+    conn.execute("CREATE TABLE communication_log (log_id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT, timestamp TEXT, note TEXT)")
+    conn.execute("INSERT INTO communication_log (client_id, timestamp, note) VALUES ('CL-1002', '2024-01-01', 'Wants a sea-facing flat near the station')")
+    conn.commit()
+    conn.close()
+    data_cache.clear()
+    text_search.clear()
+    monkeypatch.setattr(utils, "DB_FILE_PATH", db_path)
+    yield db_path
+    text_search.clear()
+    data_cache.clear()
+
+
+def hits(db_path, term, **kwargs):
+    return [(row.kind, row.id) for row in text_search.search(db_path, term, **kwargs).itertuples()]
+
+
+def test_match_query():
+    assert text_search.match_query(" mira  ro ") == '"mira"* "ro"*'
+    assert text_search.match_query('CL-10"01') == '"CL"* "10"* "01"*'
+    assert text_search.match_query(" -- ") is None
+
+
+def test_prefix_search_across_sources(search_db):
+    assert hits(search_db, "devi") == [("client", "CL-1001")]
+    assert hits(search_db, "9930") == [("client", "CL-1002")]
+    assert hits(search_db, "cl-1003") == [("client", "CL-1003")]
+    assert sorted(hits(search_db, "mira")) == [("client", "CL-1003"), ("property", "SALE-PROP-1001")]
+    assert hits(search_db, "mira ro") == [("property", "SALE-PROP-1001")]
+    assert hits(search_db, "mira", kinds=("property",)) == [("property", "SALE-PROP-1001")]
+    assert hits(search_db, "SEA FAC") == [("note", "CL-1002")]
+
+    row = text_search.search(search_db, "station").iloc[0]
+    assert row['label'] == "Chaman Seshadri" and "station" in row['detail']
+    assert text_search.search(search_db, "shop").iloc[0]['label'] == "Shop · Unknown"
+    assert len(text_search.search(search_db, "apartment", limit=1)) == 1
+    assert text_search.search(search_db, "zzz").empty
+
+
+def test_triggers_follow_writes(search_db):
+    text_search.search(search_db, "devika")
+    utils.add_communication_note("CL-1001", "Asked about parking in Kanakia")
+    assert ("note", "CL-1001") in hits(search_db, "parking")
+
+    conn = sqlite3.connect(search_db)
+    conn.execute("UPDATE clients SET name = 'Devika Rao' WHERE client_id = 'CL-1001'")
+    conn.execute("DELETE FROM properties WHERE property_id = 'RENT-PROP-1002'")
+    conn.execute("INSERT INTO properties (property_id, propertytype, arealocality) VALUES ('RENT-PROP-1004', 'Bungalow', 'Kashimira')")
+    conn.commit()
+    conn.close()
+    assert hits(search_db, "khosla") == []
+    assert hits(search_db, "devika rao") == [("client", "CL-1001")]
+    assert hits(search_db, "kanakia") == [("note", "CL-1001")]
+    assert hits(search_db, "kash") == [("property", "RENT-PROP-1004")]
+
+
+def test_replaced_tables_are_reindexed(search_db):
+    assert hits(search_db, "chaman") == [("client", "CL-1002")]
+    conn = sqlite3.connect(search_db)
+    CLIENTS.assign(name=["Asha Patil", "Ravi Iyer", "Mira Kapoor"]).to_sql("clients", conn, if_exists="replace", index=False)
+    conn.commit()
+    assert text_search.ensure_schema(conn) == ["clients"]
+    assert text_search.ensure_schema(conn) == []
+    conn.commit()
+    conn.close()
+    assert hits(search_db, "chaman") == []
+    assert hits(search_db, "ravi") == [("client", "CL-1002")]
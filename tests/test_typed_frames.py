@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import data_cache
+import typed_frames
+import utils
+
+ROWS = [
+    ("PROP-1001", "Available", "Sale", "Apartment", "Mira Road East", "2 BHK", 650, 2, "5", 5200000.0, None,
+     "2024-03-09 00:00:00", "img/a.jpg"),
+    ("PROP-1002", "Available", "Rent", "Apartment", "Kanakia", "1 BHK", 480, 1, "Ground", None, 18000.0,
+     "2024-05-01", None),
+    ("PROP-1003", "Sold", "Sale", "Shop", None, None, None, None, "2", 9000000.0, None, "not a date", None),
+]
+
+
+@pytest.fixture
+def typed_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "typed.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE properties (property_id TEXT PRIMARY KEY, listingstatus TEXT, listingtype TEXT, "
+                 "propertytype TEXT, arealocality TEXT, bedroomsbhk TEXT, areasqft INTEGER, bathrooms INTEGER, "
+                 "floornumber TEXT, askingprice REAL, monthlyrent REAL, listingdate TEXT, "
+                 + "".join(f"image_{i} TEXT, " for i in range(1, 11)) + "video TEXT)")
+    conn.executemany("INSERT INTO properties (property_id, listingstatus, listingtype, propertytype, arealocality, "
+                     "bedroomsbhk, areasqft, bathrooms, floornumber, askingprice, monthlyrent, listingdate, image_1) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", ROWS)
+    conn.commit()
+    conn.close()
+    data_cache.clear()
+    monkeypatch.setattr(utils, "DB_FILE_PATH", db_path)
+    yield db_path
+    data_cache.clear()
+
+
+def test_read_properties_applies_dtypes(typed_db):
+    with sqlite3.connect(typed_db) as conn:
+        frame = typed_frames.read_properties(conn)
+        with_media = typed_frames.read_properties(conn, include_media=True)
+        raw = pd.read_sql("SELECT * FROM properties", conn)
+
+    assert not set(typed_frames.MEDIA_COLUMNS) & set(frame.columns)
+    assert set(typed_frames.MEDIA_COLUMNS) <= set(with_media.columns)
+    for column in ("listingstatus", "listingtype", "propertytype", "arealocality", "bedroomsbhk"):
+        assert isinstance(frame[column].dtype, pd.CategoricalDtype), column
+    assert frame["areasqft"].dtype == "Int64" and frame["bathrooms"].dtype == "Int64"
+    assert frame["askingprice"].dtype == "float64"
+    assert pd.api.types.is_datetime64_any_dtype(frame["listingdate"])
+    assert frame["listingdate"].isna().tolist() == [False, False, True]
+    # "Ground" has no integer form, so the column keeps its values.
+    assert frame["floornumber"].tolist() == ["5", "Ground", "2"]
+    assert typed_frames.memory_per_row(frame) < typed_frames.memory_per_row(raw)
+
+
+def test_to_records_returns_plain_values(typed_db):
+    with sqlite3.connect(typed_db) as conn:
+        records = typed_frames.to_records(typed_frames.read_properties(conn))
+    first, _, last = records
+    assert first["listingtype"] == "Sale" and type(first["listingtype"]) is str
+    assert first["areasqft"] == 650 and type(first["areasqft"]) is int
+    assert first["listingdate"] == "2024-03-09 00:00:00"
+    assert last["arealocality"] is None and last["bedroomsbhk"] is None
+    assert pd.isna(last["areasqft"]) and last["listingdate"] is None
+
+
+def test_get_all_properties_df_is_typed_and_cached(typed_db):
+    frame = utils.get_all_properties_df()
+    assert isinstance(frame["listingtype"].dtype, pd.CategoricalDtype)
+    assert "image_1" not in frame.columns
+    assert utils.get_all_properties_df(include_media=True)["image_1"].tolist()[0] == "img/a.jpg"
+    hits = data_cache.cache_stats()["hits"]
+    pd.testing.assert_frame_equal(utils.get_all_properties_df(), frame)
+    assert data_cache.cache_stats()["hits"] == hits + 1
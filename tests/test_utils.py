@@ -51,6 +51,32 @@ def test_get_recommendations(temp_db):
         assert 'property_id' in result['recommendations'][0]
 
 
+def test_get_recommendations_for_a_client_open_to_anywhere(temp_db):
+    # "in Anywhere ..." parses to location 'Any' (client_requirements), so in-budget
+    # listings anywhere count as exact matches. The original inline regex took
+    # "Anywhere in Mira Bhayandar" as a locality and fell back to the second tier.
+    cursor = temp_db.cursor()
+    for column in ("name", "phone", "email", "lookingfor", "requirements"):
+        cursor.execute(f"ALTER TABLE clients ADD COLUMN {column} TEXT")
+    cursor.execute(
+        "UPDATE clients SET name=?, lookingfor=?, requirements=? WHERE client_id='CL-TEST'",
+        ("Test User", "Sale", "2 BHK in Anywhere in Mira Bhayandar, Budget 50L"),
+    )
+    cursor.execute(
+        "CREATE TABLE properties (property_id TEXT PRIMARY KEY, listingtype TEXT, bedroomsbhk TEXT, arealocality TEXT, askingprice REAL, monthlyrent REAL)"
+    )
+    cursor.executemany(
+        "INSERT INTO properties (property_id, listingtype, bedroomsbhk, arealocality, askingprice, monthlyrent) VALUES (?, ?, ?, ?, ?, ?)",
+        [("SALE-PROP-1001", "Sale", "2 BHK", "Mira Road", 4800000, 0),
+         ("SALE-PROP-1002", "Sale", "3 BHK", "Bhayandar West", 9000000, 0)],
+    )
+    temp_db.commit()
+
+    result = get_recommendations('CL-TEST')
+    assert result['message'] == "Found 2 great matches!"
+    assert [row['property_id'] for row in result['recommendations']] == ["SALE-PROP-1001", "SALE-PROP-1002"]
+
+
 @pytest.fixture
 def temp_db(tmp_path):
     db_path = tmp_path / 'test.db'
@@ -82,4 +108,14 @@ def test_add_task(temp_db):
     assert task[6] == 'Pending'  # status
     cursor.execute("SELECT status FROM clients WHERE client_id = 'CL-TEST'")
     status = cursor.fetchone()[0]
-    assert status == 'Site Visit Planned'
\ No newline at end of file
+    assert status == 'Site Visit Planned'
+
+def test_importing_utils_touches_no_database(tmp_path):
+    import subprocess
+    db_path = tmp_path / "untouched.db"
+    subprocess.run(
+        [sys.executable, "-c", "import threading, utils; assert threading.active_count() == 1, threading.enumerate()"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=dict(os.environ, REAL_ESTATE_DB_PATH=str(db_path)), check=True,
+    )
+    assert not db_path.exists()
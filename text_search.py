@@ -0,0 +1,168 @@
+"""
+Full-text search over clients, properties and communication-log notes.
+
+Each source table gets an external-content FTS5 index (``clients_fts``,
+``properties_fts``, ``communication_log_fts``) whose rowids are the source
+rowids, so the index stores only the tokens and results join straight back to
+the row. ``AFTER INSERT/DELETE/UPDATE OF`` triggers keep the indexes in step
+with every write, including ones made outside ``utils``.
+
+Tables recreated by pandas (``to_sql(if_exists='replace')``) lose their
+triggers; ``ensure_schema`` notices the missing triggers (or a changed column
+set) and rebuilds that index from its table. ``utils.initialize_database``
+runs it at startup and ``search`` once per data version.
+
+Queries are prefix matches: every word typed must start a token somewhere in
+the row ("mira ro" finds "Mira Road East"), ranked with ``bm25``.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+import data_cache
+import db
+
+logger = logging.getLogger(__name__)
+
+SEARCH_LIMIT = 10
+RESULT_COLUMNS = ['kind', 'id', 'label', 'detail', 'rank']
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+_lock = threading.Lock()
+_ready: Dict[str, int] = {}
+
+
+class Source(NamedTuple):
+    """One indexed table: the columns to index and the query that labels its top hits."""
+    kind: str
+    table: str
+    columns: Tuple[str, ...]
+    select: str
+
+
+# Each select ranks inside the FTS table first ({hits}) and labels only the top rows.
+SOURCES = (
+    Source('client', 'clients', ('client_id', 'name', 'phone', 'email'),
+           "SELECT 'client', s.client_id, s.name, s.phone, h.rank FROM {hits} h "
+           "JOIN clients s ON s.rowid = h.rowid ORDER BY h.rank"),
+    Source('property', 'properties', ('property_id', 'propertytype', 'arealocality', 'buildingsociety', 'city', 'bedroomsbhk'),
+           "SELECT 'property', s.property_id, "
+           "COALESCE(s.propertytype, 'Property') || ' · ' || COALESCE(s.arealocality, 'Unknown'), s.property_id, h.rank "
+           "FROM {hits} h JOIN properties s ON s.rowid = h.rowid ORDER BY h.rank"),
+    Source('note', 'communication_log', ('note',),
+           "SELECT 'note', s.client_id, COALESCE((SELECT c.name FROM clients c WHERE c.client_id = s.client_id LIMIT 1), s.client_id), "
+           "h.snippet, h.rank FROM {hits} h JOIN communication_log s ON s.rowid = h.rowid ORDER BY h.rank"),
+)
+HITS_SQL = ("(SELECT rowid, rank, snippet({fts}, -1, '', '', '…', 10) AS snippet FROM {fts} "
+            "WHERE {fts} MATCH ? ORDER BY rank LIMIT ?)")
+
+
+def fts_table(source: Source) -> str:
+    return f"{source.table}_fts"
+
+
+def match_query(term: str) -> Optional[str]:
+    """FTS5 query requiring a token starting with each word of ``term``; None if it has no words."""
+    words = _WORD_RE.findall(term or "")
+    return " ".join(f'"{word}"*' for word in words) or None
+
+
+# --- Schema and trigger maintenance ---
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _trigger_sql(source: Source, columns: Sequence[str]) -> Dict[str, str]:
+    fts = fts_table(source)
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    insert = f"INSERT INTO {fts} (rowid, {names}) VALUES (new.rowid, {new});"
+    delete = f"INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.rowid, {old});"
+    return {
+        f"{fts}_ai": f"AFTER INSERT ON {source.table} BEGIN {insert} END",
+        f"{fts}_ad": f"AFTER DELETE ON {source.table} BEGIN {delete} END",
+        f"{fts}_au": f"AFTER UPDATE OF {names} ON {source.table} BEGIN {delete} {insert} END",
+    }
+
+
+def _ensure_source(conn: sqlite3.Connection, source: Source) -> bool:
+    table_columns = set(_columns(conn, source.table))
+    columns = [column for column in source.columns if column in table_columns]
+    if not columns:
+        return False
+    fts = fts_table(source)
+    triggers = _trigger_sql(source, columns)
+    existing = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (source.table,)
+    )}
+    if _columns(conn, fts) == columns and set(triggers) <= existing:
+        return False
+    # First run, the table was recreated (which drops triggers) or its columns changed: rebuild.
+    for name in triggers:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute(f"DROP TABLE IF EXISTS {fts}")
+    conn.execute(
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({', '.join(columns)}, content='{source.table}', "
+        "content_rowid='rowid', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    for name, body in triggers.items():
+        conn.execute(f"CREATE TRIGGER {name} {body}")
+    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    return True
+
+
+def ensure_schema(conn: sqlite3.Connection) -> List[str]:
+    """Creates or rebuilds the indexes that are missing or stale inside the caller's transaction; returns their tables."""
+    return [source.table for source in SOURCES if _ensure_source(conn, source)]
+
+
+# --- Search ---
+
+def _prepare(db_path: str, conn: sqlite3.Connection) -> None:
+    version = data_cache.data_version(db_path)
+    with _lock:
+        if _ready.get(db_path) == version:
+            return
+    rebuilt = ensure_schema(conn)
+    if rebuilt:
+        conn.commit()
+        logger.info("Rebuilt full-text indexes for %s", ", ".join(rebuilt))
+    with _lock:
+        _ready[db_path] = data_cache.data_version(db_path)
+
+
+def search(db_path: str, term: str, limit: int = SEARCH_LIMIT, kinds: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Best ``limit`` matches for ``term`` as rows of (kind, id, label, detail, rank); lower rank is better.
+
+    ``id`` is the client_id for client and note hits and the property_id for
+    property hits.
+    """
+    query = match_query(term)
+    if query is None or limit <= 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    db_path = str(db_path)
+    rows = []
+    with db.connection(db_path) as conn:
+        _prepare(db_path, conn)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for source in SOURCES:
+            fts = fts_table(source)
+            if (kinds is not None and source.kind not in kinds) or fts not in tables:
+                continue
+            hits = HITS_SQL.format(fts=fts)
+            rows.extend(conn.execute(source.select.format(hits=hits), (query, int(limit))).fetchall())
+    results = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    return results.sort_values('rank', kind='stable').head(limit).reset_index(drop=True)
+
+
+def clear() -> None:
+    with _lock:
+        _ready.clear()
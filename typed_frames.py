@@ -0,0 +1,114 @@
+"""
+Schema-aware DataFrame loading for the properties table.
+
+``pd.read_sql("SELECT * FROM properties")`` returns every text column as
+``object`` and every numeric one as ``float64``. Readers then convert again with
+``pd.to_numeric(..., errors='coerce')`` or ``.astype(str).str.lower()``.
+``read_properties`` applies ``PROPERTY_DTYPES`` once at load:
+- low-cardinality text (listing type, property type, locality, furnishing,
+  listing status, ...) becomes ``category``;
+- counts and whole-number columns become nullable ``Int64``;
+- ``listingdate`` becomes ``datetime64``; text that does not parse becomes
+  ``NaT``, as the pages' ``pd.to_datetime(errors='coerce')`` calls did.
+
+A numeric conversion is only applied when it keeps every value. For example,
+a floor number stored as "Ground" leaves that column as it was.
+
+The image and video path columns (``MEDIA_COLUMNS``) are only read when
+``include_media`` is set.
+
+``to_records`` turns a typed frame back into plain Python values (``str``/None,
+``int``/NaN, ``float``, listing dates as SQLite-style text), so API responses
+and PDF/page code see the same records as before.
+"""
+
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+CATEGORY = 'category'
+INTEGER = 'Int64'
+FLOAT = 'float64'
+DATETIME = 'datetime64[ns]'
+
+PROPERTY_DTYPES: Dict[str, str] = {
+    'listingstatus': CATEGORY, 'listingtype': CATEGORY, 'propertytype': CATEGORY, 'arealocality': CATEGORY,
+    'city': CATEGORY, 'bedroomsbhk': CATEGORY, 'areatype': CATEGORY, 'furnishing': CATEGORY,
+    'facingdirection': CATEGORY, 'pricenegotiable': CATEGORY,
+    'pincode': INTEGER, 'bathrooms': INTEGER, 'areasqft': INTEGER, 'floornumber': INTEGER, 'totalfloors': INTEGER,
+    'parkingcars': INTEGER, 'propertyageyrs': INTEGER, 'commission': INTEGER, 'ownerphone': INTEGER,
+    'askingprice': FLOAT, 'monthlyrent': FLOAT, 'securitydeposit': FLOAT, 'maintmonth': FLOAT,
+    'predicted_price': FLOAT, 'price_gap_pct': FLOAT,
+    'listingdate': DATETIME,
+}
+MEDIA_COLUMNS = tuple(f'image_{i}' for i in range(1, 11)) + ('video',)
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _numeric(values: pd.Series, dtype: str) -> pd.Series:
+    converted = pd.to_numeric(values, errors='coerce')
+    if converted.notna().sum() != values.notna().sum():
+        return values
+    if dtype == INTEGER:
+        present = converted.dropna()
+        if not (present == np.floor(present)).all():
+            return values
+        return converted.astype(INTEGER)
+    return converted.astype(FLOAT)
+
+
+def apply_dtypes(frame: pd.DataFrame, dtypes: Dict[str, str] = PROPERTY_DTYPES) -> pd.DataFrame:
+    """Converts the columns of ``frame`` named in ``dtypes`` in place and returns it."""
+    for column, dtype in dtypes.items():
+        if column not in frame.columns or frame[column].dtype == dtype:
+            continue
+        if dtype == CATEGORY:
+            frame[column] = frame[column].astype(CATEGORY)
+        elif dtype == DATETIME:
+            frame[column] = pd.to_datetime(frame[column], errors='coerce', format='mixed')
+        else:
+            frame[column] = _numeric(frame[column], dtype)
+    return frame
+
+
+def property_columns(conn: sqlite3.Connection, include_media: bool = False) -> List[str]:
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(properties)")]
+    return columns if include_media else [column for column in columns if column not in MEDIA_COLUMNS]
+
+
+def read_properties(conn: sqlite3.Connection, include_media: bool = False, where_sql: str = "",
+                    params: Sequence[Any] = (), columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Properties rows (``where_sql`` includes its own WHERE) with ``PROPERTY_DTYPES`` applied."""
+    columns = list(columns) if columns else property_columns(conn, include_media)
+    select = ", ".join(f'"{column}"' for column in columns)
+    return apply_dtypes(pd.read_sql(f"SELECT {select} FROM properties{where_sql}", conn, params=tuple(params)))
+
+
+def _plain_values(values: pd.Series) -> List[Any]:
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = values.cat.categories.astype(object).tolist()
+        return [categories[code] if code >= 0 else None for code in values.cat.codes.tolist()]
+    if pd.api.types.is_extension_array_dtype(dtype) and pd.api.types.is_integer_dtype(dtype):
+        return values.to_numpy(dtype=object, na_value=np.nan).tolist()
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return [None if value is pd.NaT else value.strftime(DATE_FORMAT) for value in values.tolist()]
+    return values.tolist()
+
+
+def to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """``frame.to_dict(orient='records')`` with plain Python values instead of pandas scalars.
+
+    Built column by column: the recommendation paths call this for a handful of
+    rows per request, where per-column pandas conversions dominate.
+    """
+    columns = list(frame.columns)
+    values = [_plain_values(frame.iloc[:, position]) for position in range(len(columns))]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def memory_per_row(frame: pd.DataFrame) -> float:
+    """Bytes per row, counting the Python objects behind ``object`` columns."""
+    return float(frame.memory_usage(deep=True).sum()) / max(len(frame), 1)
@@ -1,21 +1,34 @@
 import pandas as pd
-import re
 import sqlite3
 import logging
+import threading
 from datetime import datetime
 import os
 from fpdf import FPDF
 from io import BytesIO
-import requests
 
-from config import DB_FILE_PATH, MEDIA_DIR
+import amenity_index
+import client_requirements
+import data_cache
+import db
+import lead_scoring
+import market_stats
+import price_scores
+import property_search
+import recommendation_index
+import report_images
+import snapshot
+import text_search
+import typed_frames
+from config import DB_FILE_PATH, MEDIA_DIR, SNAPSHOT_DIR
 
 logger = logging.getLogger(__name__)
 
 os.makedirs(MEDIA_DIR, exist_ok=True)
 
-def initialize_database():
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+def initialize_database(db_path=None):
+    """Creates missing tables and indexes, then runs the side-table migrations and backfills. Idempotent."""
+    with db.connection(db_path or DB_FILE_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(
             "CREATE TABLE IF NOT EXISTS clients "
@@ -62,10 +75,43 @@ def initialize_database():
             cursor.execute("ALTER TABLE tasks ADD COLUMN task_type TEXT")
         if 'details' not in task_cols:
             cursor.execute("ALTER TABLE tasks ADD COLUMN details TEXT")
+        # Point lookups and the assistant's counts and pending-task read; the
+        # tables are often created by pandas without primary keys.
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_clients_client_id ON clients (client_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_properties_property_id ON properties (property_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_clients_status ON clients (status)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_due_date ON tasks (status, due_date)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_client_status ON tasks (client_id, status, due_date)")
+        client_requirements.backfill(conn)
+        lead_scoring.refresh(conn)
+        property_search.backfill(conn)
+        text_search.ensure_schema(conn)
+        market_stats.refresh(conn)
+        price_scores.ensure_schema(conn)
         conn.commit()
-initialize_database()
+
+_startup_lock = threading.Lock()
+_started = set()
+def startup(db_path=None, refresh_prices=True):
+    """Startup hook for the API lifespan and the Streamlit pages; importing this module touches no database.
+
+    Initializes ``db_path`` once per process. With ``refresh_prices``, also starts
+    the background price-score refresh when listings are unscored or stale.
+    """
+    db_path = str(db_path or DB_FILE_PATH)
+    with _startup_lock:
+        if (db_path, refresh_prices) in _started: return
+        if not any(path == db_path for path, _ in _started): initialize_database(db_path)
+        _started.add((db_path, refresh_prices))
+    if refresh_prices:
+        with db.connection(db_path) as conn: stale = price_scores.needs_refresh(conn)
+        if stale: price_scores.refresh_in_background(db_path)
 
 # --- HELPER FUNCTIONS (Unchanged) ---
+def describe_price_gap(gap_pct):
+    """'Underpriced (-12% vs. estimate)'-style label for a stored price_gap_pct; None when the listing is unscored."""
+    flag = price_scores.price_flag(gap_pct)
+    return None if flag is None else f"{flag} ({gap_pct:+.0f}% vs. estimate)"
 def format_indian_currency(amount):
     """Formats the amount in Indian currency style."""
     if amount is None or not isinstance(amount, (int, float)):
@@ -97,7 +143,7 @@ def format_indian_currency(amount):
 def add_task(client_id, task_type, task_description, due_date, property_id=None, details=None):
     """Adds a new task/event and updates client status if applicable."""
     try:
-        with sqlite3.connect(DB_FILE_PATH) as conn:
+        with db.connection(DB_FILE_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO tasks (client_id, property_id, task_type, task_description, "
@@ -107,13 +153,15 @@ def add_task(client_id, task_type, task_description, due_date, property_id=None,
             if task_type in ["Site Visit", "Negotiation"]:
                 new_status = "Site Visit Planned" if task_type == "Site Visit" else "Negotiating"
                 cursor.execute("UPDATE clients SET status = ? WHERE client_id = ?", (new_status, client_id))
+                lead_scoring.rescore(conn, [client_id])
             conn.commit()
+        data_cache.bump_version(DB_FILE_PATH)
     except sqlite3.Error as e:
         logger.exception("Failed to add task for client_id=%s", client_id)
 
 def get_latest_client_event(client_id):
     """Gets the most recent high-priority event to determine the client's real-time status."""
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+    with db.connection(DB_FILE_PATH) as conn:
         # Prioritize "Negotiation" then "Site Visit"
         query = """
             SELECT * FROM tasks
@@ -126,45 +174,105 @@ def get_latest_client_event(client_id):
 
 # (All other functions from get_all_clients_df to PDF generation are unchanged and correct)
 def find_budget(text):
-    match = re.search(r'Budget[^\d]*([\d,]+)L?', str(text), re.IGNORECASE)
-    if match: return int(match.group(1).replace(',', '')) * 100000
-    match_rent = re.search(r'Rent[^\d]*([\d,]+)', str(text), re.IGNORECASE)
-    if match_rent: return int(match_rent.group(1).replace(',', ''))
-    return 0
+    return client_requirements.parse(text).budget
+def parse_requirements_bulk(requirements):
+    """Vectorized find_budget + location/BHK extraction over a requirements Series."""
+    return client_requirements.parse_many(requirements)
+def get_client_requirements(client_id, requirements):
+    """Returns the stored ParsedRequirements for a client."""
+    with db.connection(DB_FILE_PATH) as conn: return client_requirements.for_client(conn, client_id, requirements)
+def _load_table(query, db_path):
+    with db.connection(db_path) as conn: return pd.read_sql(query, conn)
+def _clients_snapshot(db_path):
+    return data_cache.get_frame(db_path, "clients", lambda: _load_table("SELECT * FROM clients", db_path))
+def _load_properties(db_path, include_media):
+    with db.connection(db_path) as conn: return typed_frames.read_properties(conn, include_media)
+def _properties_snapshot(db_path, include_media=False):
+    """Typed properties frame (see typed_frames.py); image/video paths only with include_media."""
+    name = "properties_with_media" if include_media else "properties"
+    return data_cache.get_frame(db_path, name, lambda: _load_properties(db_path, include_media))
 def get_all_clients_df():
-    with sqlite3.connect(DB_FILE_PATH) as conn: return pd.read_sql("SELECT * FROM clients", conn)
+    return _clients_snapshot(DB_FILE_PATH)
 def add_new_client(name, phone, email, looking_for, requirements):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+    with db.connection(DB_FILE_PATH) as conn:
         cursor = conn.cursor()
         last_id_row = cursor.execute("SELECT client_id FROM clients ORDER BY CAST(SUBSTR(client_id, 4) AS INTEGER) DESC LIMIT 1").fetchone()
         last_id = int(last_id_row[0].split('-')[1]) if last_id_row else 1000
         new_client_id = f"CL-{last_id + 1}"
         cursor.execute("INSERT INTO clients (client_id, name, phone, email, lookingfor, requirements, status) VALUES (?, ?, ?, ?, ?, ?, ?)", (new_client_id, name, phone, email, looking_for, requirements, "New"))
+        client_requirements.store(conn, new_client_id, requirements)
+        lead_scoring.rescore(conn, [new_client_id])
+        market_stats.add_clients(conn, [new_client_id])
         conn.commit()
+    data_cache.bump_version(DB_FILE_PATH)
 def update_client_details(client_id, data):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+    with db.connection(DB_FILE_PATH) as conn:
         cursor = conn.cursor(); set_clause = ", ".join([f"`{key}` = ?" for key in data.keys()]); values = list(data.values()) + [client_id]
-        query = f"UPDATE clients SET {set_clause} WHERE client_id = ?"; cursor.execute(query, tuple(values)); conn.commit()
+        new_id = data.get('client_id', client_id); market_stats.remove_clients(conn, [client_id, new_id])
+        query = f"UPDATE clients SET {set_clause} WHERE client_id = ?"; cursor.execute(query, tuple(values))
+        if new_id != client_id: client_requirements.rename(conn, client_id, new_id)
+        if 'requirements' in data: client_requirements.store(conn, new_id, data['requirements'])
+        lead_scoring.rescore(conn, [client_id, new_id])
+        market_stats.add_clients(conn, [client_id, new_id])
+        conn.commit()
+    data_cache.bump_version(DB_FILE_PATH)
 def delete_client_by_id(client_id):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+    with db.connection(DB_FILE_PATH) as conn:
         cursor = conn.cursor()
+        market_stats.remove_clients(conn, [client_id])
         cursor.execute("DELETE FROM clients WHERE client_id = ?", (client_id,))
         cursor.execute("DELETE FROM communication_log WHERE client_id = ?", (client_id,))
         cursor.execute("DELETE FROM tasks WHERE client_id = ?", (client_id,))
+        client_requirements.delete(conn, client_id)
+        lead_scoring.rescore(conn, [client_id])
         conn.commit()
+    data_cache.bump_version(DB_FILE_PATH)
 def add_communication_note(client_id, note):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with sqlite3.connect(DB_FILE_PATH) as conn:
-        cursor = conn.cursor(); cursor.execute("INSERT INTO communication_log (client_id, timestamp, note) VALUES (?, ?, ?)", (client_id, timestamp, note)); conn.commit()
+    with db.connection(DB_FILE_PATH) as conn:
+        cursor = conn.cursor(); cursor.execute("INSERT INTO communication_log (client_id, timestamp, note) VALUES (?, ?, ?)", (client_id, timestamp, note))
+        lead_scoring.rescore(conn, [client_id]); conn.commit()
+    data_cache.bump_version(DB_FILE_PATH)
 def get_communication_log(client_id):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+    with db.connection(DB_FILE_PATH) as conn:
         return pd.read_sql(
             "SELECT timestamp, note FROM communication_log WHERE client_id = ? ORDER BY timestamp DESC",
             conn,
             params=(client_id,)
         )
-def get_all_properties_df():
-    with sqlite3.connect(DB_FILE_PATH) as conn: return pd.read_sql("SELECT * FROM properties", conn)
+# Maintained by the write helpers, never edited directly.
+DERIVED_PROPERTY_COLUMNS = (amenity_index.MASK_COLUMN, *price_scores.COLUMNS)
+def get_all_properties_df(include_media=False):
+    return _properties_snapshot(DB_FILE_PATH, include_media)
+def extract_amenities(amenities_text):
+    return property_search.parse_amenities(amenities_text)
+def get_amenity_options():
+    return list(amenity_index.AMENITY_REGISTRY)
+def get_property_facets():
+    return property_search.PropertySearch(DB_FILE_PATH).facets()
+def search_properties(limit=property_search.SEARCH_LIMIT, **filters):
+    """Returns (total matches, first `limit` rows) for Property Explorer filters (see property_search.PropertyFilters)."""
+    search = property_search.PropertySearch(DB_FILE_PATH); filters = property_search.PropertyFilters(**filters)
+    with db.connection(DB_FILE_PATH) as conn: columns = [c for c in typed_frames.property_columns(conn) if c != amenity_index.MASK_COLUMN]
+    return search.count(filters), typed_frames.apply_dtypes(search.search(filters, limit, columns))
+def search_everything(term, limit=text_search.SEARCH_LIMIT, kinds=None):
+    """Ranked prefix search over clients, properties and notes (see text_search.search)."""
+    return text_search.search(DB_FILE_PATH, term, limit, kinds)
+def export_snapshot(directory=SNAPSHOT_DIR, fmt='arrow'):
+    """Writes a columnar snapshot of the tables for analytics (see snapshot.py); returns its manifest."""
+    return snapshot.export_snapshot(DB_FILE_PATH, directory, fmt)
+def get_snapshot_info(directory=SNAPSHOT_DIR):
+    return snapshot.read_manifest(directory) if snapshot.available() else None
+def load_snapshot_frames(tables=None, directory=SNAPSHOT_DIR):
+    return snapshot.load_snapshot(directory, tables)
+def get_market_stats(from_snapshot=False, directory=SNAPSHOT_DIR):
+    """Dashboard aggregates (price per sq.ft, BHK demand, listing counts, listing ages); see market_stats.read_all."""
+    if from_snapshot:
+        frames = snapshot.load_snapshot(directory, ['properties', 'clients'])
+        return market_stats.from_frames(frames['properties'], frames['clients'])
+    return market_stats.load(DB_FILE_PATH)
+def get_property_by_id(property_id):
+    return property_search.PropertySearch(DB_FILE_PATH).get(property_id)
 def save_uploaded_file(uploaded_file, property_id, media_type, index):
     if uploaded_file is not None:
         file_extension = os.path.splitext(uploaded_file.name)[1]; filename = f"{property_id}_{media_type}{index}{file_extension}"; file_path = os.path.join(MEDIA_DIR, filename)
@@ -172,7 +280,8 @@ def save_uploaded_file(uploaded_file, property_id, media_type, index):
         return file_path
     return None
 def add_new_property(data, images, video):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+    pending_index = recommendation_index.pending_update(DB_FILE_PATH)
+    with db.connection(DB_FILE_PATH) as conn:
         last_id_row = pd.read_sql("SELECT property_id FROM properties ORDER BY property_id DESC LIMIT 1", conn)
         if not last_id_row.empty:
             prefix, num_str = last_id_row['property_id'].iloc[0].rsplit('-', 1); new_id_num = int(num_str) + 1; new_property_id = f"{prefix}-{new_id_num}"
@@ -183,23 +292,45 @@ def add_new_property(data, images, video):
         data['video'] = save_uploaded_file(video, new_property_id, "vid", 1)
         df = pd.DataFrame([data]); df['property_id'] = new_property_id
         df.to_sql('properties', conn, if_exists='append', index=False)
+        property_search.store(conn, new_property_id, data.get('amenities'))
+        market_stats.add_properties(conn, [new_property_id])
+        price_scores.rescore(conn, [new_property_id])
+        recommendation_index.before_commit(DB_FILE_PATH)
+    data_cache.bump_version(DB_FILE_PATH)
+    recommendation_index.apply_property_changes(DB_FILE_PATH, [new_property_id], pending_index)
     return new_property_id
 def update_property_details(property_id, data):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+    pending_index = recommendation_index.pending_update(DB_FILE_PATH)
+    with db.connection(DB_FILE_PATH) as conn:
         cursor = conn.cursor(); set_clause = ", ".join([f"`{key}` = ?" for key in data.keys()]); values = list(data.values()) + [property_id]
-        query = f"UPDATE properties SET {set_clause} WHERE property_id = ?"; cursor.execute(query, tuple(values)); conn.commit()
+        new_id = data.get('property_id', property_id); market_stats.remove_properties(conn, [property_id, new_id])
+        query = f"UPDATE properties SET {set_clause} WHERE property_id = ?"; cursor.execute(query, tuple(values))
+        if new_id != property_id: property_search.rename(conn, property_id, new_id)
+        if 'amenities' in data: property_search.store(conn, new_id, data['amenities'])
+        market_stats.add_properties(conn, [property_id, new_id])
+        if new_id != property_id: price_scores.delete(conn, [property_id])
+        price_scores.rescore(conn, [new_id])
+        recommendation_index.before_commit(DB_FILE_PATH); conn.commit()
+    data_cache.bump_version(DB_FILE_PATH)
+    recommendation_index.apply_property_changes(DB_FILE_PATH, [property_id, data.get('property_id')], pending_index)
 def delete_property_by_id(property_id):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
-        cursor = conn.cursor(); cursor.execute("DELETE FROM properties WHERE property_id = ?", (property_id,)); conn.commit()
+    pending_index = recommendation_index.pending_update(DB_FILE_PATH)
+    with db.connection(DB_FILE_PATH) as conn:
+        market_stats.remove_properties(conn, [property_id])
+        cursor = conn.cursor(); cursor.execute("DELETE FROM properties WHERE property_id = ?", (property_id,))
+        property_search.delete(conn, property_id); price_scores.delete(conn, [property_id])
+        recommendation_index.before_commit(DB_FILE_PATH); conn.commit()
+    data_cache.bump_version(DB_FILE_PATH)
+    recommendation_index.apply_property_changes(DB_FILE_PATH, [property_id], pending_index)
 def calculate_lead_score(client_row, log_counts):
-    score = 0; budget = find_budget(client_row['requirements'])
+    score = 0; requirements = client_requirements.from_row(client_row); budget = requirements.budget
     if client_row['lookingfor'] == 'Sale':
         if budget > 10000000: score += 30
         elif budget > 5000000: score += 15
     else:
         if budget > 50000: score += 30
         elif budget > 25000: score += 15
-    if 'anywhere' in str(client_row['requirements']).lower(): score -= 10
+    if requirements.flexible_location: score -= 10
     log_count = log_counts.get(client_row['client_id'], 0); score += log_count * 10
     if client_row['status'] == 'Negotiating': score += 40
     elif client_row['status'] == 'Site Visit Planned': score += 25
@@ -207,73 +338,79 @@ def calculate_lead_score(client_row, log_counts):
     elif score >= 40: rating = "🟢 Warm"
     else: rating = "🔵 Cold"
     return score, rating
-def get_clients_with_scores():
-    clients_df = get_all_clients_df()
-    with sqlite3.connect(DB_FILE_PATH) as conn:
-        log_counts_df = pd.read_sql("SELECT client_id, COUNT(*) as count FROM communication_log GROUP BY client_id", conn)
-    log_counts = log_counts_df.set_index('client_id')['count'].to_dict()
-    scores_and_ratings = clients_df.apply(lambda row: calculate_lead_score(row, log_counts), axis=1)
-    clients_df[['score', 'rating']] = pd.DataFrame(scores_and_ratings.tolist(), index=clients_df.index)
-    return clients_df.sort_values(by='score', ascending=False)
-def get_recommendations(client_id):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+def get_clients_with_scores(limit=None, offset=0):
+    """Clients with score/rating, highest first, read from the maintained client_scores table."""
+    with db.connection(DB_FILE_PATH) as conn:
+        lead_scoring.prepare(DB_FILE_PATH, conn)
+        return lead_scoring.read_scores(conn, limit, offset)
+def get_recommendations(client_id, sort='match'):
+    """Recommendations for one client; sort='value' puts the most underpriced listings of each tier first."""
+    with db.connection(DB_FILE_PATH) as conn:
         client_df = pd.read_sql("SELECT * FROM clients WHERE client_id = ?", conn, params=(client_id,))
-    properties_df = get_all_properties_df()
-    if client_df.empty: return {"message": "Client not found.", "recommendations": []}
-    client_data = client_df.iloc[0]
-    req_budget = find_budget(client_data['requirements'])
-    req_location_match = re.search(r'\bin\s+([\w\s]+)', str(client_data['requirements']), re.IGNORECASE)
-    req_location = req_location_match.group(1).strip() if req_location_match else 'Any'
-    req_bhk_match = re.search(r'(\d+)\s*BHK', str(client_data['requirements']))
-    req_bhk = int(req_bhk_match.group(1)) if req_bhk_match else 0
-    properties_df['bhk_numeric'] = pd.to_numeric(properties_df['bedroomsbhk'].astype(str).str.extract(r'(\d+)').iloc[:, 0], errors='coerce').fillna(0)
-    price_col = 'askingprice' if client_data['lookingfor'].lower() == 'sale' else 'monthlyrent'
-    properties_df['price_numeric'] = pd.to_numeric(properties_df[price_col], errors='coerce')
-    base_filter = ( (properties_df['listingtype'].str.lower() == client_data['lookingfor'].lower()) & (properties_df['bhk_numeric'] >= req_bhk) )
-    budget_ceiling = req_budget * 1.15
-    tier1_filter = base_filter & (properties_df['price_numeric'] <= budget_ceiling)
-    if req_location != 'Any': tier1_filter = tier1_filter & (properties_df['arealocality'].str.contains(req_location, case=False, na=False))
-    perfect_matches = properties_df[tier1_filter]
-    tier2_filter = base_filter & (properties_df['price_numeric'] <= budget_ceiling)
-    good_matches = properties_df[tier2_filter]
-    core_matches = properties_df[base_filter]
-    final_recs = pd.concat([perfect_matches, good_matches, core_matches]).drop_duplicates(subset=['property_id']).head(10)
-    if not final_recs.empty:
-        if not perfect_matches.empty: message = f"Found {len(final_recs)} great matches!"
-        elif not good_matches.empty: message = "No exact location matches, showing similar properties."
-        else: message = "No matches in budget, showing similar properties."
-    else: message = "No suitable properties found."
-    response_data = { "message": message, "client_details": client_data.to_dict(), "recommendations": final_recs.to_dict(orient='records') }
-    return response_data
+        if client_df.empty: return {"message": "Client not found.", "recommendations": []}
+        client_data = client_df.iloc[0]
+        requirements = client_requirements.for_client(conn, client_id, client_data['requirements'])
+    index = recommendation_index.get_index(DB_FILE_PATH, get_all_properties_df)
+    return index.recommend(client_data, requirements.budget, requirements.bhk, requirements.location, sort=sort)
+def get_recommendations_bulk(client_ids=None, chunk_size=1000, db_path=None):
+    """Yields get_recommendations-style results for many clients (all when client_ids is None), in input order."""
+    db_path = db_path or DB_FILE_PATH
+    clients_df = _clients_snapshot(db_path)
+    if client_ids is None: client_ids = clients_df['client_id'].tolist()
+    client_ids = list(client_ids)
+    clients_by_id = clients_df.drop_duplicates(subset=['client_id']).set_index('client_id', drop=False)
+    index = recommendation_index.get_index(db_path, lambda: _properties_snapshot(db_path))
+    for start in range(0, len(client_ids), chunk_size):
+        chunk_ids = client_ids[start:start + chunk_size]
+        known_ids = [client_id for client_id in chunk_ids if client_id in clients_by_id.index]
+        chunk = clients_by_id.loc[known_ids].reset_index(drop=True)
+        results = iter(index.recommend_many(chunk, client_requirements.lookup(db_path, chunk))) if known_ids else iter(())
+        for client_id in chunk_ids:
+            if client_id in clients_by_id.index: yield {"client_id": client_id, **next(results)}
+            else: yield {"client_id": client_id, "message": "Client not found.", "recommendations": []}
 def get_all_tasks():
-    with sqlite3.connect(DB_FILE_PATH) as conn:
-        query = "SELECT t.task_id, t.task_description, t.due_date, t.status, c.name as client_name, t.client_id, p.arealocality as property_locality, p.propertytype, t.property_id FROM tasks t LEFT JOIN clients c ON t.client_id = c.client_id LEFT JOIN properties p ON t.property_id = p.property_id ORDER BY t.due_date ASC"
-        return pd.read_sql(query, conn)
+    query = "SELECT t.task_id, t.task_description, t.due_date, t.status, c.name as client_name, t.client_id, p.arealocality as property_locality, p.propertytype, t.property_id FROM tasks t LEFT JOIN clients c ON t.client_id = c.client_id LEFT JOIN properties p ON t.property_id = p.property_id ORDER BY t.due_date ASC"
+    return data_cache.get_frame(DB_FILE_PATH, "tasks", lambda: _load_table(query, DB_FILE_PATH))
 def update_task_status(task_id, status):
-    with sqlite3.connect(DB_FILE_PATH) as conn:
+    with db.connection(DB_FILE_PATH) as conn:
         cursor = conn.cursor(); cursor.execute("UPDATE tasks SET status = ? WHERE task_id = ?", (status, task_id)); conn.commit()
+    data_cache.bump_version(DB_FILE_PATH)
 # (PDF Generation code is unchanged)
 class PDF(FPDF):
     def header(self): self.set_font('Arial', 'B', 15); self.cell(0, 10, 'Intelligent Real Estate Assistant', 0, 1, 'C'); self.ln(5)
     def footer(self): self.set_y(-15); self.set_font('Arial', 'I', 8); self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-def generate_property_report(client_details, recommendations):
+def _report_image_sources(recommendations, db_path=None):
+    """Uploaded image_1 file where one exists on disk, else the stock photo for the property type."""
+    property_ids = list(dict.fromkeys(prop.get('property_id') for prop in recommendations if prop.get('property_id') and 'image_1' not in prop))
+    uploaded = {}
+    if property_ids:
+        with db.connection(db_path or DB_FILE_PATH) as conn:
+            uploaded = dict(conn.execute(f"SELECT property_id, image_1 FROM properties WHERE property_id IN ({', '.join('?' * len(property_ids))})", property_ids).fetchall())
+    sources = []
+    for prop in recommendations:
+        image_path = prop.get('image_1') if 'image_1' in prop else uploaded.get(prop.get('property_id'))
+        sources.append(image_path if report_images.is_local_file(image_path) else get_property_images(prop.get('propertytype'))[0])
+    return sources
+def generate_property_report(client_details, recommendations, fetcher=None):
+    images = (fetcher or report_images).fetch_many(_report_image_sources(recommendations))
+    return render_property_report(client_details, recommendations, images)
+def render_property_report(client_details, recommendations, images):
+    """PDF bytes for one client; images[i] holds the image bytes (or None) for recommendations[i]."""
     pdf = PDF(); pdf.add_page()
     def sanitize_text(text): return str(text).encode('latin-1', 'replace').decode('latin-1')
     pdf.set_font('Arial', 'B', 12); pdf.cell(0, 10, sanitize_text(f"Recommendations for: {client_details.get('name')}"), 0, 1)
     pdf.set_font('Arial', '', 10); pdf.multi_cell(0, 5, sanitize_text(f"Requirements: {client_details.get('requirements')}")); pdf.ln(10)
     image_width, text_col_width = 80, 95
-    for prop in recommendations:
+    for prop, image in zip(recommendations, images):
         pdf.set_font('Arial', 'B', 11); prop_title = f"{prop.get('bedroomsbhk', '')} {prop.get('propertytype', '')} in {prop.get('arealocality', '')}"; pdf.cell(0, 10, sanitize_text(prop_title), 0, 1, 'L')
         y_before_block = pdf.get_y()
-        try:
-            image_url = get_property_images(prop.get('propertytype'))[0]
-            response = requests.get(image_url, timeout=5)
-            response.raise_for_status()
-            img = BytesIO(response.content)
-            pdf.image(img, x=pdf.get_x(), y=y_before_block, w=image_width)
-        except Exception:
-            logger.warning("Image fetch failed for report. Falling back to placeholder box.", exc_info=True)
-            pdf.rect(x=pdf.get_x(), y=y_before_block, w=image_width, h=53)
+        if image is not None:
+            try:
+                pdf.image(BytesIO(image), x=pdf.get_x(), y=y_before_block, w=image_width)
+            except Exception:
+                logger.warning("Unreadable report image. Falling back to placeholder box.", exc_info=True)
+                image = None
+        if image is None: pdf.rect(x=pdf.get_x(), y=y_before_block, w=image_width, h=53)
         pdf.set_xy(pdf.get_x() + image_width + 5, y_before_block); pdf.set_font('Arial', '', 9); price_text = ""
         if client_details.get('lookingfor') == 'Sale' and prop.get('askingprice'): price_text = f"Asking Price: Rs. {format_indian_currency(prop.get('askingprice'))}"
         elif client_details.get('lookingfor') == 'Rent' and prop.get('monthlyrent'): price_text = f"Monthly Rent: Rs. {format_indian_currency(prop.get('monthlyrent'))} / month"